@@ -84,7 +84,7 @@ def demo_feedback():
 
     # 書き起こしを処理
     print("\n▶ 書き起こしファイルを処理中...")
-    feedbacks = engine.process_all_pending()
+    feedbacks = engine.process_all_pending(record_history=False)  # デモでは履歴に追加しない
     print(f"  - 処理件数: {len(feedbacks)}件")
 
     # 個別フィードバック表示
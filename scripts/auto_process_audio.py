@@ -6,20 +6,37 @@ data/audio/pending/ に音声ファイルを置くだけで、自動的に処理
 - 新しい音声ファイルを自動登録
 - 書き起こしファイルを自動検出・紐付け
 - フィードバック生成も自動実行
+
+--watch を指定すると常駐して監視し、ファイルが置かれてから数秒で登録・紐付け・フィードバック生成を行います。
+
+フィードバック生成と Slack通知は永続ジョブキュー（data/audio/job_queue.db）経由で実行し、
+APIや Slack の一時的な障害はバックオフして再試行します（次回の実行に持ち越す場合もあります）。
 """
 
 import sys
 from pathlib import Path
+from typing import Optional
 import re
 
 # プロジェクトルートをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.feedback.audio_manager import AudioManager, AudioStatus
+from src.feedback.audio_manager import AudioFile, AudioManager, AudioStatus
 from src.feedback.audio_feedback_engine import AudioFeedbackEngine
+from src.feedback.audio_pipeline import AudioPipeline
+from src.feedback.audio_watcher import (
+    DEFAULT_DEBOUNCE_SECONDS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_POLL_INTERVAL,
+    AudioWatcher,
+    WatchTarget,
+)
 from src.feedback.audio_filename_parser import AudioFilenameParser
 from src.common.slack_notifier import SlackNotifier
 
+# 書き起こしファイルの置き場所
+TRANSCRIPTS_PENDING_DIR = Path("data/audio/transcripts/pending")
+
 
 def extract_info_from_filename(filename: str) -> tuple[str, str, str] | None:
     """ファイル名から日付、CA ID、会議IDを抽出
@@ -52,68 +69,79 @@ def auto_import_audio_files(audio_manager: AudioManager) -> int:
     
     # pendingフォルダ内のファイルをチェック
     for file_path in pending_dir.iterdir():
-        if not file_path.is_file():
-            continue
-        
-        # 対応形式かチェック
-        if file_path.suffix.lower() not in AudioManager.SUPPORTED_FORMATS:
-            continue
-        
-        # ファイル名から情報を抽出（既存の形式）
-        info = extract_info_from_filename(file_path.name)
-        
-        # 既存形式でない場合、自動リネームを試みる
-        if not info:
-            print(f"📝 ファイル名を自動変換中: {file_path.name}")
-            
-            try:
-                # 自動リネームして情報を抽出
-                new_path, date, ca_id, meeting_id = AudioFilenameParser.smart_rename(
-                    source_path=file_path,
-                    target_dir=pending_dir,  # 同じフォルダ内でリネーム
-                )
-                
-                # ファイル名を変更
-                if new_path != file_path:
-                    if new_path.exists():
-                        print(f"⚠️  既に同名ファイルが存在します: {new_path.name}")
-                        continue
-                    
-                    file_path.rename(new_path)
-                    print(f"   → リネーム完了: {new_path.name}")
-                    file_path = new_path
-                
-                info = (date, ca_id, meeting_id)
-            except Exception as e:
-                print(f"⚠️  ファイル名の自動変換に失敗しました（スキップ）: {file_path.name} - {e}")
-                continue
-        
-        if not info:
-            print(f"⚠️  ファイル名の形式が正しくありません（スキップ）: {file_path.name}")
-            continue
-        
-        date, ca_id, meeting_id = info
-        
-        # 既に登録済みかチェック
-        existing = audio_manager.find_audio_file(date, ca_id, meeting_id)
-        if existing:
-            continue
+        if import_audio_file(audio_manager, file_path):
+            registered_count += 1
+    
+    return registered_count
+
+
+def import_audio_file(audio_manager: AudioManager, file_path: Path) -> Optional[AudioFile]:
+    """pendingフォルダ内の音声ファイル1件を登録（登録済み・対象外の場合は何もしない）
+    
+    Returns:
+        登録した音声ファイル、登録しなかった場合はNone
+    """
+    if not file_path.is_file():
+        return None
+    
+    # 対応形式かチェック
+    if file_path.suffix.lower() not in AudioManager.SUPPORTED_FORMATS:
+        return None
+    
+    # ファイル名から情報を抽出（既存の形式）
+    info = extract_info_from_filename(file_path.name)
+    
+    # 既存形式でない場合、自動リネームを試みる
+    if not info:
+        print(f"📝 ファイル名を自動変換中: {file_path.name}")
         
         try:
-            # ファイルを登録
-            audio_file = audio_manager.add_audio_file(
+            # 自動リネームして情報を抽出
+            new_path, date, ca_id, meeting_id = AudioFilenameParser.smart_rename(
                 source_path=file_path,
-                ca_id=ca_id,
-                date=date,
-                meeting_id=meeting_id,
-                force=False,
+                target_dir=file_path.parent,  # 同じフォルダ内でリネーム
             )
-            print(f"✅ 音声ファイルを登録: {file_path.name} (CA: {ca_id}, 日付: {date})")
-            registered_count += 1
+            
+            # ファイル名を変更
+            if new_path != file_path:
+                if new_path.exists():
+                    print(f"⚠️  既に同名ファイルが存在します: {new_path.name}")
+                    return None
+                
+                file_path.rename(new_path)
+                print(f"   → リネーム完了: {new_path.name}")
+                file_path = new_path
+            
+            info = (date, ca_id, meeting_id)
         except Exception as e:
-            print(f"❌ 登録失敗: {file_path.name} - {e}")
+            print(f"⚠️  ファイル名の自動変換に失敗しました（スキップ）: {file_path.name} - {e}")
+            return None
     
-    return registered_count
+    if not info:
+        print(f"⚠️  ファイル名の形式が正しくありません（スキップ）: {file_path.name}")
+        return None
+    
+    date, ca_id, meeting_id = info
+    
+    # 既に登録済みかチェック
+    existing = audio_manager.find_audio_file(date, ca_id, meeting_id)
+    if existing:
+        return None
+    
+    try:
+        # ファイルを登録
+        audio_file = audio_manager.add_audio_file(
+            source_path=file_path,
+            ca_id=ca_id,
+            date=date,
+            meeting_id=meeting_id,
+            force=False,
+        )
+        print(f"✅ 音声ファイルを登録: {file_path.name} (CA: {ca_id}, 日付: {date})")
+        return audio_file
+    except Exception as e:
+        print(f"❌ 登録失敗: {file_path.name} - {e}")
+        return None
 
 
 def auto_link_transcripts(audio_manager: AudioManager) -> int:
@@ -122,7 +150,7 @@ def auto_link_transcripts(audio_manager: AudioManager) -> int:
     Returns:
         紐付けしたファイル数
     """
-    transcripts_pending_dir = Path("data/audio/transcripts/pending")
+    transcripts_pending_dir = TRANSCRIPTS_PENDING_DIR
     if not transcripts_pending_dir.exists():
         transcripts_pending_dir.mkdir(parents=True, exist_ok=True)
         return 0
@@ -131,38 +159,122 @@ def auto_link_transcripts(audio_manager: AudioManager) -> int:
     
     # 書き起こしファイルをチェック
     for transcript_path in transcripts_pending_dir.glob("*.txt"):
-        # ファイル名から情報を抽出
-        info = extract_info_from_filename(transcript_path.stem + ".txt")
-        if not info:
-            continue
-        
-        date, ca_id, meeting_id = info
-        
-        # 対応する音声ファイルを検索
-        audio_file = audio_manager.find_audio_file(date, ca_id, meeting_id)
-        if not audio_file:
-            continue
-        
-        # 既に紐付け済みかチェック
-        if audio_file.status == AudioStatus.TRANSCRIPT_READY:
-            continue
-        
-        try:
-            # 書き起こしファイルを紐付け
-            audio_manager.link_transcript(audio_file, transcript_path)
-            print(f"✅ 書き起こしを紐付け: {transcript_path.name}")
+        if link_transcript_file(audio_manager, transcript_path):
             linked_count += 1
-            
-            # 紐付け後、書き起こしファイルを移動（オプション）
-            # processed_dir = Path("data/audio/transcripts/processed")
-            # processed_dir.mkdir(parents=True, exist_ok=True)
-            # transcript_path.rename(processed_dir / transcript_path.name)
-        except Exception as e:
-            print(f"❌ 紐付け失敗: {transcript_path.name} - {e}")
     
     return linked_count
 
 
+def link_transcript_file(audio_manager: AudioManager, transcript_path: Path) -> Optional[AudioFile]:
+    """書き起こしファイル1件を対応する音声ファイルに紐付け
+    
+    Returns:
+        紐付けた音声ファイル、紐付けなかった場合はNone
+    """
+    # ファイル名から情報を抽出
+    info = extract_info_from_filename(transcript_path.stem + ".txt")
+    if not info:
+        return None
+    
+    date, ca_id, meeting_id = info
+    
+    # 対応する音声ファイルを検索
+    audio_file = audio_manager.find_audio_file(date, ca_id, meeting_id)
+    if not audio_file:
+        return None
+    
+    # 既に紐付け済み・処理済みかチェック
+    if audio_file.status in (AudioStatus.TRANSCRIPT_READY, AudioStatus.PROCESSED):
+        return None
+    
+    try:
+        # 書き起こしファイルを紐付け
+        audio_manager.link_transcript(audio_file, transcript_path)
+        print(f"✅ 書き起こしを紐付け: {transcript_path.name}")
+        return audio_file
+    except Exception as e:
+        print(f"❌ 紐付け失敗: {transcript_path.name} - {e}")
+        return None
+
+
+def build_pipeline(args) -> AudioPipeline:
+    """フィードバック生成・Slack通知のパイプラインを作成"""
+    engine = AudioFeedbackEngine(use_ai=args.use_ai)
+    slack_channel = args.slack_channel or "#dk_ca_ops"
+    notifier = None
+    if not args.no_slack:
+        notifier = SlackNotifier(default_channel=slack_channel)
+        if not notifier.is_configured:
+            print("⚠️  Slack通知が設定されていないため通知をスキップします（SLACK_BOT_TOKEN または SLACK_WEBHOOK_URL を設定してください）")
+            notifier = None
+    pipeline = AudioPipeline(
+        engine,
+        notifier=notifier,
+        slack_channel=slack_channel,
+        feedback_concurrency=args.feedback_workers,
+        slack_concurrency=args.slack_workers,
+        max_attempts=args.max_attempts,
+    )
+    if args.retry_dead:
+        requeued = pipeline.queue.requeue_dead()
+        print(f"🔁 デッドレターのジョブを再投入: {requeued}件")
+    return pipeline
+
+
+def print_queue_status(pipeline: AudioPipeline) -> None:
+    """再試行待ち・デッドレターのジョブ数を表示"""
+    for line in pipeline.queue_status_lines():
+        print(f"   {line}")
+
+
+def watch(args) -> None:
+    """音声・書き起こしフォルダを監視し、ファイルが置かれたら登録・紐付け・フィードバック生成を行う"""
+    pipeline = None if args.no_feedback else build_pipeline(args)
+    audio_manager = pipeline.audio_manager if pipeline else AudioManager()
+
+    def on_linked(audio_file: Optional[AudioFile]) -> None:
+        if audio_file and pipeline:
+            pipeline.enqueue(audio_file)
+
+    def on_audio(path: Path) -> None:
+        audio_file = import_audio_file(audio_manager, path)
+        if audio_file:
+            # 書き起こしが先に置かれていた場合はここで紐付ける
+            transcript_path = TRANSCRIPTS_PENDING_DIR / f"{audio_file.date}_{audio_file.ca_id}_{audio_file.meeting_id}.txt"
+            if transcript_path.exists():
+                on_linked(link_transcript_file(audio_manager, transcript_path))
+
+    def on_transcript(path: Path) -> None:
+        on_linked(link_transcript_file(audio_manager, path))
+
+    watcher = AudioWatcher(
+        targets=[
+            WatchTarget(audio_manager.pending_dir, on_audio, AudioManager.SUPPORTED_FORMATS),
+            WatchTarget(TRANSCRIPTS_PENDING_DIR, on_transcript, {".txt"}),
+        ],
+        debounce=args.debounce,
+        poll_interval=args.poll_interval,
+        max_workers=args.workers,
+    )
+
+    mode = "watchdog（イベント通知）" if watcher.use_watchdog else f"ポーリング（{args.poll_interval}秒間隔）"
+    print(f"👀 監視を開始: {audio_manager.pending_dir}, {TRANSCRIPTS_PENDING_DIR}")
+    print(f"   検出方式: {mode} / 書き込み完了の判定: {args.debounce}秒 / 同時処理数: {args.workers}")
+    print("   Ctrl+C で終了します")
+    print()
+    if pipeline:
+        # 前回までに紐付け済みで未処理のファイル・再試行待ちのジョブも処理する
+        pipeline.enqueue_ready()
+        pipeline.start()
+    try:
+        watcher.run_forever()
+    finally:
+        if pipeline:
+            pipeline.stop()
+    print()
+    print(f"監視を終了しました（処理: {watcher.processed_count}件、失敗: {watcher.error_count}件）")
+
+
 def main():
     """メイン処理"""
     import argparse
@@ -189,6 +301,52 @@ def main():
         default=None,
         help="Slack通知先チャンネル",
     )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="常駐してフォルダを監視し、ファイルが置かれたら自動処理",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE_SECONDS,
+        help=f"書き込み完了とみなすまでの待ち時間（秒、デフォルト: {DEFAULT_DEBOUNCE_SECONDS}）",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"watchdog がない場合の走査間隔（秒、デフォルト: {DEFAULT_POLL_INTERVAL}）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"登録・紐付けの同時処理数（デフォルト: {DEFAULT_MAX_WORKERS}）",
+    )
+    parser.add_argument(
+        "--feedback-workers",
+        type=int,
+        default=1,
+        help="フィードバック生成の同時実行数（デフォルト: 1）",
+    )
+    parser.add_argument(
+        "--slack-workers",
+        type=int,
+        default=2,
+        help="Slack通知の同時実行数（デフォルト: 2）",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="1件あたりの最大試行回数。超えるとデッドレターになり、音声ファイルは failed/ に移動（デフォルト: 5）",
+    )
+    parser.add_argument(
+        "--retry-dead",
+        action="store_true",
+        help="デッドレターのジョブを再投入してから処理",
+    )
     
     args = parser.parse_args()
     
@@ -197,6 +355,10 @@ def main():
     print("=" * 70)
     print()
     
+    if args.watch:
+        watch(args)
+        return
+    
     audio_manager = AudioManager()
     
     # ステップ1: 新しい音声ファイルを自動登録
@@ -219,30 +381,22 @@ def main():
     
     # ステップ3: フィードバック生成
     if not args.no_feedback:
-        print("▶ ステップ3: フィードバック生成中...")
-        engine = AudioFeedbackEngine(use_ai=args.use_ai)
+        print("▶ ステップ3: フィードバック生成・Slack通知中...")
+        pipeline = build_pipeline(args)
         
-        ready_count = engine.get_ready_count()
+        ready_count = pipeline.enqueue_ready()
         if ready_count > 0:
             print(f"   処理準備済み: {ready_count}件")
-            
-            feedbacks = engine.process_audio_with_transcript()
+        
+        # 今回投入したジョブに加え、前回までの再試行待ちで実行時刻を過ぎたジョブも処理する
+        feedbacks = pipeline.run_until_idle()
+        runner = pipeline.runner
+        if runner.completed_count or runner.retried_count or runner.dead_count:
             print(f"   フィードバック生成完了: {len(feedbacks)}件")
-            
-            # Slack通知
-            if feedbacks and not args.no_slack:
-                print()
-                print("▶ Slack通知を送信中...")
-                slack_channel = args.slack_channel or "#dk_ca_ops"
-                notifier = SlackNotifier(default_channel=slack_channel)
-                
-                for fb in feedbacks:
-                    slack_message = fb.to_slack_message()
-                    notifier.send_message(slack_message, channel=slack_channel)
-                
-                print(f"   Slack通知完了: {len(feedbacks)}件")
+            print(f"   ジョブ: 完了 {runner.completed_count}件 / 再試行 {runner.retried_count}件 / デッドレター {runner.dead_count}件")
         else:
             print("   処理対象のファイルはありません")
+        print_queue_status(pipeline)
     else:
         print("▶ ステップ3: フィードバック生成をスキップ")
     
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+フィードバック再採点（バックフィル）スクリプト
+
+評価キーワード（PSS_PATTERNS/ADS_PATTERNS）や採点基準を変更した際に、
+処理済みの書き起こしをルールベースで再採点し、フィードバック履歴を更新します。
+採点はプロセスプールで並列に実行します。
+
+使い方:
+    python scripts/backfill_feedback.py
+    python scripts/backfill_feedback.py data/transcripts/processed --workers 8 --chunk-size 128
+    python scripts/backfill_feedback.py --dry-run --scaling   # 履歴を更新せずワーカー数ごとの速度を比較
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.feedback.backfill import DEFAULT_CHUNK_SIZE, find_transcript_files, run_backfill
+from src.feedback.feedback_history import FeedbackHistoryManager
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="処理済み書き起こしのルールベース再採点")
+    parser.add_argument(
+        "directories",
+        nargs="*",
+        default=["data/transcripts/processed"],
+        help="書き起こしのディレクトリ（サブディレクトリも対象、デフォルト: data/transcripts/processed）",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（デフォルト: CPUコア数）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="1ワーカーに渡す件数")
+    parser.add_argument("--criteria", type=str, default=None, help="PSS/ADS評価基準ファイルのパス")
+    parser.add_argument("--history-file", type=str, default=None, help="フィードバック履歴ファイルのパス")
+    parser.add_argument("--dry-run", action="store_true", help="履歴を更新せず採点のみ行う")
+    parser.add_argument(
+        "--scaling", action="store_true", help="ワーカー数1〜CPUコア数で処理速度を比較"
+    )
+    args = parser.parse_args()
+
+    files = find_transcript_files(Path(d) for d in args.directories)
+    criteria_path = Path(args.criteria) if args.criteria else None
+
+    print("=" * 70)
+    print("フィードバック再採点（バックフィル）")
+    print("=" * 70)
+    print(f"対象ディレクトリ: {', '.join(args.directories)}")
+    print(f"対象ファイル: {len(files):,}件")
+    print()
+
+    if not files:
+        print("⚠️  書き起こしファイルが見つかりません")
+        return
+
+    if args.scaling:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, *[n for n in (2, 4, 8, 16, 32) if n < cores], cores})
+        print("▶ ワーカー数ごとの処理速度（履歴は更新しません）")
+        baseline = None
+        for workers in worker_counts:
+            result = run_backfill(
+                files, None, workers=workers, chunk_size=args.chunk_size, criteria_path=criteria_path
+            )
+            baseline = baseline or result.transcripts_per_second
+            speedup = result.transcripts_per_second / baseline if baseline else 0.0
+            print(
+                f"  {workers:>3}プロセス: {result.elapsed:7.2f}秒 "
+                f"{result.transcripts_per_second:9,.0f}件/秒 (×{speedup:.2f})"
+            )
+        return
+
+    history_manager = None
+    if not args.dry_run:
+        history_file = Path(args.history_file) if args.history_file else None
+        history_manager = FeedbackHistoryManager(history_file=history_file)
+
+    def on_progress(done: int, total: int) -> None:
+        print(f"\r  {done:,} / {total:,}件", end="", flush=True)
+
+    print("▶ 再採点を実行中...")
+    result = run_backfill(
+        files,
+        history_manager,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        criteria_path=criteria_path,
+        on_progress=on_progress,
+    )
+    print()
+    print()
+    print(f"  ワーカー数: {result.workers}")
+    print(f"  成功: {result.succeeded:,}件 / 失敗: {len(result.failures):,}件")
+    print(f"  処理時間: {result.elapsed:.2f}秒 ({result.transcripts_per_second:,.0f}件/秒)")
+    for path, error in result.failures[:10]:
+        print(f"  ⚠️  {path}: {error}")
+    if len(result.failures) > 10:
+        print(f"  ... 他{len(result.failures) - 10}件")
+
+    if history_manager is not None:
+        print(f"\n▶ 履歴を更新: {history_manager.history_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+音声ファイル取り込みのベンチマークスクリプト
+
+大きな音声ファイル（デフォルト1GB）を、コピー・reflink・ハードリンク・移動の各方式で
+取り込んだときの時間と、増えたディスク使用量を比較します。
+取り込み先と同じファイルシステム（デフォルト: data/audio）に作業ディレクトリを作って計測し、
+終了時に削除します。
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.feedback.file_ingest import ingest_file
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def free_bytes(path: Path) -> int:
+    """ファイルシステムの空き容量（バイト）"""
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize
+
+
+def create_source(path: Path, size_mb: int) -> None:
+    """計測用のファイルを作成（ディスクに書き出してから返す）"""
+    chunk = os.urandom(CHUNK_SIZE)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def measure(source: Path, target: Path, mode: str, sync: bool):
+    """
+    1回分の取り込みを計測
+
+    Returns:
+        (実際に使った方式, 経過秒数, 増えたディスク使用量（バイト）)
+    """
+    before = free_bytes(target.parent)
+    start = time.perf_counter()
+    method = ingest_file(source, target, mode)
+    if sync:
+        os.sync()
+    elapsed = time.perf_counter() - start
+    used = max(before - free_bytes(target.parent), 0)
+    return method, elapsed, used
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="音声ファイル取り込みのベンチマーク")
+    parser.add_argument("--size-mb", type=int, default=1024, help="ファイルサイズ（MB、デフォルト: 1024）")
+    parser.add_argument("--dir", type=Path, default=Path("data/audio"), help="作業ディレクトリを作る場所（デフォルト: data/audio）")
+    parser.add_argument("--repeat", type=int, default=3, help="方式ごとの計測回数（中央値を表示）")
+    parser.add_argument("--no-sync", action="store_true", help="取り込み後にディスクへの書き出しを待たない")
+    args = parser.parse_args()
+
+    args.dir.mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix=".ingest-benchmark-", dir=args.dir))
+    sync = not args.no_sync
+
+    print("=" * 70)
+    print(f"音声ファイル取り込みベンチマーク（{args.size_mb:,}MB / {work_dir}）")
+    print("=" * 70)
+    print()
+
+    try:
+        source = work_dir / "source.m4a"
+        start = time.perf_counter()
+        create_source(source, args.size_mb)
+        print(f"計測用ファイルの作成: {time.perf_counter() - start:.2f}秒")
+        print()
+
+        results = []
+        for mode in ("copy", "auto", "hardlink", "move"):
+            timings = []
+            for i in range(args.repeat):
+                target = work_dir / f"{mode}-{i}.m4a"
+                method, elapsed, used = measure(source, target, mode, sync)
+                timings.append((elapsed, used))
+                if mode == "move":
+                    # 次の計測のために元に戻す
+                    os.replace(target, source)
+                else:
+                    target.unlink()
+            timings.sort()
+            elapsed, used = timings[len(timings) // 2]
+            results.append((mode, method, elapsed, used))
+
+        copy_elapsed = results[0][2]
+        print(f"  {'指定':<8} {'実際の方式':<10} {'時間':>10} {'追加ディスク':>12} {'コピー比':>10}")
+        for mode, method, elapsed, used in results:
+            ratio = f"×{copy_elapsed / elapsed:,.0f}" if elapsed > 0 else "-"
+            print(f"  {mode:<8} {method:<10} {elapsed * 1000:8.1f}ms {used / (1024 * 1024):10.1f}MB {ratio:>10}")
+        print()
+        print("※ reflink に対応していないファイルシステムでは auto はコピー、hardlink はハードリンクになります")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+フィードバック履歴の期間検索ベンチマークスクリプト
+
+合成した履歴（デフォルト100万件）に対して、CAごとの週次集計で行う期間検索を
+従来方式（全件走査・毎回の日付解釈・並べ替え・週での再フィルタ）と
+CAごとの日付順インデックス（二分探索＋スライス）で比較します。
+"""
+
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.feedback.feedback_history import FeedbackHistoryEntry
+from src.feedback.history_index import HistoryIndex
+
+
+def build_entries(count: int, ca_count: int, days: int, seed: int):
+    """合成履歴を作成（改善点などのリストはエントリ間で共有してメモリを抑える）"""
+    rng = random.Random(seed)
+    first_day = date(2025, 1, 1)
+    improvement_points = ["具体的な数字を用いた提案", "クロージングでの次回アクション確認"]
+    good_points = ["ヒアリングが丁寧"]
+    pss_scores = {"opening": 3, "need_identification": 2}
+    ads_scores = {"adaptability": 3}
+    entries = []
+    for i in range(count):
+        ca_id = f"CA{rng.randrange(ca_count):03d}"
+        entry_date = (first_day + timedelta(days=rng.randrange(days))).isoformat()
+        entries.append(FeedbackHistoryEntry(
+            ca_id=ca_id,
+            date=entry_date,
+            meeting_id=f"M{i:07d}",
+            improvement_points=improvement_points,
+            good_points=good_points,
+            overall_score=2.5,
+            overall_rating="good",
+            pss_scores=pss_scores,
+            ads_scores=ads_scores,
+            feedback_id=f"{entry_date}_{ca_id}_M{i:07d}",
+            created_at="",
+        ))
+    return entries, first_day + timedelta(days=days - 1)
+
+
+def legacy_week_query(entries, ca_id, cutoff, start, end):
+    """従来方式: 全件走査して日付を解釈し、並べ替えてから週で再フィルタ"""
+    past = []
+    for entry in entries:
+        if entry.ca_id != ca_id:
+            continue
+        try:
+            if datetime.fromisoformat(entry.date).date() >= cutoff:
+                past.append(entry)
+        except ValueError:
+            continue
+    past.sort(key=lambda x: x.date, reverse=True)
+    return [e for e in past if start <= datetime.fromisoformat(e.date).date() <= end]
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="フィードバック履歴の期間検索ベンチマーク")
+    parser.add_argument("--entries", type=int, default=1_000_000, help="履歴件数（デフォルト: 100万件）")
+    parser.add_argument("--cas", type=int, default=200, help="CA数")
+    parser.add_argument("--days", type=int, default=730, help="履歴の日数")
+    parser.add_argument("--legacy-cas", type=int, default=5, help="従来方式で計測するCA数（全件走査のため少数で推定）")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"フィードバック履歴の期間検索ベンチマーク（{args.entries:,}件 / {args.cas}CA）")
+    print("=" * 70)
+    print()
+
+    start = time.perf_counter()
+    entries, last_day = build_entries(args.entries, args.cas, args.days, args.seed)
+    print(f"合成履歴の作成: {time.perf_counter() - start:.2f}秒")
+
+    start = time.perf_counter()
+    index = HistoryIndex(entries)
+    build_elapsed = time.perf_counter() - start
+    print(f"インデックス構築（日付の解釈を含む）: {build_elapsed:.2f}秒")
+    print()
+
+    # 最終週（月曜〜日曜）の週次集計を想定
+    week_start = last_day - timedelta(days=last_day.weekday())
+    week_end = week_start + timedelta(days=6)
+    cutoff = last_day - timedelta(days=90)
+    ca_ids = sorted(index.ca_ids())
+
+    # 従来方式（CA数分の全件走査になるため一部のCAで計測して全CA分を推定）
+    legacy_cas = ca_ids[:args.legacy_cas]
+    start = time.perf_counter()
+    legacy_results = {ca_id: legacy_week_query(entries, ca_id, cutoff, week_start, week_end) for ca_id in legacy_cas}
+    legacy_per_ca = (time.perf_counter() - start) / len(legacy_cas)
+
+    # インデックス（全CA）
+    start = time.perf_counter()
+    indexed_results = {ca_id: index.between(ca_id, week_start, week_end) for ca_id in ca_ids}
+    indexed_per_ca = (time.perf_counter() - start) / len(ca_ids)
+
+    for ca_id in legacy_cas:
+        if [e.feedback_id for e in legacy_results[ca_id]] != [e.feedback_id for e in indexed_results[ca_id]]:
+            print(f"❌ {ca_id}: インデックスの検索結果が従来方式と一致しません")
+            sys.exit(1)
+
+    week_total = sum(len(r) for r in indexed_results.values())
+    print(f"対象週: {week_start} 〜 {week_end}（{week_total:,}件）")
+    print(f"  従来方式:       {legacy_per_ca * 1000:10.3f}ミリ秒/CA  全{len(ca_ids)}CA推定 {legacy_per_ca * len(ca_ids):8.2f}秒")
+    print(f"  インデックス:   {indexed_per_ca * 1000:10.3f}ミリ秒/CA  全{len(ca_ids)}CA       {indexed_per_ca * len(ca_ids):8.4f}秒")
+    if indexed_per_ca > 0:
+        print(f"  高速化: ×{legacy_per_ca / indexed_per_ca:,.0f}")
+    print("✅ 検索結果は従来方式と一致しました")
+
+
+if __name__ == "__main__":
+    main()
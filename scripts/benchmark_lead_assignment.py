@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+リード一括振り分けベンチマークスクリプト
+
+スコア順の逐次振り分け（LeadAllocator）と最適化（AssignmentOptimizer）の
+処理時間と期待展開数の合計を比較します。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analytics.aggregates import CAAggregateStore
+from src.analytics.assignment_optimizer import AssignmentOptimizer
+from src.analytics.lead_allocator import LeadAllocator
+from src.analytics.models import CA, Lead, SegmentType
+from src.analytics.segment_classifier import SegmentClassifier
+
+TEAM_REGIONS = {
+    "北海道・東北": ["東日本チーム"],
+    "関東": ["東日本チーム"],
+    "中部": ["中部チーム"],
+    "近畿": ["西日本チーム"],
+    "中国・四国": ["西日本チーム"],
+    "九州・沖縄": ["西日本チーム"],
+}
+PREFECTURE_GROUPS = {
+    "宮城県": "北海道・東北",
+    "東京都": "関東",
+    "愛知県": "中部",
+    "大阪府": "近畿",
+    "福岡県": "九州・沖縄",
+}
+
+
+def build_cas(n_cas: int, rng: np.random.Generator) -> dict:
+    """ベンチマーク用のCAを生成"""
+    teams = sorted({team for teams in TEAM_REGIONS.values() for team in teams})
+    return {
+        f"CA{i:04d}": CA(
+            ca_id=f"CA{i:04d}",
+            name=f"CA{i:04d}",
+            team=teams[i % len(teams)],
+            slack_user_id="",
+            target_leads=int(rng.integers(10, 30)),
+        )
+        for i in range(n_cas)
+    }
+
+
+def build_leads(n_leads: int, rng: np.random.Generator) -> list:
+    """ベンチマーク用のリードを生成（セグメント分類済み）"""
+    prefectures = list(PREFECTURE_GROUPS)
+    # 関東のリードを多めにして、チーム制約が効くようにする
+    weights = np.array([0.1, 0.5, 0.15, 0.15, 0.1])
+    leads = [
+        Lead(
+            lead_id=f"N{i:06d}",
+            name="",
+            age=int(age),
+            prefecture=prefectures[pref],
+            qualification="第二種電気工事士" if has_qual else "",
+            has_qualification=bool(has_qual),
+            assigned_ca_id="",
+            status="new",
+        )
+        for i, (age, has_qual, pref) in enumerate(
+            zip(
+                rng.integers(20, 65, size=n_leads),
+                rng.random(n_leads) < 0.5,
+                rng.choice(len(prefectures), size=n_leads, p=weights),
+            )
+        )
+    ]
+    return SegmentClassifier().classify_leads(leads)
+
+
+def run(name: str, allocate, cas: dict) -> None:
+    """振り分けを実行して結果を表示"""
+    start = time.perf_counter()
+    results = allocate()
+    elapsed = time.perf_counter() - start
+
+    assigned = [r for r in results if r.ca_id is not None]
+    expected = sum(r.lead.conversion_rate or 0.0 for r in assigned)
+    print(f"【{name}】")
+    print(f"  処理時間: {elapsed:.3f}秒")
+    print(f"  割り当て: {len(assigned):,}/{len(results):,}件")
+    print(f"  期待展開数の合計: {expected:,.2f}件")
+    print()
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="リード一括振り分けベンチマーク")
+    parser.add_argument("--leads", type=int, default=5000, help="新規リード件数")
+    parser.add_argument("--cas", type=int, default=300, help="CA人数")
+    parser.add_argument("--max-d", type=int, default=3, help="CA1人あたりのセグメントD保有上限")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"リード一括振り分けベンチマーク（{args.leads:,}件 × {args.cas:,}人）")
+    print("=" * 70)
+    print()
+
+    max_per_segment = {SegmentType.D: args.max_d}
+
+    # 逐次振り分け（チーム制約は条件判定で適用）
+    rng = np.random.default_rng(args.seed)
+    cas = build_cas(args.cas, rng)
+    leads = build_leads(args.leads, rng)
+    store = CAAggregateStore(cas)
+    checker = AssignmentOptimizer(
+        store, prefecture_groups=PREFECTURE_GROUPS, team_regions=TEAM_REGIONS
+    )
+    allocator = LeadAllocator(
+        store, max_per_segment=max_per_segment, is_eligible=checker.is_eligible
+    )
+    run("逐次振り分け", lambda: allocator.allocate_batch(leads), cas)
+
+    # 最適化
+    rng = np.random.default_rng(args.seed)
+    cas = build_cas(args.cas, rng)
+    leads = build_leads(args.leads, rng)
+    optimizer = AssignmentOptimizer(
+        CAAggregateStore(cas),
+        prefecture_groups=PREFECTURE_GROUPS,
+        team_regions=TEAM_REGIONS,
+        max_per_segment=max_per_segment,
+    )
+    run("最適化（最小費用流）", lambda: optimizer.optimize(leads), cas)
+
+
+if __name__ == "__main__":
+    main()
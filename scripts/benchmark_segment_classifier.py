@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+セグメント分類ベンチマークスクリプト
+
+1件ずつの判定（assign_segment）と一括判定（classify_batch）の処理時間を比較します。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analytics.segment_classifier import SegmentClassifier
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="セグメント分類ベンチマーク")
+    parser.add_argument("--leads", type=int, default=1_000_000, help="リード件数（デフォルト: 100万件）")
+    parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+    args = parser.parse_args()
+
+    classifier = SegmentClassifier()
+    rng = np.random.default_rng(args.seed)
+    ages = rng.integers(18, 70, size=args.leads)
+    has_quals = rng.random(args.leads) < 0.6
+
+    print("=" * 70)
+    print(f"セグメント分類ベンチマーク（{args.leads:,}件）")
+    print("=" * 70)
+    print()
+
+    # 1件ずつ判定
+    ages_list = ages.tolist()
+    quals_list = has_quals.tolist()
+    start = time.perf_counter()
+    per_lead = [
+        classifier.assign_segment(has_qual, age)
+        for has_qual, age in zip(quals_list, ages_list)
+    ]
+    per_lead_rates = [classifier.get_conversion_rate(seg) for seg in per_lead]
+    per_lead_elapsed = time.perf_counter() - start
+
+    # 一括判定
+    start = time.perf_counter()
+    codes, rates = classifier.classify_batch(ages, has_quals)
+    batch_elapsed = time.perf_counter() - start
+
+    # 結果の一致を確認
+    batch_segments = [classifier.segment_for_code(code) for code in codes.tolist()]
+    if batch_segments != per_lead or rates.tolist() != per_lead_rates:
+        print("❌ 一括判定の結果が1件ずつの判定と一致しません")
+        sys.exit(1)
+
+    print(f"1件ずつ判定: {per_lead_elapsed:.3f}秒 ({args.leads / per_lead_elapsed:,.0f}件/秒)")
+    print(f"一括判定:    {batch_elapsed:.3f}秒 ({args.leads / batch_elapsed:,.0f}件/秒)")
+    print(f"高速化:      {per_lead_elapsed / batch_elapsed:.1f}倍")
+    print()
+    print("✅ 判定結果は一致しています")
+
+
+if __name__ == "__main__":
+    main()
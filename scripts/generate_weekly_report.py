@@ -3,9 +3,12 @@
 週次フィードバックレポート生成・配信スクリプト
 
 過去1週間のフィードバックを集計し、CAごとに個別レポートを生成してSlackに配信します。
+全CAのサマリーとメッセージは対象週の履歴を1回で取得して一括生成します。
+--compare-timing を指定すると、CAごとに生成する従来の方法との処理時間と結果を比較します。
 """
 
 import sys
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -63,6 +66,11 @@ def main():
         default=None,
         help="特定のCAのみレポート生成（指定しない場合は全CA）",
     )
+    parser.add_argument(
+        "--compare-timing",
+        action="store_true",
+        help="CAごとの生成と一括生成の処理時間を比較（Slack通知は行わない）",
+    )
 
     args = parser.parse_args()
 
@@ -95,17 +103,19 @@ def main():
     # 対象CAを決定
     target_ca_ids = [args.ca_id] if args.ca_id else list(ca_mappings.keys())
 
-    # 各CAの週次サマリーを生成
-    summaries = []
-    for ca_id in target_ca_ids:
-        summary = generator.generate_weekly_summary(
-            ca_id=ca_id,
-            week_start=week_start,
-            week_end=week_end,
-        )
-        if summary:
-            summaries.append(summary)
-            print(f"✅ {summary.ca_name or ca_id}: {summary.feedback_count}件のフィードバック")
+    if args.compare_timing:
+        compare_timing(generator, target_ca_ids, week_start, week_end)
+        return
+
+    # 全CAの週次サマリー・メッセージを一括生成
+    reports = generator.generate_all_weekly_reports(
+        week_start=week_start,
+        week_end=week_end,
+        ca_ids=target_ca_ids,
+    )
+    summaries = reports.summaries
+    for summary in summaries:
+        print(f"✅ {summary.ca_name or summary.ca_id}: {summary.feedback_count}件のフィードバック")
 
     if not summaries:
         print("⚠️  対象期間にフィードバックデータがありません。")
@@ -124,35 +134,14 @@ def main():
         print()
 
         # 全体サマリーを送信
-        overall_summary = generator.generate_overall_summary(
-            summaries=summaries,
-            week_start=week_start,
-            week_end=week_end,
-        )
-        notifier.send_message(overall_summary, channel=slack_channel)
+        notifier.send_message(reports.overall_message, channel=slack_channel)
         print("✅ 全体サマリーを送信しました")
         print()
 
         # 各CAの個別レポートを送信
         for summary in summaries:
-            # 前週のサマリーも取得（比較用）
-            prev_week_start = (datetime.strptime(week_start, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
-            prev_week_end = (datetime.strptime(week_end, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
-            
-            previous_summary = generator.generate_weekly_summary(
-                ca_id=summary.ca_id,
-                week_start=prev_week_start,
-                week_end=prev_week_end,
-            )
-
-            # レポートメッセージを生成
-            report_message = generator.generate_weekly_report_message(
-                summary=summary,
-                previous_week_summary=previous_summary,
-            )
-
             # Slackに送信（メンション付き）
-            success = notifier.send_message(report_message, channel=slack_channel)
+            success = notifier.send_message(reports.messages[summary.ca_id], channel=slack_channel)
             
             if success:
                 print(f"✅ {summary.ca_name or summary.ca_id}のレポートを送信しました")
@@ -170,32 +159,78 @@ def main():
         print("=" * 70)
         print()
 
-        overall_summary = generator.generate_overall_summary(
-            summaries=summaries,
-            week_start=week_start,
-            week_end=week_end,
-        )
-        print(overall_summary)
+        print(reports.overall_message)
         print()
 
         for summary in summaries:
-            prev_week_start = (datetime.strptime(week_start, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
-            prev_week_end = (datetime.strptime(week_end, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
-            
-            previous_summary = generator.generate_weekly_summary(
-                ca_id=summary.ca_id,
-                week_start=prev_week_start,
-                week_end=prev_week_end,
-            )
-
-            report_message = generator.generate_weekly_report_message(
-                summary=summary,
-                previous_week_summary=previous_summary,
-            )
-            print(report_message)
+            print(reports.messages[summary.ca_id])
             print()
 
 
+def generate_reports_per_ca(
+    generator: WeeklyReportGenerator,
+    ca_ids: list[str],
+    week_start: str,
+    week_end: str,
+) -> tuple[str, dict[str, str]]:
+    """CAごとにサマリーを生成する従来の方法（--compare-timing の比較用）"""
+    summaries = []
+    for ca_id in ca_ids:
+        summary = generator.generate_weekly_summary(ca_id=ca_id, week_start=week_start, week_end=week_end)
+        if summary:
+            summaries.append(summary)
+
+    prev_week_start = (datetime.strptime(week_start, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
+    prev_week_end = (datetime.strptime(week_end, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
+    messages = {}
+    for summary in summaries:
+        previous_summary = generator.generate_weekly_summary(
+            ca_id=summary.ca_id,
+            week_start=prev_week_start,
+            week_end=prev_week_end,
+        )
+        messages[summary.ca_id] = generator.generate_weekly_report_message(
+            summary=summary,
+            previous_week_summary=previous_summary,
+        )
+    overall = generator.generate_overall_summary(summaries, week_start, week_end) if summaries else ""
+    return overall, messages
+
+
+def compare_timing(
+    generator: WeeklyReportGenerator,
+    ca_ids: list[str],
+    week_start: str,
+    week_end: str,
+) -> None:
+    """CAごとの生成と一括生成の処理時間・結果を比較"""
+    # 履歴・改善点のインデックス構築は両方式で共通のため、計測前に済ませておく
+    start = time.perf_counter()
+    for ca_id in ca_ids:
+        generator.history_manager.similarity_index(ca_id)
+    print(f"履歴インデックスの構築: {time.perf_counter() - start:.3f}秒")
+
+    start = time.perf_counter()
+    per_ca_overall, per_ca_messages = generate_reports_per_ca(generator, ca_ids, week_start, week_end)
+    per_ca_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reports = generator.generate_all_weekly_reports(week_start=week_start, week_end=week_end, ca_ids=ca_ids)
+    bulk_elapsed = time.perf_counter() - start
+
+    print(f"対象CA: {len(ca_ids)}名（レポート対象 {len(reports.summaries)}名）")
+    print(f"  CAごとの生成: {per_ca_elapsed:8.3f}秒")
+    print(f"  一括生成:     {bulk_elapsed:8.3f}秒")
+    if bulk_elapsed > 0:
+        print(f"  高速化: ×{per_ca_elapsed / bulk_elapsed:.1f}")
+
+    if per_ca_overall == reports.overall_message and per_ca_messages == reports.messages:
+        print("✅ 生成されたメッセージは一致しました")
+    else:
+        print("❌ 生成されたメッセージが一致しません")
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
 
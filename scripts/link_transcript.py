@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.feedback.audio_manager import AudioManager
+from src.feedback.file_ingest import INGEST_MODES
 
 
 def main():
@@ -30,11 +31,17 @@ def main():
         default=None,
         help="音声ファイルディレクトリ（デフォルト: data/audio）",
     )
+    parser.add_argument(
+        "--ingest",
+        choices=INGEST_MODES,
+        default="auto",
+        help="取り込み方式（auto: reflink→コピー、hardlink: reflink→ハードリンク→コピー、copy: 常にコピー、move: 移動。デフォルト: auto）",
+    )
 
     args = parser.parse_args()
 
     # AudioManagerを初期化
-    audio_manager = AudioManager(audio_dir=args.audio_dir)
+    audio_manager = AudioManager(audio_dir=args.audio_dir, ingest_mode=args.ingest)
 
     print("=" * 70)
     print("書き起こしファイル紐付け")
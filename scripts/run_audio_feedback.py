@@ -3,6 +3,8 @@
 音声ファイル統合フィードバック生成スクリプト
 
 書き起こし準備済みの音声ファイルを処理してフィードバックを生成します。
+フィードバック生成と Slack通知はジョブキュー経由で実行し、APIのレート制限・接続エラーや
+Slack の送信失敗はバックオフして再試行します（再試行待ちのジョブは次回の実行で処理します）。
 """
 
 import sys
@@ -12,6 +14,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.feedback.audio_feedback_engine import AudioFeedbackEngine
+from src.feedback.audio_pipeline import (
+    DEFAULT_SLACK_CHANNEL,
+    FEEDBACK_STAGE,
+    SLACK_STAGE,
+    AudioPipeline,
+)
 from src.common.slack_notifier import SlackNotifier
 
 
@@ -60,6 +68,17 @@ def main():
         action="store_true",
         help="Slack通知を無効化",
     )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="1件あたりの最大試行回数。超えるとデッドレターになり、音声ファイルは failed/ に移動（デフォルト: 5）",
+    )
+    parser.add_argument(
+        "--retry-dead",
+        action="store_true",
+        help="デッドレターのジョブを再投入してから処理",
+    )
 
     args = parser.parse_args()
 
@@ -76,16 +95,35 @@ def main():
         use_ai=args.use_ai,
     )
 
+    slack_channel = args.slack_channel or DEFAULT_SLACK_CHANNEL
+    notifier = None
+    if not args.no_slack:
+        notifier = SlackNotifier(default_channel=slack_channel)
+        if not notifier.is_configured:
+            print("⚠️  Slack通知が設定されていないため通知をスキップします（SLACK_BOT_TOKEN または SLACK_WEBHOOK_URL を設定してください）")
+            notifier = None
+    pipeline = AudioPipeline(
+        engine,
+        notifier=notifier,
+        slack_channel=slack_channel,
+        max_attempts=args.max_attempts,
+    )
+    if args.retry_dead:
+        requeued = pipeline.queue.requeue_dead()
+        print(f"🔁 デッドレターのジョブを再投入: {requeued}件")
+
     # 状況を確認
     pending_count = engine.get_pending_count()
     ready_count = engine.get_ready_count()
+    pipeline.enqueue_ready()
 
     print(f"📊 処理状況:")
     print(f"   書き起こし待ち: {pending_count}件")
     print(f"   処理準備済み: {ready_count}件")
     print()
 
-    if ready_count == 0:
+    # 前回までの再試行待ちで実行時刻を過ぎたジョブ（Slack通知を含む）があれば処理する
+    if ready_count == 0 and not pipeline.queue.has_ready([FEEDBACK_STAGE, SLACK_STAGE]):
         print("⚠️  処理対象の音声ファイルがありません")
         print()
         print("💡 ヒント:")
@@ -95,8 +133,12 @@ def main():
 
     # 処理実行
     print("▶ フィードバック生成を実行中...")
-    feedbacks = engine.process_audio_with_transcript()
+    feedbacks = pipeline.run_until_idle()
+    runner = pipeline.runner
     print(f"   完了: {len(feedbacks)}件処理")
+    print(f"   ジョブ: 完了 {runner.completed_count}件 / 再試行 {runner.retried_count}件 / デッドレター {runner.dead_count}件")
+    for line in pipeline.queue_status_lines():
+        print(f"   {line}")
     print()
 
     # 結果表示
@@ -115,16 +157,6 @@ def main():
         engine.feedback_engine.export_all_feedbacks(args.output_dir)
         print(f"\n▶ レポートを出力: {args.output_dir}")
 
-    # Slack通知
-    if feedbacks and not args.no_slack:
-        print("\n▶ Slack通知を送信中...")
-        slack_channel = args.slack_channel or "#dk_ca_ops"
-        notifier = SlackNotifier(default_channel=slack_channel)
-
-        for fb in feedbacks:
-            slack_message = fb.to_slack_message()
-            notifier.send_message(slack_message, channel=slack_channel)
-
 
 if __name__ == "__main__":
     main()
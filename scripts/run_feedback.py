@@ -7,6 +7,7 @@
 
 from pathlib import Path
 import sys
+import time
 
 # プロジェクトルートをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -16,6 +17,30 @@ from src.feedback import FeedbackEngine
 
 def main():
     """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="フィードバックシステム - LLM分析実行")
+    parser.add_argument("--concurrency", type=int, default=1, help="同時実行数（デフォルト: 1=逐次）")
+    parser.add_argument("--rpm", type=int, default=None, help="1分あたりのリクエスト数上限")
+    parser.add_argument("--tpm", type=int, default=None, help="1分あたりのトークン数上限")
+    parser.add_argument("--base-url", default=None, help="APIのベースURL（スタブサーバー等）")
+    parser.add_argument(
+        "--cache-dir",
+        default="data/cache/feedback_responses",
+        help="AI生成結果のキャッシュディレクトリ",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使用しない")
+    parser.add_argument(
+        "--stream", action="store_true", help="ストリーミングで受信し応答開始までの時間を計測"
+    )
+    parser.add_argument(
+        "--batch", action="store_true", help="Message Batchesでまとめて処理（夜間処理向け）"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=60.0, help="バッチ完了確認の間隔（秒）"
+    )
+    args = parser.parse_args()
+
     # パス設定
     transcripts_dir = Path("data/sample/feedback/transcripts")
     criteria_path = Path("data/sample/feedback/pss_ads_criteria.md")
@@ -31,6 +56,9 @@ def main():
         transcripts_dir=transcripts_dir,
         criteria_path=criteria_path,
         use_ai=True,  # Claude APIを使用
+        base_url=args.base_url,
+        cache_dir=None if args.no_cache else Path(args.cache_dir),
+        stream=args.stream,
     )
 
     # 書き起こしファイルを確認
@@ -42,8 +70,38 @@ def main():
 
     # 処理実行
     print("▶ LLM分析を実行中...")
-    feedbacks = engine.process_all_pending()
-    print(f"  完了: {len(feedbacks)}件処理")
+
+    def on_result(result):
+        status = "✅" if result.ok else f"❌ {result.error}"
+        if result.cached:
+            status += " (キャッシュ)"
+        print(
+            f"  {status} {result.transcript.file_path} "
+            f"({result.elapsed:.1f}秒, 試行{result.attempts}回)"
+        )
+
+    start = time.perf_counter()
+    if args.batch:
+        feedbacks = engine.process_all_pending_batch(
+            poll_interval=args.poll_interval, on_result=on_result
+        )
+    else:
+        feedbacks = engine.process_all_pending(
+            concurrency=args.concurrency,
+            on_result=on_result,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+        )
+    print(f"  完了: {len(feedbacks)}件処理 ({time.perf_counter() - start:.1f}秒)")
+    if engine.failures:
+        print(f"  失敗: {len(engine.failures)}件")
+    if engine.cache:
+        stats = engine.cache.stats()
+        print(
+            f"  キャッシュ: ヒット{stats['hits']}件 / ミス{stats['misses']}件 "
+            f"(ヒット率 {stats['hit_rate']:.0%})"
+        )
+    print(engine.generator.metrics.format_report())
     print()
 
     # 結果表示
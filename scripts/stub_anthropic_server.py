@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Anthropic API スタブサーバー
+
+Messages API（POST /v1/messages）を模したローカルサーバーです。
+フィードバック生成の並列実行・レート制限・リトライの動作確認に使用します。
+応答遅延と、レート制限（429）・過負荷（529）エラーの発生率を指定できます。
+ストリーミング（SSE）と、cache_control 付きシステムプロンプトのプロンプトキャッシュ
+（2回目以降は cache_read_input_tokens として計上し、応答開始も早くなる）を模擬します。
+Message Batches API（POST /v1/messages/batches、GET /v1/messages/batches/{id}、
+GET /v1/messages/batches/{id}/results）にも対応し、送信したバッチを --batch-seconds 秒後に完了させます。
+
+使い方:
+    python scripts/stub_anthropic_server.py --port 8787 --latency 2.0 --rate-limit-rate 0.1
+    ANTHROPIC_API_KEY=dummy python scripts/run_feedback.py --base-url http://127.0.0.1:8787 --batch
+    ANTHROPIC_API_KEY=dummy python scripts/run_feedback.py --base-url http://127.0.0.1:8787 --concurrency 8 --stream
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LEVELS = ["A", "B", "C", "D"]
+PSS_ITEMS = ["opening", "need_identification", "presentation", "handling_objections", "closing"]
+ADS_ITEMS = ["adaptability", "rapport_building", "value_delivery"]
+
+
+class StubState:
+    """スタブサーバーの設定と統計"""
+
+    def __init__(
+        self,
+        latency: float,
+        rate_limit_rate: float,
+        overload_rate: float,
+        batch_seconds: float = 5.0,
+    ) -> None:
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.overload_rate = overload_rate
+        self.batch_seconds = batch_seconds
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "success": 0,
+            "rate_limited": 0,
+            "overloaded": 0,
+            "batches": 0,
+        }
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cached_prefixes = set()
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+
+def build_feedback_json(prompt: str) -> str:
+    """プロンプトから決定的なフィードバックJSONを生成"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+
+    def level(i: int) -> str:
+        return LEVELS[digest[i] % len(LEVELS)]
+
+    result = {
+        "pss": {
+            item: {"level": level(i), "comment": f"{item} のスタブ評価コメント"}
+            for i, item in enumerate(PSS_ITEMS)
+        },
+        "ads": {
+            item: {"level": level(len(PSS_ITEMS) + i), "comment": f"{item} のスタブ評価コメント"}
+            for i, item in enumerate(ADS_ITEMS)
+        },
+        "good_points": ["スタブの評価できる点"],
+        "improvement_points": ["【重要】スタブの改善点"],
+        "specific_advice": "スタブの具体的な改善アクション",
+        "next_goals": "スタブの次回目標",
+    }
+    return json.dumps(result, ensure_ascii=False)
+
+
+def prompt_text(body: dict) -> str:
+    """リクエストのsystem・messagesを連結したテキスト"""
+    parts = []
+    system = body.get("system", "")
+    if isinstance(system, list):
+        parts.extend(block.get("text", "") for block in system)
+    else:
+        parts.append(system)
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content)
+        else:
+            parts.append(content)
+    return "\n".join(parts)
+
+
+def cacheable_prefix(body: dict) -> str:
+    """cache_control が付いたブロックまでのシステムプロンプト（キャッシュ対象の接頭辞）"""
+    system = body.get("system")
+    if not isinstance(system, list):
+        return ""
+    prefix = []
+    cacheable = ""
+    for block in system:
+        prefix.append(block.get("text", ""))
+        if block.get("cache_control"):
+            cacheable = "\n".join(prefix)
+    return cacheable
+
+
+def build_usage(state: StubState, body: dict, output_text: str) -> dict:
+    """トークン使用量（1文字=1トークン換算、キャッシュ対象の接頭辞は2回目以降キャッシュ読込）"""
+    prompt = prompt_text(body)
+    prefix = cacheable_prefix(body)
+    usage = {
+        "input_tokens": len(prompt) - len(prefix),
+        "output_tokens": len(output_text),
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+    if prefix:
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with state.lock:
+            hit = digest in state.cached_prefixes
+            state.cached_prefixes.add(digest)
+        key = "cache_read_input_tokens" if hit else "cache_creation_input_tokens"
+        usage[key] = len(prefix)
+    return usage
+
+
+def build_message(body: dict, usage: dict) -> dict:
+    """Messages APIのレスポンスを生成"""
+    text = build_feedback_json(prompt_text(body))
+    return {
+        "id": f"msg_stub_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stub"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": usage,
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Messages API のスタブ"""
+
+    state: StubState
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass  # アクセスログは出力しない
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        path = self.path.split("?")[0]
+        if path == "/v1/messages":
+            self._handle_messages(body)
+        elif path == "/v1/messages/batches":
+            self._create_batch(body)
+        else:
+            self._send_json(404, _error("not_found_error", f"Unknown path: {self.path}"))
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        # v1/messages/batches/{id}[/results]
+        if len(parts) >= 4 and parts[:3] == ["v1", "messages", "batches"]:
+            batch = self.state.batches.get(parts[3])
+            if batch is None:
+                self._send_json(404, _error("not_found_error", f"Batch not found: {parts[3]}"))
+            elif len(parts) == 4:
+                self._send_json(200, self._batch_payload(batch))
+            elif len(parts) == 5 and parts[4] == "results" and batch["results"] is not None:
+                self._send_jsonl(batch["results"])
+            else:
+                self._send_json(404, _error("not_found_error", f"Unknown path: {self.path}"))
+        else:
+            self._send_json(404, _error("not_found_error", f"Unknown path: {self.path}"))
+
+    def _create_batch(self, body: dict) -> None:
+        """バッチを受け付け、バックグラウンドで処理する"""
+        state = self.state
+        batch_id = f"msgbatch_stub_{uuid.uuid4().hex[:24]}"
+        batch = {
+            "id": batch_id,
+            "requests": body.get("requests", []),
+            "results": None,
+            "created_at": _now(),
+            "ended_at": None,
+            "base_url": f"http://{self.headers.get('host', 'localhost')}",
+        }
+        with state.lock:
+            state.batches[batch_id] = batch
+        state.count("batches")
+        threading.Thread(target=_process_batch, args=(state, batch), daemon=True).start()
+        self._send_json(200, self._batch_payload(batch))
+
+    @staticmethod
+    def _batch_payload(batch: dict) -> dict:
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if batch["results"] is None:
+            counts["processing"] = len(batch["requests"])
+        else:
+            for line in batch["results"]:
+                counts[line["result"]["type"]] += 1
+        ended = batch["results"] is not None
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": batch["created_at"],
+            "ended_at": batch["ended_at"],
+            "expires_at": batch["created_at"],
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": (
+                f"{batch['base_url']}/v1/messages/batches/{batch['id']}/results" if ended else None
+            ),
+        }
+
+    def _handle_messages(self, body: dict) -> None:
+        state = self.state
+        state.count("requests")
+
+        roll = random.random()
+        if roll < state.rate_limit_rate:
+            state.count("rate_limited")
+            self._send_json(
+                429, _error("rate_limit_error", "Stub rate limit"), {"retry-after": "1"}
+            )
+            return
+        if roll < state.rate_limit_rate + state.overload_rate:
+            state.count("overloaded")
+            self._send_json(529, _error("overloaded_error", "Stub overloaded"))
+            return
+
+        with state.lock:
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            usage = build_usage(state, body, build_feedback_json(prompt_text(body)))
+            message = build_message(body, usage)
+
+            # 応答開始までの時間はキャッシュ対象外の入力の割合に比例させる
+            total_input = (
+                usage["input_tokens"]
+                + usage["cache_creation_input_tokens"]
+                + usage["cache_read_input_tokens"]
+            )
+            uncached_share = 1 - usage["cache_read_input_tokens"] / max(total_input, 1)
+            latency = state.latency * random.uniform(0.5, 1.5)
+            ttft = latency * (0.2 + 0.6 * uncached_share)
+
+            state.count("success")
+            if body.get("stream"):
+                self._send_stream(message, ttft, latency - ttft)
+            else:
+                time.sleep(latency)
+                self._send_json(200, message)
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def _send_stream(self, message: dict, ttft: float, generation_time: float) -> None:
+        """メッセージをSSEのイベント列として送信"""
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.end_headers()
+
+        text = message["content"][0]["text"]
+        usage = message["usage"]
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+
+        time.sleep(ttft)
+        self._send_event("message_start", {"type": "message_start", "message": start})
+        self._send_event(
+            "content_block_start",
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+        )
+        chunks = [text[i:i + 64] for i in range(0, len(text), 64)] or [""]
+        for chunk in chunks:
+            self._send_event(
+                "content_block_delta",
+                {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {"type": "text_delta", "text": chunk},
+                },
+            )
+            time.sleep(generation_time / len(chunks))
+        self._send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._send_event(
+            "message_delta",
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": usage["output_tokens"]},
+            },
+        )
+        self._send_event("message_stop", {"type": "message_stop"})
+
+    def _send_jsonl(self, lines: list) -> None:
+        data = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+        self.send_response(200)
+        self.send_header("content-type", "application/x-jsonl")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, event: str, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False)
+        self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _error(error_type: str, message: str) -> dict:
+    return {"type": "error", "error": {"type": error_type, "message": message}}
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _process_batch(state: StubState, batch: dict) -> None:
+    """バッチ内のリクエストを処理（過負荷の発生率に応じて errored にする）"""
+    time.sleep(state.batch_seconds)
+    results = []
+    for item in batch["requests"]:
+        params = item.get("params", {})
+        if random.random() < state.overload_rate:
+            result = {"type": "errored", "error": _error("overloaded_error", "Stub overloaded")}
+        else:
+            usage = build_usage(state, params, build_feedback_json(prompt_text(params)))
+            result = {"type": "succeeded", "message": build_message(params, usage)}
+        results.append({"custom_id": item.get("custom_id"), "result": result})
+    batch["ended_at"] = _now()
+    batch["results"] = results
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Anthropic API スタブサーバー")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8787, help="待ち受けポート")
+    parser.add_argument("--latency", type=float, default=2.0, help="平均応答時間（秒）")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429を返す確率")
+    parser.add_argument("--overload-rate", type=float, default=0.0, help="529を返す確率")
+    parser.add_argument("--batch-seconds", type=float, default=5.0, help="バッチの処理時間（秒）")
+    args = parser.parse_args()
+
+    StubHandler.state = StubState(
+        args.latency, args.rate_limit_rate, args.overload_rate, args.batch_seconds
+    )
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+
+    print("=" * 70)
+    print(f"Anthropic API スタブサーバー: http://{args.host}:{args.port}")
+    print("=" * 70)
+    print(f"  応答時間: 平均{args.latency}秒")
+    print(f"  429発生率: {args.rate_limit_rate:.0%} / 529発生率: {args.overload_rate:.0%}")
+    print("  Ctrl+C で終了")
+    print()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        state = StubHandler.state
+        print()
+        print("■ 統計")
+        for key, value in state.stats.items():
+            print(f"  {key}: {value}")
+        print(f"  最大同時処理数: {state.max_in_flight}")
+        print(f"  キャッシュ済みプロンプト: {len(state.cached_prefixes)}件")
+
+
+if __name__ == "__main__":
+    main()
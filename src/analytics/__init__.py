@@ -2,6 +2,15 @@
 
 from .models import Lead, CA, Segment, SegmentType
 from .segment_classifier import SegmentClassifier
+from .aggregates import DEFAULT_INACTIVE_STATUSES, CAAggregate, CAAggregateStore
+from .lead_allocator import AllocationResult, LeadAllocator
+from .assignment_optimizer import AssignmentOptimizer, AssignmentTimeoutError
+from .conversion_estimator import ConversionRateEstimator, OutcomeCounts
+from .snapshot_store import HoldingsSnapshot, SnapshotStore
+from .scenario import Scenario, ScenarioResult, evaluate_scenarios
+from .segment_cube import CUBE_DIMENSIONS, CubeCell, SegmentCube
+from .forecaster import ConversionForecast, ConversionForecaster, ForecastBand
+from .segment_rules import SegmentRule, SegmentRuleSet
 from .analytics_engine import AnalyticsEngine
 
 __all__ = [
@@ -10,5 +19,27 @@ __all__ = [
     "Segment",
     "SegmentType",
     "SegmentClassifier",
+    "SegmentRule",
+    "SegmentRuleSet",
     "AnalyticsEngine",
+    "CAAggregate",
+    "CAAggregateStore",
+    "DEFAULT_INACTIVE_STATUSES",
+    "AllocationResult",
+    "LeadAllocator",
+    "AssignmentOptimizer",
+    "AssignmentTimeoutError",
+    "ConversionRateEstimator",
+    "OutcomeCounts",
+    "HoldingsSnapshot",
+    "SnapshotStore",
+    "Scenario",
+    "ScenarioResult",
+    "evaluate_scenarios",
+    "CUBE_DIMENSIONS",
+    "CubeCell",
+    "SegmentCube",
+    "ConversionForecast",
+    "ConversionForecaster",
+    "ForecastBand",
 ]
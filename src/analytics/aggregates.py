@@ -0,0 +1,198 @@
+"""CA別パフォーマンスの増分集計"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from .models import CA, CAPerformance, Lead, SegmentType
+
+# CAの保有件数に含めないリードステータス（成約・失注で対応が終わったリード）
+DEFAULT_INACTIVE_STATUSES: FrozenSet[str] = frozenset({"closed", "lost"})
+
+
+@dataclass
+class CAAggregate:
+    """CA×セグメント別の集計値"""
+
+    segment_counts: Dict[SegmentType, int] = field(
+        default_factory=lambda: {segment: 0 for segment in SegmentType}
+    )
+    segment_expected: Dict[SegmentType, float] = field(
+        default_factory=lambda: {segment: 0.0 for segment in SegmentType}
+    )
+    expected_conversions: float = 0.0
+
+    @property
+    def total_leads(self) -> int:
+        """合計保有リード数"""
+        return sum(self.segment_counts.values())
+
+
+class CAAggregateStore:
+    """CA×セグメント別の保有件数・期待展開数を保持する集計ストア
+
+    リードの追加・削除・再割り当て・ステータス変更のたびに該当CAの集計値と
+    保有リード（CA.leads、lead_id → Lead）だけをO(1)で更新し、
+    CAのパフォーマンス指標も同時に更新する。担当CAのないリードや
+    inactive_statuses のリードも保持するが、CAの集計には含めない。
+    """
+
+    def __init__(
+        self,
+        cas: Dict[str, CA],
+        inactive_statuses: Iterable[str] = (),
+    ) -> None:
+        """
+        Args:
+            cas: 集計対象のCA（ca_id → CA）
+            inactive_statuses: 保有件数に含めないリードステータス
+        """
+        self.cas = cas
+        self.inactive_statuses: FrozenSet[str] = frozenset(inactive_statuses)
+        self._aggregates: Dict[str, CAAggregate] = {ca_id: CAAggregate() for ca_id in cas}
+        self._leads: Dict[str, Lead] = {}
+        self._observers: List[Any] = []
+
+        for ca in cas.values():
+            ca.leads = {}
+            self._refresh(ca.ca_id)
+
+    def add_lead(self, lead: Lead) -> None:
+        """リードを追加"""
+        if lead.lead_id in self._leads:
+            raise ValueError(f"Lead already exists: {lead.lead_id}")
+
+        self._leads[lead.lead_id] = lead
+        self._attach(lead)
+        self._notify_added(lead)
+
+    def add_leads(self, leads: Iterable[Lead]) -> None:
+        """複数リードを追加"""
+        for lead in leads:
+            self.add_lead(lead)
+
+    def remove_lead(self, lead_id: str) -> Lead:
+        """リードを削除"""
+        lead = self._get_lead(lead_id)
+        self._detach(lead)
+        self._notify_removed(lead)
+        del self._leads[lead_id]
+        return lead
+
+    def reassign_lead(self, lead_id: str, ca_id: str) -> Lead:
+        """リードを別のCAに再割り当て"""
+        lead = self._get_lead(lead_id)
+        self._detach(lead)
+        self._notify_removed(lead)
+        lead.assigned_ca_id = ca_id
+        self._attach(lead)
+        self._notify_added(lead)
+        return lead
+
+    def update_status(self, lead_id: str, status: str) -> Lead:
+        """リードのステータスを変更"""
+        lead = self._get_lead(lead_id)
+        self._detach(lead)
+        self._notify_removed(lead)
+        lead.status = status
+        self._attach(lead)
+        self._notify_added(lead)
+        return lead
+
+    def subscribe(self, observer: Any) -> None:
+        """
+        リードの追加・削除を通知するオブザーバーを登録
+
+        observer は add_lead(lead) / remove_lead(lead) を持つオブジェクト。
+        再割り当て・ステータス変更は「変更前のリードの削除 → 変更後のリードの追加」として通知し、
+        登録済みのリードは登録時に追加として通知する。
+        """
+        self._observers.append(observer)
+        for lead in self._leads.values():
+            observer.add_lead(lead)
+
+    def get_lead(self, lead_id: str) -> Optional[Lead]:
+        """リードIDからリードを取得"""
+        return self._leads.get(lead_id)
+
+    def leads(self) -> List[Lead]:
+        """全リードを取得（追加順、集計に含めないリードを含む）"""
+        return list(self._leads.values())
+
+    def get_aggregate(self, ca_id: str) -> CAAggregate:
+        """CAの集計値を取得"""
+        return self._aggregates[ca_id]
+
+    def get_performance(self, ca_id: str) -> CAPerformance:
+        """CAのパフォーマンス指標を取得"""
+        return self.cas[ca_id].performance
+
+    def refresh_ca(self, ca_id: str) -> None:
+        """目標リード数の変更などをパフォーマンス指標に反映"""
+        self._refresh(ca_id)
+
+    def leads_of(self, ca_id: str) -> List[Lead]:
+        """CAの保有リード一覧を取得（追加順）"""
+        return list(self.cas[ca_id].leads.values())
+
+    def _get_lead(self, lead_id: str) -> Lead:
+        lead = self._leads.get(lead_id)
+        if lead is None:
+            raise KeyError(f"Lead not found: {lead_id}")
+        return lead
+
+    def _notify_added(self, lead: Lead) -> None:
+        for observer in self._observers:
+            observer.add_lead(lead)
+
+    def _notify_removed(self, lead: Lead) -> None:
+        for observer in self._observers:
+            observer.remove_lead(lead)
+
+    def _is_counted(self, lead: Lead) -> bool:
+        """CAの保有件数に含めるリードかどうか"""
+        return lead.assigned_ca_id in self._aggregates and lead.status not in self.inactive_statuses
+
+    def _attach(self, lead: Lead) -> None:
+        """リードをCAの集計に加算"""
+        if not self._is_counted(lead):
+            return
+
+        ca_id = lead.assigned_ca_id
+        self._apply(ca_id, lead, +1)
+        self.cas[ca_id].leads[lead.lead_id] = lead
+        self._refresh(ca_id)
+
+    def _detach(self, lead: Lead) -> None:
+        """リードをCAの集計から減算"""
+        if not self._is_counted(lead):
+            return
+
+        ca_id = lead.assigned_ca_id
+        self._apply(ca_id, lead, -1)
+        del self.cas[ca_id].leads[lead.lead_id]
+        self._refresh(ca_id)
+
+    def _apply(self, ca_id: str, lead: Lead, sign: int) -> None:
+        """集計値にリード1件分を加減算"""
+        aggregate = self._aggregates[ca_id]
+        rate = lead.conversion_rate or 0.0
+
+        if lead.segment_id:
+            aggregate.segment_counts[lead.segment_id] += sign
+            aggregate.segment_expected[lead.segment_id] += sign * rate
+            if aggregate.segment_counts[lead.segment_id] == 0:
+                aggregate.segment_expected[lead.segment_id] = 0.0
+        aggregate.expected_conversions += sign * rate
+
+        # 浮動小数点の誤差が残らないよう、保有ゼロになったら0に戻す
+        if aggregate.total_leads == 0:
+            aggregate.expected_conversions = 0.0
+
+    def _refresh(self, ca_id: str) -> None:
+        """集計値からCAのパフォーマンス指標を更新"""
+        aggregate = self._aggregates[ca_id]
+        self.cas[ca_id].update_performance(
+            aggregate.segment_counts, aggregate.expected_conversions
+        )
@@ -3,45 +3,125 @@
 from __future__ import annotations
 
 import csv
+import heapq
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from .models import CA, Lead, CAPerformance, SegmentType, Segment, SEGMENT_CONVERSION_RATES
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .models import (
+    CA,
+    Lead,
+    CAPerformance,
+    SegmentType,
+    Segment,
+)
+from .aggregates import DEFAULT_INACTIVE_STATUSES, CAAggregateStore
+from .assignment_optimizer import AssignmentOptimizer, AssignmentTimeoutError
+from .conversion_estimator import ConversionRateEstimator
+from .forecaster import ConversionForecast, ConversionForecaster
+from .lead_allocator import AllocationResult, LeadAllocator
+from .scenario import Scenario
 from .segment_classifier import SegmentClassifier
+from .segment_cube import SegmentCube
+from .segment_rules import SegmentRuleSet
+from .snapshot_store import SnapshotStore
 
 
 class AnalyticsEngine:
     """経営分析基盤のコアエンジン"""
 
-    def __init__(self, data_dir: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        data_dir: Optional[Path] = None,
+        rules: Optional[SegmentRuleSet] = None,
+        inactive_statuses: Iterable[str] = DEFAULT_INACTIVE_STATUSES,
+    ) -> None:
+        """
+        Args:
+            data_dir: 分析データのディレクトリ
+            rules: セグメント判定ルール（省略時は data_dir の segment_conversion_rates.csv、
+                なければ組み込みの4分類）
+            inactive_statuses: CAの保有件数に含めないリードステータス
+        """
         self.data_dir = data_dir or Path("data/sample/analytics")
-        self.leads: List[Lead] = []
+        self.inactive_statuses = frozenset(inactive_statuses)
         self.cas: Dict[str, CA] = {}
-        self.classifier = SegmentClassifier()
+        self._reset_aggregates([])
+
+        rules_path = self.data_dir / "segment_conversion_rates.csv"
+        if rules is None and rules_path.exists():
+            rules = SegmentRuleSet.from_csv(
+                rules_path,
+                prefecture_groups_path=self.data_dir / "prefecture_groups.csv",
+            )
+        self.classifier = SegmentClassifier(rules)
+        self.estimator: Optional[ConversionRateEstimator] = None
+        self.team_regions = self._load_team_regions(self.data_dir / "team_regions.csv")
+
+    @property
+    def leads(self) -> List[Lead]:
+        """全リード（追加順のコピー。追加・削除は add_lead / remove_lead で行う）"""
+        return self.aggregates.leads()
+
+    @leads.setter
+    def leads(self, leads: List[Lead]) -> None:
+        # 同じリードIDは後のリードで置き換え（位置は最初のリードの位置）
+        self._reset_aggregates({lead.lead_id: lead for lead in leads}.values())
+
+    @staticmethod
+    def _load_team_regions(filepath: Path) -> Dict[str, List[str]]:
+        """都道府県グループ → 担当チームの対応表を読み込み（ファイルがなければ制約なし）"""
+        team_regions: Dict[str, List[str]] = {}
+        if not filepath.exists():
+            return team_regions
+
+        with open(filepath, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                team_regions.setdefault(row["group"], []).append(row["team"])
+        return team_regions
 
     def load_leads_from_csv(self, filepath: Optional[Path] = None) -> List[Lead]:
         """CSVからリードデータを読み込み"""
         filepath = filepath or self.data_dir / "leads.csv"
 
-        leads = []
         with open(filepath, encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                has_qual = row.get("has_qualification", "").lower() == "true"
-                lead = Lead(
-                    lead_id=row["lead_id"],
-                    name=row["name"],
-                    age=int(row["age"]),
-                    prefecture=row["prefecture"],
-                    qualification=row["qualification"],
-                    has_qualification=has_qual,
-                    assigned_ca_id=row["assigned_ca_id"],
-                    status=row["status"],
-                    created_at=row.get("created_at", ""),
-                )
-                # セグメント自動分類
-                self.classifier.classify_lead(lead)
-                leads.append(lead)
+            rows = list(csv.DictReader(f))
+
+        # セグメント自動分類（全行を一括判定）
+        ages = np.fromiter((int(row["age"]) for row in rows), dtype=np.int64, count=len(rows))
+        has_quals = np.fromiter(
+            (row.get("has_qualification", "").lower() == "true" for row in rows),
+            dtype=bool,
+            count=len(rows),
+        )
+        codes, rates = self.classifier.classify_batch(
+            ages,
+            has_quals,
+            qualifications=[row["qualification"] for row in rows],
+            prefectures=[row["prefecture"] for row in rows],
+        )
+
+        leads = [
+            Lead(
+                lead_id=row["lead_id"],
+                name=row["name"],
+                age=age,
+                prefecture=row["prefecture"],
+                qualification=row["qualification"],
+                has_qualification=has_qual,
+                assigned_ca_id=row["assigned_ca_id"],
+                status=row["status"],
+                segment_id=self.classifier.segment_for_code(code),
+                conversion_rate=rate,
+                created_at=row.get("created_at", ""),
+                rules=self.classifier.rules,
+            )
+            for row, age, has_qual, code, rate in zip(
+                rows, ages.tolist(), has_quals.tolist(), codes.tolist(), rates.tolist()
+            )
+        ]
 
         self.leads = leads
         return leads
@@ -64,23 +144,125 @@ class AnalyticsEngine:
                 cas[ca.ca_id] = ca
 
         self.cas = cas
+        self._reset_aggregates()
         return cas
 
     def assign_leads_to_cas(self) -> None:
-        """リードをCAに割り当て"""
-        for lead in self.leads:
-            if lead.assigned_ca_id in self.cas:
-                self.cas[lead.assigned_ca_id].leads.append(lead)
+        """リードをCAに割り当て（集計ストアを作り直すため、繰り返し呼んでも重複しない）"""
+        self._reset_aggregates()
+
+    def _reset_aggregates(self, leads: Optional[Iterable[Lead]] = None) -> None:
+        """
+        CA集計ストアと多次元集計キューブを作り直し、リードを登録し直す
+
+        Args:
+            leads: 登録するリード（Noneの場合は現在のリード）
+        """
+        if leads is None:
+            leads = self.leads
+        self.aggregates = CAAggregateStore(self.cas, inactive_statuses=self.inactive_statuses)
+        self.cube = SegmentCube({ca_id: ca.team for ca_id, ca in self.cas.items()})
+        self.aggregates.subscribe(self.cube)
+        self.aggregates.add_leads(leads)
+
+    def add_lead(self, lead: Lead) -> Lead:
+        """リードを追加し、担当CAの集計を更新"""
+        if lead.segment_id is None:
+            self.classifier.classify_lead(lead)
+        self.aggregates.add_lead(lead)
+        return lead
+
+    def remove_lead(self, lead_id: str) -> Lead:
+        """リードを削除し、担当CAの集計を更新"""
+        return self.aggregates.remove_lead(lead_id)
+
+    def reassign_lead(self, lead_id: str, ca_id: str) -> Lead:
+        """リードを別のCAに再割り当てし、両CAの集計を更新"""
+        return self.aggregates.reassign_lead(lead_id, ca_id)
+
+    def update_lead_status(self, lead_id: str, status: str) -> Lead:
+        """リードのステータスを変更し、担当CAの集計を更新"""
+        return self.aggregates.update_status(lead_id, status)
+
+    def load_conversion_history(
+        self,
+        filepath: Optional[Path] = None,
+        prior_strength: float = 20.0,
+        cell_prior_strength: float = 10.0,
+        use_cell_rates: bool = True,
+    ) -> ConversionRateEstimator:
+        """
+        展開実績CSVから展開率を推定し、セグメント判定・CA別集計に反映
+
+        Args:
+            filepath: 展開実績CSVのパス（デフォルト: conversion_history.csv）
+            prior_strength: セグメント別推定の事前分布の重み（仮想件数）
+            cell_prior_strength: セグメント×都道府県×CA別推定の事前分布の重み（仮想件数）
+            use_cell_rates: リードの期待展開率にセグメント×都道府県×CA別の推定値を使うか
+
+        Returns:
+            ConversionRateEstimator: 展開率推定器（以降の実績は record_conversion_outcome で加算）
+        """
+        filepath = filepath or self.data_dir / "conversion_history.csv"
+
+        # 事前平均は常に元の判定ルールの展開率（推定値を事前分布に二重に使わない）
+        base_rules = self.estimator.rules if self.estimator else self.classifier.rules
+        self.estimator = ConversionRateEstimator.from_csv(
+            filepath,
+            rules=base_rules,
+            prior_strength=prior_strength,
+            cell_prior_strength=cell_prior_strength,
+        )
+        self.apply_conversion_estimates(use_cell_rates=use_cell_rates)
+        return self.estimator
+
+    def record_conversion_outcome(self, lead_id: str, success: bool) -> None:
+        """
+        リードの展開結果を推定器に加算（推定値の反映は apply_conversion_estimates で行う）
+
+        Args:
+            lead_id: リードID
+            success: 展開に成功したか
+        """
+        if self.estimator is None:
+            raise RuntimeError("Conversion history is not loaded")
+
+        lead = self.aggregates.get_lead(lead_id)
+        if lead is None:
+            raise KeyError(f"Lead not found: {lead_id}")
+        if lead.segment_id is None:
+            return
 
-        # 各CAのパフォーマンスを再計算
-        for ca in self.cas.values():
-            ca.calculate_performance()
+        self.estimator.add_outcome(
+            lead.segment_id.value, success, prefecture=lead.prefecture, ca_id=lead.assigned_ca_id
+        )
+
+    def apply_conversion_estimates(self, use_cell_rates: bool = True) -> None:
+        """
+        推定した展開率をセグメント判定ルール・リードの期待展開率・CA別集計に反映
+
+        Args:
+            use_cell_rates: リードの期待展開率にセグメント×都道府県×CA別の推定値を使うか
+        """
+        if self.estimator is None:
+            raise RuntimeError("Conversion history is not loaded")
+
+        self.classifier = SegmentClassifier(self.estimator.to_rule_set())
+        self.classifier.classify_leads(self.leads)
+        if use_cell_rates:
+            for lead in self.leads:
+                lead.conversion_rate = self.estimator.lead_rate(lead)
+        self.assign_leads_to_cas()
 
     def get_segment_summary(self) -> Dict[SegmentType, Dict[str, Any]]:
         """セグメント別サマリーを取得"""
         summary: Dict[SegmentType, Dict[str, Any]] = {
-            seg: {"count": 0, "expected_conversions": 0.0, "conversion_rate": rate}
-            for seg, rate in SEGMENT_CONVERSION_RATES.items()
+            seg: {
+                "count": 0,
+                "expected_conversions": 0.0,
+                "conversion_rate": self.classifier.get_conversion_rate(seg),
+            }
+            for seg in SegmentType
         }
 
         for lead in self.leads:
@@ -94,32 +276,38 @@ class AnalyticsEngine:
         """CA別サマリーを取得"""
         summaries = []
         for ca in self.cas.values():
+            perf = self.aggregates.get_performance(ca.ca_id)
             summaries.append(
                 {
                     "ca_id": ca.ca_id,
                     "name": ca.name,
                     "team": ca.team,
                     "target_leads": ca.target_leads,
-                    "current_leads": ca.current_leads,
-                    "segment_a_count": ca.performance.segment_a_count,
-                    "segment_b_count": ca.performance.segment_b_count,
-                    "segment_c_count": ca.performance.segment_c_count,
-                    "segment_d_count": ca.performance.segment_d_count,
-                    "target_expected_conversions": round(
-                        ca.performance.target_expected_conversions, 2
-                    ),
-                    "current_expected_conversions": round(
-                        ca.performance.current_expected_conversions, 2
-                    ),
-                    "achievement_rate": round(ca.performance.achievement_rate, 2),
-                    "avg_conversion_rate": round(ca.performance.avg_conversion_rate, 2),
-                    "status": ca.performance.status,
+                    "current_leads": perf.total_leads,
+                    "segment_a_count": perf.segment_a_count,
+                    "segment_b_count": perf.segment_b_count,
+                    "segment_c_count": perf.segment_c_count,
+                    "segment_d_count": perf.segment_d_count,
+                    "target_expected_conversions": round(perf.target_expected_conversions, 2),
+                    "current_expected_conversions": round(perf.current_expected_conversions, 2),
+                    "achievement_rate": round(perf.achievement_rate, 2),
+                    "avg_conversion_rate": round(perf.avg_conversion_rate, 2),
+                    "status": perf.status,
                 }
             )
         return summaries
 
-    def get_lead_allocation_suggestion(self, new_lead: Lead) -> List[Dict[str, Any]]:
-        """新規リードの振り分け提案を取得"""
+    def get_lead_allocation_suggestion(
+        self,
+        new_lead: Lead,
+        top_n: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """新規リードの振り分け提案を取得
+
+        Args:
+            new_lead: 新規リード
+            top_n: 上位何件の提案を返すか（省略時は全CA）
+        """
         # セグメント分類
         self.classifier.classify_lead(new_lead)
 
@@ -129,7 +317,7 @@ class AnalyticsEngine:
             vacancy = ca.target_leads - ca.current_leads
 
             # スコア計算（空き枠が多く、達成率が低いCAを優先）
-            score = vacancy * (1 - ca.performance.achievement_rate)
+            score = LeadAllocator.score(ca)
 
             suggestions.append(
                 {
@@ -145,9 +333,127 @@ class AnalyticsEngine:
             )
 
         # スコア順にソート
+        if top_n is not None:
+            return heapq.nlargest(top_n, suggestions, key=lambda x: x["score"])
         suggestions.sort(key=lambda x: x["score"], reverse=True)
         return suggestions
 
+    def allocate_leads(
+        self,
+        new_leads: List[Lead],
+        max_per_segment: Optional[Dict[SegmentType, int]] = None,
+    ) -> List[AllocationResult]:
+        """
+        新規リードを一括でCAに振り分け
+
+        割り当てのたびに割り当て先CAの空き枠・達成率を更新するため、
+        同じCAにリードが集中しない。
+
+        Args:
+            new_leads: 新規リード
+            max_per_segment: CA1人あたりのセグメント別保有上限
+
+        Returns:
+            入力順の振り分け結果（振り分け先がないリードは ca_id=None）
+        """
+        unclassified = [lead for lead in new_leads if lead.segment_id is None]
+        self.classifier.classify_leads(unclassified)
+
+        allocator = LeadAllocator(self.aggregates, max_per_segment=max_per_segment)
+        results = allocator.allocate_batch(new_leads)
+        return results
+
+    def optimize_lead_allocation(
+        self,
+        new_leads: List[Lead],
+        max_per_segment: Optional[Dict[SegmentType, int]] = None,
+        team_capacity: Optional[Dict[str, int]] = None,
+        time_limit: Optional[float] = 1.0,
+    ) -> List[AllocationResult]:
+        """
+        新規リードを期待展開数の合計が最大になるよう一括でCAに振り分け
+
+        空き枠・セグメント別保有上限・チーム制約（team_regions.csv）を満たす範囲で、
+        展開率の高いリードを優先して割り当てる。制限時間を超えた場合は
+        スコア順の逐次振り分け（allocate_leads と同じ方式）に切り替え、
+        各結果の fallback_reason にその理由を記録する。
+
+        Args:
+            new_leads: 新規リード
+            max_per_segment: CA1人あたりのセグメント別保有上限
+            team_capacity: チーム別の保有リード数上限
+            time_limit: 最適化の制限時間（秒、Noneは無制限）
+
+        Returns:
+            入力順の振り分け結果（振り分け先がないリードは ca_id=None）
+        """
+        unclassified = [lead for lead in new_leads if lead.segment_id is None]
+        self.classifier.classify_leads(unclassified)
+
+        optimizer = AssignmentOptimizer(
+            self.aggregates,
+            prefecture_groups=self.classifier.rules.prefecture_groups,
+            team_regions=self.team_regions,
+            max_per_segment=max_per_segment,
+            team_capacity=team_capacity,
+        )
+        try:
+            results = optimizer.optimize(new_leads, time_limit=time_limit)
+        except AssignmentTimeoutError as e:
+            allocator = LeadAllocator(
+                self.aggregates,
+                max_per_segment=max_per_segment,
+                is_eligible=optimizer.is_eligible,
+            )
+            results = allocator.allocate_batch(new_leads)
+            for result in results:
+                result.fallback_reason = str(e)
+
+        return results
+
+    def forecast_conversions(
+        self,
+        n_trials: int = 20_000,
+        seed: Optional[int] = None,
+    ) -> ConversionForecast:
+        """
+        保有リードの展開数をシミュレーションし、CA別・チーム別の予測分布を取得
+
+        Args:
+            n_trials: 試行回数
+            seed: 乱数シード
+
+        Returns:
+            ConversionForecast: p10/p50/p90 と目標達成確率
+        """
+        return ConversionForecaster(n_trials=n_trials, seed=seed).forecast(self.cas.values())
+
+    def scenario(self, name: str = "") -> Scenario:
+        """
+        What-ifシナリオを作成（現状のリード・集計値は変更しない）
+
+        例: engine.scenario("CA003に資格なし若手を10件").add_leads("CA003", SegmentType.C, 10).evaluate()
+        """
+        return Scenario(self.aggregates, self.classifier, name)
+
+    def save_snapshot(
+        self,
+        snapshot_dir: Optional[Path] = None,
+        snapshot_date: Optional[date] = None,
+    ) -> Path:
+        """
+        現在のCA×セグメント別保有状況を日付スナップショットとして保存
+
+        Args:
+            snapshot_dir: 保存ディレクトリ（デフォルト: data_dir/snapshots）
+            snapshot_date: スナップショット日付（デフォルト: 今日）
+
+        Returns:
+            Path: 保存したパーティションのパス
+        """
+        store = SnapshotStore(snapshot_dir or self.data_dir / "snapshots")
+        return store.record(self.aggregates, snapshot_date)
+
     def generate_segment_report(self) -> str:
         """セグメント別レポートを生成"""
         summary = self.get_segment_summary()
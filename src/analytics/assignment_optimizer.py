@@ -0,0 +1,306 @@
+"""リード一括振り分けの最適化（最小費用流）"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .aggregates import CAAggregateStore
+from .lead_allocator import AllocationResult, LeadAllocator
+from .models import CA, Lead, SegmentType
+
+# 容量制限なしの辺に設定する容量
+INF_CAPACITY = 10 ** 12
+
+
+class AssignmentTimeoutError(Exception):
+    """最適化が制限時間内に終わらなかった"""
+
+
+@dataclass
+class _LeadGroup:
+    """同じ展開率・同じ振り分け可能チームのリードの束"""
+
+    segment: Optional[SegmentType]
+    rate: float
+    teams: Optional[FrozenSet[str]]  # Noneは全チーム可
+    leads: List[Lead] = field(default_factory=list)
+
+
+class _FlowNetwork:
+    """残余グラフ（辺 i の逆辺は i ^ 1）"""
+
+    def __init__(self, n_nodes: int) -> None:
+        self.adjacency: List[List[int]] = [[] for _ in range(n_nodes)]
+        self.to: List[int] = []
+        self.capacity: List[int] = []
+
+    def add_edge(self, u: int, v: int, capacity: int) -> int:
+        """辺を追加して辺番号を返す"""
+        index = len(self.to)
+        self.adjacency[u].append(index)
+        self.to.append(v)
+        self.capacity.append(capacity)
+        self.adjacency[v].append(index + 1)
+        self.to.append(u)
+        self.capacity.append(0)
+        return index
+
+    def push(self, path: Sequence[int], amount: int) -> None:
+        """経路上の辺にフローを流す"""
+        for index in path:
+            self.capacity[index] -= amount
+            self.capacity[index ^ 1] += amount
+
+    def flow(self, index: int) -> int:
+        """辺に流れているフロー量"""
+        return self.capacity[index ^ 1]
+
+    def augmenting_path(self, source: int, sink: int) -> Optional[List[int]]:
+        """残余グラフ上の増加路を幅優先探索"""
+        parent_edge: Dict[int, int] = {source: -1}
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for index in self.adjacency[u]:
+                v = self.to[index]
+                if self.capacity[index] <= 0 or v in parent_edge:
+                    continue
+                parent_edge[v] = index
+                if v == sink:
+                    path = []
+                    while v != source:
+                        index = parent_edge[v]
+                        path.append(index)
+                        v = self.to[index ^ 1]
+                    path.reverse()
+                    return path
+                queue.append(v)
+        return None
+
+
+class AssignmentOptimizer:
+    """期待展開数の合計を最大化するリード一括振り分け
+
+    リードを（セグメント, 展開率, 振り分け可能チーム）の束にまとめ、
+    束 → (CA, セグメント) → CA → チーム → 終点 のネットワークで最小費用流を解く。
+    費用は束から出る辺（-展開率）にしかないため、最短増加路は
+    「展開率の高い束から順に、既存フローの付け替えを含めて流せるだけ流す」ことと同値になる。
+    同じ束の中では、空き枠 ×（1 - 達成率）のスコアが高いCAから順に割り当てて負荷を平準化する。
+
+    制約:
+        - CAの空き枠（target_leads - current_leads）
+        - CA1人あたりのセグメント別保有上限（max_per_segment）
+        - 都道府県グループ → 担当チームの対応（team_regions）
+        - チーム別の保有上限（team_capacity）
+    """
+
+    def __init__(
+        self,
+        aggregates: CAAggregateStore,
+        prefecture_groups: Optional[Dict[str, str]] = None,
+        team_regions: Optional[Dict[str, Sequence[str]]] = None,
+        max_per_segment: Optional[Dict[SegmentType, int]] = None,
+        team_capacity: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Args:
+            aggregates: 振り分け結果を反映するCA集計ストア
+            prefecture_groups: 都道府県 → 都道府県グループの対応表
+            team_regions: 都道府県グループ → 担当チームの対応表（未定義のグループは全チーム可）
+            max_per_segment: CA1人あたりのセグメント別保有上限
+            team_capacity: チーム別の保有リード数上限
+        """
+        self.aggregates = aggregates
+        self.prefecture_groups = dict(prefecture_groups or {})
+        self.team_regions: Dict[str, FrozenSet[str]] = {
+            region: frozenset(teams) for region, teams in (team_regions or {}).items()
+        }
+        self.max_per_segment = dict(max_per_segment or {})
+        self.team_capacity = dict(team_capacity or {})
+
+    def eligible_teams(self, lead: Lead) -> Optional[FrozenSet[str]]:
+        """リードを担当できるチーム（Noneは全チーム可）"""
+        region = self.prefecture_groups.get(lead.prefecture)
+        return self.team_regions.get(region) if region else None
+
+    def is_eligible(self, lead: Lead, ca: CA) -> bool:
+        """CAがリードを担当できるか（チーム対応・チーム上限）"""
+        teams = self.eligible_teams(lead)
+        if teams is not None and ca.team not in teams:
+            return False
+
+        if ca.team in self.team_capacity:
+            team_load = sum(
+                other.current_leads for other in self.aggregates.cas.values()
+                if other.team == ca.team
+            )
+            if team_load >= self.team_capacity[ca.team]:
+                return False
+        return True
+
+    def optimize(
+        self,
+        leads: Sequence[Lead],
+        time_limit: Optional[float] = None,
+    ) -> List[AllocationResult]:
+        """
+        リードを一括で最適に振り分け
+
+        Args:
+            leads: 振り分け対象のリード（セグメント分類済み）
+            time_limit: 制限時間（秒）。超過した場合は AssignmentTimeoutError を送出し、何も反映しない
+
+        Returns:
+            入力順の振り分け結果（振り分け先がないリードは ca_id=None）
+        """
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        groups = self._group_leads(leads)
+        assignments = self._solve(groups, deadline)
+
+        # 解をリードに展開して集計ストアに反映
+        results: Dict[str, AllocationResult] = {}
+        for group, ca_counts in zip(groups, assignments):
+            pending = iter(group.leads)
+            for ca_id, count in ca_counts:
+                ca = self.aggregates.cas[ca_id]
+                score = LeadAllocator.score(ca)
+                for _ in range(count):
+                    lead = next(pending)
+                    if self.aggregates.get_lead(lead.lead_id) is None:
+                        lead.assigned_ca_id = ca_id
+                        self.aggregates.add_lead(lead)
+                    else:
+                        self.aggregates.reassign_lead(lead.lead_id, ca_id)
+                    results[lead.lead_id] = AllocationResult(lead=lead, ca_id=ca_id, score=score)
+
+        return [
+            results.get(lead.lead_id) or AllocationResult(lead=lead, ca_id=None)
+            for lead in leads
+        ]
+
+    def _group_leads(self, leads: Sequence[Lead]) -> List[_LeadGroup]:
+        """リードを展開率の高い順の束にまとめる"""
+        groups: Dict[Tuple, _LeadGroup] = {}
+        for lead in leads:
+            rate = lead.conversion_rate or 0.0
+            teams = self.eligible_teams(lead)
+            key = (lead.segment_id, rate, teams)
+            if key not in groups:
+                groups[key] = _LeadGroup(segment=lead.segment_id, rate=rate, teams=teams)
+            groups[key].leads.append(lead)
+
+        return sorted(groups.values(), key=lambda g: g.rate, reverse=True)
+
+    def _solve(
+        self,
+        groups: List[_LeadGroup],
+        deadline: Optional[float],
+    ) -> List[List[Tuple[str, int]]]:
+        """束ごとのCA別割り当て件数を求める"""
+        cas = list(self.aggregates.cas.values())
+        teams = sorted({ca.team for ca in cas})
+        segments = [segment for segment in SegmentType if segment in self.max_per_segment]
+
+        # ノード番号: 束 | (CA, 上限付きセグメント) | CA | チーム | 終点
+        ca_seg_base = len(groups)
+        ca_base = ca_seg_base + len(cas) * len(segments)
+        team_base = ca_base + len(cas)
+        sink = team_base + len(teams)
+        network = _FlowNetwork(sink + 1)
+        team_index = {team: i for i, team in enumerate(teams)}
+
+        # CA → チーム → 終点
+        team_edges = {}
+        for team, t in team_index.items():
+            capacity = INF_CAPACITY
+            if team in self.team_capacity:
+                held = sum(ca.current_leads for ca in cas if ca.team == team)
+                capacity = max(self.team_capacity[team] - held, 0)
+            team_edges[team] = network.add_edge(team_base + t, sink, capacity)
+
+        ca_edges = []
+        for c, ca in enumerate(cas):
+            vacancy = max(ca.target_leads - ca.current_leads, 0)
+            ca_edges.append(network.add_edge(ca_base + c, team_base + team_index[ca.team], vacancy))
+
+        # (CA, セグメント) → CA（セグメント別保有上限）
+        seg_edges: Dict[Tuple[int, SegmentType], int] = {}
+        for c, ca in enumerate(cas):
+            counts = self.aggregates.get_aggregate(ca.ca_id).segment_counts
+            for s, segment in enumerate(segments):
+                headroom = max(self.max_per_segment[segment] - counts[segment], 0)
+                seg_edges[(c, segment)] = network.add_edge(
+                    ca_seg_base + c * len(segments) + s, ca_base + c, headroom
+                )
+
+        # 束 → CA（上限付きセグメントは (CA, セグメント) 経由）
+        group_edges: List[List[Tuple[int, int]]] = []
+        for g, group in enumerate(groups):
+            edges = []
+            for c, ca in enumerate(cas):
+                if group.teams is not None and ca.team not in group.teams:
+                    continue
+                if group.segment in self.max_per_segment:
+                    target = ca_seg_base + c * len(segments) + segments.index(group.segment)
+                else:
+                    target = ca_base + c
+                edges.append((c, network.add_edge(g, target, INF_CAPACITY)))
+            group_edges.append(edges)
+
+        # 平準化用のCA状態（空き枠・期待展開数）
+        remaining = [max(ca.target_leads - ca.current_leads, 0) for ca in cas]
+        expected = [ca.performance.current_expected_conversions for ca in cas]
+        targets = [ca.performance.target_expected_conversions for ca in cas]
+
+        def score(c: int) -> float:
+            achievement = expected[c] / targets[c] if targets[c] > 0 else 0.0
+            return remaining[c] * (1 - achievement)
+
+        for g, group in enumerate(groups):
+            supply = len(group.leads)
+
+            # 直接経路: スコアの高いCAから1件ずつ割り当て
+            heap = [(-score(c), c, edge) for c, edge in group_edges[g]]
+            heapq.heapify(heap)
+            while supply and heap:
+                _, c, edge = heapq.heappop(heap)
+                path = [edge]
+                if group.segment in self.max_per_segment:
+                    path.append(seg_edges[(c, group.segment)])
+                path.append(ca_edges[c])
+                path.append(team_edges[cas[c].team])
+                if min(network.capacity[index] for index in path) <= 0:
+                    continue  # 枠切れのCAは以後この束では使わない
+
+                network.push(path, 1)
+                supply -= 1
+                remaining[c] -= 1
+                expected[c] += group.rate
+                heapq.heappush(heap, (-score(c), c, edge))
+
+            # 既存の割り当ての付け替えで流せる分（増加路）を流す
+            while supply:
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise AssignmentTimeoutError("Lead assignment optimization exceeded time limit")
+                path = network.augmenting_path(g, sink)
+                if path is None:
+                    break
+                amount = min(supply, min(network.capacity[index] for index in path))
+                network.push(path, amount)
+                supply -= amount
+
+            if deadline is not None and time.perf_counter() > deadline:
+                raise AssignmentTimeoutError("Lead assignment optimization exceeded time limit")
+
+        return [
+            [
+                (cas[c].ca_id, network.flow(edge))
+                for c, edge in group_edges[g]
+                if network.flow(edge) > 0
+            ]
+            for g in range(len(groups))
+        ]
@@ -0,0 +1,219 @@
+"""展開実績からの展開率推定"""
+
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import Lead
+from .segment_rules import DEFAULT_SEGMENT_RULES, SegmentRuleSet
+
+# 年齢層の表記: "20代" "30代" ...
+_AGE_GROUP_PATTERN = re.compile(r"^(\d+)代")
+
+# 資格なしを表す表記
+NO_QUALIFICATION_VALUES = frozenset({"", "なし", "無し", "-"})
+
+
+@dataclass
+class OutcomeCounts:
+    """展開実績の件数"""
+
+    successes: int = 0
+    trials: int = 0
+
+    def add(self, success: bool) -> None:
+        """実績を1件加算"""
+        self.trials += 1
+        if success:
+            self.successes += 1
+
+
+class ConversionRateEstimator:
+    """展開実績からセグメント別・(セグメント×都道府県×CA)別の展開率を推定
+
+    ベータ事前分布による縮小推定を行う。
+        セグメント別: 判定ルールの期待展開率を事前平均、prior_strength 件分の重みとする
+        セグメント×都道府県×CA別: セグメント別の推定値を事前平均、cell_prior_strength 件分の重みとする
+    件数は実績1件ごとにO(1)で加算し、推定値は参照時に件数から計算するため、
+    新しい実績が追加されても履歴全体を読み直す必要はない。
+    """
+
+    def __init__(
+        self,
+        rules: Optional[SegmentRuleSet] = None,
+        prior_strength: float = 20.0,
+        cell_prior_strength: float = 10.0,
+    ) -> None:
+        """
+        Args:
+            rules: セグメント判定ルール（実績の分類と事前平均に使用）
+            prior_strength: セグメント別推定の事前分布の重み（仮想件数）
+            cell_prior_strength: セグメント×都道府県×CA別推定の事前分布の重み（仮想件数）
+        """
+        if prior_strength <= 0 or cell_prior_strength <= 0:
+            raise ValueError("Prior strengths must be positive")
+
+        self.rules = rules or DEFAULT_SEGMENT_RULES
+        self.prior_strength = prior_strength
+        self.cell_prior_strength = cell_prior_strength
+        self._prior_rates = self.rules.segment_rates()
+        self._segment_counts: Dict[str, OutcomeCounts] = {}
+        self._cell_counts: Dict[Tuple[str, str, str], OutcomeCounts] = {}
+
+    @classmethod
+    def from_csv(
+        cls,
+        filepath: Path,
+        rules: Optional[SegmentRuleSet] = None,
+        prior_strength: float = 20.0,
+        cell_prior_strength: float = 10.0,
+    ) -> ConversionRateEstimator:
+        """展開実績CSV（conversion_history.csv 形式）から推定器を作成"""
+        estimator = cls(rules, prior_strength, cell_prior_strength)
+        estimator.load_csv(filepath)
+        return estimator
+
+    @staticmethod
+    def age_from_group(age_group: str) -> int:
+        """年齢層を代表年齢に変換（"30代" → 35）"""
+        match = _AGE_GROUP_PATTERN.match(age_group.strip())
+        if not match:
+            raise ValueError(f"Unsupported age group: {age_group}")
+        return int(match.group(1)) + 5
+
+    def load_csv(self, filepath: Path) -> int:
+        """
+        展開実績CSVを読み込んで件数に加算
+
+        Args:
+            filepath: 展開実績CSVのパス
+
+        Returns:
+            int: 加算した実績件数（セグメント判定できなかった行を除く）
+        """
+        added = 0
+        with open(filepath, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if self.add_record(row):
+                    added += 1
+        return added
+
+    def add_record(self, row: Dict[str, str]) -> Optional[str]:
+        """
+        展開実績1行（conversion_history.csv の列）をセグメント判定して加算
+
+        Returns:
+            判定されたセグメントID（判定できない場合はNone）
+        """
+        qualification = row.get("qualification", "").strip()
+        has_qualification = qualification not in NO_QUALIFICATION_VALUES
+        segment_id, _ = self.rules.lookup(
+            self.age_from_group(row["age_group"]),
+            qualification,
+            has_qualification,
+            row.get("prefecture", ""),
+        )
+        if segment_id is None:
+            return None
+
+        self.add_outcome(
+            segment_id,
+            row.get("result", "").strip().lower() == "success",
+            prefecture=row.get("prefecture", ""),
+            ca_id=row.get("ca_id", ""),
+        )
+        return segment_id
+
+    def add_outcome(
+        self,
+        segment_id: str,
+        success: bool,
+        prefecture: str = "",
+        ca_id: str = "",
+    ) -> None:
+        """
+        展開結果を1件加算
+
+        Args:
+            segment_id: セグメントID
+            success: 展開に成功したか
+            prefecture: 都道府県
+            ca_id: 担当CA ID
+        """
+        self._segment_counts.setdefault(segment_id, OutcomeCounts()).add(success)
+        self._cell_counts.setdefault((segment_id, prefecture, ca_id), OutcomeCounts()).add(success)
+
+    def get_counts(
+        self,
+        segment_id: str,
+        prefecture: Optional[str] = None,
+        ca_id: Optional[str] = None,
+    ) -> OutcomeCounts:
+        """セグメント別（都道府県・CAを指定した場合はセル別）の実績件数"""
+        if prefecture is None and ca_id is None:
+            return self._segment_counts.get(segment_id, OutcomeCounts())
+        return self._cell_counts.get((segment_id, prefecture or "", ca_id or ""), OutcomeCounts())
+
+    def prior_rate(self, segment_id: str) -> float:
+        """セグメントの事前平均（判定ルールの期待展開率）"""
+        return self._prior_rates.get(segment_id, 0.0)
+
+    def segment_rate(self, segment_id: str) -> float:
+        """セグメント別の推定展開率（事前平均への縮小推定）"""
+        return self._shrink(
+            self.get_counts(segment_id), self.prior_rate(segment_id), self.prior_strength
+        )
+
+    def cell_rate(self, segment_id: str, prefecture: str, ca_id: str) -> float:
+        """セグメント×都道府県×CA別の推定展開率（セグメント別推定値への縮小推定）"""
+        return self._shrink(
+            self.get_counts(segment_id, prefecture, ca_id),
+            self.segment_rate(segment_id),
+            self.cell_prior_strength,
+        )
+
+    def lead_rate(self, lead: Lead) -> float:
+        """リードの推定展開率（セグメント×都道府県×担当CA）"""
+        if lead.segment_id is None:
+            return 0.0
+        return self.cell_rate(lead.segment_id.value, lead.prefecture, lead.assigned_ca_id)
+
+    def to_rule_set(self) -> SegmentRuleSet:
+        """
+        判定ルールの期待展開率を推定値に置き換えたルール集合を作成
+
+        同じセグメントに複数のルールがある場合は、各ルールの展開率を事前平均として
+        セグメントの実績で縮小推定する。
+        """
+        rules = [
+            replace(
+                rule,
+                conversion_rate=self._shrink(
+                    self.get_counts(rule.segment_id), rule.conversion_rate, self.prior_strength
+                ),
+            )
+            for rule in self.rules.rules
+        ]
+        return SegmentRuleSet(rules, self.rules.prefecture_groups)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """セグメント別の推定結果"""
+        return [
+            {
+                "segment_id": segment_id,
+                "prior_rate": round(self.prior_rate(segment_id), 4),
+                "successes": self.get_counts(segment_id).successes,
+                "trials": self.get_counts(segment_id).trials,
+                "estimated_rate": round(self.segment_rate(segment_id), 4),
+            }
+            for segment_id in self.rules.segment_ids
+        ]
+
+    @staticmethod
+    def _shrink(counts: OutcomeCounts, prior_mean: float, prior_strength: float) -> float:
+        """ベータ事前分布 Beta(prior_mean×k, (1-prior_mean)×k) の事後平均"""
+        return (counts.successes + prior_mean * prior_strength) / (counts.trials + prior_strength)
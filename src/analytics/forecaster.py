@@ -0,0 +1,205 @@
+"""モンテカルロ法による展開数予測"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .models import CA
+
+# 1チャンクあたりの乱数生成数の上限（試行数 × リード束数）
+MAX_DRAWS_PER_CHUNK = 4_000_000
+
+
+@dataclass
+class ForecastBand:
+    """展開数の予測分布（CA別・チーム別）"""
+
+    key: str  # ca_id またはチーム名
+    expected: float  # 期待展開数（点推定）
+    std: float
+    p10: float
+    p50: float
+    p90: float
+    target: float  # 目標期待展開数
+    prob_hit_target: float  # 目標を達成する確率
+
+    def to_dict(self) -> Dict:
+        """辞書形式に変換"""
+        return {
+            "key": self.key,
+            "expected": round(self.expected, 2),
+            "std": round(self.std, 2),
+            "p10": self.p10,
+            "p50": self.p50,
+            "p90": self.p90,
+            "target": round(self.target, 2),
+            "prob_hit_target": round(self.prob_hit_target, 3),
+        }
+
+
+@dataclass
+class ConversionForecast:
+    """展開数予測の結果"""
+
+    n_trials: int
+    ca_bands: Dict[str, ForecastBand] = field(default_factory=dict)
+    team_bands: Dict[str, ForecastBand] = field(default_factory=dict)
+
+
+class ConversionForecaster:
+    """保有リードの展開結果をシミュレーションして展開数の分布を推定
+
+    各リードの展開を期待展開率のベルヌーイ試行とみなす。
+    同じCA・同じ展開率のリードはまとめて二項分布から（一様乱数1個の逆関数法で）生成するため、
+    乱数生成数はリード数ではなく（CA × 展開率の種類）数に比例する。
+    """
+
+    def __init__(self, n_trials: int = 20_000, seed: Optional[int] = None) -> None:
+        """
+        Args:
+            n_trials: 試行回数
+            seed: 乱数シード（再現性が必要な場合に指定）
+        """
+        if n_trials <= 0:
+            raise ValueError(f"n_trials must be positive: {n_trials}")
+        self.n_trials = n_trials
+        self.seed = seed
+
+    def simulate(self, cas: Iterable[CA]) -> Tuple[List[CA], np.ndarray]:
+        """
+        CA別の展開数をシミュレーション
+
+        Args:
+            cas: 対象CA（保有リードは CA.leads を使用）
+
+        Returns:
+            (CAリスト, 展開数配列[試行, CA])
+        """
+        cas = list(cas)
+        rng = np.random.default_rng(self.seed)
+
+        # (CA, 展開率) ごとのリード数
+        counts: List[int] = []
+        rates: List[float] = []
+        starts: List[int] = []
+        has_leads: List[int] = []
+        for c, ca in enumerate(cas):
+            grouped = Counter(lead.conversion_rate or 0.0 for lead in ca.leads.values())
+            if not grouped:
+                continue
+            starts.append(len(counts))
+            has_leads.append(c)
+            for rate, n in grouped.items():
+                counts.append(n)
+                rates.append(rate)
+
+        results = np.zeros((self.n_trials, len(cas)), dtype=np.int32)
+        if not counts:
+            return cas, results
+
+        thresholds = self._binomial_thresholds(counts, rates)
+        draw_dtype = np.uint8 if max(counts) <= np.iinfo(np.uint8).max else np.int32
+        starts_arr = np.asarray(starts, dtype=np.intp)
+        has_leads_arr = np.asarray(has_leads, dtype=np.intp)
+
+        chunk = max(1, MAX_DRAWS_PER_CHUNK // len(counts))
+        for begin in range(0, self.n_trials, chunk):
+            end = min(begin + chunk, self.n_trials)
+            uniforms = rng.random((end - begin, len(counts)), dtype=np.float32)
+            draws = np.zeros(uniforms.shape, dtype=draw_dtype)
+            for row in thresholds:
+                draws += uniforms >= row
+            results[begin:end, has_leads_arr] = np.add.reduceat(
+                draws, starts_arr, axis=1, dtype=np.int32
+            )
+
+        return cas, results
+
+    def forecast(self, cas: Iterable[CA]) -> ConversionForecast:
+        """
+        CA別・チーム別の展開数予測を算出
+
+        Args:
+            cas: 対象CA
+
+        Returns:
+            ConversionForecast: パーセンタイル帯と目標達成確率
+        """
+        cas, results = self.simulate(cas)
+        forecast = ConversionForecast(n_trials=self.n_trials)
+
+        for c, ca in enumerate(cas):
+            forecast.ca_bands[ca.ca_id] = self._band(
+                ca.ca_id,
+                results[:, c],
+                ca.performance.current_expected_conversions,
+                ca.performance.target_expected_conversions,
+            )
+
+        # チーム別はCA別の試行結果を合算
+        teams = sorted({ca.team for ca in cas})
+        membership = np.zeros((len(cas), len(teams)), dtype=np.int32)
+        for c, ca in enumerate(cas):
+            membership[c, teams.index(ca.team)] = 1
+        team_results = results @ membership
+
+        for t, team in enumerate(teams):
+            members = [ca for ca in cas if ca.team == team]
+            forecast.team_bands[team] = self._band(
+                team,
+                team_results[:, t],
+                sum(ca.performance.current_expected_conversions for ca in members),
+                sum(ca.performance.target_expected_conversions for ca in members),
+            )
+
+        return forecast
+
+    @staticmethod
+    def _binomial_thresholds(counts: List[int], rates: List[float]) -> np.ndarray:
+        """
+        二項分布の累積分布表（逆関数法の閾値）を作成
+
+        確率質量は漸化式 pmf[k+1] = pmf[k] × (n-k)/(k+1) × p/(1-p) を対数で累積して求める
+        （comb(n, k) × p ** k を直接計算すると、リード数が1000件を超えたあたりでオーバーフローする）。
+
+        Returns:
+            閾値配列[k, 束]。一様乱数 u について (u >= 閾値[k]) の個数が展開数になる
+            （k >= n の行は到達しない値 2.0 で埋め、どの束でも累積確率が1に達した後の行は省く）
+        """
+        thresholds = np.full((max(counts), len(counts)), 2.0, dtype=np.float32)
+        for g, (n, p) in enumerate(zip(counts, rates)):
+            p = min(max(p, 0.0), 1.0)
+            if p <= 0.0 or p >= 1.0:
+                # 全件不成立（閾値1.0には到達しない）または全件成立
+                thresholds[:n, g] = 1.0 if p <= 0.0 else 0.0
+                continue
+            k = np.arange(n - 1, dtype=np.float64)
+            log_pmf = np.empty(n, dtype=np.float64)
+            log_pmf[0] = n * np.log1p(-p)
+            log_pmf[1:] = log_pmf[0] + np.cumsum(
+                np.log((n - k) / (k + 1)) + np.log(p) - np.log1p(-p)
+            )
+            thresholds[:n, g] = np.minimum(np.cumsum(np.exp(log_pmf)), 1.0)
+
+        # 一様乱数は1未満なので、全束の閾値が1以上の行は展開数に影響しない
+        reachable = np.flatnonzero((thresholds < 1.0).any(axis=1))
+        return thresholds[: reachable[-1] + 1 if reachable.size else 0]
+
+    @staticmethod
+    def _band(key: str, samples: np.ndarray, expected: float, target: float) -> ForecastBand:
+        """試行結果から予測分布を集計"""
+        p10, p50, p90 = np.percentile(samples, [10, 50, 90])
+        return ForecastBand(
+            key=key,
+            expected=expected,
+            std=float(samples.std()),
+            p10=float(p10),
+            p50=float(p50),
+            p90=float(p90),
+            target=target,
+            prob_hit_target=float(np.mean(samples >= target)),
+        )
@@ -0,0 +1,146 @@
+"""ヒープによるリード一括振り分け"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .aggregates import CAAggregateStore
+from .models import CA, Lead, SegmentType, SEGMENT_PRIORITY
+
+
+@dataclass
+class AllocationResult:
+    """リード振り分け結果"""
+
+    lead: Lead
+    ca_id: Optional[str]  # 振り分け先がない場合はNone
+    score: float = 0.0  # 振り分け時点のCAスコア
+    fallback_reason: Optional[str] = None  # 最適化の代わりに逐次振り分けを使った理由
+
+
+class LeadAllocator:
+    """CAを優先度付きキューで管理するリード振り分けサービス
+
+    スコア（空き枠 × (1 - 達成率)）が最も高いCAにリードを割り当て、
+    割り当てたCAのスコアだけを更新してキューに戻す。
+    1件あたりO(log CA数)で振り分けられるため、1日分のリードを一括で処理できる。
+    """
+
+    def __init__(
+        self,
+        aggregates: CAAggregateStore,
+        max_per_segment: Optional[Dict[SegmentType, int]] = None,
+        is_eligible: Optional[Callable[[Lead, CA], bool]] = None,
+    ) -> None:
+        """
+        Args:
+            aggregates: 振り分け結果を反映するCA集計ストア
+            max_per_segment: CA1人あたりのセグメント別保有上限（例: {SegmentType.D: 3}）
+            is_eligible: CAがリードを担当できるかの追加条件（チーム制約など）
+        """
+        self.aggregates = aggregates
+        self.max_per_segment = dict(max_per_segment or {})
+        self.is_eligible = is_eligible
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._versions: Dict[str, int] = {}
+        self._order: Dict[str, int] = {}
+
+    @staticmethod
+    def score(ca: CA) -> float:
+        """CAの振り分けスコア（空き枠が多く、達成率が低いCAほど高い）"""
+        vacancy = ca.target_leads - ca.current_leads
+        return vacancy * (1 - ca.performance.achievement_rate)
+
+    def allocate(self, lead: Lead) -> AllocationResult:
+        """リード1件を振り分け"""
+        return self.allocate_batch([lead])[0]
+
+    def allocate_batch(self, leads: Sequence[Lead]) -> List[AllocationResult]:
+        """
+        複数リードを一括で振り分け
+
+        優先度の高いセグメントのリードから順に、空き枠のあるCAへ割り当てる。
+        空き枠・セグメント上限を満たすCAがない場合、そのリードは未割り当て（ca_id=None）となる。
+
+        Args:
+            leads: 振り分け対象のリード（セグメント分類済み）
+
+        Returns:
+            入力順の振り分け結果
+        """
+        self._build_heap()
+
+        results: Dict[int, AllocationResult] = {}
+        order = sorted(
+            range(len(leads)),
+            key=lambda i: SEGMENT_PRIORITY.get(leads[i].segment_id, len(SEGMENT_PRIORITY) + 1),
+        )
+        for i in order:
+            results[i] = self._place(leads[i])
+
+        return [results[i] for i in range(len(leads))]
+
+    def _build_heap(self) -> None:
+        """空き枠のあるCAでキューを構築"""
+        self._heap = []
+        self._versions = {}
+        self._order = {}
+        for i, ca in enumerate(self.aggregates.cas.values()):
+            self._order[ca.ca_id] = i
+            self._versions[ca.ca_id] = 0
+            if ca.target_leads - ca.current_leads > 0:
+                self._heap.append((-self.score(ca), i, 0, ca.ca_id))
+        heapq.heapify(self._heap)
+
+    def _place(self, lead: Lead) -> AllocationResult:
+        """キュー先頭から条件を満たすCAを探して割り当て"""
+        skipped = []
+        placed: Optional[Tuple[str, float]] = None
+
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            neg_score, _, version, ca_id = entry
+            if version != self._versions[ca_id]:
+                continue  # スコア更新前の古いエントリ
+
+            if self._within_segment_limit(ca_id, lead.segment_id) and (
+                self.is_eligible is None
+                or self.is_eligible(lead, self.aggregates.cas[ca_id])
+            ):
+                placed = (ca_id, -neg_score)
+                break
+            skipped.append(entry)
+
+        # 条件を満たさず見送ったCAはスコアが変わっていないのでそのまま戻す
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+
+        if placed is None:
+            return AllocationResult(lead=lead, ca_id=None)
+
+        ca_id, score = placed
+        if self.aggregates.get_lead(lead.lead_id) is None:
+            lead.assigned_ca_id = ca_id
+            self.aggregates.add_lead(lead)
+        else:
+            self.aggregates.reassign_lead(lead.lead_id, ca_id)
+
+        # 割り当てたCAのスコアだけを更新してキューに戻す
+        ca = self.aggregates.cas[ca_id]
+        self._versions[ca_id] += 1
+        if ca.target_leads - ca.current_leads > 0:
+            heapq.heappush(
+                self._heap,
+                (-self.score(ca), self._order[ca_id], self._versions[ca_id], ca_id),
+            )
+
+        return AllocationResult(lead=lead, ca_id=ca_id, score=score)
+
+    def _within_segment_limit(self, ca_id: str, segment: Optional[SegmentType]) -> bool:
+        """セグメント別保有上限を満たすか"""
+        if segment is None or segment not in self.max_per_segment:
+            return True
+        held = self.aggregates.get_aggregate(ca_id).segment_counts[segment]
+        return held < self.max_per_segment[segment]
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import InitVar, dataclass, field
 from enum import Enum
-from typing import Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .segment_rules import SegmentRuleSet
 
 
 class SegmentType(str, Enum):
@@ -24,6 +27,14 @@ SEGMENT_CONVERSION_RATES: Dict[SegmentType, float] = {
     SegmentType.D: 0.20,
 }
 
+# 一括分類で使用するセグメントコード（配列インデックス = コード）
+SEGMENT_CODES: Tuple[SegmentType, ...] = (
+    SegmentType.A,
+    SegmentType.B,
+    SegmentType.C,
+    SegmentType.D,
+)
+
 # セグメント優先度（1が最高）
 SEGMENT_PRIORITY: Dict[SegmentType, int] = {
     SegmentType.A: 1,
@@ -98,20 +109,33 @@ class Lead:
     segment_id: Optional[SegmentType] = None
     conversion_rate: Optional[float] = None
     created_at: str = ""
+    rules: InitVar[Optional[SegmentRuleSet]] = None  # セグメント判定ルール（省略時は組み込みの4分類）
 
-    def __post_init__(self) -> None:
+    def __post_init__(self, rules: Optional[SegmentRuleSet]) -> None:
         """セグメントと期待展開率を自動設定"""
+        if rules is not None:
+            segment_id, rate = rules.lookup(
+                self.age, self.qualification, self.has_qualification, self.prefecture
+            )
+            if self.segment_id is None:
+                self.segment_id = SegmentType(segment_id) if segment_id else None
+            if self.conversion_rate is None:
+                self.conversion_rate = rate
+            return
+
         if self.segment_id is None:
             self.segment_id = self._calculate_segment()
         if self.conversion_rate is None:
             self.conversion_rate = SEGMENT_CONVERSION_RATES.get(self.segment_id, 0.0)
 
-    def _calculate_segment(self) -> SegmentType:
-        """資格有無×年齢からセグメントを自動判定"""
-        if self.has_qualification:
-            return SegmentType.A if self.age <= 40 else SegmentType.B
-        else:
-            return SegmentType.C if self.age <= 40 else SegmentType.D
+    def _calculate_segment(self) -> Optional[SegmentType]:
+        """デフォルトのセグメント判定ルールからセグメントを自動判定"""
+        from .segment_rules import DEFAULT_SEGMENT_RULES
+
+        segment_id, _ = DEFAULT_SEGMENT_RULES.lookup(
+            self.age, self.qualification, self.has_qualification, self.prefecture
+        )
+        return SegmentType(segment_id) if segment_id else None
 
 
 StatusType = Literal["on_track", "below_target", "at_risk"]
@@ -141,6 +165,61 @@ class CAPerformance:
             + self.segment_d_count
         )
 
+    @classmethod
+    def from_aggregates(
+        cls,
+        segment_counts: Dict[SegmentType, int],
+        expected_conversions: float,
+        target_leads: int,
+    ) -> CAPerformance:
+        """
+        セグメント別件数と期待展開数の集計値から指標を算出
+
+        Args:
+            segment_counts: セグメント別の保有リード数
+            expected_conversions: 保有リードの期待展開数（展開率の合計）
+            target_leads: 目標リード数
+
+        Returns:
+            CAPerformance: 算出したパフォーマンス指標
+        """
+        perf = cls(
+            segment_a_count=segment_counts.get(SegmentType.A, 0),
+            segment_b_count=segment_counts.get(SegmentType.B, 0),
+            segment_c_count=segment_counts.get(SegmentType.C, 0),
+            segment_d_count=segment_counts.get(SegmentType.D, 0),
+            current_expected_conversions=expected_conversions,
+        )
+
+        # 目標期待展開数（目標リード数 × 平均展開率0.5を想定）
+        # 実際には目標に対する期待値を設定する必要がある
+        perf.target_expected_conversions = target_leads * 0.5
+
+        # 達成率
+        if perf.target_expected_conversions > 0:
+            perf.achievement_rate = (
+                perf.current_expected_conversions / perf.target_expected_conversions
+            )
+        else:
+            perf.achievement_rate = 0.0
+
+        # 平均展開率
+        total_leads = perf.total_leads
+        if total_leads > 0:
+            perf.avg_conversion_rate = perf.current_expected_conversions / total_leads
+        else:
+            perf.avg_conversion_rate = 0.0
+
+        # ステータス判定
+        if perf.achievement_rate >= 0.8:
+            perf.status = "on_track"
+        elif perf.achievement_rate >= 0.5:
+            perf.status = "below_target"
+        else:
+            perf.status = "at_risk"
+
+        return perf
+
 
 @dataclass
 class CA:
@@ -153,52 +232,28 @@ class CA:
     target_leads: int
     current_leads: int = 0
     performance: CAPerformance = field(default_factory=CAPerformance)
-    leads: List[Lead] = field(default_factory=list)
+    leads: Dict[str, Lead] = field(default_factory=dict)  # lead_id → Lead（追加順）
 
     def calculate_performance(self) -> None:
         """保有リードからパフォーマンス指標を再計算"""
         counts = {SegmentType.A: 0, SegmentType.B: 0, SegmentType.C: 0, SegmentType.D: 0}
 
-        for lead in self.leads:
+        for lead in self.leads.values():
             if lead.segment_id:
                 counts[lead.segment_id] += 1
 
-        self.performance.segment_a_count = counts[SegmentType.A]
-        self.performance.segment_b_count = counts[SegmentType.B]
-        self.performance.segment_c_count = counts[SegmentType.C]
-        self.performance.segment_d_count = counts[SegmentType.D]
-        self.current_leads = self.performance.total_leads
-
         # 期待展開数を計算
-        self.performance.current_expected_conversions = sum(
-            lead.conversion_rate or 0.0 for lead in self.leads
+        expected_conversions = sum(lead.conversion_rate or 0.0 for lead in self.leads.values())
+
+        self.update_performance(counts, expected_conversions)
+
+    def update_performance(
+        self,
+        segment_counts: Dict[SegmentType, int],
+        expected_conversions: float,
+    ) -> None:
+        """集計済みのセグメント別件数・期待展開数からパフォーマンス指標を更新"""
+        self.performance = CAPerformance.from_aggregates(
+            segment_counts, expected_conversions, self.target_leads
         )
-
-        # 目標期待展開数（目標リード数 × 平均展開率0.5を想定）
-        # 実際には目標に対する期待値を設定する必要がある
-        self.performance.target_expected_conversions = self.target_leads * 0.5
-
-        # 達成率
-        if self.performance.target_expected_conversions > 0:
-            self.performance.achievement_rate = (
-                self.performance.current_expected_conversions
-                / self.performance.target_expected_conversions
-            )
-        else:
-            self.performance.achievement_rate = 0.0
-
-        # 平均展開率
-        if self.current_leads > 0:
-            self.performance.avg_conversion_rate = (
-                self.performance.current_expected_conversions / self.current_leads
-            )
-        else:
-            self.performance.avg_conversion_rate = 0.0
-
-        # ステータス判定
-        if self.performance.achievement_rate >= 0.8:
-            self.performance.status = "on_track"
-        elif self.performance.achievement_rate >= 0.5:
-            self.performance.status = "below_target"
-        else:
-            self.performance.status = "at_risk"
+        self.current_leads = self.performance.total_leads
@@ -0,0 +1,253 @@
+"""What-ifシミュレーション（リード再配分・目標変更・展開率変更）"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List
+
+from .aggregates import CAAggregateStore
+from .models import CAPerformance, SegmentType
+from .segment_classifier import SegmentClassifier
+
+
+@dataclass
+class ScenarioResult:
+    """シナリオの評価結果"""
+
+    name: str
+    performances: Dict[str, CAPerformance]  # ca_id → シナリオ適用後の指標
+    base_performances: Dict[str, CAPerformance]  # ca_id → 現状の指標
+    changed_ca_ids: List[str] = field(default_factory=list)
+
+    @property
+    def total_expected_conversions(self) -> float:
+        """全CAの期待展開数の合計"""
+        return sum(perf.current_expected_conversions for perf in self.performances.values())
+
+    def status_counts(self) -> Dict[str, int]:
+        """ステータス別のCA人数"""
+        counts: Dict[str, int] = {}
+        for perf in self.performances.values():
+            counts[perf.status] = counts.get(perf.status, 0) + 1
+        return counts
+
+    def get_changes(self) -> List[Dict[str, Any]]:
+        """指標が変わったCAの変化（現状 → シナリオ）"""
+        changes = []
+        for ca_id in self.changed_ca_ids:
+            before = self.base_performances[ca_id]
+            after = self.performances[ca_id]
+            changes.append(
+                {
+                    "ca_id": ca_id,
+                    "leads_before": before.total_leads,
+                    "leads_after": after.total_leads,
+                    "expected_before": round(before.current_expected_conversions, 2),
+                    "expected_after": round(after.current_expected_conversions, 2),
+                    "achievement_before": round(before.achievement_rate, 2),
+                    "achievement_after": round(after.achievement_rate, 2),
+                    "status_before": before.status,
+                    "status_after": after.status,
+                }
+            )
+        return changes
+
+
+class Scenario:
+    """現状の集計値に重ねる仮定（オーバーレイ）
+
+    リードや集計値は複製せず、CA×セグメント別の差分・目標の上書き・展開率の上書きだけを保持する。
+    評価時は変更の影響を受けるCAだけ指標を再計算し、それ以外は現状の指標をそのまま使う。
+    """
+
+    def __init__(
+        self,
+        aggregates: CAAggregateStore,
+        classifier: SegmentClassifier,
+        name: str = "",
+    ) -> None:
+        """
+        Args:
+            aggregates: 現状のCA集計ストア（変更しない）
+            classifier: 仮想リードの期待展開率の参照に使う分類器
+            name: シナリオ名
+        """
+        self.aggregates = aggregates
+        self.classifier = classifier
+        self.name = name
+        self._count_deltas: Dict[str, Dict[SegmentType, int]] = {}
+        self._expected_deltas: Dict[str, Dict[SegmentType, float]] = {}
+        self._targets: Dict[str, int] = {}
+        self._rates: Dict[SegmentType, float] = {}
+        self._reassigned: Dict[str, str] = {}  # lead_id → シナリオ上の担当CA
+
+    def fork(self, name: str = "") -> Scenario:
+        """このシナリオを起点に別のシナリオを作成（差分のみ複製）"""
+        scenario = Scenario(self.aggregates, self.classifier, name or self.name)
+        scenario._count_deltas = {k: dict(v) for k, v in self._count_deltas.items()}
+        scenario._expected_deltas = {k: dict(v) for k, v in self._expected_deltas.items()}
+        scenario._targets = dict(self._targets)
+        scenario._rates = dict(self._rates)
+        scenario._reassigned = dict(self._reassigned)
+        return scenario
+
+    def add_leads(self, ca_id: str, segment: SegmentType, count: int) -> Scenario:
+        """
+        CAに仮想の新規リードを追加（負の値で削除）
+
+        Args:
+            ca_id: CA ID
+            segment: リードのセグメント
+            count: 件数
+        """
+        self._check_ca(ca_id)
+        if count < 0:
+            self._take(ca_id, segment, -count)
+            return self
+
+        rate = self._rates.get(segment, self.classifier.get_conversion_rate(segment))
+        self._add(ca_id, segment, count, count * rate)
+        return self
+
+    def move_leads(
+        self,
+        from_ca_id: str,
+        to_ca_id: str,
+        segment: SegmentType,
+        count: int,
+    ) -> Scenario:
+        """
+        セグメントのリードを別のCAに再配分
+
+        移動するリードの期待展開率は、移動元CAが保有する同セグメントリードの平均とする。
+        """
+        self._check_ca(to_ca_id)
+        expected = self._take(from_ca_id, segment, count)
+        self._add(to_ca_id, segment, count, expected)
+        return self
+
+    def reassign_lead(self, lead_id: str, ca_id: str) -> Scenario:
+        """
+        特定のリードを別のCAに再割り当て
+
+        同じシナリオで再割り当て済みのリードは、シナリオ上の担当CAから移動する。
+        保有件数に含めないステータスのリードは担当CAだけ変わり、指標には影響しない。
+        """
+        self._check_ca(ca_id)
+        lead = self.aggregates.get_lead(lead_id)
+        if lead is None:
+            raise KeyError(f"Lead not found: {lead_id}")
+        if lead.segment_id is None:
+            raise ValueError(f"Lead has no segment: {lead_id}")
+
+        current_ca_id = self._reassigned.get(lead_id, lead.assigned_ca_id)
+        self._reassigned[lead_id] = ca_id
+        if current_ca_id == ca_id or lead.status in self.aggregates.inactive_statuses:
+            return self
+
+        rate = lead.conversion_rate or 0.0
+        if current_ca_id in self.aggregates.cas:
+            self._add(current_ca_id, lead.segment_id, -1, -rate)
+        self._add(ca_id, lead.segment_id, 1, rate)
+        return self
+
+    def set_target(self, ca_id: str, target_leads: int) -> Scenario:
+        """CAの目標リード数を変更"""
+        self._check_ca(ca_id)
+        self._targets[ca_id] = target_leads
+        return self
+
+    def set_segment_rate(self, segment: SegmentType, rate: float) -> Scenario:
+        """セグメントの期待展開率を変更（そのセグメントの全リードに適用）"""
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Conversion rate must be between 0 and 1: {rate}")
+        self._rates[segment] = rate
+        return self
+
+    def affected_ca_ids(self) -> List[str]:
+        """指標の再計算が必要なCA"""
+        affected = set(self._count_deltas) | set(self._targets)
+        if self._rates:
+            for ca_id in self.aggregates.cas:
+                counts = self.aggregates.get_aggregate(ca_id).segment_counts
+                if any(counts[segment] for segment in self._rates):
+                    affected.add(ca_id)
+        return [ca_id for ca_id in self.aggregates.cas if ca_id in affected]
+
+    def evaluate(self) -> ScenarioResult:
+        """シナリオを適用した場合のCA別指標を算出"""
+        base = {ca_id: ca.performance for ca_id, ca in self.aggregates.cas.items()}
+        performances = dict(base)
+
+        changed = []
+        for ca_id in self.affected_ca_ids():
+            perf = self._evaluate_ca(ca_id)
+            performances[ca_id] = perf
+            if perf != base[ca_id]:
+                changed.append(ca_id)
+
+        return ScenarioResult(
+            name=self.name,
+            performances=performances,
+            base_performances=base,
+            changed_ca_ids=changed,
+        )
+
+    def _evaluate_ca(self, ca_id: str) -> CAPerformance:
+        """CA1人分の指標をオーバーレイ込みで再計算"""
+        aggregate = self.aggregates.get_aggregate(ca_id)
+        count_deltas = self._count_deltas.get(ca_id, {})
+        expected_deltas = self._expected_deltas.get(ca_id, {})
+
+        counts = {}
+        expected = 0.0
+        for segment in SegmentType:
+            count = aggregate.segment_counts[segment] + count_deltas.get(segment, 0)
+            counts[segment] = count
+            if segment in self._rates:
+                expected += count * self._rates[segment]
+            else:
+                expected += aggregate.segment_expected[segment] + expected_deltas.get(segment, 0.0)
+
+        target = self._targets.get(ca_id, self.aggregates.cas[ca_id].target_leads)
+        return CAPerformance.from_aggregates(counts, max(expected, 0.0), target)
+
+    def _check_ca(self, ca_id: str) -> None:
+        if ca_id not in self.aggregates.cas:
+            raise KeyError(f"CA not found: {ca_id}")
+
+    def _held(self, ca_id: str, segment: SegmentType) -> int:
+        """シナリオ適用後の保有件数"""
+        return (
+            self.aggregates.get_aggregate(ca_id).segment_counts[segment]
+            + self._count_deltas.get(ca_id, {}).get(segment, 0)
+        )
+
+    def _take(self, ca_id: str, segment: SegmentType, count: int) -> float:
+        """CAからセグメントのリードを平均展開率で取り除き、取り除いた期待展開数を返す"""
+        self._check_ca(ca_id)
+        held = self._held(ca_id, segment)
+        if count > held:
+            raise ValueError(
+                f"{ca_id} holds only {held} segment {segment.value} leads (requested {count})"
+            )
+
+        aggregate = self.aggregates.get_aggregate(ca_id)
+        held_expected = aggregate.segment_expected[segment] + self._expected_deltas.get(
+            ca_id, {}
+        ).get(segment, 0.0)
+        expected = held_expected * count / held if held else 0.0
+        self._add(ca_id, segment, -count, -expected)
+        return expected
+
+    def _add(self, ca_id: str, segment: SegmentType, count: int, expected: float) -> None:
+        """CA×セグメントの差分を加算"""
+        counts = self._count_deltas.setdefault(ca_id, {})
+        counts[segment] = counts.get(segment, 0) + count
+        expected_deltas = self._expected_deltas.setdefault(ca_id, {})
+        expected_deltas[segment] = expected_deltas.get(segment, 0.0) + expected
+
+
+def evaluate_scenarios(scenarios: Iterable[Scenario]) -> List[ScenarioResult]:
+    """複数シナリオを評価"""
+    return [scenario.evaluate() for scenario in scenarios]
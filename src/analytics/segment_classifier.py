@@ -2,38 +2,142 @@
 
 from __future__ import annotations
 
-from typing import List
+import functools
+from typing import Any, Callable, List, Optional, Sequence, Tuple
 
-from .models import Lead, SegmentType, SEGMENT_CONVERSION_RATES
+import numpy as np
+
+from .models import Lead, SegmentType
+from .segment_rules import DEFAULT_SEGMENT_RULES, SegmentRuleSet
+
+
+class _default_instance_method:
+    """クラスから呼び出した場合はデフォルトルールの分類器で実行するメソッド
+
+    SegmentClassifier.classify_lead(lead) のような従来の（静的メソッドとしての）呼び出しを、
+    組み込みの4分類ルールの共有インスタンスに委譲する。
+    """
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        functools.update_wrapper(self, func)
+
+    def __get__(self, instance: Optional[SegmentClassifier], owner: type) -> Callable[..., Any]:
+        if instance is None:
+            instance = owner.default()
+        return self.func.__get__(instance, owner)
 
 
 class SegmentClassifier:
-    """リードのセグメント自動分類"""
+    """リードのセグメント自動分類
 
-    @staticmethod
-    def assign_segment(has_qualification: bool, age: int) -> SegmentType:
+    判定条件と期待展開率は SegmentRuleSet（データファイルから読み込み可能）に従う。
+    assign_segment・get_conversion_rate・classify_lead・classify_leads はクラスから直接呼び出すと
+    組み込みの4分類ルールで判定する（従来の静的メソッドと互換）。
+    """
+
+    _default: Optional[SegmentClassifier] = None
+
+    @classmethod
+    def default(cls) -> SegmentClassifier:
+        """組み込みの4分類ルールの分類器（共有インスタンス）"""
+        if cls._default is None:
+            cls._default = cls(DEFAULT_SEGMENT_RULES)
+        return cls._default
+
+    def __init__(self, rules: Optional[SegmentRuleSet] = None) -> None:
         """
-        資格有無×年齢からセグメントを自動判定
+        Args:
+            rules: セグメント判定ルール（デフォルト: 資格有無×40歳境界の4分類）
+        """
+        self.rules = rules or DEFAULT_SEGMENT_RULES
+
+        # セグメントコード → SegmentType（CA別集計・レポートはA〜Dの4分類を前提とする）
+        try:
+            self.segment_types: Tuple[SegmentType, ...] = tuple(
+                SegmentType(segment_id) for segment_id in self.rules.segment_ids
+            )
+        except ValueError as e:
+            raise ValueError(
+                f"Segment rules must map onto segments {[s.value for s in SegmentType]}: {e}"
+            ) from e
+        self._segment_rates = self.rules.segment_rates()
+
+    @_default_instance_method
+    def assign_segment(
+        self,
+        has_qualification: bool,
+        age: int,
+        qualification: str = "",
+        prefecture: str = "",
+    ) -> Optional[SegmentType]:
+        """
+        資格有無×年齢（×資格種別×都道府県）からセグメントを自動判定
 
         Args:
             has_qualification: 電気工事士資格の有無
             age: 年齢
+            qualification: 資格名（資格種別ルールがある場合に使用）
+            prefecture: 都道府県（都道府県グループルールがある場合に使用）
 
         Returns:
-            SegmentType: 判定されたセグメント
+            SegmentType: 判定されたセグメント（該当ルールなしの場合はNone）
         """
-        if has_qualification:
-            return SegmentType.A if age <= 40 else SegmentType.B
-        else:
-            return SegmentType.C if age <= 40 else SegmentType.D
+        segment_id, _ = self.rules.lookup(age, qualification, has_qualification, prefecture)
+        return SegmentType(segment_id) if segment_id else None
 
-    @staticmethod
-    def get_conversion_rate(segment: SegmentType) -> float:
+    @_default_instance_method
+    def get_conversion_rate(self, segment: SegmentType) -> float:
         """セグメントの期待展開率を取得"""
-        return SEGMENT_CONVERSION_RATES.get(segment, 0.0)
+        return self._segment_rates.get(segment.value, 0.0)
 
-    @classmethod
-    def classify_lead(cls, lead: Lead) -> Lead:
+    def segment_for_code(self, code: int) -> Optional[SegmentType]:
+        """一括判定のセグメントコードをSegmentTypeに変換"""
+        return self.segment_types[code] if code >= 0 else None
+
+    def classify_batch(
+        self,
+        ages: Sequence[int] | np.ndarray,
+        has_qualification: Sequence[bool] | np.ndarray,
+        qualifications: Optional[Sequence[str]] = None,
+        prefectures: Optional[Sequence[str]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        年齢・資格有無の配列からセグメントと期待展開率を一括判定
+
+        Args:
+            ages: 年齢の配列
+            has_qualification: 電気工事士資格有無の配列
+            qualifications: 資格名の配列（省略時は資格種別を区別しない）
+            prefectures: 都道府県の配列（省略時は都道府県グループを区別しない）
+
+        Returns:
+            (セグメントコード配列, 期待展開率配列)
+            セグメントコードは segment_types のインデックス（該当ルールなしは -1）
+        """
+        ages_arr = np.asarray(ages)
+        qual_arr = np.asarray(has_qualification, dtype=bool)
+        if ages_arr.shape != qual_arr.shape:
+            raise ValueError(
+                f"ages and has_qualification must have the same shape: "
+                f"{ages_arr.shape} != {qual_arr.shape}"
+            )
+
+        # 資格名の指定がなければ資格有無のみでコード化（資格なし=0, 資格あり=1）
+        qual_codes = (
+            self.rules.encode_qualifications(qualifications, qual_arr)
+            if qualifications is not None
+            else qual_arr.astype(np.int16)
+        )
+        pref_codes = (
+            self.rules.encode_prefectures(prefectures)
+            if prefectures is not None
+            else np.zeros(len(qual_arr), dtype=np.int16)
+        )
+        return self.rules.classify_batch(ages_arr, qual_codes, pref_codes)
+
+    @_default_instance_method
+    def classify_lead(self, lead: Lead) -> Lead:
         """
         リードにセグメントと期待展開率を設定
 
@@ -43,14 +147,29 @@ class SegmentClassifier:
         Returns:
             Lead: セグメント情報が設定されたリード
         """
-        lead.segment_id = cls.assign_segment(lead.has_qualification, lead.age)
-        lead.conversion_rate = cls.get_conversion_rate(lead.segment_id)
+        segment_id, rate = self.rules.lookup(
+            lead.age, lead.qualification, lead.has_qualification, lead.prefecture
+        )
+        lead.segment_id = SegmentType(segment_id) if segment_id else None
+        lead.conversion_rate = rate
         return lead
 
-    @classmethod
-    def classify_leads(cls, leads: List[Lead]) -> List[Lead]:
+    @_default_instance_method
+    def classify_leads(self, leads: List[Lead]) -> List[Lead]:
         """複数リードを一括分類"""
-        return [cls.classify_lead(lead) for lead in leads]
+        if not leads:
+            return leads
+
+        codes, rates = self.classify_batch(
+            np.fromiter((lead.age for lead in leads), dtype=np.int64, count=len(leads)),
+            np.fromiter((lead.has_qualification for lead in leads), dtype=bool, count=len(leads)),
+            qualifications=[lead.qualification for lead in leads],
+            prefectures=[lead.prefecture for lead in leads],
+        )
+        for lead, code, rate in zip(leads, codes.tolist(), rates.tolist()):
+            lead.segment_id = self.segment_for_code(code)
+            lead.conversion_rate = rate
+        return leads
 
     @staticmethod
     def get_segment_description(segment: SegmentType) -> str:
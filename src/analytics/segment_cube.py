@@ -0,0 +1,223 @@
+"""多次元セグメント集計キューブ"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import Lead
+
+# キューブの次元
+CUBE_DIMENSIONS: Tuple[str, ...] = (
+    "segment",
+    "prefecture",
+    "qualification",
+    "age_band",
+    "ca_id",
+    "team",
+    "status",
+)
+
+CellKey = Tuple[str, ...]
+
+
+@dataclass
+class CubeCell:
+    """集計セル"""
+
+    lead_count: int = 0
+    expected_conversions: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換"""
+        return {
+            "lead_count": self.lead_count,
+            "expected_conversions": round(self.expected_conversions, 2),
+        }
+
+
+def age_band(age: int) -> str:
+    """年齢を年齢層に変換（35 → "30代"）"""
+    return f"{max(age, 0) // 10 * 10}代"
+
+
+class SegmentCube:
+    """都道府県×資格×年齢層×CA×チーム×ステータス（×セグメント）の集計キューブ
+
+    全次元の組み合わせごとのセル（基本セル）をリードの追加・削除のたびに増分更新する。
+    一部の次元で集計したビュー（キューボイド）は初回の問い合わせ時に作成して保持し、
+    以降は基本セルと同時に増分更新するため、問い合わせでリードを走査し直すことはない。
+    """
+
+    def __init__(self, ca_teams: Optional[Dict[str, str]] = None) -> None:
+        """
+        Args:
+            ca_teams: CA ID → チーム名の対応表
+        """
+        self.ca_teams = dict(ca_teams or {})
+        self._base: Dict[CellKey, CubeCell] = {}
+        self._cuboids: Dict[Tuple[int, ...], Dict[CellKey, CubeCell]] = {}
+
+    def lead_key(self, lead: Lead) -> CellKey:
+        """リードの基本セルのキー（CUBE_DIMENSIONS の順）"""
+        return (
+            lead.segment_id.value if lead.segment_id else "",
+            lead.prefecture,
+            lead.qualification if lead.has_qualification else "",
+            age_band(lead.age),
+            lead.assigned_ca_id,
+            self.ca_teams.get(lead.assigned_ca_id, ""),
+            lead.status,
+        )
+
+    def add_lead(self, lead: Lead) -> None:
+        """リードを集計に加算"""
+        self._apply(self.lead_key(lead), 1, lead.conversion_rate or 0.0)
+
+    def add_leads(self, leads: Iterable[Lead]) -> None:
+        """複数リードを集計に加算"""
+        for lead in leads:
+            self.add_lead(lead)
+
+    def remove_lead(self, lead: Lead) -> None:
+        """リードを集計から減算"""
+        self._apply(self.lead_key(lead), -1, -(lead.conversion_rate or 0.0))
+
+    def materialize(self, dimensions: Sequence[str]) -> Dict[CellKey, CubeCell]:
+        """
+        指定次元で集計したキューボイドを作成（作成済みならそれを返す）
+
+        Args:
+            dimensions: 集計する次元
+
+        Returns:
+            次元の値（CUBE_DIMENSIONS の順）→ 集計セル
+        """
+        indices = self._indices(dimensions)
+        cuboid = self._cuboids.get(indices)
+        if cuboid is not None:
+            return cuboid
+
+        # 作成済みのキューボイドのうち、必要な次元を含む最小のものから集計する
+        source_indices = tuple(range(len(CUBE_DIMENSIONS)))
+        source = self._base
+        for other_indices, other in self._cuboids.items():
+            if set(indices) <= set(other_indices) and len(other) < len(source):
+                source_indices, source = other_indices, other
+
+        positions = [source_indices.index(i) for i in indices]
+        cuboid = {}
+        for key, cell in source.items():
+            sub_key = tuple(key[p] for p in positions)
+            target = cuboid.get(sub_key)
+            if target is None:
+                target = cuboid[sub_key] = CubeCell()
+            target.lead_count += cell.lead_count
+            target.expected_conversions += cell.expected_conversions
+
+        self._cuboids[indices] = cuboid
+        return cuboid
+
+    def query(
+        self,
+        group_by: Sequence[str] = (),
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[CellKey, CubeCell]:
+        """
+        集計値を取得
+
+        Args:
+            group_by: 集計軸の次元（結果のキーはこの順）
+            filters: 次元 → 値（または値の集合）の絞り込み条件
+
+        Returns:
+            集計軸の値 → 集計セル
+        """
+        filters = filters or {}
+        needed = self._indices(list(group_by) + list(filters))
+        cuboid = self.materialize([CUBE_DIMENSIONS[i] for i in needed])
+
+        group_positions = [needed.index(CUBE_DIMENSIONS.index(d)) for d in group_by]
+        conditions = []
+        for dimension, value in filters.items():
+            allowed = (
+                set(value) if isinstance(value, (set, frozenset, list, tuple)) else {value}
+            )
+            conditions.append((needed.index(CUBE_DIMENSIONS.index(dimension)), allowed))
+
+        result: Dict[CellKey, CubeCell] = {}
+        for key, cell in cuboid.items():
+            if any(key[p] not in allowed for p, allowed in conditions):
+                continue
+            group_key = tuple(key[p] for p in group_positions)
+            target = result.get(group_key)
+            if target is None:
+                target = result[group_key] = CubeCell()
+            target.lead_count += cell.lead_count
+            target.expected_conversions += cell.expected_conversions
+        return result
+
+    def roll_up(
+        self,
+        group_by: Sequence[str],
+        dimension: str,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[CellKey, CubeCell]:
+        """集計軸から次元を外して上位に集約（例: CA別 → チーム別）"""
+        return self.query([d for d in group_by if d != dimension], filters)
+
+    def drill_down(
+        self,
+        group_by: Sequence[str],
+        dimension: str,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[CellKey, CubeCell]:
+        """集計軸に次元を加えて詳細化（例: チーム別 → チーム×CA別）"""
+        return self.query(list(group_by) + [dimension], filters)
+
+    def slice(
+        self,
+        dimension: str,
+        value: Any,
+        group_by: Sequence[str] = (),
+    ) -> Dict[CellKey, CubeCell]:
+        """次元を1つの値（または値の集合）に固定して集計"""
+        return self.query(group_by, {dimension: value})
+
+    def to_rows(
+        self,
+        group_by: Sequence[str],
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """集計結果を行形式（レポート・CSV出力用）で取得"""
+        rows = []
+        for key, cell in sorted(self.query(group_by, filters).items()):
+            row: Dict[str, Any] = dict(zip(group_by, key))
+            row.update(cell.to_dict())
+            rows.append(row)
+        return rows
+
+    def _indices(self, dimensions: Iterable[str]) -> Tuple[int, ...]:
+        """次元名を CUBE_DIMENSIONS のインデックス（昇順・重複なし）に変換"""
+        indices = set()
+        for dimension in dimensions:
+            if dimension not in CUBE_DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension: {dimension} (expected one of {CUBE_DIMENSIONS})")
+            indices.add(CUBE_DIMENSIONS.index(dimension))
+        return tuple(sorted(indices))
+
+    def _apply(self, key: CellKey, count: int, expected: float) -> None:
+        """基本セルと作成済みキューボイドに加減算"""
+        self._add_to(self._base, key, count, expected)
+        for indices, cuboid in self._cuboids.items():
+            self._add_to(cuboid, tuple(key[i] for i in indices), count, expected)
+
+    @staticmethod
+    def _add_to(cells: Dict[CellKey, CubeCell], key: CellKey, count: int, expected: float) -> None:
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = CubeCell()
+        cell.lead_count += count
+        cell.expected_conversions += expected
+        if cell.lead_count == 0:
+            del cells[key]
@@ -0,0 +1,333 @@
+"""データ駆動のセグメント判定ルール
+
+セグメント定義（年齢帯・資格種別・都道府県グループ）と期待展開率をデータファイルから読み込み、
+(年齢, 資格コード, 都道府県コード) をインデックスとするルックアップテーブルにコンパイルする。
+判定はテーブル参照のみで行うため、ルール数に関係なく1件あたりO(1)で分類できる。
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import SEGMENT_CODES, SEGMENT_CONVERSION_RATES
+
+# ルックアップテーブルの年齢上限（これを超える年齢は上限に丸める）
+MAX_AGE = 120
+
+# デフォルトルールの年齢境界（この年齢以下を若手とする）
+YOUNG_AGE_LIMIT = 40
+
+# 資格コード: 0=資格なし, 1=資格あり（ルールで未指定の資格）, 2以降=ルールで指定された資格
+NO_QUALIFICATION_CODE = 0
+OTHER_QUALIFICATION_CODE = 1
+
+# 都道府県コード: 0=グループ未定義の都道府県, 1以降=グループ定義ファイルの都道府県
+UNKNOWN_PREFECTURE_CODE = 0
+
+# 年齢条件の表記: "40歳以下" / "40歳超" / "40歳未満" / "40歳以上" / "20〜39歳"
+_AGE_BOUND_PATTERN = re.compile(r"^(\d+)歳(以下|未満|超|以上)$")
+_AGE_RANGE_PATTERN = re.compile(r"^(\d+)\s*[〜~\-]\s*(\d+)歳?$")
+
+
+@dataclass(frozen=True)
+class SegmentRule:
+    """セグメント判定ルール（データファイルの1行 = 1ルール）
+
+    空の条件は「条件なし（すべてに一致）」を表す。
+    """
+
+    segment_id: str
+    name: str = ""
+    conversion_rate: float = 0.0
+    has_qualification: Optional[bool] = None
+    age_min: int = 0
+    age_max: int = MAX_AGE
+    qualifications: FrozenSet[str] = frozenset()
+    prefecture_groups: FrozenSet[str] = frozenset()
+    priority: Optional[int] = None  # 小さいほど優先（Noneは優先度指定ありのルールより後）
+
+
+class SegmentRuleSet:
+    """コンパイル済みのセグメント判定ルール集合
+
+    ルールは定義順に評価し、最初に一致したルールのセグメントと展開率を採用する。
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[SegmentRule],
+        prefecture_groups: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Args:
+            rules: 判定ルール（先頭ほど優先）
+            prefecture_groups: 都道府県 → グループ名の対応表
+        """
+        if not rules:
+            raise ValueError("At least one segment rule is required")
+
+        self.rules: Tuple[SegmentRule, ...] = tuple(rules)
+        self.prefecture_groups: Dict[str, str] = dict(prefecture_groups or {})
+
+        # セグメントID（出現順）。分類結果のセグメントコードはこのインデックス
+        segment_ids: List[str] = []
+        for rule in self.rules:
+            if rule.segment_id not in segment_ids:
+                segment_ids.append(rule.segment_id)
+        self.segment_ids: Tuple[str, ...] = tuple(segment_ids)
+
+        # 資格・都道府県の語彙をコード化
+        qualification_names = sorted({q for rule in self.rules for q in rule.qualifications})
+        self._qualification_codes: Dict[str, int] = {
+            name: i + 2 for i, name in enumerate(qualification_names)
+        }
+        self._prefecture_codes: Dict[str, int] = {
+            pref: i + 1 for i, pref in enumerate(self.prefecture_groups)
+        }
+
+        self._compile(qualification_names)
+
+    def _compile(self, qualification_names: List[str]) -> None:
+        """ルールをルックアップテーブルにコンパイル"""
+        n_quals = len(qualification_names) + 2
+        n_prefs = len(self._prefecture_codes) + 1
+
+        ages = np.arange(MAX_AGE + 1)
+        qual_names = np.array(["", ""] + qualification_names, dtype=object)
+        qual_has = np.array([False] + [True] * (n_quals - 1))
+        pref_groups = np.array([""] + list(self.prefecture_groups.values()), dtype=object)
+
+        # -1 = 該当ルールなし
+        self._segment_table = np.full((MAX_AGE + 1, n_quals, n_prefs), -1, dtype=np.int16)
+        self._rate_table = np.zeros((MAX_AGE + 1, n_quals, n_prefs), dtype=np.float64)
+
+        # 優先度の低いルールから書き込み、優先度の高いルールで上書きする
+        for rule in reversed(self.rules):
+            age_mask = (ages >= rule.age_min) & (ages <= rule.age_max)
+            qual_mask = np.ones(n_quals, dtype=bool)
+            if rule.has_qualification is not None:
+                qual_mask &= qual_has == rule.has_qualification
+            if rule.qualifications:
+                qual_mask &= np.isin(qual_names, list(rule.qualifications))
+            pref_mask = np.ones(n_prefs, dtype=bool)
+            if rule.prefecture_groups:
+                pref_mask &= np.isin(pref_groups, list(rule.prefecture_groups))
+
+            mask = age_mask[:, None, None] & qual_mask[None, :, None] & pref_mask[None, None, :]
+            self._segment_table[mask] = self.segment_ids.index(rule.segment_id)
+            self._rate_table[mask] = rule.conversion_rate
+
+        # 1件ずつの参照用（NumPyのスカラー参照よりPythonリストの方が高速）
+        self._segment_rows = self._segment_table.tolist()
+        self._rate_rows = self._rate_table.tolist()
+
+    @classmethod
+    def default(cls) -> SegmentRuleSet:
+        """組み込みの4分類（資格有無×40歳境界）ルール"""
+        rules = []
+        for segment in SEGMENT_CODES:
+            has_qual = segment.value in ("A", "B")
+            young = segment.value in ("A", "C")
+            rules.append(
+                SegmentRule(
+                    segment_id=segment.value,
+                    conversion_rate=SEGMENT_CONVERSION_RATES[segment],
+                    has_qualification=has_qual,
+                    age_min=0 if young else YOUNG_AGE_LIMIT + 1,
+                    age_max=YOUNG_AGE_LIMIT if young else MAX_AGE,
+                )
+            )
+        return cls(rules)
+
+    @classmethod
+    def from_csv(
+        cls,
+        rules_path: Path,
+        prefecture_groups_path: Optional[Path] = None,
+    ) -> SegmentRuleSet:
+        """
+        CSVからルールを読み込み
+
+        ルールCSVの列（segment_conversion_rates.csv 形式）:
+            segment_id, segment_name, conversion_rate: 必須
+            has_qualification: true/false（空欄は条件なし）
+            age_condition: "40歳以下" "40歳超" "20〜39歳" など（空欄は条件なし）
+            age_min, age_max: 年齢範囲（age_condition より優先）
+            qualifications: 資格名を "|" 区切りで指定（空欄は条件なし）
+            prefecture_group: 都道府県グループ名を "|" 区切りで指定（空欄は条件なし）
+            priority: 判定の優先順位（小さいほど優先、空欄は指定ありのルールより後で行順）
+
+        ルールは priority 順に評価するため、CSVの行の並びを変えても判定結果は変わらない。
+
+        Args:
+            rules_path: ルールCSVのパス
+            prefecture_groups_path: 都道府県グループCSV（prefecture, group列）のパス
+
+        Returns:
+            SegmentRuleSet: コンパイル済みのルール集合
+        """
+        rules = []
+        with open(rules_path, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                age_min, age_max = cls.parse_age_condition(row.get("age_condition", ""))
+                if row.get("age_min"):
+                    age_min = int(row["age_min"])
+                if row.get("age_max"):
+                    age_max = int(row["age_max"])
+
+                has_qual_text = (row.get("has_qualification") or "").strip().lower()
+                priority_text = (row.get("priority") or "").strip()
+                rules.append(
+                    SegmentRule(
+                        segment_id=row["segment_id"],
+                        name=row.get("segment_name", ""),
+                        conversion_rate=float(row["conversion_rate"]),
+                        has_qualification=None if not has_qual_text else has_qual_text == "true",
+                        age_min=age_min,
+                        age_max=age_max,
+                        qualifications=_split_values(row.get("qualifications")),
+                        prefecture_groups=_split_values(row.get("prefecture_group")),
+                        priority=int(priority_text) if priority_text else None,
+                    )
+                )
+
+        # 優先順位順に並べる（同じ優先順位・指定なしは行順を保つ）
+        rules.sort(key=lambda rule: (rule.priority is None, rule.priority or 0))
+
+        prefecture_groups: Dict[str, str] = {}
+        if prefecture_groups_path and prefecture_groups_path.exists():
+            with open(prefecture_groups_path, encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    prefecture_groups[row["prefecture"]] = row["group"]
+
+        return cls(rules, prefecture_groups)
+
+    @staticmethod
+    def parse_age_condition(condition: str) -> Tuple[int, int]:
+        """
+        年齢条件の表記を (下限, 上限) に変換
+
+        Args:
+            condition: "40歳以下" "40歳超" "40歳未満" "40歳以上" "20〜39歳" のいずれか（空欄は条件なし）
+
+        Returns:
+            (age_min, age_max): 両端を含む年齢範囲
+        """
+        condition = (condition or "").strip()
+        if not condition:
+            return 0, MAX_AGE
+
+        match = _AGE_BOUND_PATTERN.match(condition)
+        if match:
+            age, op = int(match.group(1)), match.group(2)
+            return {
+                "以下": (0, age),
+                "未満": (0, age - 1),
+                "超": (age + 1, MAX_AGE),
+                "以上": (age, MAX_AGE),
+            }[op]
+
+        match = _AGE_RANGE_PATTERN.match(condition)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+
+        raise ValueError(f"Unsupported age condition: {condition}")
+
+    def qualification_code(self, qualification: str, has_qualification: bool) -> int:
+        """資格名・資格有無を資格コードに変換"""
+        if not has_qualification:
+            return NO_QUALIFICATION_CODE
+        return self._qualification_codes.get(qualification, OTHER_QUALIFICATION_CODE)
+
+    def prefecture_code(self, prefecture: str) -> int:
+        """都道府県名を都道府県コードに変換"""
+        return self._prefecture_codes.get(prefecture, UNKNOWN_PREFECTURE_CODE)
+
+    def encode_qualifications(
+        self,
+        qualifications: Iterable[str],
+        has_qualifications: Sequence[bool] | np.ndarray,
+    ) -> np.ndarray:
+        """資格名の配列を資格コード配列に変換"""
+        has_arr = np.asarray(has_qualifications, dtype=bool)
+        codes = np.fromiter(
+            (self._qualification_codes.get(q, OTHER_QUALIFICATION_CODE) for q in qualifications),
+            dtype=np.int16,
+            count=len(has_arr),
+        )
+        codes[~has_arr] = NO_QUALIFICATION_CODE
+        return codes
+
+    def encode_prefectures(self, prefectures: Sequence[str]) -> np.ndarray:
+        """都道府県名の配列を都道府県コード配列に変換"""
+        return np.fromiter(
+            (self._prefecture_codes.get(p, UNKNOWN_PREFECTURE_CODE) for p in prefectures),
+            dtype=np.int16,
+            count=len(prefectures),
+        )
+
+    def lookup(
+        self,
+        age: int,
+        qualification: str = "",
+        has_qualification: bool = False,
+        prefecture: str = "",
+    ) -> Tuple[Optional[str], float]:
+        """
+        単一リードのセグメントと期待展開率をテーブル参照で判定
+
+        Returns:
+            (セグメントID, 期待展開率)。該当ルールがない場合は (None, 0.0)
+        """
+        age_index = min(max(age, 0), MAX_AGE)
+        qual_code = self.qualification_code(qualification, has_qualification)
+        pref_code = self.prefecture_code(prefecture)
+
+        code = self._segment_rows[age_index][qual_code][pref_code]
+        if code < 0:
+            return None, 0.0
+        return self.segment_ids[code], self._rate_rows[age_index][qual_code][pref_code]
+
+    def classify_batch(
+        self,
+        ages: Sequence[int] | np.ndarray,
+        qualification_codes: Sequence[int] | np.ndarray,
+        prefecture_codes: Sequence[int] | np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        コード化済みの配列からセグメントと期待展開率を一括判定
+
+        Returns:
+            (セグメントコード配列, 期待展開率配列)
+            セグメントコードは segment_ids のインデックス（該当ルールなしは -1）
+        """
+        index = (
+            np.clip(np.asarray(ages), 0, MAX_AGE),
+            np.asarray(qualification_codes),
+            np.asarray(prefecture_codes),
+        )
+        return self._segment_table[index], self._rate_table[index]
+
+    def segment_rates(self) -> Dict[str, float]:
+        """セグメントごとの代表展開率（各セグメントの最優先ルールの値）"""
+        rates: Dict[str, float] = {}
+        for rule in self.rules:
+            rates.setdefault(rule.segment_id, rule.conversion_rate)
+        return rates
+
+
+def _split_values(text: Optional[str]) -> FrozenSet[str]:
+    """"|" 区切りの値を集合に変換"""
+    if not text:
+        return frozenset()
+    return frozenset(v.strip() for v in text.split("|") if v.strip())
+
+
+# 組み込みのデフォルトルール
+DEFAULT_SEGMENT_RULES = SegmentRuleSet.default()
@@ -0,0 +1,277 @@
+"""CA別保有状況の時系列スナップショット"""
+
+from __future__ import annotations
+
+import csv
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .aggregates import CAAggregateStore
+from .models import SEGMENT_CODES, SegmentType
+
+# パーティションファイル名: holdings_YYYY-MM-DD.npz
+PARTITION_PREFIX = "holdings_"
+PARTITION_SUFFIX = ".npz"
+
+
+@dataclass
+class HoldingsSnapshot:
+    """1日分のCA×セグメント別保有状況（列形式）
+
+    行ごとの列: ca_ids, segments（SEGMENT_CODES のインデックス）, lead_counts, expected_conversions
+    CAごとの列: target_ca_ids, target_expected_conversions
+    """
+
+    snapshot_date: date
+    ca_ids: np.ndarray
+    segments: np.ndarray
+    lead_counts: np.ndarray
+    expected_conversions: np.ndarray
+    target_ca_ids: np.ndarray
+    target_expected_conversions: np.ndarray
+
+    def ca_totals(self) -> Dict[str, Dict[str, float]]:
+        """CA別の合計（保有リード数・期待展開数・目標・達成率）"""
+        targets = dict(
+            zip(self.target_ca_ids.tolist(), self.target_expected_conversions.tolist())
+        )
+        totals: Dict[str, Dict[str, float]] = {
+            ca_id: {"lead_count": 0, "expected_conversions": 0.0} for ca_id in targets
+        }
+        for ca_id, count, expected in zip(
+            self.ca_ids.tolist(), self.lead_counts.tolist(), self.expected_conversions.tolist()
+        ):
+            total = totals.setdefault(ca_id, {"lead_count": 0, "expected_conversions": 0.0})
+            total["lead_count"] += count
+            total["expected_conversions"] += expected
+
+        for ca_id, total in totals.items():
+            target = targets.get(ca_id, 0.0)
+            total["target_expected_conversions"] = target
+            total["achievement_rate"] = total["expected_conversions"] / target if target > 0 else 0.0
+        return totals
+
+
+class SnapshotStore:
+    """日付パーティションの追記専用スナップショットストア
+
+    1日分のCA×セグメント別保有状況を1ファイル（NumPyの列形式 .npz）に保存する。
+    書き込みは一時ファイルからのリネームで行うため、書き込み途中のファイルは読まれない。
+    期間指定の参照では該当する日付のファイルだけを読み込む。
+    """
+
+    def __init__(self, root_dir: Path) -> None:
+        """
+        Args:
+            root_dir: スナップショットの保存ディレクトリ
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    def partition_path(self, snapshot_date: date) -> Path:
+        """日付パーティションのファイルパス"""
+        return self.root_dir / f"{PARTITION_PREFIX}{snapshot_date.isoformat()}{PARTITION_SUFFIX}"
+
+    def dates(self) -> List[date]:
+        """保存済みのスナップショット日付（昇順）"""
+        dates = []
+        for path in self.root_dir.glob(f"{PARTITION_PREFIX}*{PARTITION_SUFFIX}"):
+            stem = path.name[len(PARTITION_PREFIX):-len(PARTITION_SUFFIX)]
+            try:
+                dates.append(date.fromisoformat(stem))
+            except ValueError:
+                continue
+        return sorted(dates)
+
+    def append(self, snapshot: HoldingsSnapshot) -> Path:
+        """
+        スナップショットを追記
+
+        Args:
+            snapshot: 保存するスナップショット
+
+        Returns:
+            Path: 保存したパーティションのパス
+
+        Raises:
+            FileExistsError: 同じ日付のスナップショットが保存済みの場合
+        """
+        path = self.partition_path(snapshot.snapshot_date)
+        if path.exists():
+            raise FileExistsError(f"Snapshot already exists: {path}")
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    ca_ids=snapshot.ca_ids,
+                    segments=snapshot.segments,
+                    lead_counts=snapshot.lead_counts,
+                    expected_conversions=snapshot.expected_conversions,
+                    target_ca_ids=snapshot.target_ca_ids,
+                    target_expected_conversions=snapshot.target_expected_conversions,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return path
+
+    def record(self, aggregates: CAAggregateStore, snapshot_date: Optional[date] = None) -> Path:
+        """CA集計ストアの現在の状態をスナップショットとして保存"""
+        return self.append(self.snapshot_from_aggregates(aggregates, snapshot_date or date.today()))
+
+    def load(self, snapshot_date: date) -> HoldingsSnapshot:
+        """指定日のスナップショットを読み込み"""
+        path = self.partition_path(snapshot_date)
+        if not path.exists():
+            raise FileNotFoundError(f"Snapshot not found: {path}")
+
+        with np.load(path, allow_pickle=False) as data:
+            return HoldingsSnapshot(
+                snapshot_date=snapshot_date,
+                ca_ids=data["ca_ids"],
+                segments=data["segments"],
+                lead_counts=data["lead_counts"],
+                expected_conversions=data["expected_conversions"],
+                target_ca_ids=data["target_ca_ids"],
+                target_expected_conversions=data["target_expected_conversions"],
+            )
+
+    def query_range(self, start: date, end: date) -> List[HoldingsSnapshot]:
+        """期間内（両端を含む）のスナップショットを日付順に読み込み"""
+        return [self.load(d) for d in self.dates() if start <= d <= end]
+
+    def ca_trend(
+        self,
+        ca_id: str,
+        weeks: int = 12,
+        end: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        CAの保有状況・達成率の推移を取得
+
+        Args:
+            ca_id: CA ID
+            weeks: 遡る週数
+            end: 期間の終了日（デフォルト: 最新のスナップショット日）
+
+        Returns:
+            日付ごとの保有リード数・期待展開数・達成率・セグメント別件数
+        """
+        dates = self.dates()
+        if not dates:
+            return []
+        end = end or dates[-1]
+        start = end - timedelta(weeks=weeks)
+
+        trend = []
+        for snapshot in self.query_range(start, end):
+            mask = snapshot.ca_ids == ca_id
+            if not mask.any() and ca_id not in snapshot.target_ca_ids:
+                continue
+
+            lead_counts = np.zeros(len(SEGMENT_CODES), dtype=np.int64)
+            np.add.at(lead_counts, snapshot.segments[mask], snapshot.lead_counts[mask])
+            totals = snapshot.ca_totals()[ca_id]
+            trend.append(
+                {
+                    "date": snapshot.snapshot_date.isoformat(),
+                    "lead_count": int(totals["lead_count"]),
+                    "expected_conversions": round(totals["expected_conversions"], 2),
+                    "target_expected_conversions": round(totals["target_expected_conversions"], 2),
+                    "achievement_rate": round(totals["achievement_rate"], 2),
+                    "segment_counts": {
+                        segment.value: int(count)
+                        for segment, count in zip(SEGMENT_CODES, lead_counts.tolist())
+                    },
+                }
+            )
+        return trend
+
+    @staticmethod
+    def snapshot_from_aggregates(
+        aggregates: CAAggregateStore,
+        snapshot_date: date,
+    ) -> HoldingsSnapshot:
+        """CA集計ストアからスナップショットを作成"""
+        rows = []
+        for ca_id in aggregates.cas:
+            aggregate = aggregates.get_aggregate(ca_id)
+            for code, segment in enumerate(SEGMENT_CODES):
+                if aggregate.segment_counts[segment]:
+                    rows.append(
+                        (
+                            ca_id,
+                            code,
+                            aggregate.segment_counts[segment],
+                            aggregate.segment_expected[segment],
+                        )
+                    )
+
+        targets = {
+            ca_id: aggregates.get_performance(ca_id).target_expected_conversions
+            for ca_id in aggregates.cas
+        }
+        return _build_snapshot(snapshot_date, rows, targets)
+
+    @staticmethod
+    def snapshot_from_holdings_csv(
+        filepath: Path,
+        snapshot_date: date,
+        ca_master_path: Optional[Path] = None,
+    ) -> HoldingsSnapshot:
+        """
+        CA×セグメント別保有状況CSV（ca_segment_holdings.csv 形式）からスナップショットを作成
+
+        Args:
+            filepath: 保有状況CSVのパス
+            snapshot_date: スナップショット日付
+            ca_master_path: 目標期待展開数を読み込むCAマスターCSV（省略時は目標0）
+        """
+        segment_codes = {segment: code for code, segment in enumerate(SEGMENT_CODES)}
+        rows = []
+        with open(filepath, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                rows.append(
+                    (
+                        row["ca_id"],
+                        segment_codes[SegmentType(row["segment_id"])],
+                        int(row["lead_count"]),
+                        float(row["expected_conversions"]),
+                    )
+                )
+
+        targets: Dict[str, float] = {}
+        if ca_master_path and ca_master_path.exists():
+            with open(ca_master_path, encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    targets[row["ca_id"]] = float(row["target_expected_conversions"])
+
+        return _build_snapshot(snapshot_date, rows, targets)
+
+
+def _build_snapshot(
+    snapshot_date: date,
+    rows: List[tuple],
+    targets: Dict[str, float],
+) -> HoldingsSnapshot:
+    """(ca_id, セグメントコード, 件数, 期待展開数) の行からスナップショットを作成"""
+    ca_ids, segments, lead_counts, expected = zip(*rows) if rows else ((), (), (), ())
+    return HoldingsSnapshot(
+        snapshot_date=snapshot_date,
+        ca_ids=np.array(ca_ids, dtype=str),
+        segments=np.array(segments, dtype=np.int8),
+        lead_counts=np.array(lead_counts, dtype=np.int32),
+        expected_conversions=np.array(expected, dtype=np.float64),
+        target_ca_ids=np.array(list(targets), dtype=str),
+        target_expected_conversions=np.array(list(targets.values()), dtype=np.float64),
+    )
@@ -27,6 +27,11 @@ class SlackNotifier:
         self.bot_token = bot_token or os.getenv("SLACK_BOT_TOKEN")
         self.default_channel = default_channel or os.getenv("SLACK_DEFAULT_CHANNEL", "#dk_ca_ops")
 
+    @property
+    def is_configured(self) -> bool:
+        """Bot Token または Webhook URL が設定されているか"""
+        return bool(self.bot_token or self.webhook_url)
+
     def send_message(
         self,
         message: str,
@@ -1,10 +1,23 @@
 """フィードバックシステムモジュール"""
 
+from .api_metrics import BatchMetrics, CallMetrics
 from .audio_feedback_engine import AudioFeedbackEngine
 from .audio_manager import AudioFile, AudioManager, AudioStatus
+from .audio_metadata_store import AudioMetadataStore
+from .audio_pipeline import AudioPipeline
+from .audio_watcher import AudioWatcher, WatchTarget
+from .backfill import BackfillResult, run_backfill
+from .batch_runner import BatchFeedbackRunner, BatchJob
+from .concurrent_runner import ConcurrentFeedbackRunner, FeedbackResult, RateLimiter
 from .feedback_engine import FeedbackEngine
 from .feedback_generator import FeedbackGenerator
 from .feedback_history import FeedbackHistoryManager, FeedbackHistoryEntry
+from .file_hasher import FileHasher
+from .file_ingest import ingest_file
+from .history_index import HistoryIndex
+from .history_store import HistoryStore
+from .job_queue import Job, JobQueue, JobRunner, JobStage, JobStatus
+from .keyword_matcher import KeywordMatcher
 from .models import (
     Transcript,
     PSSEvaluation,
@@ -13,13 +26,38 @@ from .models import (
     EvaluationLevel,
     OverallRating,
 )
+from .response_cache import ResponseCache
+from .similarity_index import SimilarityIndex
 from .transcript_loader import TranscriptLoader
 
 __all__ = [
     "AudioFeedbackEngine",
     "AudioFile",
     "AudioManager",
+    "AudioMetadataStore",
+    "AudioPipeline",
     "AudioStatus",
+    "AudioWatcher",
+    "BackfillResult",
+    "BatchFeedbackRunner",
+    "BatchJob",
+    "BatchMetrics",
+    "CallMetrics",
+    "ConcurrentFeedbackRunner",
+    "FeedbackResult",
+    "FileHasher",
+    "HistoryIndex",
+    "HistoryStore",
+    "Job",
+    "JobQueue",
+    "JobRunner",
+    "JobStage",
+    "JobStatus",
+    "KeywordMatcher",
+    "RateLimiter",
+    "ResponseCache",
+    "SimilarityIndex",
+    "WatchTarget",
     "Transcript",
     "PSSEvaluation",
     "ADSEvaluation",
@@ -31,4 +69,6 @@ __all__ = [
     "FeedbackEngine",
     "FeedbackHistoryManager",
     "FeedbackHistoryEntry",
+    "run_backfill",
+    "ingest_file",
 ]
@@ -0,0 +1,129 @@
+"""Messages API呼び出しの計測（応答開始までの時間・トークン使用量）"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# プロンプトキャッシュから読み込んだ入力トークンの課金比率（通常の入力トークン比）
+CACHE_READ_PRICE_RATIO = 0.1
+
+# プロンプトキャッシュへ書き込んだ入力トークンの課金比率（通常の入力トークン比）
+CACHE_WRITE_PRICE_RATIO = 1.25
+
+
+@dataclass
+class CallMetrics:
+    """1回のAPI呼び出しの計測値"""
+
+    latency: float  # リクエスト送信から応答完了まで（秒）
+    ttft: Optional[float] = None  # 最初のテキストを受信するまで（秒、ストリーミング時のみ）
+    input_tokens: int = 0  # キャッシュ対象外の入力トークン
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    @classmethod
+    def from_usage(cls, usage: Any, latency: float, ttft: Optional[float] = None) -> CallMetrics:
+        """APIレスポンスの usage から作成"""
+        return cls(
+            latency=latency,
+            ttft=ttft,
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+        )
+
+    @property
+    def total_input_tokens(self) -> int:
+        """キャッシュ分を含む入力トークン数"""
+        return self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+
+    @property
+    def rate_limited_tokens(self) -> int:
+        """レート制限の集計対象のトークン数（キャッシュ読み込み分は含めない）"""
+        return self.input_tokens + self.cache_creation_input_tokens + self.output_tokens
+
+
+class BatchMetrics:
+    """一括処理全体のAPI呼び出し計測値の集計（スレッドセーフ）"""
+
+    def __init__(self) -> None:
+        self.calls: List[CallMetrics] = []
+        self._lock = threading.Lock()
+
+    def add(self, metrics: CallMetrics) -> None:
+        """計測値を追加"""
+        with self._lock:
+            self.calls.append(metrics)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        集計結果
+
+        Returns:
+            呼び出し回数・応答時間・応答開始までの時間（平均/中央値/95%点）・トークン使用量・
+            キャッシュによる入力トークンの削減率（課金換算）
+        """
+        with self._lock:
+            calls = list(self.calls)
+
+        input_tokens = sum(c.input_tokens for c in calls)
+        cache_creation = sum(c.cache_creation_input_tokens for c in calls)
+        cache_read = sum(c.cache_read_input_tokens for c in calls)
+        total_input = input_tokens + cache_creation + cache_read
+        billed_input = (
+            input_tokens
+            + cache_creation * CACHE_WRITE_PRICE_RATIO
+            + cache_read * CACHE_READ_PRICE_RATIO
+        )
+
+        return {
+            "calls": len(calls),
+            "latency": _distribution([c.latency for c in calls]),
+            "ttft": _distribution([c.ttft for c in calls if c.ttft is not None]),
+            "input_tokens": input_tokens,
+            "output_tokens": sum(c.output_tokens for c in calls),
+            "cache_creation_input_tokens": cache_creation,
+            "cache_read_input_tokens": cache_read,
+            "cache_read_ratio": round(cache_read / total_input, 4) if total_input else 0.0,
+            "input_cost_saving": round(1 - billed_input / total_input, 4) if total_input else 0.0,
+        }
+
+    def format_report(self) -> str:
+        """集計結果のテキスト"""
+        s = self.summary()
+        lines = [f"■ API呼び出し: {s['calls']}回"]
+        if s["calls"]:
+            lines.append(_format_distribution("応答時間", s["latency"]))
+            if s["ttft"]:
+                lines.append(_format_distribution("応答開始まで", s["ttft"]))
+            lines.extend(
+                [
+                    f"  入力トークン: {s['input_tokens']:,}"
+                    f" (キャッシュ書込 {s['cache_creation_input_tokens']:,}"
+                    f" / キャッシュ読込 {s['cache_read_input_tokens']:,})",
+                    f"  出力トークン: {s['output_tokens']:,}",
+                    f"  キャッシュ読込率: {s['cache_read_ratio']:.0%}"
+                    f" / 入力コスト削減率: {s['input_cost_saving']:.0%}",
+                ]
+            )
+        return "\n".join(lines)
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    """平均・中央値・95%点（値がない場合は空）"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+def _format_distribution(label: str, dist: Dict[str, float]) -> str:
+    return f"  {label}: 平均 {dist['mean']:.2f}秒 / 中央値 {dist['p50']:.2f}秒 / 95%点 {dist['p95']:.2f}秒"
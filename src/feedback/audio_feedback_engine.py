@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 
-from .audio_manager import AudioManager, AudioStatus
+from .audio_manager import AudioFile, AudioManager, AudioStatus
 from .feedback_engine import FeedbackEngine
 from .models import Feedback
 
@@ -38,6 +38,9 @@ class AudioFeedbackEngine:
         """
         書き起こし準備済みの音声ファイルを処理してフィードバックを生成
 
+        失敗した音声ファイルはその場で失敗（failed/）として扱う。
+        APIや Slack の一時的な障害をリトライする場合は AudioPipeline を使う。
+
         Returns:
             生成されたフィードバックのリスト
         """
@@ -50,24 +53,59 @@ class AudioFeedbackEngine:
         feedbacks = []
 
         for audio_file in ready_audio_files:
-            if not audio_file.transcript_path or not audio_file.transcript_path.exists():
-                continue
+            feedback = self.process_audio_file(audio_file)
+            if feedback is not None:
+                feedbacks.append(feedback)
 
-            try:
-                # 既存のフィードバック生成フローを使用
-                feedback = self.feedback_engine.process_single_file(audio_file.transcript_path)
+        return feedbacks
 
-                # 音声ファイルを処理済みとしてマーク
-                self.audio_manager.mark_as_processed(audio_file)
+    def process_audio_file(
+        self,
+        audio_file: AudioFile,
+        raise_errors: bool = False,
+        on_feedback: Optional[Callable[[AudioFile, Feedback], None]] = None,
+    ) -> Optional[Feedback]:
+        """
+        書き起こし準備済みの音声ファイル1件のフィードバックを生成
 
-                feedbacks.append(feedback)
+        複数スレッドから呼び出してよい（履歴への追加は1件ずつ行われる）。
 
-            except Exception as e:
-                # エラーが発生した場合は失敗としてマーク
-                self.audio_manager.mark_as_failed(audio_file, error_message=str(e))
-                print(f"Error processing audio file {audio_file.file_path}: {e}")
+        Args:
+            audio_file: 音声ファイル
+            raise_errors: 失敗した場合に音声ファイルを失敗扱いにせず、例外を送出するか
+                （呼び出し元がリトライし、最終的に失敗した時点で失敗扱いにする場合）
+            on_feedback: フィードバックを生成した後、音声ファイルを処理済みにする前に呼ばれる
+                コールバック（通知の予約など。例外が発生した場合は処理済みにしない）
 
-        return feedbacks
+        Returns:
+            生成されたフィードバック（書き起こしがない・失敗した場合はNone）
+
+        Raises:
+            FileNotFoundError: raise_errors=True で書き起こしファイルがない場合
+        """
+        if not audio_file.transcript_path or not audio_file.transcript_path.exists():
+            if raise_errors:
+                raise FileNotFoundError(f"Transcript file not found: {audio_file.transcript_path}")
+            return None
+
+        try:
+            # 既存のフィードバック生成フローを使用
+            feedback = self.feedback_engine.process_single_file(audio_file.transcript_path)
+            if on_feedback:
+                on_feedback(audio_file, feedback)
+
+            # 音声ファイルを処理済みとしてマーク
+            self.audio_manager.mark_as_processed(audio_file)
+
+            return feedback
+
+        except Exception as e:
+            if raise_errors:
+                raise
+            # エラーが発生した場合は失敗としてマーク
+            self.audio_manager.mark_as_failed(audio_file, error_message=str(e))
+            print(f"Error processing audio file {audio_file.file_path}: {e}")
+            return None
 
     def get_pending_count(self) -> int:
         """書き起こし待ちの音声ファイル数を取得"""
@@ -2,17 +2,20 @@
 
 from __future__ import annotations
 
-import hashlib
 import json
 import shutil
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import re
 
+from .audio_metadata_store import AudioMetadataStore
+from .file_hasher import FileHasher, default_hasher
+from .file_ingest import INGEST_MODES, ingest_file
+
 
 class AudioStatus(str, Enum):
     """音声ファイルの処理ステータス"""
@@ -38,12 +41,14 @@ class AudioFile:
     uploaded_at: datetime = field(default_factory=datetime.now)
     processed_at: Optional[datetime] = None
     metadata: Dict[str, str] = field(default_factory=dict)
+    content_hash: Optional[str] = None  # 登録時に計算したファイル内容のハッシュ値
 
     @property
     def file_hash(self) -> str:
-        """ファイルのハッシュ値を計算"""
-        with open(self.file_path, "rb") as f:
-            return hashlib.md5(f.read()).hexdigest()
+        """ファイルのハッシュ値（計算済みの content_hash を返し、ステータス変更時に音声を読み直さない）"""
+        if self.content_hash is None:
+            self.content_hash = default_hasher.hash_file(self.file_path)
+        return self.content_hash
 
     @property
     def file_size_mb(self) -> float:
@@ -75,12 +80,21 @@ class AudioFile:
             uploaded_at=datetime.fromisoformat(data["uploaded_at"]),
             processed_at=datetime.fromisoformat(data["processed_at"]) if data.get("processed_at") else None,
             metadata=data.get("metadata", {}),
+            content_hash=data.get("content_hash"),
         )
         return audio_file
 
 
 class AudioManager:
-    """音声ファイル管理クラス"""
+    """音声ファイル管理クラス
+
+    メタデータはSQLite（AudioMetadataStore）に1ファイル1行で保存し、ステータス変更は
+    その行だけを更新する。従来形式の audio_metadata.json を指定した場合は、
+    同じ場所の audio_metadata.db に初回のみ移行する。
+    音声・書き起こしファイルは ingest_mode に従って取り込み、同じファイルシステム内では
+    reflink（move の場合は移動）でデータを複製しない。ハードリンクは音声ファイルにだけ、
+    ingest_mode="hardlink" を指定した場合に使う（書き起こしはその場で編集されることが多いため）。
+    """
 
     # 対応する音声ファイル形式
     SUPPORTED_FORMATS = {".m4a", ".mp3", ".wav", ".webm", ".mp4"}
@@ -92,46 +106,74 @@ class AudioManager:
         self,
         audio_dir: Optional[Path] = None,
         metadata_file: Optional[Path] = None,
+        hash_algorithm: str = "md5",
+        ingest_mode: str = "auto",
     ) -> None:
         """
         Args:
             audio_dir: 音声ファイルのルートディレクトリ
-            metadata_file: メタデータを保存するJSONファイルのパス
+            metadata_file: メタデータを保存するSQLiteファイルのパス
+                （従来形式の .json を指定した場合は同じ場所の .db を使い、初回に移行する）
+            hash_algorithm: ファイル内容のハッシュアルゴリズム（"md5" または "blake2b"）
+            ingest_mode: ファイルの取り込み方式（"auto"、"hardlink"、"copy"、"move"）
         """
+        if ingest_mode not in INGEST_MODES:
+            raise ValueError(f"Unsupported ingest mode: {ingest_mode}. Supported: {INGEST_MODES}")
+        self.ingest_mode = ingest_mode
         self.audio_dir = audio_dir or Path("data/audio")
         self.pending_dir = self.audio_dir / "pending"
         self.processed_dir = self.audio_dir / "processed"
         self.failed_dir = self.audio_dir / "failed"
         self.transcripts_dir = self.audio_dir / "transcripts"
+        self.hasher = default_hasher if hash_algorithm == default_hasher.algorithm else FileHasher(hash_algorithm)
 
         # ディレクトリを作成
         for dir_path in [self.pending_dir, self.processed_dir, self.failed_dir, self.transcripts_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
-        # メタデータファイル
-        self.metadata_file = metadata_file or self.audio_dir / "audio_metadata.json"
-        self._metadata: Dict[str, AudioFile] = {}
-        self._load_metadata()
-
-    def _load_metadata(self) -> None:
-        """メタデータを読み込む"""
-        if self.metadata_file.exists():
-            try:
-                data = json.loads(self.metadata_file.read_text(encoding="utf-8"))
-                self._metadata = {
-                    file_hash: AudioFile.from_dict(audio_data)
-                    for file_hash, audio_data in data.items()
-                }
-            except Exception as e:
-                print(f"Warning: Failed to load metadata: {e}")
-
-    def _save_metadata(self) -> None:
-        """メタデータを保存"""
-        data = {
-            file_hash: audio_file.to_dict()
-            for file_hash, audio_file in self._metadata.items()
-        }
-        self.metadata_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        # メタデータファイル（.json の場合は .db をデータベースとして使用し、初回に移行）
+        metadata_file = metadata_file or self.audio_dir / "audio_metadata.json"
+        if metadata_file.suffix == ".json":
+            self.legacy_metadata_file: Optional[Path] = metadata_file
+            self.metadata_file = metadata_file.with_suffix(".db")
+        else:
+            self.legacy_metadata_file = None
+            self.metadata_file = metadata_file
+        self.store = AudioMetadataStore(self.metadata_file)
+        self._migrate_legacy_metadata()
+
+    def _migrate_legacy_metadata(self) -> None:
+        """従来形式の audio_metadata.json をメタデータストアに移行（移行済みなら何もしない）"""
+        if self.legacy_metadata_file is None or not self.legacy_metadata_file.exists():
+            return
+        if self.store.get_meta("migrated_from") is not None:
+            return
+
+        try:
+            data = json.loads(self.legacy_metadata_file.read_text(encoding="utf-8"))
+            records = []
+            for file_hash, audio_data in data.items():
+                audio_file = AudioFile.from_dict(audio_data)
+                # content_hash のない従来のレコードはキー（登録時のハッシュ値）を引き継ぐ
+                if audio_file.content_hash is None:
+                    audio_file.content_hash = file_hash
+                records.append((file_hash, audio_file.to_dict()))
+        except Exception as e:
+            print(f"Warning: Failed to load metadata: {e}")
+            return
+
+        self.store.upsert(records)
+        self.store.set_meta("migrated_from", str(self.legacy_metadata_file))
+        self.store.set_meta("migrated_at", datetime.now().isoformat())
+
+    def _save(self, audio_file: AudioFile) -> None:
+        """音声ファイルのメタデータを保存（そのファイルの行だけを更新）"""
+        self.store.upsert([(audio_file.file_hash, audio_file.to_dict())])
+
+    @staticmethod
+    def _load_records(records: List[Tuple[str, dict]]) -> List[AudioFile]:
+        """ストアのレコードをAudioFileに変換"""
+        return [AudioFile.from_dict(data) for _, data in records]
 
     def validate_filename(self, filename: str) -> bool:
         """ファイル名が命名規則に従っているか確認"""
@@ -197,12 +239,16 @@ class AudioManager:
         target_filename = f"{date}_{ca_id}_{meeting_id}{suffix}"
         target_path = self.pending_dir / target_filename
 
+        # pending に正しいファイル名で置かれたファイルはそのまま登録する（取り込まない）
+        in_place = target_path.exists() and target_path.resolve() == source_path.resolve()
+
         # 重複チェック
-        if target_path.exists() and not force:
+        if target_path.exists() and not force and not in_place:
             raise FileExistsError(f"Audio file already exists: {target_path}")
 
-        # ファイルをコピー
-        shutil.copy2(source_path, target_path)
+        # ファイルを取り込む
+        if not in_place:
+            ingest_file(source_path, target_path, self.ingest_mode)
 
         # ファイルサイズを取得
         file_size = target_path.stat().st_size
@@ -215,12 +261,11 @@ class AudioManager:
             meeting_id=meeting_id,
             status=AudioStatus.PENDING,
             file_size=file_size,
+            content_hash=self.hasher.hash_file(target_path),
         )
 
-        # ハッシュを計算してメタデータに保存
-        file_hash = audio_file.file_hash
-        self._metadata[file_hash] = audio_file
-        self._save_metadata()
+        # ハッシュをキーにメタデータに保存
+        self._save(audio_file)
 
         return audio_file
 
@@ -235,61 +280,51 @@ class AudioManager:
         if not transcript_path.exists():
             raise FileNotFoundError(f"Transcript file not found: {transcript_path}")
 
-        # 書き起こしファイルを専用ディレクトリにコピー
+        # 書き起こしファイルを専用ディレクトリに取り込む
         transcript_filename = f"{audio_file.date}_{audio_file.ca_id}_{audio_file.meeting_id}.txt"
         target_transcript_path = self.transcripts_dir / transcript_filename
 
-        shutil.copy2(transcript_path, target_transcript_path)
+        # 書き起こしは元ファイル・取り込んだファイルのどちらも編集されうるため、ハードリンクにしない
+        if target_transcript_path.resolve() != transcript_path.resolve():
+            ingest_file(transcript_path, target_transcript_path, self._transcript_ingest_mode())
 
         # 音声ファイルの情報を更新
         audio_file.transcript_path = target_transcript_path
         audio_file.status = AudioStatus.TRANSCRIPT_READY
 
         # メタデータを更新
-        file_hash = audio_file.file_hash
-        self._metadata[file_hash] = audio_file
-        self._save_metadata()
+        self._save(audio_file)
 
-        # 既存の書き起こしディレクトリにもシンボリックリンクまたはコピーを作成
-        # 既存システムとの互換性のため
+        # 既存の書き起こしディレクトリにも取り込む（既存システムとの互換性のため）
         existing_transcript_dir = Path("data/transcripts/pending")
         existing_transcript_dir.mkdir(parents=True, exist_ok=True)
         existing_transcript_path = existing_transcript_dir / transcript_filename
 
-        # コピーまたはシンボリックリンクを作成
+        # 取り込んだファイルは残すため、move の場合も reflink・コピーにする
         if not existing_transcript_path.exists():
-            shutil.copy2(target_transcript_path, existing_transcript_path)
+            ingest_file(target_transcript_path, existing_transcript_path, "auto")
+
+    def _transcript_ingest_mode(self) -> str:
+        """書き起こしファイルの取り込み方式（ハードリンクは reflink・コピーに読み替える）"""
+        return "auto" if self.ingest_mode == "hardlink" else self.ingest_mode
 
     def list_pending_audio(self) -> List[AudioFile]:
         """書き起こし待ちの音声ファイル一覧を取得"""
-        return [
-            audio_file
-            for audio_file in self._metadata.values()
-            if audio_file.status == AudioStatus.PENDING
-        ]
+        return self._load_records(self.store.list_by_status(AudioStatus.PENDING.value))
 
     def list_ready_for_processing(self) -> List[AudioFile]:
         """書き起こし準備済み（フィードバック生成可能）の音声ファイル一覧を取得"""
-        return [
-            audio_file
-            for audio_file in self._metadata.values()
-            if audio_file.status == AudioStatus.TRANSCRIPT_READY
-        ]
+        return self._load_records(self.store.list_by_status(AudioStatus.TRANSCRIPT_READY.value))
 
     def get_audio_file(self, file_hash: str) -> Optional[AudioFile]:
         """ハッシュ値から音声ファイルを取得"""
-        return self._metadata.get(file_hash)
+        data = self.store.get(file_hash)
+        return AudioFile.from_dict(data) if data else None
 
     def find_audio_file(self, date: str, ca_id: str, meeting_id: str) -> Optional[AudioFile]:
         """日付、CA ID、会議IDから音声ファイルを検索"""
-        for audio_file in self._metadata.values():
-            if (
-                audio_file.date == date
-                and audio_file.ca_id == ca_id
-                and audio_file.meeting_id == meeting_id
-            ):
-                return audio_file
-        return None
+        record = self.store.find(date, ca_id, meeting_id)
+        return AudioFile.from_dict(record[1]) if record else None
 
     def mark_as_processed(self, audio_file: AudioFile) -> None:
         """音声ファイルを処理済みとしてマーク"""
@@ -304,9 +339,7 @@ class AudioManager:
         audio_file.processed_at = datetime.now()
 
         # メタデータを更新
-        file_hash = audio_file.file_hash
-        self._metadata[file_hash] = audio_file
-        self._save_metadata()
+        self._save(audio_file)
 
     def mark_as_failed(self, audio_file: AudioFile, error_message: str = "") -> None:
         """音声ファイルを処理失敗としてマーク"""
@@ -321,7 +354,5 @@ class AudioManager:
         audio_file.metadata["error"] = error_message
 
         # メタデータを更新
-        file_hash = audio_file.file_hash
-        self._metadata[file_hash] = audio_file
-        self._save_metadata()
+        self._save(audio_file)
 
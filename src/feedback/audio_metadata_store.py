@@ -0,0 +1,137 @@
+"""音声ファイルメタデータの永続化（SQLite）"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 他プロセスが書き込み中の場合に待つ秒数
+BUSY_TIMEOUT_SECONDS = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio_files (
+    file_hash TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    ca_id TEXT NOT NULL,
+    meeting_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audio_files_status
+    ON audio_files (status);
+CREATE INDEX IF NOT EXISTS idx_audio_files_meeting
+    ON audio_files (date, ca_id, meeting_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class AudioMetadataStore:
+    """音声ファイルメタデータのSQLiteストア
+
+    1ファイル1行で、ステータスと (日付, CA ID, 会議ID) に索引を張る。
+    ステータス変更などはその行だけを書き換えるため、メタデータ全体を書き直すことはない。
+    WALモードで読み込みは書き込みを待たず、書き込みが重なった場合は BUSY_TIMEOUT_SECONDS まで
+    待ってから書き込むため、auto_process_audio.py と upload_audio.py を同時に実行しても
+    互いの更新を上書きしない。レコードは辞書（AudioFile.to_dict() の形式）で受け渡す。
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Args:
+            db_path: データベースファイルのパス
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def upsert(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        レコードを追加（同じハッシュ値のレコードは置き換え）
+
+        Args:
+            records: (ハッシュ値, レコードの辞書) の組
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO audio_files (file_hash, date, ca_id, meeting_id, status, data) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(file_hash) DO UPDATE SET date = excluded.date, ca_id = excluded.ca_id, "
+                "meeting_id = excluded.meeting_id, status = excluded.status, data = excluded.data",
+                [
+                    (
+                        file_hash,
+                        record["date"],
+                        record["ca_id"],
+                        record["meeting_id"],
+                        record["status"],
+                        json.dumps(record, ensure_ascii=False),
+                    )
+                    for file_hash, record in records
+                ],
+            )
+
+    def get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """ハッシュ値からレコードを取得"""
+        rows = self._select("WHERE file_hash = ?", (file_hash,))
+        return rows[0][1] if rows else None
+
+    def find(self, date: str, ca_id: str, meeting_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """日付・CA ID・会議IDからレコードを検索（複数ある場合は最初に登録されたもの）"""
+        rows = self._select(
+            "WHERE date = ? AND ca_id = ? AND meeting_id = ? ORDER BY rowid LIMIT 1",
+            (date, ca_id, meeting_id),
+        )
+        return rows[0] if rows else None
+
+    def list_by_status(self, status: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """ステータスが一致するレコード（登録順）"""
+        return self._select("WHERE status = ? ORDER BY rowid", (status,))
+
+    def all(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """全レコード（登録順）"""
+        return self._select("ORDER BY rowid", ())
+
+    def _select(self, clause: str, params: Tuple[Any, ...]) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT file_hash, data FROM audio_files {clause}", params
+            ).fetchall()
+        return [(file_hash, json.loads(data)) for file_hash, data in rows]
+
+    def count(self) -> int:
+        """登録済みのレコード数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM audio_files").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """メタ情報を取得"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """メタ情報を保存"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,184 @@
+"""音声ファイルのフィードバック生成・Slack通知パイプライン（ジョブキュー経由）"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional
+
+from .audio_feedback_engine import AudioFeedbackEngine
+from .audio_manager import AudioFile, AudioStatus
+from .concurrent_runner import is_retryable_error
+from .job_queue import DEFAULT_POLL_INTERVAL, Job, JobQueue, JobRunner, JobStage, JobStatus
+from .models import Feedback
+
+if TYPE_CHECKING:
+    from ..common.slack_notifier import SlackNotifier
+
+# ステージ名
+FEEDBACK_STAGE = "feedback"
+SLACK_STAGE = "slack"
+
+DEFAULT_SLACK_CHANNEL = "#dk_ca_ops"
+
+
+class SlackDeliveryError(RuntimeError):
+    """Slack通知の送信に失敗した（リトライの対象）"""
+
+
+class AudioPipeline:
+    """書き起こし準備済みの音声ファイルをジョブキュー経由で処理するパイプライン
+
+    フィードバック生成（feedback）と Slack通知（slack）をそれぞれ永続キューのステージとし、
+    ステージごとに同時実行数・試行回数・バックオフを設定できる。
+    APIのレート制限・接続エラーや Slack の送信失敗はバックオフして再試行するため、
+    一時的な障害では音声ファイルを失敗扱いにせず処理を遅らせるだけになる。
+    試行回数の上限に達した、またはリトライしても回復しないエラーでデッドレターになった
+    フィードバック生成のジョブだけ、音声ファイルを失敗（failed/）として扱う。
+    ジョブは音声ファイルのハッシュ値を冪等キーにするため、同じファイルを何度投入しても
+    フィードバック生成・通知は1回だけ行われる。
+    """
+
+    def __init__(
+        self,
+        engine: AudioFeedbackEngine,
+        queue: Optional[JobQueue] = None,
+        notifier: Optional["SlackNotifier"] = None,
+        slack_channel: str = DEFAULT_SLACK_CHANNEL,
+        feedback_concurrency: int = 1,
+        slack_concurrency: int = 2,
+        max_attempts: int = 5,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        """
+        Args:
+            engine: 音声ファイル統合フィードバックエンジン
+            queue: ジョブキュー（デフォルト: 音声ディレクトリの job_queue.db）
+            notifier: Slack通知（Noneの場合は通知しない）
+            slack_channel: Slack通知先チャンネル
+            feedback_concurrency: フィードバック生成の同時実行数
+            slack_concurrency: Slack通知の同時実行数
+            max_attempts: 1ジョブあたりの最大試行回数
+            base_delay: バックオフの初期待ち時間（秒）
+            max_delay: バックオフの最大待ち時間（秒）
+            poll_interval: ジョブが見つからない場合の待ち時間（秒、常駐時）
+        """
+        self.engine = engine
+        self.audio_manager = engine.audio_manager
+        self.queue = queue or JobQueue(self.audio_manager.audio_dir / "job_queue.db")
+        self.notifier = notifier
+        self.slack_channel = slack_channel
+        self.feedbacks: List[Feedback] = []
+
+        self.runner = JobRunner(
+            self.queue,
+            [
+                JobStage(
+                    name=FEEDBACK_STAGE,
+                    handler=self._generate_feedback,
+                    concurrency=feedback_concurrency,
+                    max_attempts=max_attempts,
+                    base_delay=base_delay,
+                    max_delay=max_delay,
+                    retryable=is_retryable_error,
+                    on_dead=self._mark_failed,
+                ),
+                JobStage(
+                    name=SLACK_STAGE,
+                    handler=self._send_slack,
+                    concurrency=slack_concurrency,
+                    max_attempts=max_attempts,
+                    base_delay=base_delay,
+                    max_delay=max_delay,
+                ),
+            ],
+            poll_interval=poll_interval,
+        )
+
+    def enqueue(self, audio_file: AudioFile) -> bool:
+        """
+        音声ファイルのフィードバック生成ジョブを投入
+
+        Returns:
+            投入した場合True（投入済みの場合False）
+        """
+        return self.queue.enqueue(FEEDBACK_STAGE, audio_file.file_hash, {"file_hash": audio_file.file_hash})
+
+    def enqueue_ready(self) -> int:
+        """
+        書き起こし準備済みの音声ファイルをすべて投入
+
+        Returns:
+            新たに投入したジョブ数
+        """
+        return sum(1 for audio_file in self.audio_manager.list_ready_for_processing() if self.enqueue(audio_file))
+
+    def run_until_idle(self) -> List[Feedback]:
+        """
+        実行可能なジョブがなくなるまで処理（バックオフ中のジョブは次回の実行に残す）
+
+        Returns:
+            今回生成したフィードバック
+        """
+        self.feedbacks = []
+        self.runner.run_until_idle()
+        return self.feedbacks
+
+    def queue_status_lines(self) -> List[str]:
+        """再試行待ち・デッドレターのジョブ数の表示行"""
+        lines = []
+        counts = self.queue.counts()
+        for stage, label in [(FEEDBACK_STAGE, "フィードバック生成"), (SLACK_STAGE, "Slack通知")]:
+            stage_counts = counts.get(stage, {})
+            waiting = stage_counts.get(JobStatus.QUEUED.value, 0)
+            dead = stage_counts.get(JobStatus.DEAD.value, 0)
+            if waiting:
+                lines.append(f"⏳ {label}: 再試行待ち {waiting}件（次回の実行で再試行します）")
+            if dead:
+                lines.append(f"⚠️  {label}: デッドレター {dead}件（--retry-dead で再投入できます）")
+        return lines
+
+    def start(self) -> None:
+        """常駐して処理を開始"""
+        self.runner.start()
+
+    def stop(self) -> None:
+        """処理を停止（実行中のジョブの完了を待つ）"""
+        self.runner.stop()
+
+    def _generate_feedback(self, job: Job) -> None:
+        file_hash = job.payload["file_hash"]
+        audio_file = self.audio_manager.get_audio_file(file_hash)
+        if audio_file is None:
+            raise LookupError(f"Audio file not registered: {file_hash}")
+        if audio_file.status == AudioStatus.PROCESSED:
+            # 前回の試行で処理済みにした後、完了を記録する前に中断した場合
+            return
+
+        # 失敗は例外のまま受け取り、リトライするかどうかはステージの retryable で判定する
+        # （失敗扱いにするのはデッドレターになった時点: _mark_failed）
+        feedback = self.engine.process_audio_file(
+            audio_file, raise_errors=True, on_feedback=self._enqueue_slack
+        )
+        self.feedbacks.append(feedback)
+        print(f"✅ フィードバック生成: {audio_file.date}_{audio_file.ca_id}_{audio_file.meeting_id}")
+
+    def _enqueue_slack(self, audio_file: AudioFile, feedback: Feedback) -> None:
+        # 通知ジョブを投入してから処理済みにする（途中で中断しても通知が漏れない）
+        if self.notifier:
+            self.queue.enqueue(
+                SLACK_STAGE,
+                f"{audio_file.file_hash}:{self.slack_channel}",
+                {"message": feedback.to_slack_message(), "channel": self.slack_channel},
+            )
+
+    def _send_slack(self, job: Job) -> None:
+        if self.notifier is None:
+            raise SlackDeliveryError("Slack notifier is not configured")
+        if not self.notifier.send_message(job.payload["message"], channel=job.payload["channel"]):
+            raise SlackDeliveryError(f"Failed to send Slack message to {job.payload['channel']}")
+
+    def _mark_failed(self, job: Job) -> None:
+        audio_file = self.audio_manager.get_audio_file(job.payload["file_hash"])
+        if audio_file and audio_file.status != AudioStatus.PROCESSED:
+            self.audio_manager.mark_as_failed(audio_file, error_message=job.last_error or "")
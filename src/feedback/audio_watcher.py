@@ -0,0 +1,293 @@
+"""音声・書き起こしファイルの監視（常駐処理）"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+# サイズ・更新時刻がこの秒数変わらなければ書き込み完了とみなす
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+# ポーリング時（watchdog がない場合）のディレクトリ走査間隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+
+# ファイル処理の同時実行数
+DEFAULT_MAX_WORKERS = 4
+
+# 書き込み完了判定の間隔（秒）
+_TICK_SECONDS = 0.2
+
+FileState = Tuple[int, int]  # (サイズ, 更新時刻ns)
+
+
+@dataclass
+class WatchTarget:
+    """監視対象のディレクトリと、書き込みが完了したファイルの処理"""
+
+    directory: Path
+    handler: Callable[[Path], None]
+    suffixes: Optional[Set[str]] = None  # 対象の拡張子（小文字、Noneは全ファイル）
+
+    def accepts(self, path: Path) -> bool:
+        """処理対象のファイルか"""
+        if path.name.startswith("."):
+            return False
+        return self.suffixes is None or path.suffix.lower() in self.suffixes
+
+
+class AudioWatcher:
+    """ディレクトリを監視し、書き込みが完了したファイルを順次処理する
+
+    watchdog（inotify など）が使える場合はファイルの作成・変更・移動のイベントで、
+    使えない場合は poll_interval ごとのディレクトリ走査で変化を検出する。
+    変化したファイルはサイズと更新時刻が debounce 秒変わらなくなるまで待ってから
+    （アップロード・同期途中のファイルを処理しないため）ワーカーに渡す。
+    同時に処理するファイルは max_workers 件までで、それを超えた分は次の判定まで待たせるため、
+    大量のファイルが一度に置かれてもスレッドやメモリが際限なく増えることはない。
+    一度処理したファイルは、サイズ・更新時刻が変わらない限り再度処理しない。
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[WatchTarget],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        use_watchdog: Optional[bool] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            targets: 監視対象
+            debounce: 書き込み完了とみなすまでの待ち時間（秒）
+            poll_interval: ポーリング時の走査間隔（秒）
+            max_workers: ファイル処理の同時実行数
+            use_watchdog: watchdog を使うか（Noneの場合はインストールされていれば使う）
+            clock: 時刻関数
+        """
+        self.targets: List[WatchTarget] = list(targets)
+        for target in self.targets:
+            target.directory = Path(target.directory).absolute()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.use_watchdog = HAS_WATCHDOG if use_watchdog is None else use_watchdog and HAS_WATCHDOG
+        self.clock = clock
+
+        self.processed_count = 0
+        self.error_count = 0
+
+        self._lock = threading.Lock()
+        self._candidates: Dict[Path, Tuple[FileState, float]] = {}  # パス → (状態, 状態を確認した時刻)
+        self._handled: Dict[Path, FileState] = {}  # 処理済みファイルの状態
+        self._in_flight: Set[Path] = set()
+        self._slots = threading.Semaphore(max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._observer = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """監視を開始（既存のファイルも処理対象として検出する）"""
+        for target in self.targets:
+            target.directory.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="audio-watcher")
+        self.scan()
+
+        if self.use_watchdog:
+            self._observer = Observer()
+            for target in self.targets:
+                self._observer.schedule(_EventHandler(self), str(target.directory), recursive=False)
+            self._observer.start()
+        else:
+            self._threads.append(threading.Thread(target=self._poll_loop, daemon=True))
+        self._threads.append(threading.Thread(target=self._dispatch_loop, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """監視を停止（wait=True の場合は処理中のファイルの完了を待つ）"""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def run_forever(self) -> None:
+        """Ctrl+C まで監視を続ける"""
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        呼び出し時点で置かれているファイルをすべて処理し終えるまで待つ
+
+        次の走査・イベントを待たずに済むよう、先に監視対象のディレクトリを走査して
+        未検出のファイルを処理待ちに加えてから判定する。
+
+        Returns:
+            timeout までに処理し終えた場合True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.scan()
+        while True:
+            with self._lock:
+                if not self._candidates and not self._in_flight:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(_TICK_SECONDS / 2)
+
+    def notify(self, path: Path) -> None:
+        """ファイルの作成・変更を通知（watchdog のイベントから呼ばれる）"""
+        path = Path(path).absolute()
+        if self._target_for(path) is None:
+            return
+        state = self._stat(path)
+        if state is None:
+            return
+        with self._lock:
+            if self._handled.get(path) == state:
+                return
+            previous = self._candidates.get(path)
+            if previous is None or previous[0] != state:
+                self._candidates[path] = (state, self.clock())
+
+    def scan(self) -> None:
+        """監視対象のディレクトリを走査して変化したファイルを検出"""
+        for target in self.targets:
+            try:
+                entries = list(os.scandir(target.directory))
+            except FileNotFoundError:
+                continue
+            present = set()
+            for entry in entries:
+                if entry.is_file():
+                    path = Path(entry.path)
+                    present.add(path)
+                    self.notify(path)
+            # 移動・削除された処理済みファイルの記録を破棄
+            with self._lock:
+                for path in [p for p in self._handled if p.parent == target.directory and p not in present]:
+                    del self._handled[path]
+
+    def _target_for(self, path: Path) -> Optional[WatchTarget]:
+        for target in self.targets:
+            if path.parent == target.directory and target.accepts(path):
+                return target
+        return None
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[FileState]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.scan()
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop.wait(_TICK_SECONDS):
+            self.dispatch_ready()
+
+    def dispatch_ready(self) -> int:
+        """
+        書き込みが完了したファイルをワーカーに渡す
+
+        Returns:
+            ワーカーに渡したファイル数
+        """
+        now = self.clock()
+        ready = []
+        with self._lock:
+            for path, (state, since) in list(self._candidates.items()):
+                if path in self._in_flight:
+                    continue
+                current = self._stat(path)
+                if current is None or self._handled.get(path) == current:
+                    # 処理前に削除・移動された、または処理中に検出された処理済みのファイル
+                    del self._candidates[path]
+                elif current != state:
+                    # まだ書き込み中
+                    self._candidates[path] = (current, now)
+                elif now - since >= self.debounce:
+                    ready.append((path, state))
+
+        dispatched = 0
+        for path, state in ready:
+            if not self._slots.acquire(blocking=False):
+                break  # 空きがなければ次の判定まで待たせる
+            with self._lock:
+                self._candidates.pop(path, None)
+                self._in_flight.add(path)
+            self._executor.submit(self._handle, path, state)
+            dispatched += 1
+        return dispatched
+
+    def _handle(self, path: Path, state: FileState) -> None:
+        target = self._target_for(path)
+        try:
+            if target is not None and path.exists():
+                target.handler(path)
+            with self._lock:
+                self.processed_count += 1
+        except Exception as e:
+            with self._lock:
+                self.error_count += 1
+            print(f"⚠️  ファイル処理に失敗しました: {path.name} - {e}")
+        finally:
+            with self._lock:
+                self._handled[path] = state
+                self._in_flight.discard(path)
+            self._slots.release()
+
+
+if HAS_WATCHDOG:
+
+    class _EventHandler(FileSystemEventHandler):
+        """watchdog のイベントを AudioWatcher に通知"""
+
+        def __init__(self, watcher: AudioWatcher) -> None:
+            super().__init__()
+            self.watcher = watcher
+
+        def on_created(self, event) -> None:
+            if not event.is_directory:
+                self.watcher.notify(Path(event.src_path))
+
+        def on_modified(self, event) -> None:
+            if not event.is_directory:
+                self.watcher.notify(Path(event.src_path))
+
+        def on_moved(self, event) -> None:
+            if not event.is_directory:
+                self.watcher.notify(Path(event.dest_path))
@@ -0,0 +1,155 @@
+"""処理済み書き起こしのルールベース再採点（バックフィル）"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .feedback_generator import FeedbackGenerator
+from .feedback_history import FeedbackHistoryEntry, FeedbackHistoryManager
+from .transcript_loader import TranscriptLoader
+
+# 1ワーカーに渡す書き起こし数（プロセス間通信の回数と負荷の偏りのバランス）
+DEFAULT_CHUNK_SIZE = 64
+
+# ワーカープロセスごとのフィードバック生成エンジン（初期化時に1回だけ作成）
+_worker_generator: Optional[FeedbackGenerator] = None
+_worker_loader: Optional[TranscriptLoader] = None
+
+
+@dataclass
+class BackfillResult:
+    """バックフィルの実行結果"""
+
+    total: int = 0
+    succeeded: int = 0
+    failures: List[Tuple[str, str]] = field(default_factory=list)  # (ファイルパス, エラー)
+    elapsed: float = 0.0
+    workers: int = 1
+
+    @property
+    def transcripts_per_second(self) -> float:
+        """1秒あたりの処理件数"""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def find_transcript_files(directories: Iterable[Path]) -> List[Path]:
+    """ディレクトリ配下（サブディレクトリを含む）の書き起こしファイルを取得（パス順）"""
+    files = set()
+    for directory in directories:
+        directory = Path(directory)
+        if directory.is_file():
+            files.add(directory)
+        elif directory.exists():
+            files.update(directory.rglob("*.txt"))
+    return sorted(files)
+
+
+def _init_worker(criteria_path: Optional[str]) -> None:
+    """ワーカープロセスの初期化（キーワードオートマトンの構築はここで1回だけ行う）"""
+    global _worker_generator, _worker_loader
+    _worker_generator = FeedbackGenerator(
+        criteria_path=Path(criteria_path) if criteria_path else None, use_ai=False
+    )
+    _worker_loader = TranscriptLoader()
+
+
+def _score_chunk(paths: List[str]) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    書き起こしのまとまりをルールベースで採点
+
+    Returns:
+        (ファイルパス, 履歴エントリの辞書, エラー) のリスト
+    """
+    if _worker_generator is None or _worker_loader is None:
+        _init_worker(None)
+
+    results = []
+    for path in paths:
+        try:
+            transcript = _worker_loader.load_transcript(Path(path))
+            feedback = _worker_generator.generate_feedback(transcript)
+            results.append((path, asdict(FeedbackHistoryEntry.from_feedback(feedback)), None))
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _chunks(paths: List[Path], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(paths), size):
+        yield [str(p) for p in paths[start:start + size]]
+
+
+def run_backfill(
+    files: List[Path],
+    history_manager: Optional[FeedbackHistoryManager] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    criteria_path: Optional[Path] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> BackfillResult:
+    """
+    書き起こしをプロセスプールで並列に再採点し、履歴に一括反映
+
+    書き起こしを chunk_size 件ずつのまとまりにしてワーカーに配り、完了したまとまりから
+    順に履歴へ1トランザクションで反映（同じフィードバックIDの既存エントリは置き換え）する。
+    同時に処理中のまとまりはワーカー数の2倍までに抑え、結果をメモリに溜め込まない。
+
+    Args:
+        files: 対象の書き起こしファイル
+        history_manager: 反映先の履歴（Noneの場合は採点のみ）
+        workers: ワーカープロセス数（デフォルト: CPUコア数、1の場合は同一プロセスで実行）
+        chunk_size: 1まとまりの書き起こし数
+        criteria_path: PSS/ADS評価基準ファイルのパス
+        on_progress: 進捗コールバック（処理済み件数, 全件数）
+
+    Returns:
+        BackfillResult: 件数・失敗・処理時間
+    """
+    workers = workers or os.cpu_count() or 1
+    result = BackfillResult(total=len(files), workers=workers)
+    start = time.perf_counter()
+    done = 0
+
+    def handle(scored: List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]) -> None:
+        nonlocal done
+        entries = []
+        for path, entry, error in scored:
+            if entry is None:
+                result.failures.append((path, error or ""))
+            else:
+                entries.append(FeedbackHistoryEntry(**entry))
+        if history_manager is not None and entries:
+            history_manager.upsert_entries(entries)
+        result.succeeded += len(entries)
+        done += len(scored)
+        if on_progress:
+            on_progress(done, result.total)
+
+    chunks = _chunks(files, chunk_size)
+    if workers <= 1:
+        _init_worker(str(criteria_path) if criteria_path else None)
+        for chunk in chunks:
+            handle(_score_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(str(criteria_path) if criteria_path else None,),
+        ) as executor:
+            in_flight = set()
+            for chunk in chunks:
+                if len(in_flight) >= workers * 2:
+                    completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        handle(future.result())
+                in_flight.add(executor.submit(_score_chunk, chunk))
+            for future in wait(in_flight).done:
+                handle(future.result())
+
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,226 @@
+"""Message Batches APIによるフィードバックの一括生成（夜間処理向け）"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .concurrent_runner import FeedbackResult
+from .feedback_generator import FeedbackGenerator
+from .models import Transcript
+
+# 1バッチあたりの最大リクエスト数（APIの上限は100,000件）
+DEFAULT_MAX_BATCH_SIZE = 10000
+
+# バッチ状態ファイル名: batch_{バッチID}.json
+JOB_FILE_PREFIX = "batch_"
+
+
+class BatchError(Exception):
+    """バッチの個別リクエストが失敗した（errored / canceled / expired）"""
+
+    def __init__(self, result_type: str, detail: str = "") -> None:
+        super().__init__(f"Batch request {result_type}" + (f": {detail}" if detail else ""))
+        self.result_type = result_type
+
+
+@dataclass
+class BatchJob:
+    """送信済みバッチの状態（再開できるようファイルに保存する）"""
+
+    batch_id: str
+    requests: Dict[str, str]  # custom_id → 書き起こしファイルのパス
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    status: str = "submitted"  # "submitted" / "ended" / "collected"
+    ended_at: Optional[str] = None
+
+    @property
+    def is_collected(self) -> bool:
+        """結果の取り込みまで完了したか"""
+        return self.status == "collected"
+
+
+class BatchFeedbackRunner:
+    """書き起こしをまとめてMessage Batchesに送信し、完了後に結果を取り込む
+
+    リクエストは1回のAPI呼び出しでまとめて送信し、結果はJSONLで一括取得するため、
+    数千件の書き起こしでも1件ごとの接続を張り続ける必要がない。
+    送信したバッチIDと custom_id → 書き起こしの対応はファイルに保存し、
+    処理が中断しても次回実行時にポーリング・結果取り込みを再開できる。
+    """
+
+    def __init__(
+        self,
+        generator: FeedbackGenerator,
+        state_dir: Path,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Args:
+            generator: フィードバック生成エンジン（use_ai=True）
+            state_dir: バッチ状態ファイルの保存ディレクトリ
+            max_batch_size: 1バッチあたりの最大リクエスト数
+            sleep: 待機関数
+        """
+        self.generator = generator
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.max_batch_size = max_batch_size
+        self.sleep = sleep
+
+    def submit(self, transcripts: Iterable[Transcript]) -> List[BatchJob]:
+        """
+        書き起こしのフィードバック生成リクエストをバッチとして送信
+
+        Args:
+            transcripts: 対象の書き起こし
+
+        Returns:
+            送信したバッチ（max_batch_size ごとに分割）
+        """
+        requests = []
+        for transcript in transcripts:
+            requests.append((transcript, self.generator.build_ai_request(transcript)))
+
+        client = self.generator.get_client()
+        jobs = []
+        for start in range(0, len(requests), self.max_batch_size):
+            chunk = requests[start:start + self.max_batch_size]
+            custom_ids = [f"fb-{start + i:06d}" for i in range(len(chunk))]
+            batch = client.messages.batches.create(
+                requests=[
+                    {"custom_id": custom_id, "params": request}
+                    for custom_id, (_, request) in zip(custom_ids, chunk)
+                ]
+            )
+            job = BatchJob(
+                batch_id=batch.id,
+                requests={
+                    custom_id: transcript.file_path
+                    for custom_id, (transcript, _) in zip(custom_ids, chunk)
+                },
+            )
+            self.save_job(job)
+            jobs.append(job)
+        return jobs
+
+    def wait(
+        self,
+        job: BatchJob,
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = None,
+    ) -> BatchJob:
+        """
+        バッチの処理完了までポーリング
+
+        Args:
+            job: 対象のバッチ
+            poll_interval: ポーリング間隔（秒）
+            timeout: 待機時間の上限（秒、Noneは無制限）
+
+        Raises:
+            TimeoutError: timeout までに処理が完了しなかった場合
+        """
+        client = self.generator.get_client()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while job.status == "submitted":
+            batch = client.messages.batches.retrieve(job.batch_id)
+            if batch.processing_status == "ended":
+                job.status = "ended"
+                job.ended_at = datetime.now().isoformat()
+                self.save_job(job)
+                break
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                raise TimeoutError(f"Batch {job.batch_id} did not finish within {timeout}s")
+            self.sleep(poll_interval)
+        return job
+
+    def collect(
+        self,
+        job: BatchJob,
+        transcripts: Optional[Dict[str, Transcript]] = None,
+        load_transcript: Optional[Callable[[Path], Transcript]] = None,
+    ) -> List[FeedbackResult]:
+        """
+        処理が完了したバッチの結果を書き起こしに対応付けて取り込む
+
+        Args:
+            job: 処理が完了したバッチ
+            transcripts: ファイルパス → 書き起こし（含まれない場合は load_transcript で読み込む）
+            load_transcript: 書き起こしの読み込み関数
+
+        Returns:
+            書き起こしごとの結果（custom_id 順、失敗時は error が設定される）
+        """
+        transcripts = transcripts or {}
+        client = self.generator.get_client()
+
+        results = []
+        for item in client.messages.batches.results(job.batch_id):
+            file_path = job.requests.get(item.custom_id)
+            if file_path is None:
+                continue
+            transcript = transcripts.get(file_path)
+            if transcript is None:
+                if load_transcript is None or not Path(file_path).exists():
+                    print(f"⚠️  書き起こしが見つかりません: {file_path}")
+                    continue
+                transcript = load_transcript(Path(file_path))
+
+            results.append((item.custom_id, self._to_result(transcript, item)))
+
+        results.sort(key=lambda pair: pair[0])
+        job.status = "collected"
+        self.save_job(job)
+        return [result for _, result in results]
+
+    def pending_jobs(self) -> List[BatchJob]:
+        """結果の取り込みが完了していないバッチ（前回の実行が中断した場合など）"""
+        jobs = []
+        for path in sorted(self.state_dir.glob(f"{JOB_FILE_PREFIX}*.json")):
+            job = BatchJob(**json.loads(path.read_text(encoding="utf-8")))
+            if not job.is_collected:
+                jobs.append(job)
+        return jobs
+
+    def job_path(self, batch_id: str) -> Path:
+        """バッチ状態ファイルのパス"""
+        return self.state_dir / f"{JOB_FILE_PREFIX}{batch_id}.json"
+
+    def save_job(self, job: BatchJob) -> None:
+        """バッチ状態を保存（一時ファイルからのリネームで書き込む）"""
+        path = self.job_path(job.batch_id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(job), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _to_result(self, transcript: Transcript, item: Any) -> FeedbackResult:
+        """バッチの個別結果をFeedbackResultに変換"""
+        result = FeedbackResult(transcript=transcript, attempts=1)
+        outcome = item.result
+        if outcome.type != "succeeded":
+            error = getattr(outcome, "error", None)
+            result.error = BatchError(outcome.type, str(error) if error else "")
+            return result
+
+        try:
+            parsed = self.generator.result_from_message(outcome.message)
+            request = self.generator.build_ai_request(transcript)
+            self.generator.store_cache(request, parsed)
+            result.feedback = self.generator.feedback_from_result(transcript, parsed)
+        except Exception as e:
+            result.error = e
+        return result
@@ -0,0 +1,284 @@
+"""フィードバック生成の並列実行（レート制限・リトライ付き）"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from .api_metrics import CallMetrics
+from .feedback_generator import FeedbackGenerator
+from .models import Feedback, Transcript
+
+# リトライ対象のHTTPステータス（レート制限・過負荷・一時的なサーバーエラー）
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+# レート制限の集計期間（秒）
+RATE_WINDOW_SECONDS = 60.0
+
+
+@dataclass
+class FeedbackResult:
+    """1件分のフィードバック生成結果"""
+
+    transcript: Transcript
+    feedback: Optional[Feedback] = None
+    error: Optional[Exception] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    cached: bool = False  # キャッシュから取得した（APIを呼ばなかった）か
+
+    @property
+    def ok(self) -> bool:
+        """生成に成功したか"""
+        return self.feedback is not None
+
+
+@dataclass(eq=False)
+class _Reservation:
+    """レート制限の予約（時刻・トークン数）"""
+
+    timestamp: float
+    tokens: float
+    expired: bool = False
+
+
+class RateLimiter:
+    """直近1分間のリクエスト数・トークン数の予算管理
+
+    予算を超える場合は、古い記録が集計期間から外れるまで待機する。
+    トークン数は呼び出し前に見積もりで予約し、レスポンス受信後に実績値へ補正する。
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            requests_per_minute: 1分あたりのリクエスト数上限（Noneは無制限）
+            tokens_per_minute: 1分あたりのトークン数上限（Noneは無制限）
+            clock: 時刻取得関数
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self._entries: Deque[_Reservation] = deque()
+        self._tokens = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, tokens: int = 0) -> _Reservation:
+        """
+        予算の範囲内になるまで待機してから予約
+
+        Args:
+            tokens: 見積もりトークン数
+
+        Returns:
+            予約（adjust で実績値に補正する際に使用）
+        """
+        if self.tokens_per_minute is not None:
+            tokens = min(tokens, self.tokens_per_minute)
+
+        with self._condition:
+            while True:
+                now = self.clock()
+                self._expire(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    entry = _Reservation(now, float(tokens))
+                    self._entries.append(entry)
+                    self._tokens += tokens
+                    return entry
+                self._condition.wait(timeout=wait)
+
+    def adjust(self, entry: _Reservation, actual_tokens: int) -> None:
+        """予約したトークン数を実績値に補正"""
+        with self._condition:
+            if not entry.expired:
+                self._tokens += actual_tokens - entry.tokens
+            entry.tokens = float(actual_tokens)
+            self._condition.notify_all()
+
+    def _expire(self, now: float) -> None:
+        """集計期間から外れた記録を削除"""
+        while self._entries and now - self._entries[0].timestamp >= RATE_WINDOW_SECONDS:
+            entry = self._entries.popleft()
+            entry.expired = True
+            self._tokens -= entry.tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """予約できるまでの待ち時間（0以下なら即時予約可能）"""
+        if not self._entries:
+            return 0.0
+
+        waits = [0.0]
+        if self.requests_per_minute is not None and len(self._entries) >= self.requests_per_minute:
+            oldest = self._entries[len(self._entries) - self.requests_per_minute]
+            waits.append(oldest.timestamp + RATE_WINDOW_SECONDS - now)
+
+        if self.tokens_per_minute is not None and self._tokens + tokens > self.tokens_per_minute:
+            # 古い記録から順に外れたときに予算内に収まる時刻まで待つ
+            excess = self._tokens + tokens - self.tokens_per_minute
+            for entry in self._entries:
+                excess -= entry.tokens
+                if excess <= 0:
+                    waits.append(entry.timestamp + RATE_WINDOW_SECONDS - now)
+                    break
+        return max(waits)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """レート制限・過負荷などリトライで回復する可能性のあるエラーか"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # 接続エラー・タイムアウト（anthropic.APIConnectionError / APITimeoutError など）
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError"} or isinstance(
+        error, (ConnectionError, TimeoutError)
+    )
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """エラーレスポンスの retry-after ヘッダー（秒）"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ConcurrentFeedbackRunner:
+    """複数の書き起こしのフィードバック生成を並列実行
+
+    同時実行数・1分あたりのリクエスト数/トークン数の予算を守りながら
+    Messages APIを並列に呼び出し、完了した順に結果を返す。
+    レート制限（429）・過負荷（529）などのエラーはジッター付き指数バックオフでリトライする。
+    """
+
+    def __init__(
+        self,
+        generator: FeedbackGenerator,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Args:
+            generator: フィードバック生成エンジン
+            max_concurrency: 同時実行数
+            requests_per_minute: 1分あたりのリクエスト数上限
+            tokens_per_minute: 1分あたりのトークン数上限（入力+出力）
+            max_retries: 1件あたりの最大リトライ回数
+            base_delay: バックオフの初期待ち時間（秒）
+            max_delay: バックオフの最大待ち時間（秒）
+            sleep: 待機関数
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1: {max_concurrency}")
+
+        self.generator = generator
+        self.max_concurrency = max_concurrency
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def run(
+        self,
+        transcripts: Iterable[Transcript],
+        on_result: Optional[Callable[[FeedbackResult], None]] = None,
+    ) -> Iterator[FeedbackResult]:
+        """
+        フィードバックを並列生成し、完了した順に結果を返す
+
+        Args:
+            transcripts: 対象の書き起こし
+            on_result: 1件完了するごとに呼ばれるコールバック
+
+        Yields:
+            FeedbackResult: 完了した結果（失敗時は error が設定される）
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self._process, t) for t in transcripts]
+            for future in as_completed(futures):
+                result = future.result()
+                if on_result:
+                    on_result(result)
+                yield result
+
+    def run_all(
+        self,
+        transcripts: Iterable[Transcript],
+        on_result: Optional[Callable[[FeedbackResult], None]] = None,
+    ) -> List[FeedbackResult]:
+        """全件の完了を待って結果を返す（完了順）"""
+        return list(self.run(transcripts, on_result))
+
+    def _process(self, transcript: Transcript) -> FeedbackResult:
+        """1件分を生成（リトライ込み）"""
+        result = FeedbackResult(transcript=transcript)
+        start = time.perf_counter()
+
+        while True:
+            result.attempts += 1
+            try:
+                result.feedback, result.cached = self._generate(transcript)
+                break
+            except Exception as e:
+                if not is_retryable_error(e) or result.attempts > self.max_retries:
+                    result.error = e
+                    break
+                self.sleep(self._backoff(result.attempts, retry_after_seconds(e)))
+
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def _generate(self, transcript: Transcript) -> Tuple[Feedback, bool]:
+        """
+        予算を確保してからフィードバックを生成
+
+        Returns:
+            (フィードバック, キャッシュから取得したか)
+        """
+        if not self.generator.use_ai:
+            return self.generator.generate_feedback(transcript), False
+
+        request = self.generator.build_ai_request(transcript)
+        cached = self.generator.lookup_cache(request)
+        if cached is not None:
+            return self.generator.feedback_from_result(transcript, cached), True
+
+        reservation = self.limiter.acquire(self.generator.estimate_request_tokens(request))
+        message = self.generator.call_ai(request)
+
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            self.limiter.adjust(
+                reservation, CallMetrics.from_usage(usage, latency=0.0).rate_limited_tokens
+            )
+        result = self.generator.result_from_message(message)
+        self.generator.store_cache(request, result)
+        return self.generator.feedback_from_result(transcript, result), False
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """ジッター付き指数バックオフの待ち時間（retry-after 指定時はそれ以上待つ）"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, delay)  # フルジッター
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional
 
 from .models import Feedback
 from .transcript_loader import TranscriptLoader
-from .feedback_generator import FeedbackGenerator
+from .feedback_generator import DEFAULT_MODEL, FeedbackGenerator
 from .feedback_history import FeedbackHistoryManager
+from .concurrent_runner import ConcurrentFeedbackRunner, FeedbackResult
+from .response_cache import ResponseCache
+from .api_metrics import BatchMetrics
+from .batch_runner import DEFAULT_MAX_BATCH_SIZE, BatchFeedbackRunner
 
 
 class FeedbackEngine:
@@ -20,6 +26,10 @@ class FeedbackEngine:
         criteria_path: Optional[Path] = None,
         use_ai: bool = False,
         history_file: Optional[Path] = None,
+        model: str = DEFAULT_MODEL,
+        base_url: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        stream: bool = False,
     ) -> None:
         """
         Args:
@@ -27,43 +37,222 @@ class FeedbackEngine:
             criteria_path: PSS/ADS評価基準ファイルのパス
             use_ai: Claude AIを使用するか（デフォルト: False）
             history_file: フィードバック履歴ファイルのパス
+            model: 使用するモデル名
+            base_url: APIのベースURL（ローカルのスタブサーバーで動作確認する場合など）
+            cache_dir: AI生成結果のキャッシュディレクトリ（省略時はキャッシュしない）
+            stream: ストリーミングで受信するか（応答開始までの時間を計測する場合）
         """
         transcripts_dir = transcripts_dir or Path("data/transcripts/pending")
         self.loader = TranscriptLoader(pending_dir=transcripts_dir)
-        self.generator = FeedbackGenerator(criteria_path=criteria_path, use_ai=use_ai)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.generator = FeedbackGenerator(
+            criteria_path=criteria_path,
+            use_ai=use_ai,
+            model=model,
+            base_url=base_url,
+            cache=self.cache,
+            stream=stream,
+        )
         self.history_manager = FeedbackHistoryManager(history_file=history_file)
         self.feedbacks: List[Feedback] = []
+        self.failures: List[FeedbackResult] = []
+        self._record_lock = threading.Lock()
+
+    def process_all_pending(
+        self,
+        concurrency: int = 1,
+        on_result: Optional[Callable[[FeedbackResult], None]] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        record_history: bool = True,
+    ) -> List[Feedback]:
+        """
+        全ての処理待ち書き起こしを処理
+
+        concurrency が2以上、またはリクエスト/トークン予算を指定した場合は並列に生成し、
+        レート制限・過負荷エラーはバックオフしてリトライする。
+        並列時に最終的に失敗した書き起こしは failures に記録する。
+        生成したフィードバックは、バッチ処理（process_all_pending_batch）と同じく
+        繰り返し改善点を検出したうえで履歴に追加する。
 
-    def process_all_pending(self) -> List[Feedback]:
-        """全ての処理待ち書き起こしを処理"""
+        Args:
+            concurrency: 同時実行数（1は逐次処理）
+            on_result: 1件完了するごとに呼ばれるコールバック（完了順）
+            requests_per_minute: 1分あたりのリクエスト数上限
+            tokens_per_minute: 1分あたりのトークン数上限
+            record_history: 繰り返し改善点の検出・履歴への追加を行うか
+
+        Returns:
+            生成したフィードバック（書き起こしファイル順）
+        """
         self.feedbacks = []
+        self.failures = []
+        self.generator.metrics = BatchMetrics()
+
+        if concurrency <= 1 and requests_per_minute is None and tokens_per_minute is None:
+            for transcript in self.loader.iter_pending():
+                start = time.perf_counter()
+                feedback, cached = self.generator.generate_feedback_cached(transcript)
+                self.feedbacks.append(feedback)
+                if on_result:
+                    on_result(
+                        FeedbackResult(
+                            transcript=transcript,
+                            feedback=feedback,
+                            attempts=1,
+                            elapsed=time.perf_counter() - start,
+                            cached=cached,
+                        )
+                    )
+            if record_history:
+                self._record_history(self.feedbacks)
+            return self.feedbacks
+
+        transcripts = self.loader.load_all_pending()
+        runner = ConcurrentFeedbackRunner(
+            self.generator,
+            max_concurrency=max(concurrency, 1),
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
+        order = {id(t): i for i, t in enumerate(transcripts)}
+        results = sorted(
+            runner.run(transcripts, on_result),
+            key=lambda r: order[id(r.transcript)],
+        )
+
+        self.feedbacks = [r.feedback for r in results if r.feedback is not None]
+        self.failures = [r for r in results if not r.ok]
+        if record_history:
+            self._record_history(self.feedbacks)
+        return self.feedbacks
+
+    def process_all_pending_batch(
+        self,
+        state_dir: Optional[Path] = None,
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        on_result: Optional[Callable[[FeedbackResult], None]] = None,
+        record_history: bool = True,
+    ) -> List[Feedback]:
+        """
+        全ての処理待ち書き起こしをMessage Batchesでまとめて処理（夜間処理向け）
+
+        前回の実行で送信済みのまま結果を取り込んでいないバッチがあれば、その完了を待って取り込む
+        （その書き起こしは再送信しない）。キャッシュ済みの書き起こしは送信しない。
+        生成したフィードバックは繰り返し改善点を検出したうえで履歴に追加する。
+        最終的に失敗した書き起こしは failures に記録する。
+
+        Args:
+            state_dir: バッチ状態ファイルの保存ディレクトリ（デフォルト: data/feedback/batches）
+            poll_interval: 完了確認のポーリング間隔（秒）
+            timeout: 1バッチあたりの待機時間の上限（秒、Noneは無制限）
+            max_batch_size: 1バッチあたりの最大リクエスト数
+            on_result: 1件の結果が確定するごとに呼ばれるコールバック（キャッシュ済み → バッチ順）
+            record_history: 繰り返し改善点の検出・履歴への追加を行うか
+
+        Returns:
+            生成したフィードバック
 
+        Raises:
+            TimeoutError: timeout までにバッチの処理が完了しなかった場合（次回実行時に再開できる）
+        """
+        self.feedbacks = []
+        self.failures = []
+        self.generator.metrics = BatchMetrics()
+
+        runner = BatchFeedbackRunner(
+            self.generator,
+            state_dir or Path("data/feedback/batches"),
+            max_batch_size=max_batch_size,
+        )
+        jobs = runner.pending_jobs()
+        submitted = {path for job in jobs for path in job.requests.values()}
+
+        results: List[FeedbackResult] = []
+        to_submit = []
+        transcripts = {}
         for transcript in self.loader.iter_pending():
-            feedback = self.generator.generate_feedback(transcript)
-            self.feedbacks.append(feedback)
+            if transcript.file_path in submitted:
+                transcripts[transcript.file_path] = transcript
+                continue
+            cached = self.generator.lookup_cache(self.generator.build_ai_request(transcript))
+            if cached is not None:
+                feedback = self.generator.feedback_from_result(transcript, cached)
+                result = FeedbackResult(transcript=transcript, feedback=feedback, cached=True)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+            else:
+                transcripts[transcript.file_path] = transcript
+                to_submit.append(transcript)
+
+        if to_submit:
+            jobs.extend(runner.submit(to_submit))
+
+        for job in jobs:
+            runner.wait(job, poll_interval=poll_interval, timeout=timeout)
+            collected = runner.collect(job, transcripts, self.loader.load_transcript)
+            results.extend(collected)
+            if on_result:
+                for result in collected:
+                    on_result(result)
 
+        self.feedbacks = [r.feedback for r in results if r.feedback is not None]
+        self.failures = [r for r in results if not r.ok]
+        if record_history:
+            self._record_history(self.feedbacks)
         return self.feedbacks
 
+    def _record_history(self, feedbacks: Iterable[Feedback]) -> None:
+        """
+        一括処理で生成したフィードバックに繰り返し改善点を設定し、履歴にまとめて追加
+
+        再実行時にキャッシュから取得した登録済みのフィードバックは追加しない。
+        """
+        with self._record_lock:
+            known_ids = self.history_manager.feedback_ids()
+            added = 0
+            for feedback in feedbacks:
+                self._attach_repeated_improvements(feedback)
+                if self._feedback_id(feedback) not in known_ids:
+                    self.history_manager.add_feedback(feedback, save=False)
+                    added += 1
+            if added:
+                self.history_manager.save()
+
     def process_single_file(self, file_path: Path) -> Feedback:
         """単一ファイルを処理"""
         transcript = self.loader.load_transcript(file_path)
         feedback = self.generator.generate_feedback(transcript)
-        
-        # 過去のフィードバック履歴を参照して繰り返し改善点を検出
-        feedback_id = f"{feedback.transcript.date}_{feedback.transcript.ca_id}_{feedback.transcript.meeting_id}"
-        repeated = self.history_manager.find_repeated_improvements(
+        self.record_feedback(feedback)
+        return feedback
+
+    def record_feedback(self, feedback: Feedback) -> None:
+        """生成したフィードバックを履歴に追加（複数スレッドから呼ばれても1件ずつ追加する）"""
+        with self._record_lock:
+            # 過去のフィードバック履歴を参照して繰り返し改善点を検出
+            self._attach_repeated_improvements(feedback)
+
+            # 履歴に追加
+            self.history_manager.add_feedback(feedback)
+
+            self.feedbacks.append(feedback)
+
+    def _attach_repeated_improvements(self, feedback: Feedback) -> None:
+        """過去のフィードバック履歴を参照して繰り返し改善点を設定"""
+        feedback.repeated_improvements = self.history_manager.find_repeated_improvements(
             current_improvement_points=feedback.improvement_points,
             ca_id=feedback.transcript.ca_id,
-            exclude_feedback_id=feedback_id,
+            exclude_feedback_id=self._feedback_id(feedback),
             days=90,
         )
-        feedback.repeated_improvements = repeated
-        
-        # 履歴に追加
-        self.history_manager.add_feedback(feedback)
-        
-        self.feedbacks.append(feedback)
-        return feedback
+
+    @staticmethod
+    def _feedback_id(feedback: Feedback) -> str:
+        """履歴のフィードバックID"""
+        return f"{feedback.transcript.date}_{feedback.transcript.ca_id}_{feedback.transcript.meeting_id}"
 
     def generate_summary_report(self) -> str:
         """サマリーレポートを生成"""
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import csv
 import json
+import threading
+import time
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     import anthropic
@@ -20,6 +22,19 @@ from .models import (
     Feedback,
     EvaluationLevel,
 )
+from .api_metrics import BatchMetrics, CallMetrics
+from .keyword_matcher import KeywordMatcher
+from .response_cache import ResponseCache
+
+# フィードバック生成に使用するモデル
+DEFAULT_MODEL = "claude-3-5-sonnet-20241022"  # 最新のClaude 3.5 Sonnetモデル
+
+# 1回の生成の最大出力トークン数（より長いレスポンスに対応）
+DEFAULT_MAX_TOKENS = 4000
+
+# プロンプトテンプレート・レスポンス解釈のバージョン
+# （プロンプト文面の変更はキャッシュキーに自動で反映されるため、解釈の変更時に上げる）
+PROMPT_TEMPLATE_VERSION = "1"
 
 
 class FeedbackGenerator:
@@ -73,14 +88,44 @@ class FeedbackGenerator:
         self,
         criteria_path: Optional[Path] = None,
         use_ai: bool = False,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        base_url: Optional[str] = None,
+        client: Optional[Any] = None,
+        max_retries: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+        stream: bool = False,
     ) -> None:
         """
         Args:
             criteria_path: PSS/ADS評価基準ファイルのパス
             use_ai: Claude AIを使用するかどうか（デフォルト: False）
+            model: 使用するモデル名
+            max_tokens: 最大出力トークン数
+            base_url: APIのベースURL（ローカルのスタブサーバーで動作確認する場合など）
+            client: 使用するAPIクライアント（省略時は初回呼び出し時に作成）
+            max_retries: APIクライアント自体のリトライ回数（省略時はクライアントの既定値）
+            cache: 生成結果のキャッシュ（省略時はキャッシュしない）
+            stream: ストリーミングで受信するか（応答開始までの時間を計測できる）
         """
         self.criteria_path = criteria_path
         self.use_ai = use_ai
+        self.model = model
+        self.max_tokens = max_tokens
+        self.base_url = base_url
+        self.client = client
+        self.max_retries = max_retries
+        self.cache = cache
+        self.stream = stream
+        self.metrics = BatchMetrics()
+        self._client_lock = threading.Lock()
+        self._system_prompt: Optional[str] = None
+        self.keyword_matcher = KeywordMatcher(
+            keyword
+            for patterns in (*self.PSS_PATTERNS.values(), *self.ADS_PATTERNS.values())
+            for keywords in patterns.values()
+            for keyword in keywords
+        )
         self.criteria_content: str | None = None
 
         if criteria_path and criteria_path.exists():
@@ -88,20 +133,32 @@ class FeedbackGenerator:
 
     def generate_feedback(self, transcript: Transcript) -> Feedback:
         """書き起こしからフィードバックを生成"""
+        return self.generate_feedback_cached(transcript)[0]
+
+    def generate_feedback_cached(self, transcript: Transcript) -> Tuple[Feedback, bool]:
+        """
+        書き起こしからフィードバックを生成し、キャッシュから取得したかも返す
+
+        Returns:
+            (フィードバック, キャッシュから取得した（APIを呼ばなかった）か)
+        """
         if self.use_ai:
             return self._generate_with_ai(transcript)
         else:
-            return self._generate_rule_based(transcript)
+            return self._generate_rule_based(transcript), False
 
     def _generate_rule_based(self, transcript: Transcript) -> Feedback:
         """ルールベースのフィードバック生成（サンプル/テスト用）"""
         content = transcript.content.lower()
 
+        # 全キーワードの出現位置を1回の走査で取得
+        hits = self.match_keywords(content)
+
         # PSS評価
-        pss = self._evaluate_pss(content)
+        pss = self._evaluate_pss(content, hits)
 
         # ADS評価
-        ads = self._evaluate_ads(content)
+        ads = self._evaluate_ads(content, hits)
 
         # 良かった点を抽出
         good_points = self._extract_good_points(content, pss, ads)
@@ -125,14 +182,22 @@ class FeedbackGenerator:
             next_goals=next_goals,
         )
 
-    def _evaluate_pss(self, content: str) -> PSSEvaluation:
-        """PSSの各項目を評価"""
+    def match_keywords(self, content: str) -> Dict[str, List[int]]:
+        """PSS/ADS評価キーワードの出現位置（キーワード → 開始位置のリスト）"""
+        return self.keyword_matcher.find_all(content)
+
+    def _evaluate_pss(
+        self, content: str, hits: Optional[Dict[str, List[int]]] = None
+    ) -> PSSEvaluation:
+        """PSSの各項目を評価（キーワードの有無で採点）"""
+        if hits is None:
+            hits = self.match_keywords(content)
         evaluations = {}
         comments = {}
 
         for item, patterns in self.PSS_PATTERNS.items():
-            positive_count = sum(1 for p in patterns["positive"] if p in content)
-            negative_count = sum(1 for p in patterns["negative"] if p in content)
+            positive_count = sum(1 for p in patterns["positive"] if p in hits)
+            negative_count = sum(1 for p in patterns["negative"] if p in hits)
 
             # スコア計算
             score = positive_count - negative_count * 2
@@ -166,14 +231,18 @@ class FeedbackGenerator:
             closing_comment=comments["closing_comment"],
         )
 
-    def _evaluate_ads(self, content: str) -> ADSEvaluation:
-        """ADSの各項目を評価"""
+    def _evaluate_ads(
+        self, content: str, hits: Optional[Dict[str, List[int]]] = None
+    ) -> ADSEvaluation:
+        """ADSの各項目を評価（キーワードの有無で採点）"""
+        if hits is None:
+            hits = self.match_keywords(content)
         evaluations = {}
         comments = {}
 
         for item, patterns in self.ADS_PATTERNS.items():
-            positive_count = sum(1 for p in patterns["positive"] if p in content)
-            negative_count = sum(1 for p in patterns["negative"] if p in content)
+            positive_count = sum(1 for p in patterns["positive"] if p in hits)
+            negative_count = sum(1 for p in patterns["negative"] if p in hits)
 
             score = positive_count - negative_count * 2
 
@@ -372,20 +441,124 @@ class FeedbackGenerator:
 
         return goals[0] if goals else "現状の質を維持しながら、さらなる向上を目指してください。"
 
-    def _generate_with_ai(self, transcript: Transcript) -> Feedback:
-        """Claude AIを使用したフィードバック生成"""
+    def get_client(self) -> Any:
+        """Anthropic APIクライアントを取得（初回呼び出し時に作成し、スレッド間で共有）"""
+        if self.client is not None:
+            return self.client
         if not HAS_ANTHROPIC:
             raise ImportError(
                 "anthropic package is required for AI-based feedback. "
                 "Install with: pip install anthropic"
             )
 
-        client = anthropic.Anthropic()
+        with self._client_lock:
+            if self.client is None:
+                kwargs: Dict[str, Any] = {}
+                if self.base_url:
+                    kwargs["base_url"] = self.base_url
+                if self.max_retries is not None:
+                    kwargs["max_retries"] = self.max_retries
+                self.client = anthropic.Anthropic(**kwargs)
+        return self.client
+
+    def _generate_with_ai(self, transcript: Transcript) -> Tuple[Feedback, bool]:
+        """Claude AIを使用したフィードバック生成（キャッシュ済みならAPIを呼ばない）"""
+        request = self.build_ai_request(transcript)
+        result = self.lookup_cache(request)
+        if result is not None:
+            return self.feedback_from_result(transcript, result), True
+
+        result = self.result_from_message(self.call_ai(request))
+        self.store_cache(request, result)
+        return self.feedback_from_result(transcript, result), False
+
+    def build_ai_request(self, transcript: Transcript) -> Dict[str, Any]:
+        """
+        書き起こしからMessages APIのリクエストパラメータを構築
+
+        評価基準・指示はプロンプトキャッシュ対象のシステムプロンプトにまとめ、
+        書き起こしごとに変わる内容だけをユーザーメッセージで送る。
+        """
+        if self._system_prompt is None:
+            self._system_prompt = self._build_system_prompt()
+
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": [
+                {
+                    "type": "text",
+                    "text": self._system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            "messages": [
+                {"role": "user", "content": self._build_user_prompt(transcript)}
+            ],
+        }
+
+    @staticmethod
+    def estimate_request_tokens(request: Dict[str, Any]) -> int:
+        """リクエストの消費トークン数の見積もり（入力は1文字≒1トークンとして上限側に見積もる）"""
+        input_chars = sum(
+            len(message["content"]) if isinstance(message["content"], str)
+            else sum(len(block.get("text", "")) for block in message["content"])
+            for message in request["messages"]
+        )
+        system = request.get("system", "")
+        if isinstance(system, list):
+            input_chars += sum(len(block.get("text", "")) for block in system)
+        else:
+            input_chars += len(system)
+        return input_chars + request.get("max_tokens", 0)
+
+    def call_ai(self, request: Dict[str, Any]) -> Any:
+        """
+        Messages APIを呼び出してレスポンスを取得
 
-        # 評価基準を含めたプロンプトを構築
+        応答時間・トークン使用量を metrics に記録する。
+        ストリーミング時は最初のテキストを受信するまでの時間も記録する。
+        """
+        client = self.get_client()
+        start = time.perf_counter()
+        ttft = None
+        if self.stream:
+            with client.messages.stream(**request) as stream:
+                for text in stream.text_stream:
+                    if ttft is None and text:
+                        ttft = time.perf_counter() - start
+                message = stream.get_final_message()
+        else:
+            message = client.messages.create(**request)
+
+        self.metrics.add(
+            CallMetrics.from_usage(
+                getattr(message, "usage", None), time.perf_counter() - start, ttft
+            )
+        )
+        return message
+
+    def result_from_message(self, message: Any) -> Dict[str, Any]:
+        """APIレスポンスから生成結果（パース済みJSON）を取り出す"""
+        return self.parse_ai_response(message.content[0].text)
+
+    def lookup_cache(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """リクエストに対するキャッシュ済みの生成結果（キャッシュ未使用・未登録ならNone）"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache.make_key(request, PROMPT_TEMPLATE_VERSION))
+
+    def store_cache(self, request: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """生成結果をキャッシュに保存"""
+        if self.cache is not None:
+            key = self.cache.make_key(request, PROMPT_TEMPLATE_VERSION)
+            self.cache.put(key, result, model=request.get("model", ""))
+
+    def _build_system_prompt(self) -> str:
+        """評価基準・指示・出力形式を含む、全書き起こしで共通のシステムプロンプトを構築"""
         criteria_text = self.criteria_content or self._get_default_criteria()
 
-        prompt = f"""あなたはKeyensの営業マネージャーとして、メンバーの成長を期待しながらも厳しくも建設的なフィードバックを提供する役割を担っています。
+        return f"""あなたはKeyensの営業マネージャーとして、メンバーの成長を期待しながらも厳しくも建設的なフィードバックを提供する役割を担っています。
 
 ## 重要な方針
 - メンバーの成長を第一に考えるが、厳しさも忘れない
@@ -396,11 +569,10 @@ class FeedbackGenerator:
 ## 評価基準
 {criteria_text}
 
-## 書き起こし内容
-{transcript.content}
-
 ## フィードバック生成の指示
 
+ユーザーから渡される営業通話の書き起こしを評価し、以下の指示に従ってフィードバックを生成してください。
+
 ### 1. 評価コメントの書き方
 各項目の評価コメントは、以下のスタイルで書いてください：
 - 評価が高い場合: 良い点を評価しつつ、さらなる改善の余地を示唆
@@ -457,17 +629,17 @@ class FeedbackGenerator:
 JSONのみを出力し、それ以外のテキストは含めないでください。
 """
 
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",  # 最新のClaude 3.5 Sonnetモデル
-            max_tokens=4000,  # より長いレスポンスに対応
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-        )
+    def _build_user_prompt(self, transcript: Transcript) -> str:
+        """書き起こしごとのユーザープロンプトを構築"""
+        return f"""## 書き起こし内容
+{transcript.content}
 
-        # レスポンスをパース
-        response_text = message.content[0].text
+上記の書き起こしを評価し、指定のJSON形式のみで出力してください。
+"""
 
+    @staticmethod
+    def parse_ai_response(response_text: str) -> Dict[str, Any]:
+        """レスポンス本文からJSONを取り出してパース"""
         # JSONを抽出（```json ... ``` で囲まれている場合を考慮）
         if "```json" in response_text:
             json_start = response_text.find("```json") + 7
@@ -478,9 +650,10 @@ JSONのみを出力し、それ以外のテキストは含めないでくださ
             json_end = response_text.find("```", json_start)
             response_text = response_text[json_start:json_end].strip()
 
-        result = json.loads(response_text)
+        return json.loads(response_text)
 
-        # Feedbackオブジェクトを構築
+    def feedback_from_result(self, transcript: Transcript, result: Dict[str, Any]) -> Feedback:
+        """パース済みのJSONからFeedbackオブジェクトを構築"""
         pss = PSSEvaluation(
             opening=EvaluationLevel(result["pss"]["opening"]["level"]),
             need_identification=EvaluationLevel(result["pss"]["need_identification"]["level"]),
@@ -4,10 +4,14 @@ from __future__ import annotations
 
 import json
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import date, datetime
+from functools import cached_property
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 
+from .history_index import HistoryIndex
+from .history_store import HistoryStore
+from .similarity_index import SimilarityIndex
 from .models import Feedback
 
 
@@ -27,6 +31,14 @@ class FeedbackHistoryEntry:
     feedback_id: str  # ユニークID
     created_at: str
 
+    @cached_property
+    def entry_date(self) -> Optional[date]:
+        """解釈済みの日付（YYYY-MM-DD または ISO形式の日時、解釈できない場合はNone）"""
+        try:
+            return datetime.fromisoformat(self.date).date()
+        except (TypeError, ValueError):
+            return None
+
     @classmethod
     def from_feedback(cls, feedback: Feedback, feedback_id: Optional[str] = None) -> "FeedbackHistoryEntry":
         """Feedbackオブジェクトから生成"""
@@ -59,66 +71,171 @@ class FeedbackHistoryEntry:
 
 
 class FeedbackHistoryManager:
-    """フィードバック履歴管理クラス"""
+    """フィードバック履歴管理クラス
+
+    履歴はSQLite（HistoryStore）に1エントリ1行で保存する。CAを指定した期間検索は、そのCAの
+    初回参照時にストアから構築する日付順インデックス（HistoryIndex）で行い、以降の追加は構築済みの
+    インデックスにも反映する。全CAをまとめた期間検索はストアの日付の索引で直接行い、
+    履歴全体をメモリに読み込むことはない。
+    従来形式の history.json を指定した場合は、同じ場所の history.db に初回のみ移行する。
+    """
 
     def __init__(self, history_file: Optional[Path] = None):
         """
         Args:
             history_file: 履歴ファイルのパス（デフォルト: data/feedback/history.json）
+                .json の場合は拡張子を .db に変えたパスをデータベースとして使用し、
+                既存の .json の内容を初回に移行する
         """
-        self.history_file = history_file or Path("data/feedback/history.json")
+        history_file = history_file or Path("data/feedback/history.json")
+        if history_file.suffix == ".json":
+            self.legacy_file: Optional[Path] = history_file
+            self.history_file = history_file.with_suffix(".db")
+        else:
+            self.legacy_file = None
+            self.history_file = history_file
         self.history_file.parent.mkdir(parents=True, exist_ok=True)
-        self._history: List[FeedbackHistoryEntry] = []
-        self._load_history()
-
-    def _load_history(self) -> None:
-        """履歴を読み込む"""
-        if self.history_file.exists():
-            try:
-                data = json.loads(self.history_file.read_text(encoding="utf-8"))
-                entries = []
-                for entry_data in data.get("feedbacks", []):
-                    # 後方互換性: 古い形式のデータに対応
-                    if "good_points" not in entry_data:
-                        entry_data["good_points"] = []
-                    if "overall_rating" not in entry_data:
-                        # スコアから評価を推定
-                        score = entry_data.get("overall_score", 0.0)
-                        if score >= 3.5:
-                            entry_data["overall_rating"] = "excellent"
-                        elif score >= 2.5:
-                            entry_data["overall_rating"] = "good"
-                        elif score >= 1.5:
-                            entry_data["overall_rating"] = "needs_improvement"
-                        else:
-                            entry_data["overall_rating"] = "requires_coaching"
-                    if "pss_scores" not in entry_data:
-                        entry_data["pss_scores"] = {}
-                    if "ads_scores" not in entry_data:
-                        entry_data["ads_scores"] = {}
-                    
-                    entries.append(FeedbackHistoryEntry(**entry_data))
-                self._history = entries
-            except Exception as e:
-                print(f"Warning: Failed to load feedback history: {e}")
-                self._history = []
-
-    def _save_history(self) -> None:
-        """履歴を保存"""
+        self._store: Optional[HistoryStore] = None
+        self._indexes: Dict[str, HistoryIndex] = {}  # CA ID → 日付順インデックス（参照したCAのみ）
+        self._similarity: Dict[str, SimilarityIndex] = {}  # CA ID → 改善点の類似検索インデックス
+        self._pending: Dict[str, FeedbackHistoryEntry] = {}  # save=False で追加した未保存分
+
+    @property
+    def store(self) -> HistoryStore:
+        """履歴ストア（初回アクセス時に開き、必要なら history.json から移行）"""
+        if self._store is None:
+            self._store = HistoryStore(self.history_file)
+            self._migrate_legacy_history()
+        return self._store
+
+    def ca_index(self, ca_id: str) -> HistoryIndex:
+        """CAの日付順インデックス（初回アクセス時にそのCAの履歴から構築）"""
+        self.save()
+        index = self._indexes.get(ca_id)
+        if index is None:
+            # ストアは日付の新しい順（同じ日付は登録順）で返すため、日付の古い順に並べ直す。
+            # インデックスの登録順は同じ日付のエントリの並びにだけ使われる
+            rows = sorted(self.store.query(ca_id=ca_id), key=lambda row: row["date"])
+            index = HistoryIndex(FeedbackHistoryEntry(**row) for row in rows)
+            self._indexes[ca_id] = index
+        return index
+
+    def _migrate_legacy_history(self) -> None:
+        """従来形式の history.json を履歴ストアに移行（移行済みなら何もしない）"""
+        if self.legacy_file is None or not self.legacy_file.exists():
+            return
+        if self._store.get_meta("migrated_from") is not None:
+            return
+
         try:
-            data = {
-                "feedbacks": [asdict(entry) for entry in self._history],
-                "last_updated": datetime.now().isoformat(),
-            }
-            self.history_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            data = json.loads(self.legacy_file.read_text(encoding="utf-8"))
+            entries = [
+                self._normalize_legacy_entry(entry_data)
+                for entry_data in data.get("feedbacks", [])
+            ]
         except Exception as e:
-            print(f"Warning: Failed to save feedback history: {e}")
+            print(f"Warning: Failed to load feedback history: {e}")
+            return
+
+        self._store.upsert(asdict(entry) for entry in entries)
+        self._store.set_meta("migrated_from", str(self.legacy_file))
+        self._store.set_meta("migrated_at", datetime.now().isoformat())
 
-    def add_feedback(self, feedback: Feedback) -> None:
-        """フィードバックを履歴に追加"""
-        entry = FeedbackHistoryEntry.from_feedback(feedback)
-        self._history.append(entry)
-        self._save_history()
+    @staticmethod
+    def _normalize_legacy_entry(entry_data: dict) -> FeedbackHistoryEntry:
+        """従来形式のエントリを補完して読み込む"""
+        # 後方互換性: 古い形式のデータに対応
+        if "good_points" not in entry_data:
+            entry_data["good_points"] = []
+        if "overall_rating" not in entry_data:
+            # スコアから評価を推定
+            score = entry_data.get("overall_score", 0.0)
+            if score >= 3.5:
+                entry_data["overall_rating"] = "excellent"
+            elif score >= 2.5:
+                entry_data["overall_rating"] = "good"
+            elif score >= 1.5:
+                entry_data["overall_rating"] = "needs_improvement"
+            else:
+                entry_data["overall_rating"] = "requires_coaching"
+        if "pss_scores" not in entry_data:
+            entry_data["pss_scores"] = {}
+        if "ads_scores" not in entry_data:
+            entry_data["ads_scores"] = {}
+
+        return FeedbackHistoryEntry(**entry_data)
+
+    def add_feedback(self, feedback: Feedback, save: bool = True) -> None:
+        """フィードバックを履歴に追加（同じフィードバックIDのエントリは置き換え）
+
+        Args:
+            feedback: 追加するフィードバック
+            save: 直ちに保存するか（まとめて追加する場合は False にして最後に save() を呼ぶ）
+        """
+        self.upsert_entries([FeedbackHistoryEntry.from_feedback(feedback)], save=save)
+
+    def upsert_entries(self, entries: Iterable[FeedbackHistoryEntry], save: bool = True) -> int:
+        """履歴エントリを一括で追加（同じフィードバックIDのエントリは置き換え）
+
+        Args:
+            entries: 追加するエントリ
+            save: 直ちに保存するか（False の場合は save() または次の参照時に1トランザクションで保存）
+
+        Returns:
+            新規に追加したエントリ数（save=False の場合は0）
+        """
+        if not save:
+            for entry in entries:
+                self._pending[entry.feedback_id] = entry
+            return 0
+        self.save()
+        entries = list(entries)
+        added = self.store.upsert(asdict(entry) for entry in entries)
+        self._update_index(entries)
+        return added
+
+    def similarity_index(self, ca_id: str) -> SimilarityIndex:
+        """CAの改善点の類似検索インデックス（初回アクセス時にそのCAの履歴から構築）"""
+        history_index = self.ca_index(ca_id)  # 未保存のエントリを先に反映する
+        similarity = self._similarity.get(ca_id)
+        if similarity is None:
+            similarity = SimilarityIndex()
+            for entry in history_index.between(ca_id):
+                similarity.add(entry.feedback_id, entry.improvement_points)
+            self._similarity[ca_id] = similarity
+        return similarity
+
+    def _update_index(self, entries: Iterable[FeedbackHistoryEntry]) -> None:
+        """構築済みのインデックスに保存したエントリを反映"""
+        if not self._indexes:
+            return
+        for entry in entries:
+            for ca_id, other in list(self._indexes.items()):
+                if ca_id != entry.ca_id and other.get(entry.feedback_id) is not None:
+                    # 担当CAが変わったエントリは、元のCAのインデックスを次の参照時に構築し直す
+                    del self._indexes[ca_id]
+                    self._similarity.pop(ca_id, None)
+            index = self._indexes.get(entry.ca_id)
+            if index is None:
+                continue
+            if index.get(entry.feedback_id) is not None and entry.ca_id in self._similarity:
+                self._similarity[entry.ca_id].remove(entry.feedback_id)
+            index.upsert(entry)
+            similarity = self._similarity.get(entry.ca_id)
+            if similarity is not None and entry.entry_date is not None:
+                similarity.add(entry.feedback_id, entry.improvement_points)
+
+    def feedback_ids(self) -> Set[str]:
+        """履歴に登録済みのフィードバックID"""
+        self.save()
+        return self.store.ids()
+
+    def save(self) -> None:
+        """未保存のエントリを保存"""
+        if self._pending:
+            pending, self._pending = self._pending, {}
+            self.store.upsert(asdict(entry) for entry in pending.values())
+            self._update_index(pending.values())
 
     def get_past_feedbacks(
         self,
@@ -134,31 +251,58 @@ class FeedbackHistoryManager:
             days: 過去何日分を取得するか（デフォルト: 90日）
             
         Returns:
-            過去のフィードバック履歴エントリのリスト
+            過去のフィードバック履歴エントリのリスト（日付の新しい順）
         """
         from datetime import timedelta
         
         cutoff_date = (datetime.now() - timedelta(days=days)).date()
-        
-        past_feedbacks = []
-        for entry in self._history:
-            if entry.ca_id != ca_id:
-                continue
-            
-            if exclude_feedback_id and entry.feedback_id == exclude_feedback_id:
-                continue
-            
-            try:
-                entry_date = datetime.fromisoformat(entry.date).date() if "T" not in entry.date else datetime.fromisoformat(entry.date).date()
-                if entry_date >= cutoff_date:
-                    past_feedbacks.append(entry)
-            except Exception:
-                # 日付パースに失敗した場合はスキップ
-                continue
-        
-        # 日付順にソート（新しい順）
-        past_feedbacks.sort(key=lambda x: x.date, reverse=True)
-        return past_feedbacks
+        return self.get_entries_between(ca_id, start=cutoff_date, exclude_feedback_id=exclude_feedback_id)
+
+    def get_entries_between(
+        self,
+        ca_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        exclude_feedback_id: Optional[str] = None,
+    ) -> List[FeedbackHistoryEntry]:
+        """期間内のフィードバックを取得
+
+        Args:
+            ca_id: CA ID
+            start: 期間の開始日（この日を含む、Noneは制限なし）
+            end: 期間の終了日（この日を含む、Noneは制限なし）
+            exclude_feedback_id: 除外するフィードバックID
+
+        Returns:
+            フィードバック履歴エントリのリスト（日付の新しい順、日付を解釈できないエントリは除外）
+        """
+        return self.ca_index(ca_id).between(ca_id, start, end, exclude_feedback_id)
+
+    def get_entries_by_ca(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Dict[str, List[FeedbackHistoryEntry]]:
+        """期間内のフィードバックをCAごとに取得
+
+        Args:
+            start: 期間の開始日（この日を含む、Noneは制限なし）
+            end: 期間の終了日（この日を含む、Noneは制限なし）
+
+        Returns:
+            CA ID → フィードバック履歴エントリのリスト（日付の新しい順、期間内にエントリのないCAは含まない）
+        """
+        self.save()
+        entries_by_ca: Dict[str, List[FeedbackHistoryEntry]] = {}
+        rows = self.store.query(
+            start=start.isoformat() if start is not None else None,
+            end=end.isoformat() if end is not None else None,
+        )
+        for row in rows:
+            entry = FeedbackHistoryEntry(**row)
+            if entry.entry_date is not None:
+                entries_by_ca.setdefault(entry.ca_id, []).append(entry)
+        return entries_by_ca
 
     def find_repeated_improvements(
         self,
@@ -168,6 +312,9 @@ class FeedbackHistoryManager:
         days: int = 90,
     ) -> List[dict]:
         """繰り返されている改善点を検出
+
+        CAごとの類似検索インデックス（文字n-gramのMinHash/LSH）から、現在の改善点と
+        言い回しが近い改善点を含む過去のフィードバックを取得する。
         
         Args:
             current_improvement_points: 現在のフィードバックの改善点
@@ -181,54 +328,35 @@ class FeedbackHistoryManager:
                 "improvement_point": "改善点のテキスト",
                 "count": 繰り返し回数,
                 "last_feedback_date": "最後に指摘された日付",
-                "past_feedback_ids": ["過去のフィードバックID", ...]
+                "past_feedback_ids": ["過去のフィードバックID", ...],  # 日付の新しい順
+                "similarity": 最も近い過去の改善点との類似度（0〜1）
             }
         """
-        past_feedbacks = self.get_past_feedbacks(ca_id, exclude_feedback_id, days)
-        
-        # 改善点をキーワードでグループ化
-        improvement_keywords = {}
-        for improvement in current_improvement_points:
-            # 改善点から主要なキーワードを抽出（「【重要】」「【必須】」などのマークを除去）
-            clean_improvement = improvement
-            for marker in ["【重要】", "【必須】", "【緊急】"]:
-                clean_improvement = clean_improvement.replace(marker, "").strip()
-            
-            # 改善点の先頭部分をキーワードとして使用（最初の30文字程度）
-            keyword = clean_improvement[:30] if len(clean_improvement) > 30 else clean_improvement
-            
-            improvement_keywords[improvement] = keyword
-        
+        from datetime import timedelta
+
+        cutoff_date = (datetime.now() - timedelta(days=days)).date()
+        index = self.ca_index(ca_id)
+        similarity = self.similarity_index(ca_id)
+
         repeated = []
-        for current_improvement, keyword in improvement_keywords.items():
-            matching_count = 0
-            last_date = None
-            past_feedback_ids = []
-            
-            for past_feedback in past_feedbacks:
-                for past_improvement in past_feedback.improvement_points:
-                    # 類似性チェック（キーワードマッチング）
-                    clean_past = past_improvement
-                    for marker in ["【重要】", "【必須】", "【緊急】"]:
-                        clean_past = clean_past.replace(marker, "").strip()
-                    
-                    past_keyword = clean_past[:30] if len(clean_past) > 30 else clean_past
-                    
-                    # キーワードが類似しているかチェック（部分一致）
-                    if keyword in past_keyword or past_keyword in keyword:
-                        matching_count += 1
-                        if last_date is None or past_feedback.date > last_date:
-                            last_date = past_feedback.date
-                        past_feedback_ids.append(past_feedback.feedback_id)
-                        break
-            
-            if matching_count > 0:
+        for current_improvement in dict.fromkeys(current_improvement_points):
+            matches = []
+            for feedback_id, score in similarity.query(current_improvement).items():
+                if feedback_id == exclude_feedback_id:
+                    continue
+                past_feedback = index.get(feedback_id)
+                if past_feedback is None or past_feedback.entry_date < cutoff_date:
+                    continue
+                matches.append((past_feedback, score))
+
+            if matches:
+                matches.sort(key=lambda pair: (pair[0].date, pair[0].feedback_id), reverse=True)
                 repeated.append({
                     "improvement_point": current_improvement,
-                    "count": matching_count,
-                    "last_feedback_date": last_date,
-                    "past_feedback_ids": past_feedback_ids,
+                    "count": len(matches),
+                    "last_feedback_date": matches[0][0].date,
+                    "past_feedback_ids": [entry.feedback_id for entry, _ in matches],
+                    "similarity": round(max(score for _, score in matches), 3),
                 })
         
         return repeated
-
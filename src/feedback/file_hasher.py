@@ -0,0 +1,106 @@
+"""ファイル内容のハッシュ計算（チャンク読み込み・キャッシュ付き）"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+# 1回に読み込むバイト数（大きな音声ファイルでもメモリ使用量はこの大きさに収まる）
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# 対応するハッシュアルゴリズム（md5 は既存メタデータのキーとの互換用、blake2b は高速な代替）
+SUPPORTED_ALGORITHMS = ("md5", "blake2b")
+
+# blake2b のダイジェスト長（バイト）
+BLAKE2B_DIGEST_SIZE = 32
+
+
+class FileHasher:
+    """ファイル内容のハッシュ値を計算するサービス
+
+    ファイルは固定長のチャンク単位で同じバッファに読み込みながらハッシュするため、
+    ファイル全体をメモリに載せない。計算結果は (絶対パス, サイズ, 更新時刻ns) をキーに
+    キャッシュし、ファイルが変わっていなければ再度読み込まない。
+    """
+
+    def __init__(self, algorithm: str = "md5", chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Args:
+            algorithm: ハッシュアルゴリズム（"md5" または "blake2b"）
+            chunk_size: 1回に読み込むバイト数
+        """
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}. Supported: {SUPPORTED_ALGORITHMS}")
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def _new_hash(self):
+        if self.algorithm == "blake2b":
+            return hashlib.blake2b(digest_size=BLAKE2B_DIGEST_SIZE)
+        return hashlib.md5()
+
+    @staticmethod
+    def cache_key(path: Path) -> Tuple[str, int, int]:
+        """キャッシュキー（絶対パス, サイズ, 更新時刻ns）"""
+        stat = os.stat(path)
+        return (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+    def hash_file(self, path: Path) -> str:
+        """
+        ファイル内容のハッシュ値を取得（変更されていなければキャッシュから返す）
+
+        Args:
+            path: 対象ファイルのパス
+
+        Returns:
+            ハッシュ値の16進文字列
+        """
+        key = self.cache_key(path)
+        with self._lock:
+            digest = self._cache.get(key)
+            if digest is not None:
+                self.hits += 1
+                return digest
+            self.misses += 1
+
+        digest = self.compute(path)
+        with self._lock:
+            self._cache[key] = digest
+        return digest
+
+    def compute(self, path: Path) -> str:
+        """キャッシュを使わずにファイル全体をチャンク単位で読み込んでハッシュ値を計算"""
+        hasher = self._new_hash()
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                hasher.update(view[:size])
+        return hasher.hexdigest()
+
+    def remember(self, path: Path, digest: str) -> None:
+        """計算済みのハッシュ値を登録（移動・コピー後のファイルを再度読み込まないため）"""
+        key = self.cache_key(path)
+        with self._lock:
+            self._cache[key] = digest
+
+    def clear(self) -> None:
+        """キャッシュを削除"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 既定のハッシュ計算サービス（プロセス内で共有）
+default_hasher = FileHasher()
@@ -0,0 +1,158 @@
+"""ファイルの取り込み（reflink・ハードリンク・移動によるコピーの回避）"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+# 取り込み方式
+#   auto:     reflink → コピー（元ファイルとブロックを共有しても、どちらかを書き換えれば別々になる）
+#   hardlink: reflink → ハードリンク → コピー（元ファイルと実体を共有するため、明示した場合のみ使う）
+#   copy:     常にコピー
+#   move:     移動（別のファイルシステムの場合はコピーしてから元ファイルを削除）
+INGEST_MODES = ("auto", "hardlink", "copy", "move")
+
+# Linux の FICLONE ioctl（linux/fs.h の _IOW(0x94, 9, int)）
+FICLONE = 0x40049409
+
+
+def _clonefile_function():
+    """macOS（APFS）の clonefile(2)（使えない場合はNone）"""
+    if sys.platform != "darwin":
+        return None
+    library = ctypes.util.find_library("c")
+    if not library:
+        return None
+    function = getattr(ctypes.CDLL(library, use_errno=True), "clonefile", None)
+    if function is not None:
+        function.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+        function.restype = ctypes.c_int
+    return function
+
+
+_clonefile = _clonefile_function()
+
+
+def reflink(source: Path, target: Path) -> None:
+    """
+    ファイルをreflink（コピーオンライト）で複製
+
+    データブロックは元ファイルと共有し、どちらかが書き換えられた部分だけが別々に保存される。
+    Btrfs・XFS（reflink=1）などの Linux と、APFS の macOS で使える。
+
+    Raises:
+        OSError: reflink に対応していないファイルシステム・OSの場合
+    """
+    if _clonefile is not None:
+        if _clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), str(target))
+        return
+
+    if not HAS_FCNTL or not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflink is not supported on this platform", str(target))
+
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            os.unlink(target)
+            raise
+    shutil.copystat(source, target)
+
+
+def _hardlink(source: Path, target: Path) -> None:
+    os.link(source, target)
+
+
+def _copy(source: Path, target: Path) -> None:
+    shutil.copy2(source, target)
+
+
+_METHODS = {
+    "reflink": reflink,
+    "hardlink": _hardlink,
+    "copy": _copy,
+}
+
+_CHAINS = {
+    "auto": ("reflink", "copy"),
+    "hardlink": ("reflink", "hardlink", "copy"),
+    "copy": ("copy",),
+}
+
+
+def ingest_file(source: Path, target: Path, mode: str = "auto") -> str:
+    """
+    ファイルを target に取り込む
+
+    同じファイルシステム内では reflink・移動（rename）でデータを複製せずに取り込み、
+    使えない場合（別のファイルシステム、対応していないファイルシステムなど）はコピーする。
+    取り込みは同じディレクトリの一時ファイルを経由して os.replace で置き換えるため、
+    target が既にあっても（それが他のファイルのハードリンクであっても）その内容は書き換えない。
+
+    "hardlink" は reflink が使えない場合にハードリンクで取り込む。ハードリンクは元ファイルと
+    同じ実体を指すため、どちらかをその場で書き換えるともう一方も変わる。元ファイルを
+    書き換えないことが分かっている大きなファイル（録音した音声など）にだけ指定すること。
+
+    Args:
+        source: 元ファイルのパス
+        target: 取り込み先のパス
+        mode: 取り込み方式（INGEST_MODES のいずれか）
+
+    Returns:
+        実際に使った方式（"reflink"、"hardlink"、"move"、"copy" のいずれか）
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError(f"Unsupported ingest mode: {mode}. Supported: {INGEST_MODES}")
+
+    source = Path(source)
+    target = Path(target)
+
+    if mode == "move":
+        try:
+            os.replace(source, target)
+            return "move"
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # 別のファイルシステムの場合はコピーしてから元ファイルを削除
+        _replace_via_temp(source, target, "copy")
+        source.unlink()
+        return "copy"
+
+    methods = _CHAINS[mode]
+    for method in methods[:-1]:
+        try:
+            _replace_via_temp(source, target, method)
+            return method
+        except OSError:
+            continue
+    _replace_via_temp(source, target, methods[-1])
+    return methods[-1]
+
+
+def _replace_via_temp(source: Path, target: Path, method: str) -> None:
+    """一時ファイルに取り込んでから target を置き換える"""
+    # ドットで始まる名前にして、監視・自動登録の対象にならないようにする
+    tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        _METHODS[method](source, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        # 失敗した場合と、target が既に source と同じ実体で置き換えが起きなかった場合の後始末
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
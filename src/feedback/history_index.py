@@ -0,0 +1,127 @@
+"""CAごとの日付順インデックス（二分探索による期間検索）"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .feedback_history import FeedbackHistoryEntry
+
+# 並び順のキー: (日付の序数, 日付文字列, -登録順)
+SortKey = Tuple[int, str, int]
+
+
+class HistoryIndex:
+    """フィードバック履歴エントリのCAごとの日付順インデックス
+
+    CAごとにエントリを (日付, 日付文字列, 登録順) の昇順に並べたリストと、同じ順のキーの
+    リストを保持する。期間検索はキーの二分探索で範囲の両端を求めてスライスするだけで、
+    検索のたびに日付を解釈したり並べ替えたりしない。日付はエントリ側で解釈済みのもの
+    （FeedbackHistoryEntry.entry_date）を使い、解釈できないエントリは索引に含めない。
+    """
+
+    def __init__(self, entries: Iterable["FeedbackHistoryEntry"] = ()) -> None:
+        """
+        Args:
+            entries: 登録順（古い順）のエントリ
+        """
+        self._keys: Dict[str, List[SortKey]] = {}
+        self._entries: Dict[str, List["FeedbackHistoryEntry"]] = {}
+        self._seqs: Dict[str, int] = {}  # フィードバックID → 登録順（日付を解釈できないエントリも含む）
+        self._locations: Dict[str, Tuple[str, SortKey]] = {}  # フィードバックID → (CA ID, キー)
+        self._by_id: Dict[str, "FeedbackHistoryEntry"] = {}  # フィードバックID → エントリ（索引に含むもの）
+
+        # 一括構築: CAごとに集めてから1回だけ並べ替える
+        latest: Dict[str, "FeedbackHistoryEntry"] = {}
+        for entry in entries:
+            self._seqs.setdefault(entry.feedback_id, len(self._seqs))
+            latest[entry.feedback_id] = entry  # 同じIDは後のエントリで置き換え（登録順は維持）
+
+        grouped: Dict[str, List[Tuple[SortKey, "FeedbackHistoryEntry"]]] = {}
+        for feedback_id, entry in latest.items():
+            key = self._make_key(entry, self._seqs[feedback_id])
+            if key is not None:
+                grouped.setdefault(entry.ca_id, []).append((key, entry))
+                self._locations[feedback_id] = (entry.ca_id, key)
+                self._by_id[feedback_id] = entry
+
+        for ca_id, pairs in grouped.items():
+            pairs.sort(key=lambda pair: pair[0])
+            self._keys[ca_id] = [key for key, _ in pairs]
+            self._entries[ca_id] = [entry for _, entry in pairs]
+
+    @staticmethod
+    def _make_key(entry: "FeedbackHistoryEntry", seq: int) -> Optional[SortKey]:
+        entry_date = entry.entry_date
+        if entry_date is None:
+            return None
+        return (entry_date.toordinal(), entry.date, -seq)
+
+    def upsert(self, entry: "FeedbackHistoryEntry") -> None:
+        """エントリを追加（同じフィードバックIDのエントリは置き換え、登録順は維持）"""
+        previous = self._locations.pop(entry.feedback_id, None)
+        if previous is not None:
+            self._remove(*previous)
+            del self._by_id[entry.feedback_id]
+        seq = self._seqs.setdefault(entry.feedback_id, len(self._seqs))
+
+        key = self._make_key(entry, seq)
+        if key is None:
+            return
+        keys = self._keys.setdefault(entry.ca_id, [])
+        position = bisect_right(keys, key)
+        keys.insert(position, key)
+        self._entries.setdefault(entry.ca_id, []).insert(position, entry)
+        self._locations[entry.feedback_id] = (entry.ca_id, key)
+        self._by_id[entry.feedback_id] = entry
+
+    def _remove(self, ca_id: str, key: SortKey) -> None:
+        keys = self._keys[ca_id]
+        position = bisect_left(keys, key)
+        del keys[position]
+        del self._entries[ca_id][position]
+
+    def between(
+        self,
+        ca_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        exclude_feedback_id: Optional[str] = None,
+    ) -> List["FeedbackHistoryEntry"]:
+        """
+        期間内のエントリを取得（日付の新しい順、同じ日付は登録順）
+
+        Args:
+            ca_id: CA ID
+            start: 期間の開始日（この日を含む、Noneは制限なし）
+            end: 期間の終了日（この日を含む、Noneは制限なし）
+            exclude_feedback_id: 除外するフィードバックID
+
+        Returns:
+            エントリのリスト
+        """
+        keys = self._keys.get(ca_id)
+        if not keys:
+            return []
+        low = 0 if start is None else bisect_left(keys, (start.toordinal(),))
+        high = len(keys) if end is None else bisect_left(keys, (end.toordinal() + 1,))
+        if low >= high:
+            return []
+        entries = self._entries[ca_id][low:high]
+        entries.reverse()
+        if exclude_feedback_id is not None:
+            entries = [entry for entry in entries if entry.feedback_id != exclude_feedback_id]
+        return entries
+
+    def get(self, feedback_id: str) -> Optional["FeedbackHistoryEntry"]:
+        """フィードバックIDのエントリ（日付を解釈できない・未登録の場合はNone）"""
+        return self._by_id.get(feedback_id)
+
+    def ca_ids(self) -> List[str]:
+        """エントリのあるCA ID"""
+        return [ca_id for ca_id, keys in self._keys.items() if keys]
+
+    def __len__(self) -> int:
+        return len(self._locations)
@@ -0,0 +1,177 @@
+"""フィードバック履歴の永続化（SQLite）"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback_history (
+    feedback_id TEXT PRIMARY KEY,
+    ca_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    date_key TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_history_ca_date
+    ON feedback_history (ca_id, date_key);
+CREATE INDEX IF NOT EXISTS idx_feedback_history_date
+    ON feedback_history (date_key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class HistoryStore:
+    """フィードバック履歴エントリのSQLiteストア
+
+    1エントリ1行で、CA ID・日付（YYYY-MM-DD に正規化した date_key）に索引を張る。
+    追加・更新はエントリ単位（まとめて渡した場合は1トランザクション）で書き込むため、
+    履歴全体を書き直すことはない。WALモードで書き込み途中にプロセスが落ちても
+    コミット済みのエントリは失われず、読み込みは書き込みを待たない。
+    エントリは辞書（FeedbackHistoryEntry のフィールド）で受け渡す。
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Args:
+            db_path: データベースファイルのパス
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        エントリを追加（同じ feedback_id のエントリは置き換え）
+
+        Args:
+            rows: エントリの辞書（feedback_id, ca_id, date, created_at を含む）
+
+        Returns:
+            新規に追加したエントリ数
+        """
+        added = 0
+        with self._lock, self._conn:
+            for row in rows:
+                values = (
+                    row["ca_id"],
+                    row["date"],
+                    date_key(row["date"]),
+                    row.get("created_at", ""),
+                    json.dumps(row, ensure_ascii=False),
+                    row["feedback_id"],
+                )
+                cursor = self._conn.execute(
+                    "UPDATE feedback_history SET ca_id = ?, date = ?, date_key = ?, "
+                    "created_at = ?, data = ? WHERE feedback_id = ?",
+                    values,
+                )
+                if cursor.rowcount == 0:
+                    self._conn.execute(
+                        "INSERT INTO feedback_history "
+                        "(ca_id, date, date_key, created_at, data, feedback_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        values,
+                    )
+                    added += 1
+        return added
+
+    def query(
+        self,
+        ca_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        exclude_feedback_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        条件に合うエントリを取得（日付の新しい順）
+
+        Args:
+            ca_id: CA ID
+            start: 期間の開始日（YYYY-MM-DD、この日を含む）
+            end: 期間の終了日（YYYY-MM-DD、この日を含む）
+            exclude_feedback_id: 除外するフィードバックID
+
+        Returns:
+            エントリの辞書のリスト（日付を解釈できないエントリは期間指定時に除外）
+        """
+        conditions = []
+        params: List[Any] = []
+        if ca_id is not None:
+            conditions.append("ca_id = ?")
+            params.append(ca_id)
+        if start is not None:
+            conditions.append("date_key >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("date_key <= ? AND date_key != ''")
+            params.append(end)
+        if exclude_feedback_id is not None:
+            conditions.append("feedback_id != ?")
+            params.append(exclude_feedback_id)
+
+        sql = "SELECT data FROM feedback_history"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY date DESC, rowid"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def scan(self) -> Iterator[Dict[str, Any]]:
+        """全エントリを登録順に取得"""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM feedback_history ORDER BY rowid").fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def ids(self) -> Set[str]:
+        """登録済みのフィードバックID"""
+        with self._lock:
+            return {fid for (fid,) in self._conn.execute("SELECT feedback_id FROM feedback_history")}
+
+    def count(self) -> int:
+        """登録済みのエントリ数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM feedback_history").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """メタ情報を取得"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """メタ情報を保存"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
+
+
+def date_key(value: str) -> str:
+    """日付文字列（YYYY-MM-DD または ISO形式の日時）を YYYY-MM-DD に正規化（解釈できない場合は空文字）"""
+    try:
+        return datetime.fromisoformat(value).date().isoformat()
+    except (TypeError, ValueError):
+        return ""
@@ -0,0 +1,469 @@
+"""永続ジョブキュー（SQLite・ステージ別の並列実行・リトライ・デッドレター）"""
+
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# 他プロセスが書き込み中の場合に待つ秒数
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# ジョブが見つからない場合の待ち時間（秒、常駐時）
+DEFAULT_POLL_INTERVAL = 1.0
+
+# 取得できるジョブ（実行可能時刻を過ぎた実行待ち、またはリース期限切れの実行中）
+_READY_CONDITION = "((status = ? AND available_at <= ?) OR (status = ? AND lease_until <= ?))"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stage TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_token TEXT,
+    lease_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (stage, idempotency_key)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready
+    ON jobs (stage, status, available_at);
+"""
+
+
+class JobStatus(str, Enum):
+    """ジョブのステータス"""
+
+    QUEUED = "queued"  # 実行待ち（リトライ待ちを含む）
+    RUNNING = "running"  # 実行中（リース期限まで他のワーカーは取得しない）
+    DONE = "done"  # 完了
+    DEAD = "dead"  # リトライ上限に達した、またはリトライしても回復しないエラー（デッドレター）
+
+
+@dataclass
+class Job:
+    """キューから取得したジョブ"""
+
+    id: int
+    stage: str
+    idempotency_key: str
+    payload: Dict[str, Any]
+    status: JobStatus
+    attempts: int  # 取得された回数（今回の実行を含む）
+    last_error: Optional[str] = None
+    lease_token: Optional[str] = None
+
+
+class JobQueue:
+    """SQLiteに保存する永続ジョブキュー
+
+    ジョブはステージ名と冪等キーの組で一意になり、同じ組の投入は無視される
+    （処理途中で中断して再実行しても、次のステージのジョブが二重に作られない）。
+    取得したジョブにはリース期限を設定し、期限内に完了・失敗の報告がなければ
+    （プロセスが異常終了した場合など）再び取得できるようになる。
+    WALモードのため、複数プロセスから同じキューを使っても同じジョブを二重に取得しない。
+    """
+
+    def __init__(self, db_path: Path, clock: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            db_path: データベースファイルのパス
+            clock: 時刻関数（UNIX時刻、プロセス間で共有するため壁時計を使う）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def enqueue(self, stage: str, idempotency_key: str, payload: Dict[str, Any], delay: float = 0.0) -> bool:
+        """
+        ジョブを投入（同じステージ・冪等キーのジョブがあれば何もしない）
+
+        Args:
+            stage: ステージ名
+            idempotency_key: 冪等キー
+            payload: ジョブの内容（JSONに変換できる辞書）
+            delay: 実行可能になるまでの秒数
+
+        Returns:
+            投入した場合True（既に同じジョブがある場合False）
+        """
+        now = self.clock()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (stage, idempotency_key, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(stage, idempotency_key) DO NOTHING",
+                (
+                    stage,
+                    idempotency_key,
+                    json.dumps(payload, ensure_ascii=False),
+                    JobStatus.QUEUED.value,
+                    now + delay,
+                    now,
+                    now,
+                ),
+            )
+        return cursor.rowcount > 0
+
+    def claim(self, stage: str, lease_seconds: float) -> Optional[Job]:
+        """
+        実行可能なジョブを1件取得してリースする
+
+        実行待ちで実行可能時刻を過ぎたもの、またはリース期限切れの実行中のものを古い順に取得する。
+
+        Args:
+            stage: ステージ名
+            lease_seconds: リース期間（秒）
+
+        Returns:
+            取得したジョブ（実行可能なジョブがない場合はNone）
+        """
+        now = self.clock()
+        token = uuid.uuid4().hex
+        with self._lock:
+            with self._conn:
+                # 1文で選択と更新を行うため、複数プロセスで同じジョブを取得しない
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_token = ?, "
+                    "lease_until = ?, updated_at = ? "
+                    f"WHERE id = (SELECT id FROM jobs WHERE stage = ? AND {_READY_CONDITION} "
+                    "ORDER BY available_at, id LIMIT 1)",
+                    (JobStatus.RUNNING.value, token, now + lease_seconds, now, stage, *self._ready_params(now)),
+                )
+            if cursor.rowcount == 0:
+                return None
+            row = self._conn.execute(
+                "SELECT id, stage, idempotency_key, payload, status, attempts, last_error, lease_token "
+                "FROM jobs WHERE lease_token = ?",
+                (token,),
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def has_ready(self, stages: Iterable[str]) -> bool:
+        """いずれかのステージに実行可能なジョブがあるか"""
+        stages = list(stages)
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM jobs WHERE stage IN ({', '.join('?' * len(stages))}) AND {_READY_CONDITION} LIMIT 1",
+                (*stages, *self._ready_params(now)),
+            ).fetchone()
+        return row is not None
+
+    @staticmethod
+    def _ready_params(now: float) -> tuple:
+        return (JobStatus.QUEUED.value, now, JobStatus.RUNNING.value, now)
+
+    def complete(self, job: Job) -> bool:
+        """
+        ジョブを完了にする
+
+        Returns:
+            更新した場合True（リース期限切れで他のワーカーに取得し直されていた場合False）
+        """
+        return self._finish(job, JobStatus.DONE, None, self.clock())
+
+    def retry(self, job: Job, error: str, delay: float) -> bool:
+        """
+        ジョブを delay 秒後に再実行する
+
+        Returns:
+            更新した場合True（リース期限切れで他のワーカーに取得し直されていた場合False）
+        """
+        return self._finish(job, JobStatus.QUEUED, error, self.clock() + delay)
+
+    def bury(self, job: Job, error: str) -> bool:
+        """
+        ジョブをデッドレターにする
+
+        Returns:
+            更新した場合True（リース期限切れで他のワーカーに取得し直されていた場合False）
+        """
+        return self._finish(job, JobStatus.DEAD, error, self.clock())
+
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str], available_at: float) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, last_error = ?, available_at = ?, lease_token = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE id = ? AND lease_token = ?",
+                (status.value, error, available_at, self.clock(), job.id, job.lease_token),
+            )
+        job.status = status
+        job.last_error = error
+        return cursor.rowcount > 0
+
+    def requeue_dead(self, stage: Optional[str] = None) -> int:
+        """
+        デッドレターのジョブを試行回数を0に戻して再投入
+
+        Args:
+            stage: ステージ名（Noneは全ステージ）
+
+        Returns:
+            再投入したジョブ数
+        """
+        now = self.clock()
+        clause, params = ("AND stage = ?", (stage,)) if stage else ("", ())
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? "
+                f"WHERE status = ? {clause}",
+                (JobStatus.QUEUED.value, now, now, JobStatus.DEAD.value, *params),
+            )
+        return cursor.rowcount
+
+    def list_jobs(self, status: JobStatus, stage: Optional[str] = None) -> List[Job]:
+        """ステータスが一致するジョブ（投入順）"""
+        clause, params = ("AND stage = ?", (stage,)) if stage else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, stage, idempotency_key, payload, status, attempts, last_error, lease_token "
+                f"FROM jobs WHERE status = ? {clause} ORDER BY id",
+                (status.value, *params),
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """ステージ → ステータス → ジョブ数"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status"
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for stage, status, count in rows:
+            counts.setdefault(stage, {})[status] = count
+        return counts
+
+    def next_available_at(self, stage: Optional[str] = None) -> Optional[float]:
+        """実行待ちのジョブが次に実行可能になる時刻（実行待ちがない場合はNone）"""
+        clause, params = ("AND stage = ?", (stage,)) if stage else ("", ())
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT MIN(available_at) FROM jobs WHERE status = ? {clause}",
+                (JobStatus.QUEUED.value, *params),
+            ).fetchone()
+        return row[0]
+
+    def purge_done(self, older_than: float) -> int:
+        """
+        完了から older_than 秒以上経ったジョブを削除
+
+        Returns:
+            削除したジョブ数
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status = ? AND updated_at <= ?",
+                (JobStatus.DONE.value, self.clock() - older_than),
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _job(row: tuple) -> Job:
+        job_id, stage, key, payload, status, attempts, last_error, lease_token = row
+        return Job(
+            id=job_id,
+            stage=stage,
+            idempotency_key=key,
+            payload=json.loads(payload),
+            status=JobStatus(status),
+            attempts=attempts,
+            last_error=last_error,
+            lease_token=lease_token,
+        )
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
+
+
+def _always_retry(error: Exception) -> bool:
+    return True
+
+
+@dataclass
+class JobStage:
+    """ステージの処理とリトライ・並列度の設定"""
+
+    name: str
+    handler: Callable[[Job], None]  # 例外を送出すると失敗としてリトライ・デッドレターの対象になる
+    concurrency: int = 1  # 同時実行数
+    max_attempts: int = 5  # 最大試行回数（これに達するとデッドレター）
+    base_delay: float = 30.0  # バックオフの初期待ち時間（秒）
+    max_delay: float = 3600.0  # バックオフの最大待ち時間（秒）
+    lease_seconds: float = 600.0  # 1回の実行にかかる時間の上限（秒、超えると他のワーカーが取得し直す）
+    retryable: Callable[[Exception], bool] = field(default=_always_retry)  # リトライで回復する可能性のあるエラーか
+    on_dead: Optional[Callable[[Job], None]] = None  # デッドレターになったときに呼ばれる
+
+    def backoff(self, attempt: int) -> float:
+        """ジッター付き指数バックオフの待ち時間（初期待ち時間の半分以上は待つ）"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+
+class JobRunner:
+    """ステージごとに指定した数のワーカースレッドでジョブを実行
+
+    ハンドラーが例外を送出したジョブは、リトライで回復する可能性があり試行回数が上限未満なら
+    指数バックオフ後に再実行し、それ以外はデッドレターにする。
+    ハンドラーは次のステージのジョブを投入してよい（同じ実行の中で続けて処理される）。
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        stages: Iterable[JobStage],
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        """
+        Args:
+            queue: ジョブキュー
+            stages: ステージ
+            poll_interval: ジョブが見つからない場合の待ち時間（秒）
+        """
+        self.queue = queue
+        self.stages: List[JobStage] = list(stages)
+        self.poll_interval = poll_interval
+
+        self.completed_count = 0
+        self.retried_count = 0
+        self.dead_count = 0
+
+        self._condition = threading.Condition()
+        self._active = 0  # ジョブを取得中・実行中のワーカー数
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def run_until_idle(self) -> None:
+        """実行可能なジョブがなくなるまで処理する（バックオフ中のジョブは次回の実行に残す）"""
+        self._stop.clear()
+        self._start_workers(until_idle=True)
+        self._join_workers()
+
+    def start(self) -> None:
+        """常駐して処理を開始（stop まで新しいジョブを待ち続ける）"""
+        self._stop.clear()
+        self._start_workers(until_idle=False)
+
+    def stop(self) -> None:
+        """処理を停止（実行中のジョブの完了を待つ）"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._join_workers()
+
+    def _start_workers(self, until_idle: bool) -> None:
+        for stage in self.stages:
+            for i in range(max(stage.concurrency, 1)):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(stage, until_idle),
+                    name=f"job-{stage.name}-{i}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def _join_workers(self) -> None:
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _worker(self, stage: JobStage, until_idle: bool) -> None:
+        stage_names = [s.name for s in self.stages]
+        while not self._stop.is_set():
+            job: Optional[Job] = None
+            with self._condition:
+                self._active += 1
+            try:
+                job = self.queue.claim(stage.name, stage.lease_seconds)
+                if job is not None:
+                    self._execute(stage, job)
+            except sqlite3.Error as e:
+                # ロック競合（database is locked）などでキューを操作できなかった。
+                # 取得済みのジョブはリース期限切れ後に取得し直されるため、待ってから続ける
+                # （待つ間は実行中として数え、他のワーカーが処理完了と判断しないようにする）
+                print(f"⚠️  {stage.name}: ジョブキューの操作に失敗しました: {e}")
+                self._stop.wait(self.poll_interval)
+                continue
+            finally:
+                with self._condition:
+                    self._active -= 1
+                    self._condition.notify_all()
+            if job is not None:
+                continue
+
+            with self._condition:
+                # 他のワーカーがジョブを取得・実行しておらず（次のステージへの投入が起こらない）、
+                # どのステージにも実行可能なジョブがなければ全ワーカーを終了する
+                if until_idle and self._active == 0 and not self._has_ready(stage_names):
+                    self._stop.set()
+                    self._condition.notify_all()
+                    return
+                self._condition.wait(self.poll_interval)
+
+    def _has_ready(self, stage_names: List[str]) -> bool:
+        """実行可能なジョブがあるか（キューを参照できない場合は、あるものとして待ち直す）"""
+        try:
+            return self.queue.has_ready(stage_names)
+        except sqlite3.Error as e:
+            print(f"⚠️  ジョブキューの参照に失敗しました: {e}")
+            return True
+
+    def _execute(self, stage: JobStage, job: Job) -> None:
+        if job.attempts > stage.max_attempts:
+            # 実行中にプロセスが終了するなどしてリース期限切れで取得し直されたジョブ
+            self._bury(stage, job, job.last_error or "lease expired")
+            return
+        try:
+            stage.handler(job)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if stage.retryable(e) and job.attempts < stage.max_attempts:
+                delay = stage.backoff(job.attempts)
+                self.queue.retry(job, error, delay)
+                with self._condition:
+                    self.retried_count += 1
+                print(
+                    f"⚠️  {stage.name}: {job.idempotency_key} の処理に失敗しました"
+                    f"（{job.attempts}/{stage.max_attempts}回目、{delay:.0f}秒後に再試行）: {error}"
+                )
+            else:
+                self._bury(stage, job, error)
+            return
+
+        self.queue.complete(job)
+        with self._condition:
+            self.completed_count += 1
+
+    def _bury(self, stage: JobStage, job: Job, error: str) -> None:
+        if not self.queue.bury(job, error):
+            return
+        with self._condition:
+            self.dead_count += 1
+        print(f"❌ {stage.name}: {job.idempotency_key} をデッドレターに移しました（{job.attempts}回試行）: {error}")
+        if stage.on_dead:
+            try:
+                stage.on_dead(job)
+            except Exception as e:
+                print(f"⚠️  {stage.name}: デッドレターの後処理に失敗しました: {job.idempotency_key} - {e}")
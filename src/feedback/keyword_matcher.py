@@ -0,0 +1,105 @@
+"""複数キーワードの一括検索（Aho–Corasick法）"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """複数キーワードを1回の走査で検索するオートマトン
+
+    キーワード群からトライ木と失敗遷移を一度だけ構築し、失敗遷移を畳み込んだ遷移表
+    （ノード×文字 → 次のノード）にしておく。走査はテキストを先頭から1文字ずつ読み、
+    1文字あたり1回の表引きだけで全キーワードの出現位置を求める。計算量はキーワード数によらず
+    テキスト長＋出現数に比例する。重なり合う出現（「具体的」と「具体的に」など）もすべて検出する。
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        """
+        Args:
+            keywords: 検索するキーワード（空文字・重複は無視）
+        """
+        self.keywords: List[str] = list(dict.fromkeys(k for k in keywords if k))
+        # ノードごとの遷移（文字 → ノード番号）・失敗遷移・出力（キーワード番号）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        # 失敗遷移を畳み込んだ遷移表（キーワードに含まれない文字は根に戻る）
+        self._delta: List[Dict[str, int]] = []
+        self._build()
+
+    def _build(self) -> None:
+        """トライ木と失敗遷移を構築"""
+        for index, keyword in enumerate(self.keywords):
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(index)
+
+        # 幅優先で失敗遷移を設定し、失敗先の出力を引き継ぐ
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+        # 幅優先順（失敗先が先に確定する順）に遷移表を作成
+        self._delta = [{} for _ in self._goto]
+        self._delta[0] = dict(self._goto[0])
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            delta = dict(self._delta[self._fail[node]])
+            delta.update(self._goto[node])
+            self._delta[node] = delta
+            queue.extend(self._goto[node].values())
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        キーワードの出現を順に返す
+
+        Yields:
+            (開始位置, キーワード)
+        """
+        delta, output, keywords = self._delta, self._output, self.keywords
+        node = 0
+        for position, char in enumerate(text):
+            node = delta[node].get(char, 0)
+            if output[node]:
+                for index in output[node]:
+                    keyword = keywords[index]
+                    yield position - len(keyword) + 1, keyword
+
+    def find_all(self, text: str) -> Dict[str, List[int]]:
+        """
+        全キーワードの出現位置を取得
+
+        Returns:
+            キーワード → 開始位置のリスト（出現しないキーワードは含まない）
+        """
+        positions: Dict[str, List[int]] = {}
+        for start, keyword in self.iter_matches(text):
+            positions.setdefault(keyword, []).append(start)
+        return positions
+
+    def count(self, text: str) -> Dict[str, int]:
+        """キーワード → 出現回数（出現しないキーワードは含まない）"""
+        return {keyword: len(starts) for keyword, starts in self.find_all(text).items()}
+
+    def present(self, text: str) -> Set[str]:
+        """テキストに含まれるキーワード"""
+        return {keyword for _, keyword in self.iter_matches(text)}
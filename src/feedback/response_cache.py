@@ -0,0 +1,153 @@
+"""AIフィードバック生成結果のキャッシュ（内容アドレス方式）"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# キャッシュファイルの形式バージョン（形式を変えた場合に上げると既存エントリは参照されなくなる）
+CACHE_FORMAT_VERSION = 1
+
+
+class ResponseCache:
+    """Messages APIのリクエスト内容をキーにした、パース済み生成結果の永続キャッシュ
+
+    キーはリクエスト全体（モデル名・最大トークン数・評価基準と指示文を含むプロンプト・書き起こし）と
+    プロンプトテンプレートのバージョンのSHA-256ハッシュ。評価基準ファイルやテンプレートが
+    変わればキーも変わるため、古いエントリは明示的に削除しなくても参照されなくなる。
+    エントリは1件1ファイル（{root}/{ハッシュ先頭2文字}/{ハッシュ}.json）で、
+    一時ファイルからのリネームで書き込むため、並列実行中や中断時にも壊れたエントリは残らない。
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        """
+        Args:
+            cache_dir: キャッシュの保存ディレクトリ
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(request: Dict[str, Any], template_version: str = "") -> str:
+        """
+        リクエスト内容からキャッシュキーを生成
+
+        Args:
+            request: Messages APIのリクエストパラメータ
+            template_version: プロンプトテンプレート・レスポンス解釈のバージョン
+
+        Returns:
+            SHA-256の16進文字列
+        """
+        payload = json.dumps(
+            {
+                "format": CACHE_FORMAT_VERSION,
+                "template_version": template_version,
+                "request": request,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        """キーに対応するエントリのファイルパス"""
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュされた生成結果を取得（ヒット率の集計対象）
+
+        Returns:
+            パース済みの生成結果（未登録・読み込めない場合はNone）
+        """
+        result = None
+        path = self.entry_path(key)
+        if path.exists():
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+                if entry.get("key") == key:
+                    result = entry["result"]
+            except (OSError, ValueError, KeyError):
+                result = None
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], model: str = "") -> None:
+        """
+        生成結果を保存
+
+        Args:
+            key: キャッシュキー
+            result: パース済みの生成結果
+            model: 生成に使用したモデル名（記録用）
+        """
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "key": key,
+            "model": model,
+            "created_at": datetime.now().isoformat(),
+            "result": result,
+        }
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @property
+    def hit_rate(self) -> float:
+        """ヒット率（参照がない場合は0）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット数・ミス数・ヒット率"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+    def reset_stats(self) -> None:
+        """ヒット率の集計をリセット"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self) -> int:
+        """
+        全エントリを削除
+
+        Returns:
+            削除したエントリ数
+        """
+        removed = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            path.unlink()
+            removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache_dir.glob("*/*.json"))
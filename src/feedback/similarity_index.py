@@ -0,0 +1,172 @@
+"""改善点の類似検索（文字n-gramのMinHash/LSH）"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# 改善点の先頭に付く強調マーク（類似度の計算では除去する）
+IMPROVEMENT_MARKERS = ["【重要】", "【必須】", "【緊急】"]
+
+# MinHashの値域（メルセンヌ素数 2^31-1、係数との積が uint64 に収まる）
+_MERSENNE_PRIME = (1 << 31) - 1
+
+DEFAULT_NGRAM = 2
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 32
+DEFAULT_THRESHOLD = 0.35
+
+
+def normalize_improvement(text: str) -> str:
+    """強調マークと空白を除去"""
+    for marker in IMPROVEMENT_MARKERS:
+        text = text.replace(marker, "")
+    return "".join(text.split())
+
+
+def char_ngrams(text: str, n: int = DEFAULT_NGRAM) -> FrozenSet[str]:
+    """文字n-gramの集合（n文字未満のテキストはテキスト全体を1要素とする）"""
+    if len(text) < n:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard係数"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityIndex:
+    """文書（フィードバック）ごとのテキスト群を登録し、近いテキストを持つ文書を検索するインデックス
+
+    各テキストを正規化して文字n-gram（日本語の言い換えにも効くようデフォルトは2文字）に分解し、
+    MinHash署名を bands 個の帯に分けてハッシュバケットに登録する（LSH）。
+    検索は同じバケットに入った候補だけについてn-gram集合のJaccard係数を計算するため、
+    登録件数が増えても全件と比較しない。Jaccard係数が threshold 付近の組が候補に入る確率は
+    約 1-(1-threshold^r)^bands（r = num_perm / bands）で、閾値を大きく下回る組はほぼ候補にならない。
+    追加・削除は文書単位で逐次行える。
+    """
+
+    def __init__(
+        self,
+        ngram: int = DEFAULT_NGRAM,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        threshold: float = DEFAULT_THRESHOLD,
+        seed: int = 1,
+    ) -> None:
+        """
+        Args:
+            ngram: n-gramの文字数
+            num_perm: MinHash署名の長さ（bands で割り切れること）
+            bands: LSHの帯の数
+            threshold: 類似とみなすJaccard係数の下限
+            seed: ハッシュ関数の乱数シード
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.ngram = ngram
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        # バケットには正規化後のテキストを登録し、同じ文言の改善点は1つの候補として扱う
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self._texts: Dict[str, Tuple[FrozenSet[str], List[Tuple[int, bytes]]]] = {}  # テキスト → (n-gram集合, バケットキー)
+        self._text_docs: Dict[str, Set[str]] = {}  # テキスト → そのテキストを含む文書ID
+        self._docs: Dict[str, Set[str]] = {}  # 文書ID → テキスト
+
+    def _signature(self, shingles: FrozenSet[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) % _MERSENNE_PRIME for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def _bucket_keys(self, shingles: FrozenSet[str]) -> List[Tuple[int, bytes]]:
+        if not shingles:
+            return []
+        signature = self._signature(shingles)
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def add(self, doc_id: str, texts: Iterable[str]) -> None:
+        """文書のテキスト群を登録（同じ文書IDは置き換え）"""
+        self.remove(doc_id)
+        normalized_texts = {normalize_improvement(text) for text in texts}
+        for normalized in normalized_texts:
+            if normalized not in self._texts:
+                shingles = char_ngrams(normalized, self.ngram)
+                keys = self._bucket_keys(shingles)
+                for key in keys:
+                    self._buckets.setdefault(key, set()).add(normalized)
+                self._texts[normalized] = (shingles, keys)
+                self._text_docs[normalized] = set()
+            self._text_docs[normalized].add(doc_id)
+        self._docs[doc_id] = normalized_texts
+
+    def remove(self, doc_id: str) -> None:
+        """文書を削除（未登録なら何もしない）"""
+        for normalized in self._docs.pop(doc_id, ()):
+            docs = self._text_docs[normalized]
+            docs.discard(doc_id)
+            if docs:
+                continue
+            # どの文書にも含まれなくなったテキストはバケットから除く
+            del self._text_docs[normalized]
+            _, keys = self._texts.pop(normalized)
+            for key in keys:
+                bucket = self._buckets[key]
+                bucket.discard(normalized)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, text: str, threshold: Optional[float] = None) -> Dict[str, float]:
+        """
+        テキストに近いテキストを持つ文書を検索
+
+        Args:
+            text: 検索するテキスト
+            threshold: 類似とみなすJaccard係数の下限（Noneはインデックスの既定値）
+
+        Returns:
+            文書ID → 文書内で最も近いテキストとの類似度（threshold 以上のもの）
+        """
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_improvement(text)
+        cached = self._texts.get(normalized)
+        if cached is None:
+            shingles = char_ngrams(normalized, self.ngram)
+            cached = (shingles, self._bucket_keys(shingles))
+        shingles, keys = cached
+        candidates: Set[str] = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+
+        matches: Dict[str, float] = {}
+        for candidate in candidates:
+            similarity = jaccard(shingles, self._texts[candidate][0])
+            if similarity < threshold:
+                continue
+            for doc_id in self._text_docs[candidate]:
+                if similarity > matches.get(doc_id, 0.0):
+                    matches[doc_id] = similarity
+        return matches
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def __len__(self) -> int:
+        return len(self._docs)
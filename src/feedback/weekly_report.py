@@ -6,9 +6,9 @@ from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from .feedback_history import FeedbackHistoryManager
+from .feedback_history import FeedbackHistoryEntry, FeedbackHistoryManager
 from .models import Feedback
 from .ca_mapping import CAMappingManager
 
@@ -33,6 +33,18 @@ class WeeklyFeedbackSummary:
     good_points_summary: Dict[str, int]  # 良かった点の頻度
 
 
+@dataclass
+class WeeklyReportBatch:
+    """全CAの週次レポート（一括生成の結果）"""
+
+    week_start: str  # YYYY-MM-DD
+    week_end: str  # YYYY-MM-DD
+    summaries: List[WeeklyFeedbackSummary]
+    previous_summaries: Dict[str, WeeklyFeedbackSummary]  # CA ID → 前週のサマリー
+    overall_message: str  # 全体サマリー（Slack用）
+    messages: Dict[str, str]  # CA ID → 個別レポート（Slack用）
+
+
 class WeeklyReportGenerator:
     """週次レポート生成クラス"""
 
@@ -69,32 +81,128 @@ class WeeklyReportGenerator:
         """
         # 期間を決定（デフォルトは前週）
         if week_start is None or week_end is None:
-            today = datetime.now()
-            # 前週の月曜日を計算
-            days_since_monday = (today.weekday() + 1) % 7  # 0=月曜日
-            last_monday = today - timedelta(days=days_since_monday + 7)
-            week_start = last_monday.strftime("%Y-%m-%d")
-            week_end = (last_monday + timedelta(days=6)).strftime("%Y-%m-%d")
+            week_start, week_end = self._default_week()
         
         # 期間内のフィードバック履歴を取得
         start_date = datetime.strptime(week_start, "%Y-%m-%d").date()
         end_date = datetime.strptime(week_end, "%Y-%m-%d").date()
         
-        past_feedbacks = self.history_manager.get_past_feedbacks(ca_id, days=90)
-        
-        # 期間内のフィードバックをフィルタリング
-        week_feedbacks = []
-        for entry in past_feedbacks:
-            try:
-                entry_date = datetime.strptime(entry.date, "%Y-%m-%d").date() if "T" not in entry.date else datetime.fromisoformat(entry.date).date()
-                if start_date <= entry_date <= end_date:
-                    week_feedbacks.append(entry)
-            except Exception:
-                continue
+        week_feedbacks = self.history_manager.get_entries_between(ca_id, start_date, end_date)
         
         if not week_feedbacks:
             return None
         
+        return self._summarize(ca_id, week_start, week_end, week_feedbacks)
+
+    def generate_all_weekly_summaries(
+        self,
+        week_start: Optional[str] = None,
+        week_end: Optional[str] = None,
+        ca_ids: Optional[List[str]] = None,
+        detect_repeated: bool = True,
+    ) -> List[WeeklyFeedbackSummary]:
+        """全CAの週次サマリーを一括生成
+        
+        対象週の履歴を1回で取得してCAごとに振り分け、各CAのエントリを1回ずつ走査して集計する。
+        繰り返し改善点の検出もCAごとに1回（上位の改善点をまとめて）行う。
+        
+        Args:
+            week_start: 週の開始日（YYYY-MM-DD）。Noneの場合は前週の月曜日
+            week_end: 週の終了日（YYYY-MM-DD）。Noneの場合は前週の日曜日
+            ca_ids: 対象CA（Noneの場合は対象週に履歴のある全CA）
+            detect_repeated: 繰り返し改善点を検出するか（前週比較用の集計では不要）
+            
+        Returns:
+            週次サマリーのリスト（ca_ids の順、データがないCAは含まない）
+        """
+        if week_start is None or week_end is None:
+            week_start, week_end = self._default_week()
+        
+        start_date = datetime.strptime(week_start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(week_end, "%Y-%m-%d").date()
+        
+        entries_by_ca = self.history_manager.get_entries_by_ca(start_date, end_date)
+        if ca_ids is None:
+            ca_ids = sorted(entries_by_ca)
+        
+        return [
+            self._summarize(ca_id, week_start, week_end, entries_by_ca[ca_id], detect_repeated)
+            for ca_id in ca_ids
+            if entries_by_ca.get(ca_id)
+        ]
+
+    def generate_all_weekly_reports(
+        self,
+        week_start: Optional[str] = None,
+        week_end: Optional[str] = None,
+        ca_ids: Optional[List[str]] = None,
+    ) -> WeeklyReportBatch:
+        """全CAの週次サマリーとSlackメッセージを一括生成
+        
+        Args:
+            week_start: 週の開始日（YYYY-MM-DD）。Noneの場合は前週の月曜日
+            week_end: 週の終了日（YYYY-MM-DD）。Noneの場合は前週の日曜日
+            ca_ids: 対象CA（Noneの場合は対象週に履歴のある全CA）
+            
+        Returns:
+            WeeklyReportBatch: サマリー・全体サマリー・CAごとのメッセージ
+        """
+        if week_start is None or week_end is None:
+            week_start, week_end = self._default_week()
+        
+        summaries = self.generate_all_weekly_summaries(week_start, week_end, ca_ids)
+        
+        # 前週のサマリー（平均スコアの比較にのみ使うため繰り返し改善点は検出しない）
+        prev_week_start = (datetime.strptime(week_start, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
+        prev_week_end = (datetime.strptime(week_end, "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
+        previous_summaries = {
+            summary.ca_id: summary
+            for summary in self.generate_all_weekly_summaries(
+                prev_week_start,
+                prev_week_end,
+                [summary.ca_id for summary in summaries],
+                detect_repeated=False,
+            )
+        }
+        
+        messages = {
+            summary.ca_id: self.generate_weekly_report_message(
+                summary=summary,
+                previous_week_summary=previous_summaries.get(summary.ca_id),
+            )
+            for summary in summaries
+        }
+        overall_message = (
+            self.generate_overall_summary(summaries, week_start, week_end) if summaries else ""
+        )
+        
+        return WeeklyReportBatch(
+            week_start=week_start,
+            week_end=week_end,
+            summaries=summaries,
+            previous_summaries=previous_summaries,
+            overall_message=overall_message,
+            messages=messages,
+        )
+
+    @staticmethod
+    def _default_week() -> Tuple[str, str]:
+        """前週の月曜日と日曜日"""
+        today = datetime.now()
+        # 前週の月曜日を計算
+        days_since_monday = (today.weekday() + 1) % 7  # 0=月曜日
+        last_monday = today - timedelta(days=days_since_monday + 7)
+        return last_monday.strftime("%Y-%m-%d"), (last_monday + timedelta(days=6)).strftime("%Y-%m-%d")
+
+    def _summarize(
+        self,
+        ca_id: str,
+        week_start: str,
+        week_end: str,
+        week_feedbacks: List[FeedbackHistoryEntry],
+        detect_repeated: bool = True,
+    ) -> WeeklyFeedbackSummary:
+        """期間内のフィードバック履歴からサマリーを計算"""
         # サマリーを計算
         scores = []
         rating_counts = defaultdict(int)
@@ -141,14 +249,12 @@ class WeeklyReportGenerator:
         
         # 繰り返し改善点を検出
         repeated_improvements_list = []
-        for point, count in top_improvements:
-            repeated = self.history_manager.find_repeated_improvements(
-                [point],
+        if detect_repeated and top_improvements:
+            repeated_improvements_list = self.history_manager.find_repeated_improvements(
+                [point for point, _ in top_improvements],
                 ca_id=ca_id,
                 days=90,
             )
-            if repeated:
-                repeated_improvements_list.extend(repeated)
         
         # 評価分布を日本語ラベルに変換
         rating_labels = {
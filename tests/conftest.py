@@ -0,0 +1,43 @@
+"""テスト共通のフィクスチャ"""
+
+import importlib.util
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+
+def load_stub_module():
+    """scripts/stub_anthropic_server.py をモジュールとして読み込む"""
+    spec = importlib.util.spec_from_file_location(
+        "stub_anthropic_server", ROOT / "scripts" / "stub_anthropic_server.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """
+    Anthropic APIのスタブサーバーを空きポートで起動
+
+    Returns:
+        スタブの状態（StubState、base_url 属性に接続先URL）。エラー発生率などはテスト中に変更できる
+    """
+    pytest.importorskip("anthropic")
+    stub = load_stub_module()
+    state = stub.StubState(latency=0.0, rate_limit_rate=0.0, overload_rate=0.0, batch_seconds=0.0)
+    handler = type("StubHandler", (stub.StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "dummy")
+    state.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+    thread.join()
@@ -0,0 +1,242 @@
+"""CA別パフォーマンスの増分集計のテスト"""
+
+import random
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from src.analytics.aggregates import CAAggregateStore
+from src.analytics.analytics_engine import AnalyticsEngine
+from src.analytics.models import CA, Lead, SegmentType
+from src.analytics.segment_cube import CUBE_DIMENSIONS, SegmentCube
+from src.analytics.snapshot_store import SnapshotStore
+
+DATA_DIR = Path(__file__).parent.parent / "data" / "sample" / "analytics"
+
+
+def make_ca(ca_id: str, team: str = "東日本", target_leads: int = 10) -> CA:
+    return CA(ca_id=ca_id, name=ca_id, team=team, slack_user_id="", target_leads=target_leads)
+
+
+def make_lead(lead_id: str, ca_id: str = "", status: str = "active", age: int = 30, qualified: bool = True) -> Lead:
+    return Lead(
+        lead_id=lead_id,
+        name="",
+        age=age,
+        prefecture="東京都",
+        qualification="第二種電気工事士" if qualified else "",
+        has_qualification=qualified,
+        assigned_ca_id=ca_id,
+        status=status,
+    )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = AnalyticsEngine(data_dir=tmp_path)
+    engine.cas = {"CA1": make_ca("CA1"), "CA2": make_ca("CA2", "西日本")}
+    engine.assign_leads_to_cas()
+    return engine
+
+
+def test_loaded_leads_can_be_removed_before_assignment():
+    engine = AnalyticsEngine(data_dir=DATA_DIR)
+    leads = engine.load_leads_from_csv()
+    engine.load_cas_from_csv()
+
+    removed = engine.remove_lead(leads[0].lead_id)
+
+    assert removed is leads[0]
+    assert [lead.lead_id for lead in engine.leads] == [lead.lead_id for lead in leads[1:]]
+    assert engine.aggregates.get_lead(leads[0].lead_id) is None
+    assert leads[0].lead_id not in engine.cas[leads[0].assigned_ca_id].leads
+
+
+def test_assign_after_load_keeps_one_copy_of_each_lead():
+    engine = AnalyticsEngine(data_dir=DATA_DIR)
+    leads = engine.load_leads_from_csv()
+    engine.load_cas_from_csv()
+
+    engine.assign_leads_to_cas()
+    engine.assign_leads_to_cas()
+
+    assert len(engine.leads) == len(leads)
+    assert sum(ca.current_leads for ca in engine.cas.values()) == len(
+        [lead for lead in leads if lead.assigned_ca_id in engine.cas]
+    )
+
+
+def test_engine_and_store_share_leads(engine):
+    engine.add_lead(make_lead("L1", "CA1"))
+    engine.add_lead(make_lead("L2", ""))
+
+    assert [lead.lead_id for lead in engine.leads] == ["L1", "L2"]
+    assert engine.aggregates.get_lead("L2") is not None
+    assert engine.cas["CA1"].current_leads == 1
+
+    engine.remove_lead("L2")
+    assert [lead.lead_id for lead in engine.leads] == ["L1"]
+
+
+def test_status_change_updates_active_counts(engine):
+    engine.add_lead(make_lead("L1", "CA1"))
+    engine.add_lead(make_lead("L2", "CA1"))
+    expected = engine.cas["CA1"].performance.current_expected_conversions
+
+    engine.update_lead_status("L1", "closed")
+
+    assert engine.cas["CA1"].current_leads == 1
+    assert engine.cas["CA1"].performance.current_expected_conversions == pytest.approx(expected / 2)
+    assert list(engine.cas["CA1"].leads) == ["L2"]
+
+    engine.update_lead_status("L1", "active")
+    assert engine.cas["CA1"].current_leads == 2
+
+
+def test_inactive_statuses_are_configurable(tmp_path):
+    engine = AnalyticsEngine(data_dir=tmp_path, inactive_statuses=["placed"])
+    engine.cas = {"CA1": make_ca("CA1")}
+    engine.assign_leads_to_cas()
+    engine.add_lead(make_lead("L1", "CA1", status="closed"))
+    engine.add_lead(make_lead("L2", "CA1", status="placed"))
+
+    assert engine.cas["CA1"].current_leads == 1
+    assert list(engine.cas["CA1"].leads) == ["L1"]
+
+
+CA_IDS = ["CA1", "CA2", "CA3"]
+STATUSES = ["active", "new", "closed"]
+PREFECTURES = ["東京都", "大阪府", "北海道"]
+
+
+def random_lead(rng, lead_id: str) -> Lead:
+    qualified = rng.random() < 0.6
+    return Lead(
+        lead_id=lead_id,
+        name="",
+        age=rng.randint(20, 65),
+        prefecture=rng.choice(PREFECTURES),
+        qualification=rng.choice(["第一種電気工事士", "第二種電気工事士"]) if qualified else "",
+        has_qualification=qualified,
+        assigned_ca_id=rng.choice(CA_IDS + [""]),
+        status=rng.choice(STATUSES),
+        conversion_rate=round(rng.random(), 3),
+    )
+
+
+def make_store(cas):
+    store = CAAggregateStore(cas, inactive_statuses=["closed"])
+    cube = SegmentCube({ca.ca_id: ca.team for ca in cas.values()})
+    store.subscribe(cube)
+    return store, cube
+
+
+def assert_matches_full_recompute(store, cube, cas):
+    """集計ストア・キューブの値が、全リードからの再集計と一致することを確認"""
+    fresh_cas = {ca_id: make_ca(ca_id, ca.team, ca.target_leads) for ca_id, ca in cas.items()}
+    for lead in store.leads():
+        if lead.assigned_ca_id in fresh_cas and lead.status != "closed":
+            fresh_cas[lead.assigned_ca_id].leads[lead.lead_id] = lead
+
+    for ca_id, fresh in fresh_cas.items():
+        fresh.calculate_performance()
+        held = fresh.leads.values()
+        aggregate = store.get_aggregate(ca_id)
+        for segment in SegmentType:
+            in_segment = [lead for lead in held if lead.segment_id == segment]
+            assert aggregate.segment_counts[segment] == len(in_segment)
+            assert aggregate.segment_expected[segment] == pytest.approx(
+                sum(lead.conversion_rate for lead in in_segment), abs=1e-9
+            )
+        assert set(cas[ca_id].leads) == set(fresh.leads)
+        assert cas[ca_id].current_leads == fresh.current_leads
+        actual = cas[ca_id].performance
+        assert actual.total_leads == fresh.performance.total_leads
+        assert actual.current_expected_conversions == pytest.approx(
+            fresh.performance.current_expected_conversions, abs=1e-9
+        )
+        assert actual.status == fresh.performance.status
+
+    fresh_cube = SegmentCube(cube.ca_teams)
+    fresh_cube.add_leads(store.leads())
+    for group_by in (CUBE_DIMENSIONS, ("team", "segment"), ("ca_id",), ()):
+        actual = cube.query(group_by)
+        expected = fresh_cube.query(group_by)
+        assert actual.keys() == expected.keys()
+        for key, cell in expected.items():
+            assert actual[key].lead_count == cell.lead_count
+            assert actual[key].expected_conversions == pytest.approx(cell.expected_conversions, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_store_and_cube_match_full_recompute(seed):
+    rng = random.Random(seed)
+    cas = {ca_id: make_ca(ca_id, rng.choice(["東日本", "西日本"])) for ca_id in CA_IDS}
+    store, cube = make_store(cas)
+    # 作成済みのキューボイドも増分更新されることを確認するため、先に問い合わせておく
+    cube.query(["team", "segment"])
+    next_id = 0
+
+    for _ in range(200):
+        lead_ids = [lead.lead_id for lead in store.leads()]
+        operation = rng.choice(["add", "add", "remove", "reassign", "status"]) if lead_ids else "add"
+        if operation == "add":
+            store.add_lead(random_lead(rng, f"L{next_id}"))
+            next_id += 1
+        elif operation == "remove":
+            store.remove_lead(rng.choice(lead_ids))
+        elif operation == "reassign":
+            store.reassign_lead(rng.choice(lead_ids), rng.choice(CA_IDS + [""]))
+        else:
+            store.update_status(rng.choice(lead_ids), rng.choice(STATUSES))
+
+        assert_matches_full_recompute(store, cube, cas)
+
+
+def test_store_rejects_duplicate_and_unknown_leads():
+    store, _ = make_store({"CA1": make_ca("CA1")})
+    store.add_lead(make_lead("L1", "CA1"))
+
+    with pytest.raises(ValueError):
+        store.add_lead(make_lead("L1", "CA1"))
+    with pytest.raises(KeyError):
+        store.remove_lead("L2")
+
+
+def test_subscribe_replays_registered_leads():
+    cas = {"CA1": make_ca("CA1")}
+    store, _ = make_store(cas)
+    store.add_leads([make_lead("L1", "CA1"), make_lead("L2", "", status="closed")])
+
+    cube = SegmentCube({"CA1": "東日本"})
+    store.subscribe(cube)
+
+    assert_matches_full_recompute(store, cube, cas)
+
+
+def test_snapshot_round_trip_matches_aggregates(tmp_path):
+    rng = random.Random(0)
+    cas = {ca_id: make_ca(ca_id) for ca_id in CA_IDS}
+    store, _ = make_store(cas)
+    store.add_leads(random_lead(rng, f"L{i}") for i in range(50))
+    snapshots = SnapshotStore(tmp_path)
+
+    snapshots.record(store, date(2025, 1, 6))
+    store.reassign_lead(next(iter(cas["CA1"].leads)), "CA2")
+    snapshots.record(store, date(2025, 1, 13))
+
+    assert snapshots.dates() == [date(2025, 1, 6), date(2025, 1, 13)]
+    totals = snapshots.load(date(2025, 1, 13)).ca_totals()
+    for ca_id, ca in cas.items():
+        assert totals[ca_id]["lead_count"] == ca.current_leads
+        assert totals[ca_id]["expected_conversions"] == pytest.approx(
+            ca.performance.current_expected_conversions
+        )
+        assert totals[ca_id]["achievement_rate"] == pytest.approx(ca.performance.achievement_rate)
+
+    trend = snapshots.ca_trend("CA1", end=date(2025, 1, 13))
+    assert trend[1]["lead_count"] == cas["CA1"].current_leads
+    assert trend[0]["lead_count"] - trend[1]["lead_count"] == 1
+    with pytest.raises(FileExistsError):
+        snapshots.record(store, date(2025, 1, 13))
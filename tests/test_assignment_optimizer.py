@@ -0,0 +1,158 @@
+"""リード一括振り分けの最適化（最小費用流）のテスト"""
+
+import itertools
+import random
+
+import pytest
+
+from src.analytics.aggregates import CAAggregateStore
+from src.analytics.analytics_engine import AnalyticsEngine
+from src.analytics.assignment_optimizer import AssignmentOptimizer, AssignmentTimeoutError
+from src.analytics.lead_allocator import LeadAllocator
+from src.analytics.models import CA, Lead, SegmentType
+
+PREFECTURE_GROUPS = {"東京都": "関東", "大阪府": "関西", "福岡県": "九州"}
+TEAM_REGIONS = {"関東": ["東日本"], "関西": ["西日本"]}  # 九州は全チーム可
+
+# (年齢, 資格あり) → セグメント A〜D
+PROFILES = [(30, True), (50, True), (30, False), (50, False)]
+
+
+def make_ca(ca_id: str, team: str, target_leads: int) -> CA:
+    return CA(ca_id=ca_id, name=ca_id, team=team, slack_user_id="", target_leads=target_leads)
+
+
+def make_lead(lead_id: str, age: int, has_qualification: bool, prefecture: str) -> Lead:
+    return Lead(
+        lead_id=lead_id,
+        name="",
+        age=age,
+        prefecture=prefecture,
+        qualification="第二種電気工事士" if has_qualification else "",
+        has_qualification=has_qualification,
+        assigned_ca_id="",
+        status="new",
+    )
+
+
+def make_optimizer(cas, max_per_segment=None) -> AssignmentOptimizer:
+    return AssignmentOptimizer(
+        CAAggregateStore({ca.ca_id: ca for ca in cas}),
+        prefecture_groups=PREFECTURE_GROUPS,
+        team_regions=TEAM_REGIONS,
+        max_per_segment=max_per_segment,
+    )
+
+
+def expected_total(results) -> float:
+    return sum(result.lead.conversion_rate for result in results if result.ca_id is not None)
+
+
+def brute_force_best(cas, leads, optimizer, max_per_segment) -> float:
+    """全割り当てを列挙して期待展開数の合計の最大値を求める"""
+    choices = [None] + [ca.ca_id for ca in cas]
+    by_id = {ca.ca_id: ca for ca in cas}
+    best = 0.0
+    for assignment in itertools.product(choices, repeat=len(leads)):
+        counts = {ca.ca_id: 0 for ca in cas}
+        segment_counts = {}
+        feasible = True
+        for lead, ca_id in zip(leads, assignment):
+            if ca_id is None:
+                continue
+            teams = optimizer.eligible_teams(lead)
+            if teams is not None and by_id[ca_id].team not in teams:
+                feasible = False
+                break
+            counts[ca_id] += 1
+            key = (ca_id, lead.segment_id)
+            segment_counts[key] = segment_counts.get(key, 0) + 1
+            if counts[ca_id] > by_id[ca_id].target_leads:
+                feasible = False
+                break
+            if segment_counts[key] > max_per_segment.get(lead.segment_id, len(leads)):
+                feasible = False
+                break
+        if feasible:
+            best = max(
+                best,
+                sum(lead.conversion_rate for lead, ca_id in zip(leads, assignment) if ca_id),
+            )
+    return best
+
+
+def test_optimizer_beats_greedy_when_team_constraint_binds():
+    # 全チーム可のAリードを先に東日本へ入れると、関東のCリードの行き先がなくなる
+    def build():
+        cas = [make_ca("CA1", "東日本", 1), make_ca("CA2", "西日本", 1)]
+        leads = [make_lead("L1", 30, True, "福岡県"), make_lead("L2", 30, False, "東京都")]
+        return make_optimizer(cas), leads
+
+    optimizer, leads = build()
+    greedy = LeadAllocator(
+        optimizer.aggregates, is_eligible=optimizer.is_eligible
+    ).allocate_batch(leads)
+
+    optimizer, leads = build()
+    optimal = optimizer.optimize(leads)
+
+    assert [result.ca_id for result in greedy] == ["CA1", None]
+    assert [result.ca_id for result in optimal] == ["CA2", "CA1"]
+    assert expected_total(optimal) > expected_total(greedy)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_optimizer_matches_brute_force(seed):
+    rng = random.Random(seed)
+    cas = [
+        make_ca(f"CA{i}", rng.choice(["東日本", "西日本"]), rng.randint(0, 2)) for i in range(3)
+    ]
+    leads = [
+        make_lead(f"L{i}", *rng.choice(PROFILES), rng.choice(list(PREFECTURE_GROUPS)))
+        for i in range(rng.randint(1, 6))
+    ]
+    max_per_segment = {SegmentType.D: 1} if rng.random() < 0.5 else {}
+    optimizer = make_optimizer(cas, max_per_segment)
+
+    best = brute_force_best(cas, leads, optimizer, max_per_segment)
+    results = optimizer.optimize(leads)
+
+    assert expected_total(results) == pytest.approx(best)
+    for ca in cas:
+        assert ca.current_leads <= ca.target_leads
+
+
+def test_optimizer_timeout_leaves_aggregates_untouched():
+    cas = [make_ca("CA1", "東日本", 5)]
+    optimizer = make_optimizer(cas)
+    leads = [make_lead(f"L{i}", 30, True, "東京都") for i in range(3)]
+
+    with pytest.raises(AssignmentTimeoutError):
+        optimizer.optimize(leads, time_limit=0.0)
+
+    assert cas[0].current_leads == 0
+    assert all(optimizer.aggregates.get_lead(lead.lead_id) is None for lead in leads)
+
+
+def test_engine_falls_back_to_greedy_on_timeout(tmp_path):
+    engine = AnalyticsEngine(data_dir=tmp_path)
+    engine.cas = {"CA1": make_ca("CA1", "東日本", 5), "CA2": make_ca("CA2", "西日本", 5)}
+    engine.assign_leads_to_cas()
+    leads = [make_lead(f"L{i}", 30, True, "東京都") for i in range(3)]
+
+    results = engine.optimize_lead_allocation(leads, time_limit=0.0)
+
+    assert all(result.ca_id is not None for result in results)
+    assert all(result.fallback_reason for result in results)
+    assert len(engine.leads) == 3
+
+
+def test_engine_optimization_has_no_fallback_reason(tmp_path):
+    engine = AnalyticsEngine(data_dir=tmp_path)
+    engine.cas = {"CA1": make_ca("CA1", "東日本", 5)}
+    engine.assign_leads_to_cas()
+
+    results = engine.optimize_lead_allocation([make_lead("L1", 30, True, "東京都")])
+
+    assert results[0].ca_id == "CA1"
+    assert results[0].fallback_reason is None
@@ -0,0 +1,195 @@
+"""音声ファイルメタデータのSQLiteストアと、従来形式のJSONからの移行のテスト"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from src.feedback.audio_manager import AudioFile, AudioManager, AudioStatus
+from src.feedback.audio_metadata_store import AudioMetadataStore
+
+
+def make_record(meeting_id: str, status: AudioStatus = AudioStatus.PENDING, ca_id: str = "CA001") -> dict:
+    return AudioFile(
+        file_path=f"data/audio/pending/2025-01-15_{ca_id}_{meeting_id}.m4a",
+        ca_id=ca_id,
+        date="2025-01-15",
+        meeting_id=meeting_id,
+        status=status,
+        file_size=1024,
+        uploaded_at=datetime(2025, 1, 15, 9, 0),
+    ).to_dict()
+
+
+@pytest.fixture
+def legacy_data():
+    """従来形式の audio_metadata.json の内容（ハッシュ値 → レコード、content_hash なし）"""
+    records = {
+        "hash-c": make_record("m3"),
+        "hash-a": make_record("m1", AudioStatus.TRANSCRIPT_READY),
+        "hash-d": make_record("m1", AudioStatus.PENDING),  # 同じ会議の重複登録
+        "hash-b": make_record("m2", AudioStatus.PROCESSED),
+        "hash-e": make_record("m4", AudioStatus.TRANSCRIPT_READY, ca_id="CA002"),
+        "hash-f": make_record("m5", AudioStatus.PENDING, ca_id="CA002"),
+    }
+    for record in records.values():
+        del record["content_hash"]
+    return records
+
+
+@pytest.fixture
+def legacy_file(tmp_path, legacy_data):
+    path = tmp_path / "audio" / "audio_metadata.json"
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps(legacy_data, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def open_manager(tmp_path, legacy_file) -> AudioManager:
+    return AudioManager(audio_dir=tmp_path / "audio", metadata_file=legacy_file)
+
+
+def legacy_list(data: dict, status: AudioStatus) -> list:
+    """従来の実装（JSONの登録順に走査）と同じ一覧"""
+    return [file_hash for file_hash, record in data.items() if record["status"] == status.value]
+
+
+def legacy_find(data: dict, date: str, ca_id: str, meeting_id: str):
+    """従来の実装（JSONの登録順で最初に一致したもの）と同じ検索結果"""
+    for file_hash, record in data.items():
+        if (record["date"], record["ca_id"], record["meeting_id"]) == (date, ca_id, meeting_id):
+            return file_hash
+    return None
+
+
+def test_migration_moves_legacy_json_to_sqlite(tmp_path, legacy_file, legacy_data):
+    manager = open_manager(tmp_path, legacy_file)
+
+    assert manager.metadata_file == legacy_file.with_suffix(".db")
+    assert manager.store.count() == len(legacy_data)
+    assert manager.store.get_meta("migrated_from") == str(legacy_file)
+    for file_hash, record in legacy_data.items():
+        audio_file = manager.get_audio_file(file_hash)
+        # content_hash のない従来のレコードはキーを引き継ぐ
+        assert audio_file.content_hash == file_hash
+        assert audio_file.file_hash == file_hash
+        assert audio_file.to_dict() == {**record, "content_hash": file_hash}
+
+
+def test_migration_keeps_list_and_find_results(tmp_path, legacy_file, legacy_data):
+    manager = open_manager(tmp_path, legacy_file)
+
+    assert [f.content_hash for f in manager.list_pending_audio()] == legacy_list(
+        legacy_data, AudioStatus.PENDING
+    )
+    assert [f.content_hash for f in manager.list_ready_for_processing()] == legacy_list(
+        legacy_data, AudioStatus.TRANSCRIPT_READY
+    )
+    for key in [("2025-01-15", "CA001", "m1"), ("2025-01-15", "CA002", "m4"), ("2025-01-15", "CA001", "m9")]:
+        found = manager.find_audio_file(*key)
+        assert (found.content_hash if found else None) == legacy_find(legacy_data, *key)
+
+
+def test_migration_is_idempotent_across_reopens(tmp_path, legacy_file, legacy_data):
+    manager = open_manager(tmp_path, legacy_file)
+    migrated_at = manager.store.get_meta("migrated_at")
+    audio_file = manager.get_audio_file("hash-c")
+    audio_file.status = AudioStatus.TRANSCRIPT_READY
+    manager._save(audio_file)
+    manager.store.close()
+
+    # 移行後に従来ファイルが残っていても、再度取り込んで更新を巻き戻さない
+    legacy_data["hash-z"] = make_record("m9")
+    legacy_file.write_text(json.dumps(legacy_data, ensure_ascii=False), encoding="utf-8")
+    for _ in range(2):
+        manager = open_manager(tmp_path, legacy_file)
+        assert manager.store.count() == len(legacy_data) - 1
+        assert manager.store.get_meta("migrated_at") == migrated_at
+        assert manager.get_audio_file("hash-c").status == AudioStatus.TRANSCRIPT_READY
+        assert manager.get_audio_file("hash-z") is None
+        manager.store.close()
+
+
+def test_broken_legacy_file_is_not_marked_migrated(tmp_path, legacy_file, legacy_data):
+    legacy_file.write_text("{broken", encoding="utf-8")
+    manager = open_manager(tmp_path, legacy_file)
+
+    assert manager.store.count() == 0
+    assert manager.store.get_meta("migrated_from") is None
+    manager.store.close()
+
+    # 修復後に開き直せば移行される
+    legacy_file.write_text(json.dumps(legacy_data, ensure_ascii=False), encoding="utf-8")
+    assert open_manager(tmp_path, legacy_file).store.count() == len(legacy_data)
+
+
+def test_db_metadata_file_skips_migration(tmp_path, legacy_file):
+    manager = AudioManager(audio_dir=tmp_path / "audio", metadata_file=tmp_path / "other.db")
+
+    assert manager.legacy_metadata_file is None
+    assert manager.store.count() == 0
+
+
+def test_status_changes_update_single_row(tmp_path):
+    manager = AudioManager(audio_dir=tmp_path / "audio")
+    sources = []
+    for meeting_id in ["m1", "m2", "m3"]:
+        source = tmp_path / f"2025-01-15_CA001_{meeting_id}.m4a"
+        source.write_bytes(meeting_id.encode() * 512)
+        sources.append(manager.add_audio_file(source))
+
+    manager.mark_as_failed(sources[1], "boom")
+
+    assert [f.meeting_id for f in manager.list_pending_audio()] == ["m1", "m3"]
+    failed = manager.find_audio_file("2025-01-15", "CA001", "m2")
+    assert failed.status == AudioStatus.FAILED
+    assert failed.metadata == {"error": "boom"}
+    assert failed.file_path == manager.failed_dir / "2025-01-15_CA001_m2.m4a"
+    assert manager.store.count() == 3
+
+
+def test_store_upsert_replaces_and_keeps_registration_order(tmp_path):
+    store = AudioMetadataStore(tmp_path / "meta.db")
+    store.upsert([("h1", make_record("m1")), ("h2", make_record("m2")), ("h3", make_record("m3"))])
+
+    store.upsert([("h1", make_record("m1", AudioStatus.PROCESSED))])
+
+    assert store.count() == 3
+    assert store.get("h1")["status"] == AudioStatus.PROCESSED.value
+    assert [h for h, _ in store.list_by_status(AudioStatus.PENDING.value)] == ["h2", "h3"]
+    assert [h for h, _ in store.all()] == ["h1", "h2", "h3"]
+    assert store.get("missing") is None
+
+
+def test_store_find_returns_first_registered(tmp_path):
+    store = AudioMetadataStore(tmp_path / "meta.db")
+    store.upsert([("h2", make_record("m1")), ("h1", make_record("m1"))])
+
+    file_hash, record = store.find("2025-01-15", "CA001", "m1")
+
+    assert file_hash == "h2"
+    assert record["meeting_id"] == "m1"
+    assert store.find("2025-01-15", "CA001", "m2") is None
+
+
+def test_store_meta_round_trip(tmp_path):
+    store = AudioMetadataStore(tmp_path / "meta.db")
+
+    assert store.get_meta("key") is None
+    store.set_meta("key", "v1")
+    store.set_meta("key", "v2")
+    assert store.get_meta("key") == "v2"
+
+
+def test_store_writes_are_visible_to_other_connections(tmp_path):
+    # auto_process_audio.py と upload_audio.py を同時に実行した場合を想定
+    first = AudioMetadataStore(tmp_path / "meta.db")
+    second = AudioMetadataStore(tmp_path / "meta.db")
+
+    first.upsert([("h1", make_record("m1"))])
+    second.upsert([("h2", make_record("m2"))])
+    first.upsert([("h1", make_record("m1", AudioStatus.PROCESSED))])
+
+    for store in (first, second):
+        assert [h for h, _ in store.all()] == ["h1", "h2"]
+        assert store.get("h1")["status"] == AudioStatus.PROCESSED.value
@@ -0,0 +1,103 @@
+"""音声ファイルのフィードバック生成・Slack通知パイプラインのテスト"""
+
+from pathlib import Path
+
+import pytest
+
+from src.feedback.audio_feedback_engine import AudioFeedbackEngine
+from src.feedback.audio_manager import AudioStatus
+from src.feedback.audio_pipeline import FEEDBACK_STAGE, SLACK_STAGE, AudioPipeline
+
+TRANSCRIPT = (
+    Path(__file__).parent.parent
+    / "data"
+    / "sample"
+    / "feedback"
+    / "transcripts"
+    / "2025-01-15_CA001_client-call-001.txt"
+)
+
+
+class FakeNotifier:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, message, channel=None):
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.sent.append((channel, message))
+        return True
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return AudioFeedbackEngine(audio_dir=tmp_path / "audio")
+
+
+@pytest.fixture
+def audio_file(engine, tmp_path):
+    source = tmp_path / "2025-01-15_CA001_m1.m4a"
+    source.write_bytes(b"\x00" * 1024)
+    audio_file = engine.audio_manager.add_audio_file(source)
+    engine.audio_manager.link_transcript(audio_file, TRANSCRIPT)
+    return audio_file
+
+
+def make_pipeline(engine, notifier=None):
+    return AudioPipeline(
+        engine, notifier=notifier, base_delay=0.0, max_delay=0.0, max_attempts=3, poll_interval=0.01
+    )
+
+
+def flaky_generator(engine, errors):
+    generate = engine.feedback_engine.generator.generate_feedback
+
+    def generate_feedback(transcript):
+        if errors:
+            raise errors.pop(0)
+        return generate(transcript)
+
+    engine.feedback_engine.generator.generate_feedback = generate_feedback
+
+
+def test_transient_errors_are_retried_without_failing_audio(engine, audio_file):
+    flaky_generator(engine, [ConnectionError("api down"), TimeoutError("timed out")])
+    notifier = FakeNotifier(failures=1)
+    pipeline = make_pipeline(engine, notifier)
+
+    assert pipeline.enqueue_ready() == 1
+    feedbacks = pipeline.run_until_idle()
+
+    assert len(feedbacks) == 1
+    assert engine.audio_manager.get_audio_file(audio_file.file_hash).status == AudioStatus.PROCESSED
+    assert len(notifier.sent) == 1
+    assert pipeline.queue.counts() == {FEEDBACK_STAGE: {"done": 1}, SLACK_STAGE: {"done": 1}}
+
+
+def test_unrecoverable_error_marks_audio_failed(engine, audio_file):
+    flaky_generator(engine, [ValueError("bad transcript")])
+    pipeline = make_pipeline(engine, FakeNotifier())
+
+    pipeline.enqueue_ready()
+    feedbacks = pipeline.run_until_idle()
+
+    assert feedbacks == []
+    failed = engine.audio_manager.get_audio_file(audio_file.file_hash)
+    assert failed.status == AudioStatus.FAILED
+    assert "bad transcript" in failed.metadata["error"]
+    assert pipeline.queue.counts() == {FEEDBACK_STAGE: {"dead": 1}}
+
+
+def test_same_audio_is_processed_once(engine, audio_file):
+    notifier = FakeNotifier()
+    pipeline = make_pipeline(engine, notifier)
+
+    pipeline.enqueue(audio_file)
+    pipeline.run_until_idle()
+    assert not pipeline.enqueue(audio_file)
+    assert pipeline.run_until_idle() == []
+
+    assert len(notifier.sent) == 1
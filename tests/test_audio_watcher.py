@@ -0,0 +1,219 @@
+"""音声・書き起こしファイル監視のテスト"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.feedback.audio_watcher import AudioWatcher, WatchTarget
+
+DEBOUNCE = 2.0
+
+
+class FakeClock:
+    """テストから進める時刻"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class RecordingHandler:
+    """処理したファイルと同時実行数を記録（release されるまで処理を止められる）"""
+
+    def __init__(self, block: bool = False) -> None:
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, path) -> None:
+        with self._lock:
+            self.calls.append(path.name)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_watcher(tmp_path, clock):
+    watchers = []
+
+    def make(handler, debounce=DEBOUNCE, max_workers=4):
+        # 走査は明示的に呼び出し、判定はテストから進める時刻で行う
+        watcher = AudioWatcher(
+            [WatchTarget(tmp_path / "pending", handler, {".m4a"})],
+            debounce=debounce,
+            poll_interval=3600,
+            max_workers=max_workers,
+            use_watchdog=False,
+            clock=clock,
+        )
+        watcher.start()
+        watchers.append(watcher)
+        return watcher
+
+    yield make
+    for watcher in watchers:
+        watcher.stop()
+
+
+def write(path, data: bytes, mode: str = "wb") -> None:
+    with open(path, mode) as f:
+        f.write(data)
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_growing_file_is_debounced(make_watcher, clock, tmp_path):
+    handler = RecordingHandler()
+    watcher = make_watcher(handler)
+    path = tmp_path / "pending" / "2025-01-15_CA001_m1.m4a"
+
+    write(path, b"a" * 100)
+    watcher.scan()
+    clock.advance(DEBOUNCE - 0.5)
+    assert watcher.dispatch_ready() == 0
+
+    # 書き込みが続いている間は、最後の変化から debounce 秒経つまで処理しない
+    write(path, b"a" * 100, "ab")
+    watcher.scan()
+    clock.advance(1.0)
+    assert watcher.dispatch_ready() == 0
+    write(path, b"a" * 100, "ab")
+    assert watcher.dispatch_ready() == 0  # 判定時にサイズの変化を検出して待ち直す
+    clock.advance(DEBOUNCE - 0.5)
+    assert watcher.dispatch_ready() == 0
+    assert handler.calls == []
+
+    clock.advance(0.5)
+    assert watcher.wait_idle(timeout=5)
+    assert handler.calls == [path.name]
+    assert watcher.processed_count == 1
+
+
+def test_concurrent_handlers_are_bounded_by_max_workers(make_watcher, clock, tmp_path):
+    handler = RecordingHandler(block=True)
+    watcher = make_watcher(handler, max_workers=2)
+    for i in range(6):
+        write(tmp_path / "pending" / f"2025-01-15_CA001_m{i}.m4a", b"a" * (i + 1))
+
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+    wait_until(lambda: handler.running == 2)
+
+    # 空きがない間はワーカーに渡さず、処理待ちのまま残す
+    assert watcher.dispatch_ready() == 0
+    assert handler.running == 2
+    assert len(handler.calls) == 2
+
+    handler.release.set()
+    assert watcher.wait_idle(timeout=5)
+    assert sorted(handler.calls) == sorted(f"2025-01-15_CA001_m{i}.m4a" for i in range(6))
+    assert handler.max_running == 2
+    assert watcher.processed_count == 6
+
+
+def test_handled_files_are_not_processed_again(make_watcher, clock, tmp_path):
+    handler = RecordingHandler()
+    watcher = make_watcher(handler)
+    path = tmp_path / "pending" / "2025-01-15_CA001_m1.m4a"
+    write(path, b"a" * 100)
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+    assert watcher.wait_idle(timeout=5)
+
+    for _ in range(3):
+        watcher.scan()
+        clock.advance(DEBOUNCE)
+        assert watcher.dispatch_ready() == 0
+    assert handler.calls == [path.name]
+
+    # 内容が変わったファイルは再度処理する
+    write(path, b"b", "ab")
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+    assert watcher.wait_idle(timeout=5)
+    assert handler.calls == [path.name, path.name]
+
+
+def test_moved_away_and_restored_file_is_processed_again(make_watcher, clock, tmp_path):
+    handler = RecordingHandler()
+    watcher = make_watcher(handler)
+    path = tmp_path / "pending" / "2025-01-15_CA001_m1.m4a"
+    write(path, b"a" * 100)
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+    assert watcher.wait_idle(timeout=5)
+    stat = os.stat(path)
+
+    moved = tmp_path / "m1.m4a"
+    os.replace(path, moved)
+    watcher.scan()
+    os.replace(moved, path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+
+    assert watcher.wait_idle(timeout=5)
+    assert handler.calls == [path.name, path.name]
+
+
+def test_ignores_hidden_and_unsupported_files(make_watcher, clock, tmp_path):
+    handler = RecordingHandler()
+    watcher = make_watcher(handler, debounce=0)
+    write(tmp_path / "pending" / ".2025-01-15_CA001_m1.m4a", b"a")
+    write(tmp_path / "pending" / "notes.txt", b"a")
+
+    assert watcher.wait_idle(timeout=1)
+    assert watcher.dispatch_ready() == 0
+    assert handler.calls == []
+
+
+def test_wait_idle_sees_files_created_before_the_next_scan(make_watcher, tmp_path):
+    handler = RecordingHandler()
+    watcher = make_watcher(handler, debounce=0)
+
+    # start() の走査後に置かれ、まだどの走査にも検出されていないファイル
+    path = tmp_path / "pending" / "2025-01-15_CA001_m1.m4a"
+    write(path, b"a" * 100)
+
+    assert watcher.wait_idle(timeout=5)
+    assert handler.calls == [path.name]
+
+
+def test_handler_errors_are_counted_and_not_retried(make_watcher, clock, tmp_path):
+    def failing(path):
+        raise RuntimeError("boom")
+
+    watcher = make_watcher(failing)
+    write(tmp_path / "pending" / "2025-01-15_CA001_m1.m4a", b"a")
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+
+    assert watcher.wait_idle(timeout=5)
+    assert (watcher.processed_count, watcher.error_count) == (0, 1)
+    watcher.scan()
+    clock.advance(DEBOUNCE)
+    assert watcher.dispatch_ready() == 0
@@ -0,0 +1,86 @@
+"""展開実績からの展開率推定のテスト"""
+
+import pytest
+
+from src.analytics.conversion_estimator import ConversionRateEstimator
+from src.analytics.segment_rules import DEFAULT_SEGMENT_RULES
+
+DECADES = [20, 30, 40, 50, 60]
+
+
+@pytest.mark.parametrize("decade", DECADES)
+def test_age_from_group_returns_midpoint(decade):
+    assert ConversionRateEstimator.age_from_group(f"{decade}代") == decade + 5
+    assert ConversionRateEstimator.age_from_group(f" {decade}代前半 ") == decade + 5
+
+
+def test_age_from_group_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        ConversionRateEstimator.age_from_group("不明")
+
+
+@pytest.mark.parametrize("decade", DECADES)
+@pytest.mark.parametrize("qualification", ["第二種電気工事士", "なし"])
+def test_record_segment_matches_midpoint_age(decade, qualification):
+    # 年代の実績は、その年代の中央の年齢のリードと同じセグメントに分類される
+    has_qualification = qualification != "なし"
+    expected, _ = DEFAULT_SEGMENT_RULES.lookup(decade + 5, qualification, has_qualification, "東京都")
+
+    estimator = ConversionRateEstimator()
+    segment_id = estimator.add_record(
+        {
+            "prefecture": "東京都",
+            "age_group": f"{decade}代",
+            "qualification": qualification,
+            "ca_id": "CA001",
+            "result": "success",
+        }
+    )
+
+    assert segment_id == expected
+
+
+@pytest.mark.parametrize(
+    "age_group, qualification, expected",
+    [
+        ("30代", "第二種電気工事士", "A"),
+        ("40代", "第二種電気工事士", "B"),  # 41〜49歳が大半のため「40歳超」に寄せる
+        ("50代", "第二種電気工事士", "B"),
+        ("30代", "なし", "C"),
+        ("40代", "なし", "D"),
+        ("50代", "なし", "D"),
+    ],
+)
+def test_boundary_decade_uses_older_prior(age_group, qualification, expected):
+    estimator = ConversionRateEstimator()
+
+    segment_id = estimator.add_record(
+        {"prefecture": "東京都", "age_group": age_group, "qualification": qualification}
+    )
+
+    assert segment_id == expected
+
+
+def test_boundary_decade_counts_go_to_older_segment():
+    estimator = ConversionRateEstimator()
+    rows = [
+        ("40代", "第一種電気工事士", "success"),
+        ("40代", "第二種電気工事士", "failure"),
+        ("40代", "なし", "failure"),
+    ]
+
+    for age_group, qualification, result in rows:
+        estimator.add_record(
+            {
+                "prefecture": "東京都",
+                "age_group": age_group,
+                "qualification": qualification,
+                "ca_id": "CA001",
+                "result": result,
+            }
+        )
+
+    assert estimator.get_counts("A").trials == 0
+    assert estimator.get_counts("C").trials == 0
+    assert (estimator.get_counts("B").successes, estimator.get_counts("B").trials) == (1, 2)
+    assert (estimator.get_counts("D").successes, estimator.get_counts("D").trials) == (0, 1)
@@ -0,0 +1,87 @@
+"""フィードバックエンジンの逐次・並列・バッチ処理のテスト（スタブサーバー使用）"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.feedback.feedback_engine import FeedbackEngine
+
+SAMPLE_DIR = Path(__file__).parent.parent / "data" / "sample" / "feedback"
+
+MODES = {
+    "serial": lambda engine, on_result: engine.process_all_pending(on_result=on_result),
+    "concurrent": lambda engine, on_result: engine.process_all_pending(
+        concurrency=4, on_result=on_result
+    ),
+    "batch": lambda engine, on_result: engine.process_all_pending_batch(
+        state_dir=engine.history_manager.history_file.parent / "batches",
+        poll_interval=0.01,
+        timeout=10,
+        on_result=on_result,
+    ),
+}
+
+
+@pytest.fixture
+def transcripts_dir(tmp_path):
+    target = tmp_path / "transcripts"
+    shutil.copytree(SAMPLE_DIR / "transcripts", target)
+    return target
+
+
+def make_engine(stub_server, tmp_path, transcripts_dir) -> FeedbackEngine:
+    engine = FeedbackEngine(
+        transcripts_dir=transcripts_dir,
+        criteria_path=SAMPLE_DIR / "pss_ads_criteria.md",
+        use_ai=True,
+        history_file=tmp_path / "feedback" / "history.db",
+        base_url=stub_server.base_url,
+        cache_dir=tmp_path / "cache",
+    )
+    engine.generator.max_retries = 0
+    return engine
+
+
+def run(mode, engine):
+    results = []
+    feedbacks = MODES[mode](engine, results.append)
+    return feedbacks, results
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_modes_agree_on_cache_flag_and_history(mode, stub_server, tmp_path, transcripts_dir):
+    expected_ids = {path.stem for path in transcripts_dir.glob("*.txt")}
+
+    engine = make_engine(stub_server, tmp_path, transcripts_dir)
+    feedbacks, results = run(mode, engine)
+
+    assert len(feedbacks) == len(expected_ids)
+    assert [r.cached for r in results] == [False] * len(expected_ids)
+    assert engine.history_manager.feedback_ids() == expected_ids
+    assert all(fb.repeated_improvements is not None for fb in feedbacks)
+
+    # 同じ書き起こしの再実行はキャッシュから取得し、履歴は重複しない
+    requests = stub_server.stats["requests"] + stub_server.stats["batches"]
+    engine = make_engine(stub_server, tmp_path, transcripts_dir)
+    feedbacks, results = run(mode, engine)
+
+    assert len(feedbacks) == len(expected_ids)
+    assert [r.cached for r in results] == [True] * len(expected_ids)
+    assert stub_server.stats["requests"] + stub_server.stats["batches"] == requests
+    assert engine.cache.hits == len(expected_ids)
+    assert engine.history_manager.store.count() == len(expected_ids)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_record_history_can_be_disabled(mode, stub_server, tmp_path, transcripts_dir):
+    engine = make_engine(stub_server, tmp_path, transcripts_dir)
+
+    if mode == "batch":
+        engine.process_all_pending_batch(
+            state_dir=tmp_path / "batches", poll_interval=0.01, timeout=10, record_history=False
+        )
+    else:
+        engine.process_all_pending(concurrency=4 if mode == "concurrent" else 1, record_history=False)
+
+    assert engine.history_manager.feedback_ids() == set()
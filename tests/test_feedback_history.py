@@ -0,0 +1,115 @@
+"""フィードバック履歴の保存・期間検索のテスト"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.feedback.feedback_history import FeedbackHistoryEntry, FeedbackHistoryManager
+
+
+def make_entry(ca_id: str, entry_date: str, meeting_id: str, improvement_points=()) -> FeedbackHistoryEntry:
+    return FeedbackHistoryEntry(
+        ca_id=ca_id,
+        date=entry_date,
+        meeting_id=meeting_id,
+        improvement_points=list(improvement_points),
+        good_points=[],
+        overall_score=2.5,
+        overall_rating="good",
+        pss_scores={},
+        ads_scores={},
+        feedback_id=f"{entry_date}_{ca_id}_{meeting_id}",
+        created_at="",
+    )
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = FeedbackHistoryManager(history_file=tmp_path / "history.db")
+    manager.upsert_entries([
+        make_entry("CA1", "2025-01-06", "m1"),
+        make_entry("CA1", "2025-01-08", "m2"),
+        make_entry("CA1", "2025-01-08", "m3"),
+        make_entry("CA1", "2025-01-20", "m4"),
+        make_entry("CA1", "日付不明", "m5"),
+        make_entry("CA2", "2025-01-07T10:30:00", "m1"),
+        make_entry("CA2", "2025-02-01", "m2"),
+    ])
+
+    def scan():
+        raise AssertionError("履歴全体を読み込んだ")
+
+    monkeypatch.setattr(manager.store, "scan", scan)
+    return manager
+
+
+def ids(entries):
+    return [entry.meeting_id for entry in entries]
+
+
+def test_range_queries_do_not_load_whole_history(manager):
+    week = (date(2025, 1, 6), date(2025, 1, 12))
+
+    assert ids(manager.get_entries_between("CA1", *week)) == ["m2", "m3", "m1"]
+    assert ids(manager.get_entries_between("CA1")) == ["m4", "m2", "m3", "m1"]
+    assert ids(manager.get_entries_between("CA1", *week, exclude_feedback_id="2025-01-08_CA1_m2")) == [
+        "m3",
+        "m1",
+    ]
+    assert {ca_id: ids(entries) for ca_id, entries in manager.get_entries_by_ca(*week).items()} == {
+        "CA1": ["m2", "m3", "m1"],
+        "CA2": ["m1"],
+    }
+    assert {ca_id: ids(entries) for ca_id, entries in manager.get_entries_by_ca().items()} == {
+        "CA1": ["m4", "m2", "m3", "m1"],
+        "CA2": ["m2", "m1"],
+    }
+
+
+def test_index_is_built_only_for_queried_ca(manager):
+    manager.get_entries_between("CA1")
+
+    assert set(manager._indexes) == {"CA1"}
+
+
+def test_added_entries_are_reflected_in_built_index(manager):
+    manager.get_entries_between("CA1")
+
+    manager.upsert_entries([make_entry("CA1", "2025-01-08", "m6")])
+    manager.upsert_entries([make_entry("CA1", "2025-01-07", "m7")], save=False)
+
+    assert ids(manager.get_entries_between("CA1", date(2025, 1, 7), date(2025, 1, 8))) == [
+        "m2",
+        "m3",
+        "m6",
+        "m7",
+    ]
+
+
+def test_reassigned_entry_moves_between_ca_indexes(manager):
+    manager.get_entries_between("CA1")
+    manager.get_entries_between("CA2")
+    moved = make_entry("CA1", "2025-01-06", "m1")
+    moved.ca_id = "CA2"
+
+    manager.upsert_entries([moved])
+
+    assert ids(manager.get_entries_between("CA1")) == ["m4", "m2", "m3"]
+    assert ids(manager.get_entries_between("CA2")) == ["m2", "m1", "m1"]
+
+
+def test_find_repeated_improvements_uses_ca_history(tmp_path):
+    manager = FeedbackHistoryManager(history_file=tmp_path / "history.db")
+    today = date.today()
+    manager.upsert_entries([
+        make_entry("CA1", (today - timedelta(days=3)).isoformat(), "m1", ["具体的な数字を用いた提案が不足"]),
+        make_entry("CA1", (today - timedelta(days=200)).isoformat(), "m2", ["具体的な数字を用いた提案が不足"]),
+        make_entry("CA2", (today - timedelta(days=1)).isoformat(), "m1", ["具体的な数字を用いた提案が不足"]),
+    ])
+
+    repeated = manager.find_repeated_improvements(["具体的な数字を用いた提案が不足"], "CA1")
+
+    assert [item["past_feedback_ids"] for item in repeated] == [
+        [f"{(today - timedelta(days=3)).isoformat()}_CA1_m1"]
+    ]
+    assert set(manager._indexes) == {"CA1"}
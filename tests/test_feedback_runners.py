@@ -0,0 +1,253 @@
+"""並列実行・バッチ処理・キャッシュのテスト（スタブサーバー使用）"""
+
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from src.feedback.batch_runner import BatchFeedbackRunner
+from src.feedback.concurrent_runner import ConcurrentFeedbackRunner
+from src.feedback.feedback_generator import FeedbackGenerator
+from src.feedback.response_cache import ResponseCache
+from src.feedback.transcript_loader import TranscriptLoader
+
+CRITERIA_PATH = Path(__file__).parent.parent / "data" / "sample" / "feedback" / "pss_ads_criteria.md"
+
+
+@pytest.fixture
+def transcripts_dir(tmp_path):
+    target = tmp_path / "transcripts"
+    target.mkdir()
+    for i in range(6):
+        path = target / f"2025-01-{10 + i:02d}_CA00{i % 3 + 1}_call-{i:03d}.txt"
+        path.write_text(f"CA: 本日はお時間いただきありがとうございます。面談{i}件目です。\n", encoding="utf-8")
+    return target
+
+
+@pytest.fixture
+def transcripts(transcripts_dir):
+    return TranscriptLoader(pending_dir=transcripts_dir).load_all_pending()
+
+
+def make_generator(stub_server, cache_dir=None, stream=False) -> FeedbackGenerator:
+    # リトライはランナー側で行うため、クライアント自体のリトライは無効にする
+    return FeedbackGenerator(
+        criteria_path=CRITERIA_PATH,
+        use_ai=True,
+        base_url=stub_server.base_url,
+        max_retries=0,
+        cache=ResponseCache(cache_dir) if cache_dir else None,
+        stream=stream,
+    )
+
+
+class RecordingSleep:
+    """待ち時間を記録し（実際の待機は短縮）、指定回数待ったらスタブのエラー発生率を0に戻す"""
+
+    def __init__(self, stub_server=None, recover_after=None):
+        self.stub_server = stub_server
+        self.recover_after = recover_after
+        self.delays = []
+
+    def __call__(self, seconds):
+        self.delays.append(seconds)
+        time.sleep(min(seconds, 0.01))
+        if self.recover_after is not None and len(self.delays) >= self.recover_after:
+            self.stub_server.rate_limit_rate = 0.0
+            self.stub_server.overload_rate = 0.0
+
+
+def test_concurrent_runner_respects_max_concurrency(stub_server, transcripts):
+    stub_server.latency = 0.2
+    runner = ConcurrentFeedbackRunner(make_generator(stub_server), max_concurrency=3)
+
+    results = runner.run_all(transcripts)
+
+    assert all(result.ok for result in results)
+    assert {result.transcript.file_path for result in results} == {t.file_path for t in transcripts}
+    assert 1 < stub_server.max_in_flight <= 3
+    assert stub_server.stats["requests"] == len(transcripts)
+
+
+def test_rate_limited_requests_are_retried_after_retry_after(stub_server, transcripts):
+    stub_server.rate_limit_rate = 1.0
+    sleep = RecordingSleep(stub_server, recover_after=2)
+    runner = ConcurrentFeedbackRunner(
+        make_generator(stub_server), max_concurrency=1, max_retries=5, base_delay=0.01, sleep=sleep
+    )
+
+    [result] = runner.run_all(transcripts[:1])
+
+    assert result.ok
+    assert result.attempts == 3
+    assert stub_server.stats["rate_limited"] == 2
+    # 429の retry-after（1秒）以上待つ
+    assert len(sleep.delays) == 2
+    assert all(delay >= 1.0 for delay in sleep.delays)
+
+
+def test_overloaded_requests_back_off_exponentially(stub_server, transcripts):
+    stub_server.overload_rate = 1.0
+    sleep = RecordingSleep(stub_server, recover_after=4)
+    runner = ConcurrentFeedbackRunner(
+        make_generator(stub_server), max_concurrency=1, base_delay=0.5, max_delay=2.0, sleep=sleep
+    )
+
+    [result] = runner.run_all(transcripts[:1])
+
+    assert result.ok
+    assert result.attempts == 5
+    # フルジッター: attempt 回目の待ち時間は 0〜min(max_delay, base_delay * 2^(attempt-1))
+    for attempt, delay in enumerate(sleep.delays, start=1):
+        assert 0 <= delay <= min(2.0, 0.5 * 2 ** (attempt - 1))
+
+
+def test_retries_stop_after_max_retries(stub_server, transcripts):
+    stub_server.rate_limit_rate = 1.0
+    sleep = RecordingSleep()
+    runner = ConcurrentFeedbackRunner(
+        make_generator(stub_server), max_concurrency=2, max_retries=2, sleep=sleep
+    )
+
+    results = runner.run_all(transcripts[:2])
+
+    assert all(not result.ok for result in results)
+    assert all(result.attempts == 3 for result in results)
+    assert all(result.error.status_code == 429 for result in results)
+    assert stub_server.stats["requests"] == 6
+    assert len(sleep.delays) == 4
+
+
+def test_backoff_is_capped_and_honors_retry_after(stub_server):
+    random.seed(0)
+    runner = ConcurrentFeedbackRunner(make_generator(stub_server), base_delay=1.0, max_delay=4.0)
+
+    assert all(0 <= runner._backoff(10, None) <= 4.0 for _ in range(100))
+    assert all(runner._backoff(1, 3.0) >= 3.0 for _ in range(100))
+
+
+def test_cached_results_skip_the_api(stub_server, transcripts, tmp_path):
+    first = ConcurrentFeedbackRunner(make_generator(stub_server, tmp_path / "cache"), max_concurrency=3)
+    fresh = {r.transcript.file_path: r for r in first.run_all(transcripts)}
+    requests = stub_server.stats["requests"]
+
+    generator = make_generator(stub_server, tmp_path / "cache")
+    second = ConcurrentFeedbackRunner(generator, max_concurrency=3)
+    results = second.run_all(transcripts)
+
+    assert all(result.cached for result in results)
+    assert not any(result.cached for result in fresh.values())
+    assert stub_server.stats["requests"] == requests
+    assert generator.cache.hits == len(transcripts)
+    for result in results:
+        expected = fresh[result.transcript.file_path].feedback
+        assert result.feedback.pss == expected.pss
+        assert result.feedback.improvement_points == expected.improvement_points
+
+    # 書き起こしの内容が変わればキャッシュは使わない
+    transcripts[0].content += "追加の発言です。\n"
+    feedback, cached = generator.generate_feedback_cached(transcripts[0])
+    assert not cached
+    assert stub_server.stats["requests"] == requests + 1
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_system_prompt_is_sent_as_cached_block(stub_server, transcripts, stream):
+    generator = make_generator(stub_server, stream=stream)
+
+    request = generator.build_ai_request(transcripts[0])
+    [block] = request["system"]
+    assert block["cache_control"] == {"type": "ephemeral"}
+    assert "pss" in block["text"].lower()
+    assert transcripts[0].content not in block["text"]
+
+    generator.generate_feedback(transcripts[0])
+    generator.generate_feedback(transcripts[1])
+
+    first, second = generator.metrics.calls
+    assert first.cache_creation_input_tokens == len(block["text"])
+    assert first.cache_read_input_tokens == 0
+    assert second.cache_creation_input_tokens == 0
+    assert second.cache_read_input_tokens == len(block["text"])
+    assert second.rate_limited_tokens < first.rate_limited_tokens
+    if stream:
+        assert all(call.ttft is not None for call in generator.metrics.calls)
+
+
+def test_batch_submit_poll_and_collect(stub_server, transcripts, tmp_path):
+    stub_server.batch_seconds = 0.2
+    sleep = RecordingSleep()
+    generator = make_generator(stub_server, tmp_path / "cache")
+    runner = BatchFeedbackRunner(generator, tmp_path / "batches", max_batch_size=4, sleep=sleep)
+
+    jobs = runner.submit(transcripts)
+
+    assert [len(job.requests) for job in jobs] == [4, 2]
+    assert stub_server.stats["batches"] == 2
+    assert stub_server.stats["requests"] == 0
+    assert {job.batch_id for job in runner.pending_jobs()} == {job.batch_id for job in jobs}
+
+    by_path = {t.file_path: t for t in transcripts}
+    results = []
+    for job in jobs:
+        runner.wait(job, poll_interval=0.05)
+        assert job.status == "ended"
+        results.extend(runner.collect(job, by_path))
+
+    assert sleep.delays and all(delay == 0.05 for delay in sleep.delays)
+    assert runner.pending_jobs() == []
+    assert all(result.ok for result in results)
+    assert [r.transcript.file_path for r in results] == [t.file_path for t in transcripts]
+
+    # custom_id の対応付けが正しければ、同じ書き起こしを直接生成した結果と一致する
+    direct = make_generator(stub_server)
+    for result in results:
+        expected = direct.generate_feedback(result.transcript)
+        assert result.feedback.pss == expected.pss
+        assert result.feedback.ads == expected.ads
+
+    # 取り込んだ結果はキャッシュされる
+    assert all(generator.lookup_cache(generator.build_ai_request(t)) is not None for t in transcripts)
+
+
+def test_batch_resumes_pending_jobs(stub_server, transcripts, tmp_path):
+    state_dir = tmp_path / "batches"
+    [job] = BatchFeedbackRunner(make_generator(stub_server), state_dir).submit(transcripts[:3])
+
+    # 送信後に中断した想定: 新しいランナーが状態ファイルから再開し、書き起こしはファイルから読み込む
+    runner = BatchFeedbackRunner(make_generator(stub_server), state_dir, sleep=RecordingSleep())
+    [resumed] = runner.pending_jobs()
+    assert resumed.batch_id == job.batch_id
+    assert resumed.requests == job.requests
+
+    runner.wait(resumed, poll_interval=0.01)
+    results = runner.collect(resumed, load_transcript=TranscriptLoader().load_transcript)
+
+    assert [r.transcript.file_path for r in results] == [t.file_path for t in transcripts[:3]]
+    assert all(result.ok for result in results)
+    assert runner.pending_jobs() == []
+
+
+def test_batch_wait_times_out(stub_server, transcripts, tmp_path):
+    stub_server.batch_seconds = 5.0
+    runner = BatchFeedbackRunner(make_generator(stub_server), tmp_path / "batches", sleep=RecordingSleep())
+    [job] = runner.submit(transcripts[:1])
+
+    with pytest.raises(TimeoutError):
+        runner.wait(job, poll_interval=1.0, timeout=0.5)
+
+    assert job.status == "submitted"
+    assert runner.pending_jobs()[0].batch_id == job.batch_id
+
+
+def test_batch_errored_items_are_reported(stub_server, transcripts, tmp_path):
+    stub_server.overload_rate = 1.0
+    runner = BatchFeedbackRunner(make_generator(stub_server), tmp_path / "batches", sleep=RecordingSleep())
+    [job] = runner.submit(transcripts[:2])
+
+    runner.wait(job, poll_interval=0.01)
+    results = runner.collect(job, {t.file_path: t for t in transcripts})
+
+    assert [r.error.result_type for r in results] == ["errored", "errored"]
+    assert all(result.feedback is None for result in results)
@@ -0,0 +1,142 @@
+"""ファイル内容のハッシュ計算のテスト"""
+
+import hashlib
+import os
+import random
+
+import pytest
+
+from src.feedback.audio_manager import AudioManager
+from src.feedback.file_hasher import BLAKE2B_DIGEST_SIZE, FileHasher
+
+CHUNK_SIZE = 64
+
+
+def reference_digest(algorithm: str, data: bytes) -> str:
+    """ファイル全体を一度にハッシュした値"""
+    if algorithm == "blake2b":
+        return hashlib.blake2b(data, digest_size=BLAKE2B_DIGEST_SIZE).hexdigest()
+    return hashlib.md5(data).hexdigest()
+
+
+class CountingHasher(FileHasher):
+    """実際にファイルを読み込んだ回数を数える"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.computed = 0
+
+    def compute(self, path):
+        self.computed += 1
+        return super().compute(path)
+
+
+@pytest.mark.parametrize("algorithm", ["md5", "blake2b"])
+@pytest.mark.parametrize(
+    "size", [0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 5 * CHUNK_SIZE + 3]
+)
+def test_chunked_hash_matches_whole_file_hash(tmp_path, algorithm, size):
+    data = random.Random(size).randbytes(size)
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(data)
+
+    hasher = FileHasher(algorithm, chunk_size=CHUNK_SIZE)
+
+    assert hasher.compute(path) == reference_digest(algorithm, data)
+    assert hasher.hash_file(path) == reference_digest(algorithm, data)
+
+
+def test_default_chunk_size_matches_whole_file_hash(tmp_path):
+    data = random.Random(0).randbytes(3 * 1024 * 1024 + 17)
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(data)
+
+    assert FileHasher().hash_file(path) == hashlib.md5(data).hexdigest()
+    assert FileHasher("blake2b").hash_file(path) == reference_digest("blake2b", data)
+
+
+def test_blake2b_differs_from_md5(tmp_path):
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(b"audio")
+
+    md5 = FileHasher("md5").hash_file(path)
+    blake2b = FileHasher("blake2b").hash_file(path)
+
+    assert len(md5) == 32
+    assert len(blake2b) == 2 * BLAKE2B_DIGEST_SIZE
+    assert md5 != blake2b
+
+
+def test_unsupported_algorithm():
+    with pytest.raises(ValueError):
+        FileHasher("sha1")
+
+
+def test_cache_hits_for_unchanged_file(tmp_path):
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(b"a" * 200)
+    hasher = CountingHasher(chunk_size=CHUNK_SIZE)
+
+    first = hasher.hash_file(path)
+    second = hasher.hash_file(path)
+    # 相対パスで指定しても同じファイルならキャッシュを使う
+    third = hasher.hash_file(os.path.relpath(path))
+
+    assert first == second == third
+    assert hasher.computed == 1
+    assert (hasher.hits, hasher.misses) == (2, 1)
+
+
+def test_cache_misses_after_content_change_with_same_size(tmp_path):
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(b"a" * 200)
+    hasher = CountingHasher(chunk_size=CHUNK_SIZE)
+    before = hasher.hash_file(path)
+    stat = os.stat(path)
+
+    path.write_bytes(b"b" * 200)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert hasher.hash_file(path) == hashlib.md5(b"b" * 200).hexdigest() != before
+    assert hasher.computed == 2
+    assert hasher.misses == 2
+
+
+def test_cache_misses_after_size_change(tmp_path):
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(b"a" * 200)
+    hasher = CountingHasher(chunk_size=CHUNK_SIZE)
+    hasher.hash_file(path)
+    stat = os.stat(path)
+
+    with open(path, "ab") as f:
+        f.write(b"a")
+    # 更新時刻が変わらなくてもサイズが変われば読み直す
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert hasher.hash_file(path) == hashlib.md5(b"a" * 201).hexdigest()
+    assert hasher.computed == 2
+
+
+def test_remember_and_clear(tmp_path):
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(b"a" * 200)
+    hasher = CountingHasher()
+
+    hasher.remember(path, "known")
+    assert hasher.hash_file(path) == "known"
+    assert hasher.computed == 0
+
+    hasher.clear()
+    assert hasher.hash_file(path) == hashlib.md5(b"a" * 200).hexdigest()
+    assert (hasher.hits, hasher.misses) == (0, 1)
+
+
+def test_audio_manager_stores_hash_of_selected_algorithm(tmp_path):
+    source = tmp_path / "2025-01-15_CA001_m1.m4a"
+    source.write_bytes(b"\x00" * 1024)
+
+    audio_file = AudioManager(audio_dir=tmp_path / "audio", hash_algorithm="blake2b").add_audio_file(source)
+
+    assert audio_file.content_hash == reference_digest("blake2b", b"\x00" * 1024)
+    assert audio_file.file_hash == audio_file.content_hash
@@ -0,0 +1,116 @@
+"""ファイルの取り込み（reflink・ハードリンク・移動）のテスト"""
+
+import errno
+import os
+
+import pytest
+
+from src.feedback import file_ingest
+from src.feedback.audio_manager import AudioManager
+from src.feedback.file_ingest import ingest_file
+
+
+@pytest.fixture
+def no_reflink(monkeypatch):
+    """reflink に対応していないファイルシステムとして扱う"""
+
+    def unsupported(source, target):
+        raise OSError(errno.EOPNOTSUPP, "reflink is not supported", str(target))
+
+    monkeypatch.setitem(file_ingest._METHODS, "reflink", unsupported)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.m4a"
+    path.write_bytes(b"audio" * 100)
+    return path
+
+
+def same_inode(a, b) -> bool:
+    return os.stat(a).st_ino == os.stat(b).st_ino
+
+
+def test_auto_falls_back_to_copy_not_hardlink(no_reflink, source, tmp_path):
+    target = tmp_path / "target.m4a"
+
+    assert ingest_file(source, target) == "copy"
+
+    assert target.read_bytes() == source.read_bytes()
+    assert not same_inode(source, target)
+
+
+def test_hardlink_is_opt_in(no_reflink, source, tmp_path):
+    target = tmp_path / "target.m4a"
+
+    assert ingest_file(source, target, "hardlink") == "hardlink"
+
+    assert same_inode(source, target)
+
+
+def test_hardlink_falls_back_to_copy(no_reflink, monkeypatch, source, tmp_path):
+    def cross_device(source, target):
+        raise OSError(errno.EXDEV, "Invalid cross-device link", str(target))
+
+    monkeypatch.setitem(file_ingest._METHODS, "hardlink", cross_device)
+    target = tmp_path / "target.m4a"
+
+    assert ingest_file(source, target, "hardlink") == "copy"
+    assert not same_inode(source, target)
+
+
+def test_auto_uses_reflink_when_available(source, tmp_path):
+    target = tmp_path / "target.m4a"
+
+    method = ingest_file(source, target)
+
+    # reflink に対応しているかはファイルシステム次第だが、実体は共有しない
+    assert method in ("reflink", "copy")
+    assert target.read_bytes() == source.read_bytes()
+    assert not same_inode(source, target)
+
+
+def test_move(source, tmp_path):
+    data = source.read_bytes()
+    target = tmp_path / "target.m4a"
+
+    assert ingest_file(source, target, "move") == "move"
+
+    assert not source.exists()
+    assert target.read_bytes() == data
+
+
+def test_replacing_target_does_not_modify_linked_file(no_reflink, source, tmp_path):
+    # target が他のファイルのハードリンクでも、その内容は書き換えずに置き換える
+    other = tmp_path / "other.m4a"
+    other.write_bytes(b"other")
+    target = tmp_path / "target.m4a"
+    os.link(other, target)
+
+    ingest_file(source, target, "copy")
+
+    assert other.read_bytes() == b"other"
+    assert target.read_bytes() == source.read_bytes()
+    assert not any(path.name.endswith(".tmp") for path in tmp_path.iterdir())
+
+
+def test_unknown_mode(source, tmp_path):
+    with pytest.raises(ValueError):
+        ingest_file(source, tmp_path / "target.m4a", "symlink")
+
+
+def test_transcripts_are_never_hardlinked(no_reflink, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    audio = tmp_path / "2025-01-15_CA001_m1.m4a"
+    audio.write_bytes(b"audio" * 100)
+    transcript = tmp_path / "transcript.txt"
+    transcript.write_text("CA: こんにちは", encoding="utf-8")
+    manager = AudioManager(audio_dir=tmp_path / "audio", ingest_mode="hardlink")
+
+    audio_file = manager.add_audio_file(audio)
+    manager.link_transcript(audio_file, transcript)
+
+    assert same_inode(audio, audio_file.file_path)
+    assert not same_inode(transcript, audio_file.transcript_path)
+    transcript.write_text("CA: 書き換え", encoding="utf-8")
+    assert audio_file.transcript_path.read_text(encoding="utf-8") == "CA: こんにちは"
@@ -0,0 +1,72 @@
+"""モンテカルロ法による展開数予測のテスト"""
+
+from math import comb
+
+import numpy as np
+import pytest
+
+from src.analytics.forecaster import ConversionForecaster
+from src.analytics.models import CA, Lead
+
+
+def make_ca(ca_id: str, rates) -> CA:
+    ca = CA(ca_id=ca_id, name=ca_id, team="東日本", slack_user_id="", target_leads=len(rates))
+    for i, rate in enumerate(rates):
+        lead = Lead(
+            lead_id=f"{ca_id}-{i}",
+            name="",
+            age=30,
+            prefecture="東京都",
+            qualification="",
+            has_qualification=False,
+            assigned_ca_id=ca_id,
+            status="new",
+            conversion_rate=rate,
+        )
+        ca.leads[lead.lead_id] = lead
+    ca.calculate_performance()
+    return ca
+
+
+@pytest.mark.parametrize("n, p", [(1, 0.3), (7, 0.75), (40, 0.2)])
+def test_thresholds_match_binomial_cdf(n, p):
+    thresholds = ConversionForecaster._binomial_thresholds([n], [p])
+
+    cdf = np.cumsum([comb(n, k) * p**k * (1 - p) ** (n - k) for k in range(n)])
+    np.testing.assert_allclose(thresholds[:, 0], np.minimum(cdf[: len(thresholds)], 1.0), rtol=1e-6)
+    assert (cdf[len(thresholds):].astype(np.float32) >= 1.0).all()
+
+
+@pytest.mark.parametrize("n", [1_100, 5_000])
+def test_large_lead_counts_do_not_overflow(n):
+    p = 0.4
+    forecaster = ConversionForecaster(n_trials=4_000, seed=0)
+
+    _, results = forecaster.simulate([make_ca("CA1", [p] * n)])
+
+    samples = results[:, 0]
+    assert samples.mean() == pytest.approx(n * p, rel=0.01)
+    assert samples.std() == pytest.approx(np.sqrt(n * p * (1 - p)), rel=0.1)
+
+
+def test_degenerate_rates():
+    forecaster = ConversionForecaster(n_trials=1_000, seed=0)
+
+    _, results = forecaster.simulate(
+        [make_ca("CA1", [0.0] * 300), make_ca("CA2", [1.0] * 300), make_ca("CA3", [])]
+    )
+
+    assert (results[:, 0] == 0).all()
+    assert (results[:, 1] == 300).all()
+    assert (results[:, 2] == 0).all()
+
+
+def test_forecast_sums_team_bands():
+    cas = [make_ca("CA1", [0.75] * 20 + [0.2] * 10), make_ca("CA2", [0.6] * 2_000)]
+
+    forecast = ConversionForecaster(n_trials=2_000, seed=1).forecast(cas)
+
+    team = forecast.team_bands["東日本"]
+    assert team.expected == pytest.approx(0.75 * 20 + 0.2 * 10 + 0.6 * 2_000)
+    assert team.p10 <= team.p50 <= team.p90
+    assert forecast.ca_bands["CA2"].p50 == pytest.approx(1_200, rel=0.02)
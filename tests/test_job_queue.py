@@ -0,0 +1,217 @@
+"""永続ジョブキューのテスト"""
+
+import sqlite3
+
+import pytest
+
+from src.feedback.job_queue import JobQueue, JobRunner, JobStage, JobStatus
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(tmp_path / "job_queue.db", clock=clock)
+    yield queue
+    queue.close()
+
+
+def test_enqueue_is_idempotent_per_stage(queue):
+    assert queue.enqueue("feedback", "k1", {"n": 1})
+    assert not queue.enqueue("feedback", "k1", {"n": 2})
+    assert queue.enqueue("slack", "k1", {"n": 3})
+
+    assert queue.counts() == {"feedback": {"queued": 1}, "slack": {"queued": 1}}
+    assert queue.claim("feedback", 60).payload == {"n": 1}
+
+
+def test_claim_leases_job_once(queue):
+    queue.enqueue("feedback", "k1", {})
+
+    job = queue.claim("feedback", 60)
+
+    assert job.status == JobStatus.RUNNING
+    assert job.attempts == 1
+    assert queue.claim("feedback", 60) is None
+    assert not queue.has_ready(["feedback"])
+
+
+def test_delayed_job_becomes_ready_at_available_time(queue, clock):
+    queue.enqueue("feedback", "k1", {}, delay=30)
+
+    assert queue.claim("feedback", 60) is None
+    assert queue.next_available_at("feedback") == clock.now + 30
+
+    clock.now += 30
+    assert queue.has_ready(["feedback"])
+    assert queue.claim("feedback", 60) is not None
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish(queue, clock):
+    queue.enqueue("feedback", "k1", {})
+    stale = queue.claim("feedback", 10)
+
+    clock.now += 11
+    fresh = queue.claim("feedback", 10)
+
+    assert fresh.id == stale.id
+    assert fresh.attempts == 2
+    assert not queue.complete(stale)
+    assert not queue.retry(stale, "late", 0)
+    assert queue.complete(fresh)
+    assert queue.counts() == {"feedback": {"done": 1}}
+
+
+def test_retry_requeues_with_delay_and_error(queue, clock):
+    queue.enqueue("feedback", "k1", {})
+    job = queue.claim("feedback", 60)
+
+    assert queue.retry(job, "ConnectionError: down", 5)
+
+    assert queue.claim("feedback", 60) is None
+    clock.now += 5
+    again = queue.claim("feedback", 60)
+    assert again.attempts == 2
+    assert again.last_error == "ConnectionError: down"
+
+
+def test_bury_and_requeue_dead(queue):
+    queue.enqueue("feedback", "k1", {})
+    queue.enqueue("slack", "k2", {})
+    assert queue.bury(queue.claim("feedback", 60), "ValueError: bad")
+    assert queue.bury(queue.claim("slack", 60), "SlackDeliveryError")
+
+    dead = queue.list_jobs(JobStatus.DEAD, "feedback")
+    assert [job.last_error for job in dead] == ["ValueError: bad"]
+    assert queue.claim("feedback", 60) is None
+
+    assert queue.requeue_dead("feedback") == 1
+    job = queue.claim("feedback", 60)
+    assert job.attempts == 1
+    assert queue.counts()["slack"] == {"dead": 1}
+
+
+def test_purge_done(queue, clock):
+    queue.enqueue("feedback", "k1", {})
+    queue.complete(queue.claim("feedback", 60))
+
+    clock.now += 100
+    assert queue.purge_done(older_than=200) == 0
+    assert queue.purge_done(older_than=50) == 1
+    assert queue.counts() == {}
+
+
+def test_runner_retries_then_completes(tmp_path):
+    queue = JobQueue(tmp_path / "job_queue.db")
+    calls = []
+
+    def handler(job):
+        calls.append(job.attempts)
+        if job.attempts < 3:
+            raise ConnectionError("temporarily unavailable")
+
+    stage = JobStage(name="feedback", handler=handler, base_delay=0.0, max_delay=0.0)
+    runner = JobRunner(queue, [stage], poll_interval=0.01)
+    queue.enqueue("feedback", "k1", {})
+
+    runner.run_until_idle()
+
+    assert calls == [1, 2, 3]
+    assert runner.retried_count == 2
+    assert runner.completed_count == 1
+    assert queue.counts() == {"feedback": {"done": 1}}
+
+
+@pytest.mark.parametrize(
+    "error, retryable, expected_calls",
+    [
+        (ValueError("bad transcript"), False, 1),  # リトライしても回復しないエラー
+        (ConnectionError("down"), True, 3),  # 試行回数の上限
+    ],
+)
+def test_runner_buries_and_calls_on_dead(tmp_path, error, retryable, expected_calls):
+    queue = JobQueue(tmp_path / "job_queue.db")
+    calls = []
+    dead = []
+
+    def handler(job):
+        calls.append(job.attempts)
+        raise error
+
+    stage = JobStage(
+        name="feedback",
+        handler=handler,
+        max_attempts=3,
+        base_delay=0.0,
+        max_delay=0.0,
+        retryable=lambda e: retryable,
+        on_dead=dead.append,
+    )
+    runner = JobRunner(queue, [stage], poll_interval=0.01)
+    queue.enqueue("feedback", "k1", {})
+
+    runner.run_until_idle()
+
+    assert len(calls) == expected_calls
+    assert runner.dead_count == 1
+    assert [job.idempotency_key for job in dead] == ["k1"]
+    assert dead[0].last_error == f"{type(error).__name__}: {error}"
+    assert queue.counts() == {"feedback": {"dead": 1}}
+
+
+def test_runner_processes_jobs_enqueued_by_earlier_stage(tmp_path):
+    queue = JobQueue(tmp_path / "job_queue.db")
+    delivered = []
+
+    def generate(job):
+        queue.enqueue("slack", job.idempotency_key, {"message": job.payload["name"]})
+
+    stages = [
+        JobStage(name="feedback", handler=generate, concurrency=2),
+        JobStage(name="slack", handler=lambda job: delivered.append(job.payload["message"])),
+    ]
+    for name in ["a", "b", "c"]:
+        queue.enqueue("feedback", name, {"name": name})
+
+    JobRunner(queue, stages, poll_interval=0.01).run_until_idle()
+
+    assert sorted(delivered) == ["a", "b", "c"]
+    assert queue.counts() == {"feedback": {"done": 3}, "slack": {"done": 3}}
+
+
+class LockedOnceQueue(JobQueue):
+    """最初の取得だけ database is locked で失敗するキュー"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.claim_failures = 0
+
+    def claim(self, stage, lease_seconds):
+        if self.claim_failures == 0:
+            self.claim_failures += 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().claim(stage, lease_seconds)
+
+
+def test_worker_survives_claim_error(tmp_path):
+    queue = LockedOnceQueue(tmp_path / "job_queue.db")
+    handled = []
+    runner = JobRunner(queue, [JobStage(name="feedback", handler=handled.append)], poll_interval=0.01)
+    queue.enqueue("feedback", "k1", {})
+
+    runner.run_until_idle()
+
+    assert queue.claim_failures == 1
+    assert [job.idempotency_key for job in handled] == ["k1"]
+    assert queue.counts() == {"feedback": {"done": 1}}
@@ -0,0 +1,69 @@
+"""複数キーワードの一括検索（Aho–Corasick法）のテスト"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from src.feedback.feedback_generator import FeedbackGenerator
+from src.feedback.keyword_matcher import KeywordMatcher
+
+TRANSCRIPTS_DIR = Path(__file__).parent.parent / "data" / "sample" / "feedback" / "transcripts"
+
+
+def scan_positions(keywords, text):
+    """キーワードごとに部分文字列検索した出現位置（重なりを含む）"""
+    positions = {}
+    for keyword in dict.fromkeys(k for k in keywords if k):
+        start = text.find(keyword)
+        while start != -1:
+            positions.setdefault(keyword, []).append(start)
+            start = text.find(keyword, start + 1)
+    return positions
+
+
+def test_overlapping_and_nested_keywords():
+    matcher = KeywordMatcher(["具体的", "具体的に", "的に", "に", "具体的"])
+
+    assert matcher.keywords == ["具体的", "具体的に", "的に", "に"]
+    assert matcher.find_all("具体的に具体的にお話し") == {
+        "具体的": [0, 4],
+        "具体的に": [0, 4],
+        "的に": [2, 6],
+        "に": [3, 7],
+    }
+    assert matcher.count("具体的に具体的に") == {"具体的": 2, "具体的に": 2, "的に": 2, "に": 2}
+
+
+def test_empty_keywords_and_text():
+    assert KeywordMatcher(["", ""]).find_all("abc") == {}
+    assert KeywordMatcher(["abc"]).find_all("") == {}
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_substring_scan_on_random_text(seed):
+    rng = random.Random(seed)
+    alphabet = "abcあい"
+    keywords = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        for _ in range(rng.randint(1, 12))
+    ]
+    text = "".join(rng.choice(alphabet + "xyz") for _ in range(rng.randint(0, 200)))
+
+    matcher = KeywordMatcher(keywords)
+
+    assert matcher.find_all(text) == scan_positions(keywords, text)
+    assert matcher.present(text) == {k for k in keywords if k and k in text}
+
+
+@pytest.mark.parametrize("path", sorted(TRANSCRIPTS_DIR.glob("*.txt")), ids=lambda p: p.name)
+def test_feedback_keywords_match_substring_scan(path):
+    generator = FeedbackGenerator()
+    content = path.read_text(encoding="utf-8").lower()
+
+    hits = generator.match_keywords(content)
+
+    assert hits == scan_positions(generator.keyword_matcher.keywords, content)
+    for patterns in (*generator.PSS_PATTERNS.values(), *generator.ADS_PATTERNS.values()):
+        for keywords in patterns.values():
+            assert {k for k in keywords if k in hits} == {k for k in keywords if k in content}
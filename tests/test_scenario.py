@@ -0,0 +1,162 @@
+"""What-ifシミュレーション（シナリオのオーバーレイ）のテスト"""
+
+import copy
+import random
+
+import pytest
+
+from src.analytics.aggregates import CAAggregateStore
+from src.analytics.models import CA, Lead, SegmentType
+from src.analytics.scenario import Scenario
+from src.analytics.segment_classifier import SegmentClassifier
+
+CA_IDS = ["CA1", "CA2", "CA3"]
+
+
+def make_ca(ca_id: str, target_leads: int = 4) -> CA:
+    return CA(ca_id=ca_id, name=ca_id, team="東日本", slack_user_id="", target_leads=target_leads)
+
+
+def make_lead(lead_id: str, ca_id: str, age: int = 30, status: str = "active", rate: float = 0.5) -> Lead:
+    return Lead(
+        lead_id=lead_id,
+        name="",
+        age=age,
+        prefecture="東京都",
+        qualification="第二種電気工事士",
+        has_qualification=True,
+        assigned_ca_id=ca_id,
+        status=status,
+        conversion_rate=rate,
+    )
+
+
+def build_store(leads):
+    store = CAAggregateStore({ca_id: make_ca(ca_id) for ca_id in CA_IDS}, inactive_statuses=["closed"])
+    store.add_leads(copy.deepcopy(leads))
+    return store
+
+
+def assert_same_performance(result, store):
+    for ca_id in CA_IDS:
+        actual = result.performances[ca_id]
+        expected = store.get_performance(ca_id)
+        assert actual.total_leads == expected.total_leads, ca_id
+        assert actual.current_expected_conversions == pytest.approx(
+            expected.current_expected_conversions
+        ), ca_id
+        assert actual.status == expected.status, ca_id
+
+
+@pytest.fixture
+def leads():
+    return [
+        make_lead("L1", "CA1", rate=0.9),
+        make_lead("L2", "CA1", rate=0.3),
+        make_lead("L3", "CA2", age=50, rate=0.6),
+        make_lead("L4", "CA3", status="closed", rate=0.8),
+    ]
+
+
+def test_reassigning_same_lead_twice_does_not_double_count(leads):
+    store = build_store(leads)
+    scenario = Scenario(store, SegmentClassifier()).reassign_lead("L1", "CA2").reassign_lead("L1", "CA3")
+
+    result = scenario.evaluate()
+
+    expected = build_store(leads)
+    expected.reassign_lead("L1", "CA3")
+    assert_same_performance(result, expected)
+    assert result.performances["CA1"].total_leads == 1
+    assert result.performances["CA2"].total_leads == 1
+    assert result.changed_ca_ids == ["CA1", "CA3"]
+    # 現状の集計は変更しない
+    assert store.get_performance("CA1").total_leads == 2
+    assert store.get_lead("L1").assigned_ca_id == "CA1"
+
+
+def test_reassigning_back_to_original_ca_is_a_no_op(leads):
+    store = build_store(leads)
+
+    result = Scenario(store, SegmentClassifier()).reassign_lead("L1", "CA2").reassign_lead("L1", "CA1").evaluate()
+
+    assert_same_performance(result, store)
+    assert result.changed_ca_ids == []
+
+
+def test_reassigning_inactive_lead_does_not_change_counts(leads):
+    store = build_store(leads)
+
+    result = Scenario(store, SegmentClassifier()).reassign_lead("L4", "CA1").evaluate()
+
+    assert_same_performance(result, store)
+
+
+def test_fork_keeps_reassignments_independent(leads):
+    store = build_store(leads)
+    base = Scenario(store, SegmentClassifier()).reassign_lead("L1", "CA2")
+
+    forked = base.fork().reassign_lead("L1", "CA3")
+
+    expected = build_store(leads)
+    expected.reassign_lead("L1", "CA2")
+    assert_same_performance(base.evaluate(), expected)
+    expected.reassign_lead("L1", "CA3")
+    assert_same_performance(forked.evaluate(), expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_reassignments_match_applied_store(seed):
+    rng = random.Random(seed)
+    leads = [
+        make_lead(
+            f"L{i}",
+            rng.choice(CA_IDS + [""]),
+            age=rng.choice([30, 50]),
+            status=rng.choice(["active", "closed"]),
+            rate=round(rng.random(), 3),
+        )
+        for i in range(12)
+    ]
+    store = build_store(leads)
+    scenario = Scenario(store, SegmentClassifier())
+    expected = build_store(leads)
+
+    for _ in range(30):
+        lead_id = rng.choice(leads).lead_id
+        ca_id = rng.choice(CA_IDS)
+        scenario.reassign_lead(lead_id, ca_id)
+        expected.reassign_lead(lead_id, ca_id)
+
+    assert_same_performance(scenario.evaluate(), expected)
+
+
+def test_add_and_move_leads(leads):
+    store = build_store(leads)
+    classifier = SegmentClassifier()
+
+    result = (
+        Scenario(store, classifier)
+        .add_leads("CA3", SegmentType.A, 2)
+        .move_leads("CA1", "CA2", SegmentType.A, 1)
+        .evaluate()
+    )
+
+    rate_a = classifier.get_conversion_rate(SegmentType.A)
+    assert result.performances["CA3"].total_leads == 2
+    assert result.performances["CA3"].current_expected_conversions == pytest.approx(2 * rate_a)
+    # 移動するリードの期待展開率は移動元の同セグメントの平均（(0.9 + 0.3) / 2）
+    assert result.performances["CA1"].current_expected_conversions == pytest.approx(0.6)
+    assert result.performances["CA2"].current_expected_conversions == pytest.approx(1.2)
+    with pytest.raises(ValueError):
+        Scenario(store, classifier).move_leads("CA1", "CA2", SegmentType.A, 3)
+
+
+def test_segment_rate_override_applies_to_held_leads(leads):
+    store = build_store(leads)
+
+    result = Scenario(store, SegmentClassifier()).set_segment_rate(SegmentType.A, 0.1).evaluate()
+
+    assert result.performances["CA1"].current_expected_conversions == pytest.approx(0.2)
+    assert result.performances["CA2"] == store.get_performance("CA2")
+    assert result.changed_ca_ids == ["CA1"]
@@ -0,0 +1,165 @@
+"""データ駆動のセグメント判定ルールのテスト"""
+
+import itertools
+
+import pytest
+
+from src.analytics.analytics_engine import AnalyticsEngine
+from src.analytics.models import Lead, SegmentType
+from src.analytics.segment_classifier import SegmentClassifier
+from src.analytics.segment_rules import MAX_AGE, SegmentRule, SegmentRuleSet
+
+PREFECTURE_GROUPS = {"東京都": "関東", "神奈川県": "関東", "大阪府": "関西"}
+
+RULES = [
+    SegmentRule("A", conversion_rate=0.9, has_qualification=True, age_max=35,
+                qualifications=frozenset({"第一種電気工事士"})),
+    SegmentRule("B", conversion_rate=0.7, has_qualification=True, age_max=40,
+                prefecture_groups=frozenset({"関東"})),
+    SegmentRule("A", conversion_rate=0.75, has_qualification=True, age_max=40),
+    SegmentRule("B", conversion_rate=0.6, has_qualification=True),
+    SegmentRule("C", conversion_rate=0.4, age_min=20, age_max=40),
+    SegmentRule("D", conversion_rate=0.2, age_min=41),
+]
+
+QUALIFICATIONS = [("", False), ("第一種電気工事士", True), ("第二種電気工事士", True)]
+PREFECTURES = ["東京都", "大阪府", "北海道", ""]
+
+CSV_HEADER = (
+    "segment_id,segment_name,has_qualification,age_condition,description,"
+    "sample_size,success_count,conversion_rate,priority,qualifications,prefecture_group\n"
+)
+CSV_ROWS = [
+    "A,資格あり若手,true,40歳以下,,0,0,0.75,1,,\n",
+    "B,資格ありベテラン,true,40歳超,,0,0,0.60,2,,\n",
+    "C,資格なし若手,false,40歳以下,,0,0,0.40,3,,\n",
+    "D,資格なし,,,,0,0,0.20,4,,\n",
+]
+
+
+def scan(rules, prefecture_groups, age, qualification, has_qualification, prefecture):
+    """ルールを先頭から順に評価して最初に一致したルールを返す（テーブル化前の判定）"""
+    group = prefecture_groups.get(prefecture)
+    for rule in rules:
+        if not rule.age_min <= min(age, MAX_AGE) <= rule.age_max:
+            continue
+        if rule.has_qualification is not None and rule.has_qualification != has_qualification:
+            continue
+        if rule.qualifications and not (has_qualification and qualification in rule.qualifications):
+            continue
+        if rule.prefecture_groups and group not in rule.prefecture_groups:
+            continue
+        return rule.segment_id, rule.conversion_rate
+    return None, 0.0
+
+
+def test_lookup_matches_first_match_scan():
+    rule_set = SegmentRuleSet(RULES, PREFECTURE_GROUPS)
+
+    for age, (qualification, has_qual), prefecture in itertools.product(
+        range(0, 130), QUALIFICATIONS, PREFECTURES
+    ):
+        assert rule_set.lookup(age, qualification, has_qual, prefecture) == scan(
+            RULES, PREFECTURE_GROUPS, age, qualification, has_qual, prefecture
+        ), (age, qualification, prefecture)
+
+
+def test_classify_batch_matches_lookup():
+    rule_set = SegmentRuleSet(RULES, PREFECTURE_GROUPS)
+    cases = list(itertools.product(range(15, 70), QUALIFICATIONS, PREFECTURES))
+    ages = [age for age, _, _ in cases]
+    qualifications = [q for _, (q, _), _ in cases]
+    has_quals = [h for _, (_, h), _ in cases]
+    prefectures = [p for _, _, p in cases]
+
+    codes, rates = rule_set.classify_batch(
+        ages,
+        rule_set.encode_qualifications(qualifications, has_quals),
+        rule_set.encode_prefectures(prefectures),
+    )
+
+    for i, (age, (qualification, has_qual), prefecture) in enumerate(cases):
+        segment_id, rate = rule_set.lookup(age, qualification, has_qual, prefecture)
+        assert (rule_set.segment_ids[codes[i]] if codes[i] >= 0 else None) == segment_id
+        assert rates[i] == pytest.approx(rate)
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        ("", (0, MAX_AGE)),
+        ("40歳以下", (0, 40)),
+        ("40歳未満", (0, 39)),
+        ("40歳超", (41, MAX_AGE)),
+        ("40歳以上", (40, MAX_AGE)),
+        ("20〜39歳", (20, 39)),
+    ],
+)
+def test_parse_age_condition(condition, expected):
+    assert SegmentRuleSet.parse_age_condition(condition) == expected
+
+
+def test_csv_rules_are_ordered_by_priority(tmp_path):
+    ordered = tmp_path / "ordered.csv"
+    ordered.write_text(CSV_HEADER + "".join(CSV_ROWS), encoding="utf-8")
+    shuffled = tmp_path / "shuffled.csv"
+    shuffled.write_text(CSV_HEADER + "".join(reversed(CSV_ROWS)), encoding="utf-8")
+
+    expected = SegmentRuleSet.from_csv(ordered)
+    actual = SegmentRuleSet.from_csv(shuffled)
+
+    assert [rule.segment_id for rule in actual.rules] == ["A", "B", "C", "D"]
+    for age, has_qual in itertools.product(range(18, 70), [True, False]):
+        assert actual.lookup(age, "", has_qual) == expected.lookup(age, "", has_qual)
+    # D（資格・年齢の条件なし）が先に評価されると、資格なし若手もDになる
+    assert actual.lookup(30, "", False) == ("C", 0.4)
+
+
+def test_classifier_methods_work_on_class_and_instance():
+    assert SegmentClassifier.assign_segment(True, 30) == SegmentType.A
+    assert SegmentClassifier.get_conversion_rate(SegmentType.D) == pytest.approx(0.2)
+
+    custom = SegmentClassifier(SegmentRuleSet(RULES, PREFECTURE_GROUPS))
+    assert custom.assign_segment(True, 30, "第一種電気工事士") == SegmentType.A
+    assert custom.get_conversion_rate(SegmentType.A) == pytest.approx(0.9)
+
+
+def test_engine_classifies_loaded_leads_with_its_rules(tmp_path):
+    (tmp_path / "segment_conversion_rates.csv").write_text(
+        CSV_HEADER + "A,資格あり,true,,,0,0,0.95,1,,\nD,資格なし,false,,,0,0,0.05,2,,\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "leads.csv").write_text(
+        "lead_id,name,age,prefecture,qualification,has_qualification,assigned_ca_id,status\n"
+        "L1,,55,東京都,第二種電気工事士,true,,new\n"
+        "L2,,25,東京都,,false,,new\n",
+        encoding="utf-8",
+    )
+    engine = AnalyticsEngine(data_dir=tmp_path)
+
+    leads = {lead.lead_id: lead for lead in engine.load_leads_from_csv()}
+
+    assert (leads["L1"].segment_id, leads["L1"].conversion_rate) == (SegmentType.A, 0.95)
+    assert (leads["L2"].segment_id, leads["L2"].conversion_rate) == (SegmentType.D, 0.05)
+
+
+def test_lead_uses_given_rules():
+    rules = SegmentRuleSet(RULES, PREFECTURE_GROUPS)
+
+    lead = Lead(
+        lead_id="L1",
+        name="",
+        age=38,
+        prefecture="東京都",
+        qualification="第二種電気工事士",
+        has_qualification=True,
+        assigned_ca_id="",
+        status="new",
+        rules=rules,
+    )
+
+    assert lead.segment_id == SegmentType.B
+    assert lead.conversion_rate == pytest.approx(0.7)
+
+    default = Lead("L2", "", 38, "東京都", "第二種電気工事士", True, "", "new")
+    assert (default.segment_id, default.conversion_rate) == (SegmentType.A, 0.75)